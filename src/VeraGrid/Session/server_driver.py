@@ -3,7 +3,9 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.  
 # SPDX-License-Identifier: MPL-2.0
 from __future__ import annotations
+import os
 import time
+import tempfile
 import requests
 import asyncio
 from uuid import uuid4
@@ -15,9 +17,12 @@ from PySide6 import QtCore
 from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.Simulations.driver_handler import create_driver
 from VeraGridEngine.IO.veragrid.remote import (gather_model_as_jsons_for_communication, RemoteInstruction, RemoteJob,
-                                               send_json_data, get_certificate_path, get_certificate)
+                                               send_json_data, get_certificate_path, get_certificate,
+                                               get_job_status, download_job_results, read_job_results,
+                                               send_model_job)
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
-from VeraGridEngine.Simulations.types import DRIVER_OBJECTS
+from VeraGridEngine.Simulations.types import DRIVER_OBJECTS, RESULTS_OBJECTS
+from VeraGridEngine.enumerations import JobStatus
 
 disable_warnings(exceptions.InsecureRequestWarning)
 
@@ -482,13 +487,16 @@ class RemoteJobDriver(QThread):
                  instruction: RemoteInstruction,
                  base_url: str,
                  certificate_path: str,
-                 register_driver_func) -> None:
+                 register_driver_func,
+                 poll_time: float = 1.0) -> None:
         """
 
         :param grid:
         :param instruction:
         :param base_url:
         :param certificate_path:
+        :param register_driver_func:
+        :param poll_time: time in seconds between the job status requests
         """
         QThread.__init__(self)
 
@@ -500,21 +508,56 @@ class RemoteJobDriver(QThread):
         self.certificate_path = certificate_path
 
         self.register_driver_func = register_driver_func
+        self.poll_time = poll_time
 
         self.logger = Logger()
 
+    def wait_for_results(self, job_id: str, results: RESULTS_OBJECTS) -> bool:
+        """
+        Follow a submitted job until it finishes and download its results
+        :param job_id: job id tag
+        :param results: results object to fill in-place
+        :return: did the job finish well?
+        """
+        while True:
+            job = get_job_status(base_url=self.base_url, job_id=job_id, certificate=self.certificate_path)
+
+            if job is None:
+                self.logger.add_error("Job not found in the server", value=job_id)
+                return False
+
+            self.progress_signal.emit(job.progress_value)
+            self.progress_text.emit(job.progress)
+
+            if job.status == JobStatus.Done:
+                break
+
+            elif job.is_finished():
+                self.logger.add_error(f"Job {job.status.value}", value=job.msg)
+                return False
+
+            time.sleep(self.poll_time)
+
+        file_path = os.path.join(tempfile.gettempdir(), f"{job_id}.zip")
+        if download_job_results(base_url=self.base_url, job_id=job_id,
+                                certificate=self.certificate_path, file_path=file_path):
+            read_job_results(file_path=file_path, results=results)
+            os.remove(file_path)
+            return True
+        else:
+            self.logger.add_error("Could not download the job results", value=job_id)
+            return False
+
     def run(self):
         """
 
         :return:
         """
-        websocket_url = f"{self.base_url}/upload_job"
-
-        model_data = gather_model_as_jsons_for_communication(circuit=self.grid, instruction=self.instruction)
-
         try:
-            response, ok = send_json_data(json_data=model_data,
-                                          endpoint_url=websocket_url,
+            # the model travels in binary form, and only if the server does not have it already
+            response, ok = send_model_job(base_url=self.base_url,
+                                          circuit=self.grid,
+                                          instruction=self.instruction,
                                           certificate=self.certificate_path)
 
             if not ok:
@@ -529,18 +572,14 @@ class RemoteJobDriver(QThread):
 
         if response is not None:
 
-            success = response.get("success", False)
-
-            if success:
-                results_data = response["results"]
-
-                time_indices = results_data.get('time_indices', self.grid.get_all_time_indices())
+            if response.get("success", False):
+                time_indices = (self.instruction.time_indices if self.instruction.time_indices is not None
+                                else self.grid.get_all_time_indices())
                 driver = create_driver(grid=self.grid,
                                        driver_tpe=self.instruction.operation,
                                        time_indices=time_indices)
 
-                if driver is not None:
-                    driver.results.parse_data(data=results_data)
+                if driver is not None and self.wait_for_results(job_id=response["job_id"], results=driver.results):
                     self.register_driver_func(driver=driver)
             else:
                 self.logger.add_error(msg=response.get("msg", "No message"))
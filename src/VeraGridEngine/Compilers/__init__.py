@@ -7,4 +7,5 @@ import VeraGridEngine.Compilers.circuit_to_data
 # import VeraGridEngine.Compilers.circuit_to_bentayga
 # import VeraGridEngine.Compilers.circuit_to_newton_pa
 # import VeraGridEngine.Compilers.circuit_to_pgm
-from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
\ No newline at end of file
+from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
+from VeraGridEngine.Compilers.circuit_to_data_ts import NumericalCircuitTs, compile_numerical_circuit_ts
\ No newline at end of file
@@ -5,7 +5,7 @@
 from __future__ import annotations
 import numpy as np
 from cmath import rect
-from typing import Dict, Union, TYPE_CHECKING
+from typing import Dict, Union, Tuple, Any, TYPE_CHECKING
 
 from VeraGridEngine.basic_structures import Logger
 import VeraGridEngine.Devices as dev
@@ -31,6 +31,7 @@ from VeraGridEngine.DataStructures.fluid_pump_data import FluidPumpData
 from VeraGridEngine.DataStructures.fluid_p2x_data import FluidP2XData
 from VeraGridEngine.DataStructures.fluid_path_data import FluidPathData
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
+from VeraGridEngine.DataStructures.compilation_cache import COMPILATION_CACHE
 
 if TYPE_CHECKING:  # Only imports the below statements during type checking
     from VeraGridEngine.Devices.multi_circuit import MultiCircuit
@@ -1030,8 +1031,8 @@ def fill_generator_parent(
         data.pmin[k] = elm.Pmin_prof[t_idx]
 
         if elm.use_reactive_power_curve:
-            data.qmin[k] = elm.q_curve.get_qmin(data.p[i])
-            data.qmax[k] = elm.q_curve.get_qmax(data.p[i])
+            data.qmin[k] = elm.q_curve.get_qmin(data.p[k])
+            data.qmax[k] = elm.q_curve.get_qmax(data.p[k])
         else:
             data.qmin[k] = elm.Qmin_prof[t_idx]
             data.qmax[k] = elm.Qmax_prof[t_idx]
@@ -1077,8 +1078,8 @@ def fill_generator_parent(
 
         # reactive power limits, for the given power value
         if elm.use_reactive_power_curve:
-            data.qmin[k] = elm.q_curve.get_qmin(data.p[i])
-            data.qmax[k] = elm.q_curve.get_qmax(data.p[i])
+            data.qmin[k] = elm.q_curve.get_qmin(data.p[k])
+            data.qmax[k] = elm.q_curve.get_qmax(data.p[k])
         else:
             data.qmin[k] = elm.Qmin
             data.qmax[k] = elm.Qmax
@@ -2356,22 +2357,22 @@ def get_fluid_path_data(data: FluidPathData,
     return data
 
 
-def compile_numerical_circuit_at(circuit: MultiCircuit,
-                                 t_idx: Union[int, None] = None,
-                                 apply_temperature=False,
-                                 branch_tolerance_mode=BranchImpedanceMode.Specified,
-                                 opf_results: VALID_OPF_RESULTS | None = None,
-                                 use_stored_guess=False,
-                                 bus_dict: Union[Dict[Bus, int], None] = None,
-                                 areas_dict: Union[Dict[Area, int], None] = None,
-                                 control_taps_modules: bool = True,
-                                 control_taps_phase: bool = True,
-                                 control_remote_voltage: bool = True,
-                                 fill_gep: bool = False,
-                                 fill_three_phase: bool = False,
-                                 logger=Logger()) -> NumericalCircuit:
+def build_numerical_circuit_at(circuit: MultiCircuit,
+                               t_idx: Union[int, None] = None,
+                               apply_temperature=False,
+                               branch_tolerance_mode=BranchImpedanceMode.Specified,
+                               opf_results: VALID_OPF_RESULTS | None = None,
+                               use_stored_guess=False,
+                               bus_dict: Union[Dict[Bus, int], None] = None,
+                               areas_dict: Union[Dict[Area, int], None] = None,
+                               control_taps_modules: bool = True,
+                               control_taps_phase: bool = True,
+                               control_remote_voltage: bool = True,
+                               fill_gep: bool = False,
+                               fill_three_phase: bool = False,
+                               logger=Logger()) -> NumericalCircuit:
     """
-    Compile a NumericalCircuit from a MultiCircuit
+    Build a NumericalCircuit from a MultiCircuit (see compile_numerical_circuit_at)
     :param circuit: MultiCircuit instance
     :param t_idx: time step from the time series to gather data from, if None the snapshot is used
     :param apply_temperature: apply the branch temperature correction
@@ -2617,3 +2618,115 @@ def compile_numerical_circuit_at(circuit: MultiCircuit,
             nc.active_branch_data.any_pf_control = True
 
     return nc
+
+
+def get_compilation_key(circuit: MultiCircuit,
+                        t_idx: Union[int, None],
+                        *options: Any) -> Tuple[Any, ...]:
+    """
+    Get the key of a compilation of a MultiCircuit: the circuit, its structure, its revision
+    (that changes with any modification of its devices), the time index and the compilation options
+    :param circuit: MultiCircuit
+    :param t_idx: time index (None for the snapshot)
+    :param options: compilation options
+    :return: tuple
+    """
+    return ('NumericalCircuit',
+            id(circuit),
+            circuit.get_revision(),
+            circuit.get_structure_key(),
+            circuit.Sbase,
+            circuit.fBase,
+            t_idx) + options
+
+
+def compile_numerical_circuit_at(circuit: MultiCircuit,
+                                 t_idx: Union[int, None] = None,
+                                 apply_temperature=False,
+                                 branch_tolerance_mode=BranchImpedanceMode.Specified,
+                                 opf_results: VALID_OPF_RESULTS | None = None,
+                                 use_stored_guess=False,
+                                 bus_dict: Union[Dict[Bus, int], None] = None,
+                                 areas_dict: Union[Dict[Area, int], None] = None,
+                                 control_taps_modules: bool = True,
+                                 control_taps_phase: bool = True,
+                                 control_remote_voltage: bool = True,
+                                 fill_gep: bool = False,
+                                 fill_three_phase: bool = False,
+                                 use_cache: bool = False,
+                                 logger=Logger()) -> NumericalCircuit:
+    """
+    Compile a NumericalCircuit from a MultiCircuit.
+    With use_cache, the compilations are kept in the COMPILATION_CACHE, so that compiling the same unmodified
+    circuit with the same options only copies the cached NumericalCircuit. The numerical circuit given
+    keeps its derived structures (admittances, islands, linear factors) in the cache too.
+    The cache only sees the modifications done through the device and profile setters:
+    whoever modifies arrays in-place (i.e. profile.toarray()[t] = x) or sub-objects (i.e. a tap changer)
+    must call touch_model() before compiling again.
+    :param circuit: MultiCircuit instance
+    :param t_idx: time step from the time series to gather data from, if None the snapshot is used
+    :param apply_temperature: apply the branch temperature correction
+    :param branch_tolerance_mode: Branch tolerance mode
+    :param opf_results:(optional) OptimalPowerFlowResults instance
+    :param use_stored_guess: use the storage voltage guess?
+    :param bus_dict (optional) Dict[Bus, int] dictionary
+    :param areas_dict (optional) Dict[Area, int] dictionary
+    :param control_taps_modules: control taps modules?
+    :param control_taps_phase: control taps phase?
+    :param control_remote_voltage: control remote voltage?
+    :param fill_gep: fill generation expansion planning parameters?
+    :param fill_three_phase:
+    :param use_cache: use the compilation cache? (the compilations with opf results or dictionaries are not cached)
+                      only for callers that guarantee that the circuit is not modified in-place
+    :param logger: Logger instance
+    :return: NumericalCircuit instance
+    """
+    if use_cache and opf_results is None and bus_dict is None and areas_dict is None:
+
+        key = get_compilation_key(circuit, t_idx, apply_temperature, branch_tolerance_mode, use_stored_guess,
+                                  control_taps_modules, control_taps_phase, control_remote_voltage,
+                                  fill_gep, fill_three_phase)
+
+        entry = COMPILATION_CACHE.get(key)
+
+        if entry is None:
+            # the compilation messages are kept to report them again when the compilation is reused
+            compilation_logger = Logger()
+            nc = build_numerical_circuit_at(circuit=circuit,
+                                            t_idx=t_idx,
+                                            apply_temperature=apply_temperature,
+                                            branch_tolerance_mode=branch_tolerance_mode,
+                                            use_stored_guess=use_stored_guess,
+                                            control_taps_modules=control_taps_modules,
+                                            control_taps_phase=control_taps_phase,
+                                            control_remote_voltage=control_remote_voltage,
+                                            fill_gep=fill_gep,
+                                            fill_three_phase=fill_three_phase,
+                                            logger=compilation_logger)
+
+            nc.use_cache = True
+
+            # the callers modify their numerical circuit, the cache keeps its own copy
+            COMPILATION_CACHE.set(key, (nc.copy(), compilation_logger))
+        else:
+            nc_cached, compilation_logger = entry
+            nc = nc_cached.copy()
+
+        logger += compilation_logger
+        return nc
+
+    else:
+        return build_numerical_circuit_at(circuit=circuit,
+                                          t_idx=t_idx,
+                                          apply_temperature=apply_temperature,
+                                          branch_tolerance_mode=branch_tolerance_mode,
+                                          opf_results=opf_results,
+                                          use_stored_guess=use_stored_guess,
+                                          bus_dict=bus_dict,
+                                          areas_dict=areas_dict,
+                                          control_taps_modules=control_taps_modules,
+                                          control_taps_phase=control_taps_phase,
+                                          control_remote_voltage=control_remote_voltage,
+                                          fill_gep=fill_gep,
+                                          fill_three_phase=fill_three_phase,
+                                          logger=logger)
@@ -0,0 +1,591 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from typing import Dict, List, Set, Union, TYPE_CHECKING
+
+from VeraGridEngine.basic_structures import Logger, Vec, Mat, CxMat, IntVec, BoolVec
+from VeraGridEngine.enumerations import BranchImpedanceMode
+from VeraGridEngine.Devices.Substation.bus import Bus
+from VeraGridEngine.Devices.Aggregation.area import Area
+from VeraGridEngine.Topology.topology import find_different_states
+from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
+from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
+
+if TYPE_CHECKING:  # Only imports the below statements during type checking
+    from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+
+# profiles that are patched per time step, all the other profiles define the "structure" of a time step
+_BUS_PATCHED: Set[str] = {'Vmin_prof', 'Vmax_prof'}
+
+_LOAD_PATCHED: Set[str] = {'P_prof', 'Q_prof', 'Ir_prof', 'Ii_prof', 'G_prof', 'B_prof', 'Cost_prof', 'shift_key_prof'}
+
+_SHUNT_PATCHED: Set[str] = {'G_prof', 'B_prof', 'Cost_prof'}
+
+_GEN_PATCHED: Set[str] = {'P_prof', 'Pf_prof', 'Pmax_prof', 'Pmin_prof', 'Qmax_prof', 'Qmin_prof',
+                          'Cost0_prof', 'Cost_prof', 'Cost2_prof', 'shift_key_prof', 'srap_enabled_prof'}
+
+_BRANCH_PATCHED: Set[str] = {'rate_prof', 'contingency_factor_prof', 'protection_rating_factor_prof', 'Cost_prof'}
+
+_CTRL_BRANCH_PATCHED: Set[str] = _BRANCH_PATCHED | {'Pset_prof', 'Qset_prof', 'vset_prof',
+                                                    'tap_module_prof', 'tap_phase_prof'}
+
+# three-phase profiles are not used by the positive sequence compilation
+_IGNORED: Set[str] = {'Pa_prof', 'Pb_prof', 'Pc_prof', 'Qa_prof', 'Qb_prof', 'Qc_prof',
+                      'Ir1_prof', 'Ir2_prof', 'Ir3_prof', 'Ii1_prof', 'Ii2_prof', 'Ii3_prof',
+                      'G1_prof', 'G2_prof', 'G3_prof', 'B1_prof', 'B2_prof', 'B3_prof',
+                      'Ga_prof', 'Gb_prof', 'Gc_prof', 'Ba_prof', 'Bb_prof', 'Bc_prof',
+                      'n_customers_prof'}
+
+
+def _profile_matrix(elements: List, prof_name: str, time_indices: IntVec, dtype=float) -> Mat:
+    """
+    Stack the profiles of a list of devices into a (nt, nelm) matrix
+    :param elements: list of devices
+    :param prof_name: name of the profile attribute (i.e. P_prof)
+    :param time_indices: time indices to gather
+    :param dtype: matrix data type
+    :return: (nt, nelm) matrix
+    """
+    mat = np.zeros((len(time_indices), len(elements)), dtype=dtype)
+    for k, elm in enumerate(elements):
+        mat[:, k] = getattr(elm, prof_name).toarray()[time_indices]
+    return mat
+
+
+def _kw_scale(elements: List) -> Vec:
+    """
+    Get the MW scaling factor of a list of injection devices
+    :param elements: list of devices
+    :return: array with 1.0 or 0.001 (for the devices declared in kW)
+    """
+    return np.array([1e-3 if elm.use_kw else 1.0 for elm in elements], dtype=float)
+
+
+def _connected(elements: List) -> BoolVec:
+    """
+    Get the mask of injection devices that are connected to a bus
+    :param elements: list of devices
+    :return: boolean array
+    """
+    return np.array([elm.bus is not None for elm in elements], dtype=bool)
+
+
+class NumericalCircuitTs:
+    """
+    Structure of arrays with the time series of the profiled magnitudes of a MultiCircuit.
+
+    The grid is compiled only once per different "structure" (active states, control modes, set points, etc.)
+    and the rest of the time steps are obtained by patching the per-step values on a copy of that compilation.
+    """
+
+    def __init__(self,
+                 circuit: MultiCircuit,
+                 time_indices: IntVec,
+                 apply_temperature: bool = False,
+                 branch_tolerance_mode: BranchImpedanceMode = BranchImpedanceMode.Specified,
+                 use_stored_guess: bool = False,
+                 bus_dict: Union[Dict[Bus, int], None] = None,
+                 areas_dict: Union[Dict[Area, int], None] = None,
+                 control_taps_modules: bool = True,
+                 control_taps_phase: bool = True,
+                 control_remote_voltage: bool = True,
+                 logger: Logger | None = None):
+        """
+        Constructor
+        :param circuit: MultiCircuit instance
+        :param time_indices: array of time indices to compile
+        :param apply_temperature: apply the branch temperature correction
+        :param branch_tolerance_mode: Branch tolerance mode
+        :param use_stored_guess: use the storage voltage guess?
+        :param bus_dict: (optional) Dict[Bus, int] dictionary
+        :param areas_dict: (optional) Dict[Area, int] dictionary
+        :param control_taps_modules: control taps modules?
+        :param control_taps_phase: control taps phase?
+        :param control_remote_voltage: control remote voltage?
+        :param logger: Logger instance
+        """
+        self.circuit = circuit
+        self.time_indices: IntVec = np.array(time_indices, dtype=int)
+        self.nt = len(self.time_indices)
+
+        self.apply_temperature = apply_temperature
+        self.branch_tolerance_mode = branch_tolerance_mode
+        self.use_stored_guess = use_stored_guess
+        self.control_taps_modules = control_taps_modules
+        self.control_taps_phase = control_taps_phase
+        self.control_remote_voltage = control_remote_voltage
+        self.logger = Logger() if logger is None else logger
+
+        self.bus_dict = {bus: i for i, bus in enumerate(circuit.buses)} if bus_dict is None else bus_dict
+        self.areas_dict = {elm: i for i, elm in enumerate(circuit.areas)} if areas_dict is None else areas_dict
+
+        # time index -> position in the time_indices array
+        self._t_pos: Dict[int, int] = {int(t): k for k, t in enumerate(self.time_indices)}
+
+        # device lists in the same order as compile_numerical_circuit_at
+        buses = circuit.buses
+        loads = circuit.get_loads()
+        stat_gens = circuit.get_static_generators()
+        ext_grids = circuit.get_external_grids()
+        cur_inj = circuit.get_current_injections()
+        load_like = loads + stat_gens + ext_grids + cur_inj
+        shunt_like = circuit.get_shunts() + circuit.get_controllable_shunts()
+        generators = circuit.get_generators()
+        batteries = circuit.get_batteries()
+
+        passive_branches = list()
+        ctrl_branches = list()
+        ctrl_idx = list()
+        for lst, is_ctrl in [(circuit.lines, False),
+                             (circuit.dc_lines, False),
+                             (circuit.transformers2w, True),
+                             (circuit.windings, True),
+                             (circuit.upfc_devices, False),
+                             (circuit.series_reactances, False),
+                             (circuit.switch_devices, False)]:
+            for elm in lst:
+                if lst is circuit.windings and (elm.bus_from is None or elm.bus_to is None):
+                    continue  # the ill-connected windings are skipped by the compilation
+
+                if is_ctrl:
+                    ctrl_idx.append(len(passive_branches))
+                    ctrl_branches.append(elm)
+                passive_branches.append(elm)
+
+        self.nbr = len(passive_branches)
+        self.ctrl_idx: IntVec = np.array(ctrl_idx, dtype=int)
+
+        ti = self.time_indices
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Buses
+        # --------------------------------------------------------------------------------------------------------------
+        self.bus_active = _profile_matrix(buses, 'active_prof', ti, dtype=bool)
+        self.bus_Vmin = _profile_matrix(buses, 'Vmin_prof', ti)
+        self.bus_Vmax = _profile_matrix(buses, 'Vmax_prof', ti)
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Load-like devices (loads, static generators, external grids and current injections)
+        # --------------------------------------------------------------------------------------------------------------
+        nl, nsg, neg, nci = len(loads), len(stat_gens), len(ext_grids), len(cur_inj)
+        i0, i1, i2, i3 = 0, nl, nl + nsg, nl + nsg + neg
+        nload = len(load_like)
+        self.load_active = _profile_matrix(load_like, 'active_prof', ti, dtype=bool)
+        self.load_S: CxMat = np.zeros((self.nt, nload), dtype=complex)
+        self.load_I: CxMat = np.zeros((self.nt, nload), dtype=complex)
+        self.load_Y: CxMat = np.zeros((self.nt, nload), dtype=complex)
+        self.load_cost: Mat = np.zeros((self.nt, nload), dtype=float)
+        self.load_shift_key = _profile_matrix(load_like, 'shift_key_prof', ti)
+        self._load_idx = np.where(_connected(load_like))[0]
+
+        if nl:
+            s = _kw_scale(loads) * _connected(loads)
+            self.load_S[:, i0:i1] = (_profile_matrix(loads, 'P_prof', ti)
+                                     + 1j * _profile_matrix(loads, 'Q_prof', ti)) * s
+            self.load_I[:, i0:i1] = (_profile_matrix(loads, 'Ir_prof', ti)
+                                     + 1j * _profile_matrix(loads, 'Ii_prof', ti)) * s
+            self.load_Y[:, i0:i1] = (_profile_matrix(loads, 'G_prof', ti)
+                                     + 1j * _profile_matrix(loads, 'B_prof', ti)) * s
+            self.load_cost[:, i0:i1] = _profile_matrix(loads, 'Cost_prof', ti) * s
+
+        if nsg:
+            s = _kw_scale(stat_gens) * _connected(stat_gens)
+            self.load_S[:, i1:i2] = -(_profile_matrix(stat_gens, 'P_prof', ti)
+                                      + 1j * _profile_matrix(stat_gens, 'Q_prof', ti)) * s
+            self.load_cost[:, i1:i2] = _profile_matrix(stat_gens, 'Cost_prof', ti) * s
+
+        if neg:
+            s = _kw_scale(ext_grids) * _connected(ext_grids)
+            self.load_S[:, i2:i3] = (_profile_matrix(ext_grids, 'P_prof', ti)
+                                     + 1j * _profile_matrix(ext_grids, 'Q_prof', ti)) * s
+
+        if nci:
+            s = _kw_scale(cur_inj) * _connected(cur_inj)
+            self.load_I[:, i3:] = (_profile_matrix(cur_inj, 'Ir_prof', ti)
+                                   + 1j * _profile_matrix(cur_inj, 'Ii_prof', ti)) * s
+            self.load_cost[:, i3:] = _profile_matrix(cur_inj, 'Cost_prof', ti) * s
+
+        # weights of each load-like device in the fixed reactive power-sharing magnitudes
+        self._load_wq = np.r_[-np.ones(nl), np.ones(nsg + neg + nci)]
+        self._load_wi = np.r_[-np.ones(nl), np.zeros(nsg), np.ones(neg + nci)]
+        self._load_wb = np.r_[-np.ones(nl), np.zeros(nsg), np.ones(neg + nci)]
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Shunt-like devices
+        # --------------------------------------------------------------------------------------------------------------
+        self.shunt_active = _profile_matrix(shunt_like, 'active_prof', ti, dtype=bool)
+        s = _kw_scale(shunt_like) * _connected(shunt_like)
+        self.shunt_Y: CxMat = (_profile_matrix(shunt_like, 'G_prof', ti)
+                               + 1j * _profile_matrix(shunt_like, 'B_prof', ti)) * s
+        self.shunt_cost = _profile_matrix(shunt_like, 'Cost_prof', ti)
+        self.shunt_cost[:, :len(circuit.get_shunts())] = 0.0  # only the controllable shunts have cost
+        self._shunt_idx = np.where(_connected(shunt_like))[0]
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Generators and batteries
+        # --------------------------------------------------------------------------------------------------------------
+        self.gen = _GenerationMatrices(generators, ti)
+        self.batt = _GenerationMatrices(batteries, ti)
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Branches
+        # --------------------------------------------------------------------------------------------------------------
+        self.branch_active = _profile_matrix(passive_branches, 'active_prof', ti, dtype=bool)
+        self.branch_rates = _profile_matrix(passive_branches, 'rate_prof', ti)
+        self.branch_contingency_rates = (self.branch_rates *
+                                         _profile_matrix(passive_branches, 'contingency_factor_prof', ti))
+        self.branch_protection_rates = (self.branch_rates *
+                                        _profile_matrix(passive_branches, 'protection_rating_factor_prof', ti))
+        self.branch_overload_cost = _profile_matrix(passive_branches, 'Cost_prof', ti)
+
+        self.tap_module = _profile_matrix(ctrl_branches, 'tap_module_prof', ti)
+        self.tap_angle = _profile_matrix(ctrl_branches, 'tap_phase_prof', ti)
+        self.Pset = _profile_matrix(ctrl_branches, 'Pset_prof', ti) / circuit.Sbase
+        self.Qset = _profile_matrix(ctrl_branches, 'Qset_prof', ti) / circuit.Sbase
+        self.vset = _profile_matrix(ctrl_branches, 'vset_prof', ti)
+
+        self.hvdc_active = _profile_matrix(circuit.hvdc_lines, 'active_prof', ti, dtype=bool)
+        self.vsc_active = _profile_matrix(circuit.vsc_devices, 'active_prof', ti, dtype=bool)
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Structure: any profile that is not patched and changes in time splits the time steps into groups
+        # --------------------------------------------------------------------------------------------------------------
+        families = [
+            (buses, _BUS_PATCHED),
+            (load_like, _LOAD_PATCHED),
+            (shunt_like, _SHUNT_PATCHED),
+            (generators, _GEN_PATCHED),
+            (batteries, _GEN_PATCHED),
+            (ctrl_branches, _CTRL_BRANCH_PATCHED),
+            ([elm for elm in passive_branches if elm not in ctrl_branches], _BRANCH_PATCHED),
+            (circuit.hvdc_lines, set()),
+            (circuit.vsc_devices, set()),
+            (circuit.fluid_nodes, set()),
+            (circuit.fluid_paths, set()),
+        ]
+        self.structure = self._get_structure_matrix(families=families)
+
+        if self.structure.shape[1] > 0:
+            self.groups, self.mapping = find_different_states(self.structure)
+        else:
+            self.groups = {0: list(range(self.nt))}
+            self.mapping = np.zeros(self.nt, dtype=int)
+
+        # compiled circuits for each group representative (filled on demand)
+        self._base_circuits: Dict[int, NumericalCircuit] = dict()
+
+    def _get_structure_matrix(self, families) -> Mat:
+        """
+        Compose the matrix of structural profiles that change within the time indices
+        :param families: list of (list of devices, set of patched profile names)
+        :return: (nt, n) matrix where each column is a varying structural profile
+        """
+        columns = list()
+        for elements, patched in families:
+            for elm in elements:
+                for prof_name in elm.properties_with_profile.values():
+                    if prof_name in patched or prof_name in _IGNORED:
+                        continue
+
+                    prof = getattr(elm, prof_name)
+                    if prof.size() == 0:
+                        continue
+
+                    arr = prof.toarray()[self.time_indices]
+
+                    if arr.dtype == object:
+                        # objects (buses, control modes, etc.) are translated into integer codes
+                        codes: Dict = dict()
+                        arr = np.array([codes.setdefault(x, len(codes)) for x in arr], dtype=float)
+                    else:
+                        arr = arr.astype(float)
+
+                    if np.any(arr != arr[0]):
+                        columns.append(arr)
+
+        if len(columns):
+            return np.array(columns).T
+        else:
+            return np.zeros((self.nt, 0))
+
+    @property
+    def n_groups(self) -> int:
+        """
+        Number of different structures found in the time indices
+        :return: int
+        """
+        return len(self.groups)
+
+    def get_base_circuit(self, pos: int) -> NumericalCircuit:
+        """
+        Get the compiled circuit representing the structure of a time position
+        :param pos: position in the time_indices array
+        :return: NumericalCircuit (do not modify)
+        """
+        rep = int(self.mapping[pos])
+        nc = self._base_circuits.get(rep, None)
+
+        if nc is None:
+            nc = compile_numerical_circuit_at(
+                circuit=self.circuit,
+                t_idx=int(self.time_indices[rep]),
+                apply_temperature=self.apply_temperature,
+                branch_tolerance_mode=self.branch_tolerance_mode,
+                use_stored_guess=self.use_stored_guess,
+                bus_dict=self.bus_dict,
+                areas_dict=self.areas_dict,
+                control_taps_modules=self.control_taps_modules,
+                control_taps_phase=self.control_taps_phase,
+                control_remote_voltage=self.control_remote_voltage,
+                logger=self.logger,
+                fill_three_phase=False
+            )
+            self._base_circuits[rep] = nc
+
+        return nc
+
+    def compile_base_circuits(self) -> None:
+        """
+        Compile the base circuit of every group (they are compiled on demand otherwise)
+        """
+        for rep in self.groups.keys():
+            self.get_base_circuit(int(rep))
+
+    def __getstate__(self) -> Dict:
+        """
+        Pickling support (i.e. to send this object to other processes).
+        All the base circuits are compiled, so that the MultiCircuit is not needed anymore.
+        :return: state dictionary
+        """
+        self.compile_base_circuits()
+        state = self.__dict__.copy()
+        state['circuit'] = None
+        state['bus_dict'] = None
+        state['areas_dict'] = None
+        return state
+
+    def nc_at(self, t_idx: int) -> NumericalCircuit:
+        """
+        Get the NumericalCircuit of a time index
+        :param t_idx: time index (must be one of the compiled time indices)
+        :return: NumericalCircuit, equivalent to compile_numerical_circuit_at(t_idx=t_idx)
+        """
+        pos = self._t_pos[int(t_idx)]
+        rep = int(self.mapping[pos])
+
+        # the circuits get modified by the simulations (i.e. topology reduction), so we give away a copy
+        nc = self.get_base_circuit(pos).copy()
+
+        if pos != rep:
+            self._patch(nc=nc, pos=pos, rep=rep)
+
+        return nc
+
+    def _patch(self, nc: NumericalCircuit, pos: int, rep: int) -> None:
+        """
+        Write the per-step values of a time position into a circuit compiled at another position of the same group
+        :param nc: NumericalCircuit to modify in-place
+        :param pos: position in the time_indices array to apply
+        :param rep: position in the time_indices array of the compiled circuit
+        """
+        nc.t_idx = int(self.time_indices[pos])
+
+        bd = nc.bus_data
+        bd.Vmin[:] = self.bus_Vmin[pos, :]
+        bd.Vmax[:] = self.bus_Vmax[pos, :]
+
+        idx = self._load_idx
+        ld = nc.load_data
+        ld.S[idx] = self.load_S[pos, idx]
+        ld.I[idx] = self.load_I[pos, idx]
+        ld.Y[idx] = self.load_Y[pos, idx]
+        ld.cost[idx] = self.load_cost[pos, idx]
+        ld.shift_key[idx] = self.load_shift_key[pos, idx]
+
+        idx = self._shunt_idx
+        sd = nc.shunt_data
+        sd.Y[idx] = self.shunt_Y[pos, idx]
+        sd.cost[idx] = self.shunt_cost[pos, idx]
+
+        self.gen.patch(data=nc.generator_data, pos=pos)
+        self.batt.patch(data=nc.battery_data, pos=pos)
+
+        m = self.nbr
+        br = nc.passive_branch_data
+        br.rates[:m] = self.branch_rates[pos, :]
+        br.contingency_rates[:m] = self.branch_contingency_rates[pos, :]
+        br.protection_rates[:m] = self.branch_protection_rates[pos, :]
+        br.overload_cost[:m] = self.branch_overload_cost[pos, :]
+
+        if len(self.ctrl_idx):
+            ctrl = nc.active_branch_data
+            ctrl.tap_module[self.ctrl_idx] = self.tap_module[pos, :]
+            ctrl.tap_angle[self.ctrl_idx] = self.tap_angle[pos, :]
+            ctrl.Pset[self.ctrl_idx] = self.Pset[pos, :]
+            ctrl.Qset[self.ctrl_idx] = self.Qset[pos, :]
+            ctrl.vset[self.ctrl_idx] = self.vset[pos, :]
+
+            if not self.use_stored_guess:
+                # the compilation rotates the "from" voltage guess with the tap angle
+                d_tau = self.tap_angle[pos, :] - self.tap_angle[rep, :]
+                if np.any(d_tau != 0.0):
+                    d_ang = np.zeros(nc.nbus)
+                    np.add.at(d_ang, br.F[self.ctrl_idx], d_tau)
+                    bd.Vbus *= np.exp(1j * d_ang)
+
+        self._patch_reactive_power_sharing(nc=nc, pos=pos)
+
+    def _patch_reactive_power_sharing(self, nc: NumericalCircuit, pos: int) -> None:
+        """
+        Recompute the bus magnitudes that aggregate the injection devices values
+        :param nc: NumericalCircuit to modify in-place
+        :param pos: position in the time_indices array
+        """
+        nbus = nc.nbus
+        bd = nc.bus_data
+
+        q_fixed = np.zeros(nbus)
+        q_shared_total = np.zeros(nbus)
+        b_fixed = np.zeros(nbus)
+        srap = np.zeros(nbus)
+
+        for data, mat in [(nc.generator_data, self.gen), (nc.battery_data, self.batt)]:
+            act = data.active.astype(bool)
+            ctrl = act & data.controllable.astype(bool)
+            fixed = act & ~ctrl
+
+            q_share = data.p[ctrl] + 1e-14
+            data.q_share[ctrl] = q_share
+            q_shared_total += np.bincount(data.bus_idx[ctrl], weights=q_share, minlength=nbus)
+
+            pf2 = np.power(data.pf[fixed], 2.0)
+            pf_sign = (data.pf[fixed] + 1e-20) / np.abs(data.pf[fixed] + 1e-20)
+            q = pf_sign * data.p[fixed] * np.sqrt((1.0 - pf2) / (pf2 + 1e-20))
+            q_fixed += np.bincount(data.bus_idx[fixed], weights=q, minlength=nbus)
+
+            p = mat.p[pos, :]
+            sr = act & mat.srap_enabled[pos, :] & (p > 0.0)
+            srap += np.bincount(data.bus_idx[sr], weights=p[sr], minlength=nbus)
+
+        sd = nc.shunt_data
+        act = sd.active.astype(bool)
+        ctrl = act & sd.controllable.astype(bool)
+        fixed = act & ~ctrl
+        sd.q_share[ctrl] = sd.Y[ctrl].imag
+        q_shared_total += np.bincount(sd.bus_idx[ctrl], weights=sd.Y[ctrl].imag, minlength=nbus)
+        b_fixed += np.bincount(sd.bus_idx[fixed], weights=sd.Y[fixed].imag, minlength=nbus)
+
+        ld = nc.load_data
+        act = ld.active.astype(bool)
+        q_fixed += np.bincount(ld.bus_idx[act], weights=self._load_wq[act] * ld.S[act].imag, minlength=nbus)
+        ii_fixed = np.bincount(ld.bus_idx[act], weights=self._load_wi[act] * ld.I[act].imag, minlength=nbus)
+        b_fixed += np.bincount(ld.bus_idx[act], weights=self._load_wb[act] * ld.Y[act].imag, minlength=nbus)
+
+        bd.q_fixed = q_fixed
+        bd.ii_fixed = ii_fixed
+        bd.b_fixed = b_fixed
+        bd.q_shared_total = q_shared_total
+        bd.srap_availbale_power = srap
+
+
+class _GenerationMatrices:
+    """
+    Time series matrices of the generator-like devices (generators and batteries)
+    """
+
+    def __init__(self, elements: List, time_indices: IntVec):
+        """
+        Constructor
+        :param elements: list of generators or batteries
+        :param time_indices: time indices to gather
+        """
+        ti = time_indices
+        s = _kw_scale(elements)
+        self.scale = s
+        self.idx: IntVec = np.where(_connected(elements))[0]
+
+        self.active = _profile_matrix(elements, 'active_prof', ti, dtype=bool)
+        self.p = _profile_matrix(elements, 'P_prof', ti)  # in the device units
+        self.pf = _profile_matrix(elements, 'Pf_prof', ti)
+        self.v = _profile_matrix(elements, 'Vset_prof', ti)
+        self.pmax = _profile_matrix(elements, 'Pmax_prof', ti) * s
+        self.pmin = _profile_matrix(elements, 'Pmin_prof', ti) * s
+        self.qmin = _profile_matrix(elements, 'Qmin_prof', ti)
+        self.qmax = _profile_matrix(elements, 'Qmax_prof', ti)
+        self.cost_0 = _profile_matrix(elements, 'Cost0_prof', ti)
+        self.cost_1 = _profile_matrix(elements, 'Cost_prof', ti) * s
+        self.cost_2 = _profile_matrix(elements, 'Cost2_prof', ti) * (s * s)
+        self.shift_key = _profile_matrix(elements, 'shift_key_prof', ti)
+        self.srap_enabled = _profile_matrix(elements, 'srap_enabled_prof', ti, dtype=bool)
+
+        for k, elm in enumerate(elements):
+            if elm.use_reactive_power_curve:
+                self.qmin[:, k] = [elm.q_curve.get_qmin(p) for p in self.p[:, k]]
+                self.qmax[:, k] = [elm.q_curve.get_qmax(p) for p in self.p[:, k]]
+
+        self.qmin *= s
+        self.qmax *= s
+
+    def patch(self, data, pos: int) -> None:
+        """
+        Write the values of a time position
+        :param data: GeneratorData or BatteryData
+        :param pos: position in the time_indices array
+        """
+        idx = self.idx
+        data.p[idx] = self.p[pos, idx] * self.scale[idx]
+        data.pf[idx] = self.pf[pos, idx]
+        data.v[idx] = self.v[pos, idx]
+        data.pmax[idx] = self.pmax[pos, idx]
+        data.pmin[idx] = self.pmin[pos, idx]
+        data.qmin[idx] = self.qmin[pos, idx]
+        data.qmax[idx] = self.qmax[pos, idx]
+        data.cost_0[idx] = self.cost_0[pos, idx]
+        data.cost_1[idx] = self.cost_1[pos, idx]
+        data.cost_2[idx] = self.cost_2[pos, idx]
+        data.shift_key[idx] = self.shift_key[pos, idx]
+
+
+def compile_numerical_circuit_ts(circuit: MultiCircuit,
+                                 time_indices: Union[IntVec, None] = None,
+                                 apply_temperature=False,
+                                 branch_tolerance_mode=BranchImpedanceMode.Specified,
+                                 use_stored_guess=False,
+                                 bus_dict: Union[Dict[Bus, int], None] = None,
+                                 areas_dict: Union[Dict[Area, int], None] = None,
+                                 control_taps_modules: bool = True,
+                                 control_taps_phase: bool = True,
+                                 control_remote_voltage: bool = True,
+                                 logger: Logger | None = None) -> NumericalCircuitTs:
+    """
+    Compile all the time steps of a MultiCircuit at once
+    :param circuit: MultiCircuit instance
+    :param time_indices: time indices to compile, if None all are compiled
+    :param apply_temperature: apply the branch temperature correction
+    :param branch_tolerance_mode: Branch tolerance mode
+    :param use_stored_guess: use the storage voltage guess?
+    :param bus_dict: (optional) Dict[Bus, int] dictionary
+    :param areas_dict: (optional) Dict[Area, int] dictionary
+    :param control_taps_modules: control taps modules?
+    :param control_taps_phase: control taps phase?
+    :param control_remote_voltage: control remote voltage?
+    :param logger: Logger instance
+    :return: NumericalCircuitTs instance
+    """
+    return NumericalCircuitTs(
+        circuit=circuit,
+        time_indices=circuit.get_all_time_indices() if time_indices is None else time_indices,
+        apply_temperature=apply_temperature,
+        branch_tolerance_mode=branch_tolerance_mode,
+        use_stored_guess=use_stored_guess,
+        bus_dict=bus_dict,
+        areas_dict=areas_dict,
+        control_taps_modules=control_taps_modules,
+        control_taps_phase=control_taps_phase,
+        control_remote_voltage=control_remote_voltage,
+        logger=logger
+    )
@@ -16,4 +16,4 @@ from VeraGridEngine.DataStructures.fluid_turbine_data import FluidTurbineData
 from VeraGridEngine.DataStructures.fluid_pump_data import FluidPumpData
 from VeraGridEngine.DataStructures.fluid_p2x_data import FluidP2XData
 from VeraGridEngine.DataStructures.fluid_path_data import FluidPathData
-
+from VeraGridEngine.DataStructures.compilation_cache import COMPILATION_CACHE, CompilationCache
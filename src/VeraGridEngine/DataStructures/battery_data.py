@@ -42,6 +42,7 @@ class BatteryData(GeneratorData):
         """
 
         data = super().slice(elm_idx, bus_idx, bus_map)
+        data.__class__ = BatteryData
 
         data.enom = self.enom[elm_idx]
         data.e_min = self.e_min[elm_idx]
@@ -62,6 +63,7 @@ class BatteryData(GeneratorData):
         """
 
         data = super().copy()
+        data.__class__ = BatteryData
 
         data.enom = self.enom.copy()
         data.e_min = self.e_min.copy()
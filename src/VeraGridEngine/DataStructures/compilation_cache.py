@@ -0,0 +1,205 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, Union, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def get_memory_size(obj: Any, depth: int = 4) -> int:
+    """
+    Estimate the memory used by the arrays of an object
+    :param obj: numpy array, sparse matrix, list, tuple, dict or object with arrays as attributes
+    :param depth: levels of nested objects to explore
+    :return: number of bytes
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+
+    elif sp.issparse(obj):
+        if hasattr(obj, 'indptr'):
+            return obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes
+        else:
+            return obj.data.nbytes * 3  # coo, lil, etc.: rough value
+
+    elif depth <= 0:
+        return 0
+
+    elif isinstance(obj, (list, tuple)):
+        return sum(get_memory_size(val, depth - 1) for val in obj)
+
+    elif isinstance(obj, dict):
+        return sum(get_memory_size(val, depth - 1) for val in obj.values())
+
+    elif hasattr(obj, '__dict__'):
+        return sum(get_memory_size(val, depth - 1) for val in obj.__dict__.values())
+
+    else:
+        return 0
+
+
+def get_arrays_key(*arrays: Union[np.ndarray, float, int, bool, None]) -> bytes:
+    """
+    Get a key of the content of some arrays, to identify the data derived from them
+    :param arrays: numpy arrays or scalars
+    :return: 16-byte digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        if isinstance(arr, np.ndarray):
+            h.update(str((arr.dtype.str, arr.shape)).encode())
+            if arr.dtype == object:
+                h.update(repr(arr.tolist()).encode())
+            else:
+                h.update(np.ascontiguousarray(arr).tobytes())
+        else:
+            h.update(repr(arr).encode())
+    return h.digest()
+
+
+def get_content_key(obj: Any, depth: int = 2) -> bytes:
+    """
+    Get a key of the numerical content of an object (i.e. a NumericalCircuit): its numeric arrays,
+    sparse matrices and scalars, exploring the nested objects.
+    The object arrays (names, tags, ...) are not considered.
+    :param obj: any object
+    :param depth: levels of nested objects to explore
+    :return: 16-byte digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+
+    def update(val: Any, level: int) -> None:
+        """
+        Add a value to the hash
+        :param val: value
+        :param level: remaining levels
+        """
+        if isinstance(val, np.ndarray):
+            if val.dtype != object:
+                h.update(str((val.dtype.str, val.shape)).encode())
+                h.update(np.ascontiguousarray(val).tobytes())
+
+        elif sp.issparse(val):
+            val = val.tocsc()
+            h.update(str(val.shape).encode())
+            h.update(val.indptr.tobytes())
+            h.update(val.indices.tobytes())
+            h.update(val.data.tobytes())
+
+        elif isinstance(val, (bool, int, float, complex, str, np.number)) or val is None:
+            h.update(repr(val).encode())
+
+        elif level > 0 and hasattr(val, '__dict__'):
+            # sorted, the attributes may have been created in a different order
+            for name in sorted(val.__dict__.keys()):
+                h.update(name.encode())
+                update(val.__dict__[name], level - 1)
+
+    update(obj, depth)
+
+    return h.digest()
+
+
+class CompilationCache:
+    """
+    Least recently used cache of compiled data (i.e. numerical circuits, islands or linear factors)
+    with a cap on the memory of the stored arrays.
+    The stored values must not be modified: who gets a value that is going to be modified must copy it.
+    """
+
+    def __init__(self, max_memory: int = 512 * 1024 * 1024, enabled: bool = True):
+        """
+        Constructor
+        :param max_memory: maximum memory in bytes of the stored values
+        :param enabled: use the cache?
+        """
+        self.max_memory: int = max_memory
+        self.enabled: bool = enabled
+
+        # key -> (value, number of bytes)
+        self._data: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._memory: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def memory(self) -> int:
+        """
+        Memory in bytes used by the stored values
+        """
+        return self._memory
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get a value
+        :param key: key
+        :return: the value or None if not found
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._data.get(key, None)
+
+        if entry is None:
+            self.misses += 1
+            return None
+        else:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, nbytes: Union[int, None] = None) -> None:
+        """
+        Store a value, evicting the least recently used ones if the memory cap is exceeded
+        :param key: key
+        :param value: value
+        :param nbytes: memory used by the value (estimated if not given)
+        """
+        if not self.enabled:
+            return
+
+        if nbytes is None:
+            nbytes = get_memory_size(value)
+
+        self.pop(key)
+
+        if nbytes > self.max_memory:
+            # it would evict everything else and not fit anyway
+            return
+
+        self._data[key] = (value, nbytes)
+        self._memory += nbytes
+
+        while self._memory > self.max_memory:
+            _, (_, nbytes_old) = self._data.popitem(last=False)
+            self._memory -= nbytes_old
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Remove a value (if stored)
+        :param key: key
+        """
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._memory -= entry[1]
+
+    def clear(self) -> None:
+        """
+        Remove all the values
+        """
+        self._data.clear()
+        self._memory = 0
+
+
+# cache shared by all the simulations of this process
+COMPILATION_CACHE = CompilationCache()
@@ -41,7 +41,8 @@ class FluidTurbineData:
         :return: new FluidTurbineData instance
         """
 
-        data = FluidTurbineData(nelm=self.nelm)
+        # same class, this is also the copy of the pumps and P2X
+        data = type(self)(nelm=self.nelm)
 
         data.names = self.names.copy()
         data.idtag = self.idtag.copy()
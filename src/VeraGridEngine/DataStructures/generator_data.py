@@ -194,6 +194,7 @@ class GeneratorData:
 
         data.active = self.active.copy()
         data.p = self.p.copy()
+        data.p3_star = self.p3_star.copy()
         data.pf = self.pf.copy()
         data.v = self.v.copy()
 
@@ -236,7 +237,9 @@ class GeneratorData:
         data.shift_key = self.shift_key.copy()
         data.scalable = self.scalable.copy()
 
-        data.original_idx = self.original_idx
+        data.original_idx = self.original_idx.copy()
+        data.is_at_dc_bus = self.is_at_dc_bus.copy()
+        data.name_to_idx = self.name_to_idx.copy()
 
         return data
 
@@ -11,7 +11,7 @@ import numpy as np
 import pandas as pd
 import scipy.sparse as sp
 
-from VeraGridEngine.Devices import RemedialAction
+from VeraGridEngine.Devices import RemedialAction, Bus
 from VeraGridEngine.Topology.simulation_indices import SimulationIndices
 from VeraGridEngine.Topology.topology import find_islands
 from VeraGridEngine.basic_structures import Logger
@@ -20,6 +20,7 @@ from VeraGridEngine.enumerations import BusMode, ContingencyOperationTypes
 import VeraGridEngine.Topology.topology as tp
 import VeraGridEngine.Topology.simulation_indices as si
 import VeraGridEngine.Topology.admittance_matrices as ycalc
+from VeraGridEngine.DataStructures.compilation_cache import COMPILATION_CACHE, get_arrays_key
 from VeraGridEngine.DataStructures.battery_data import BatteryData
 from VeraGridEngine.DataStructures.passive_branch_data import PassiveBranchData
 from VeraGridEngine.DataStructures.active_branch_data import ActiveBranchData
@@ -359,11 +360,21 @@ class NumericalCircuit:
 
         self.__topology_performed = False
 
+        # admittance matrices fixed from the outside (i.e. reused from another step with the same admittance data)
+        self.__admittances: ycalc.AdmittanceMatrices | None = None
+
+        # keep the derived structures (admittances, islands, linear factors) in the COMPILATION_CACHE?
+        # set by the compilation with use_cache, since hashing their inputs only pays off if they are reused
+        self.use_cache: bool = False
+
         # map to relate the elements idtag to their structures
         # used during contingency analysis to modify the structures active, etc...
         # based on the device idtag
         self.structs_idtag_dict: Dict[str, Tuple[DataStructType, int]] = dict()
 
+        # dictionary of the MultiCircuit buses to their index, set by the compiler
+        self.bus_dict: Dict[Bus, int] | None = None
+
     def propagate_bus_result(self, bus_magnitude: Vec | CxVec):
         """
         This function applies the __bus_map_arr to a calculated magnitude to
@@ -479,7 +490,9 @@ class NumericalCircuit:
 
         nc.bus_data = self.bus_data.copy()
         nc.passive_branch_data = self.passive_branch_data.copy()
+        nc.active_branch_data = self.active_branch_data.copy()
         nc.hvdc_data = self.hvdc_data.copy()
+        nc.vsc_data = self.vsc_data.copy()
         nc.load_data = self.load_data.copy()
         nc.shunt_data = self.shunt_data.copy()
         nc.generator_data = self.generator_data.copy()
@@ -490,6 +503,8 @@ class NumericalCircuit:
         nc.fluid_p2x_data = self.fluid_p2x_data.copy()
         nc.fluid_path_data = self.fluid_path_data.copy()
         nc.structs_idtag_dict = self.structs_idtag_dict.copy()
+        nc.bus_dict = self.bus_dict
+        nc.use_cache = self.use_cache
         nc.consolidate_information()
 
         return nc
@@ -773,9 +788,38 @@ class NumericalCircuit:
         Get Admittance structures
         :return: Admittance object
         """
+        if self.__admittances is not None:
+            return self.__admittances
+
+        Yshunt_bus = self.get_Yshunt_bus_pu()
+        Cf = self.passive_branch_data.Cf.tocsc()
+        Ct = self.passive_branch_data.Ct.tocsc()
+
+        if self.use_cache:
+            # the admittances are kept in the cache by the content of their inputs
+            key = ('Ybus', get_arrays_key(self.passive_branch_data.R,
+                                          self.passive_branch_data.X,
+                                          self.passive_branch_data.G,
+                                          self.passive_branch_data.B,
+                                          self.active_branch_data.tap_module,
+                                          self.passive_branch_data.virtual_tap_f,
+                                          self.passive_branch_data.virtual_tap_t,
+                                          self.active_branch_data.tap_angle,
+                                          Cf.indptr, Cf.indices, Cf.data,
+                                          Ct.indptr, Ct.indices, Ct.data,
+                                          Yshunt_bus,
+                                          self.passive_branch_data.conn))
+
+            adm = COMPILATION_CACHE.get(key)
+
+            if adm is not None:
+                # the admittances may be modified in-place (i.e. modify_taps), the cache keeps its own copy
+                return adm.copy()
+        else:
+            key = None
 
         # compute admittances on demand
-        return ycalc.compute_admittances(
+        adm = ycalc.compute_admittances(
             R=self.passive_branch_data.R,
             X=self.passive_branch_data.X,
             G=self.passive_branch_data.G,
@@ -784,13 +828,48 @@ class NumericalCircuit:
             vtap_f=self.passive_branch_data.virtual_tap_f,
             vtap_t=self.passive_branch_data.virtual_tap_t,
             tap_angle=self.active_branch_data.tap_angle,
-            Cf=self.passive_branch_data.Cf.tocsc(),
-            Ct=self.passive_branch_data.Ct.tocsc(),
-            Yshunt_bus=self.get_Yshunt_bus_pu(),
+            Cf=Cf,
+            Ct=Ct,
+            Yshunt_bus=Yshunt_bus,
             conn=self.passive_branch_data.conn,
             seq=1
         )
 
+        if key is not None:
+            COMPILATION_CACHE.set(key, adm.copy())
+
+        return adm
+
+    def get_incremental_admittance_matrices(self) -> ycalc.IncrementalAdmittanceMatrices:
+        """
+        Get admittance structures that can be updated in place (branch states, taps and shunts)
+        :return: IncrementalAdmittanceMatrices
+        """
+        return ycalc.compute_incremental_admittances(
+            nbus=self.nbus,
+            R=self.passive_branch_data.R,
+            X=self.passive_branch_data.X,
+            G=self.passive_branch_data.G,
+            B=self.passive_branch_data.B,
+            tap_module=self.active_branch_data.tap_module,
+            vtap_f=self.passive_branch_data.virtual_tap_f,
+            vtap_t=self.passive_branch_data.virtual_tap_t,
+            tap_angle=self.active_branch_data.tap_angle,
+            Yshunt_bus=self.get_Yshunt_bus_pu(),
+            F=self.passive_branch_data.F,
+            T=self.passive_branch_data.T,
+            active=self.passive_branch_data.active
+        )
+
+    def set_admittance_matrices(self,
+                                adm: ycalc.AdmittanceMatrices | ycalc.IncrementalAdmittanceMatrices | None) -> None:
+        """
+        Fix the admittance matrices returned by get_admittance_matrices.
+        This is used to reuse the admittances computed for another circuit with the same admittance data.
+        :param adm: AdmittanceMatrices, or None to compute them on demand again
+        """
+        self.__admittances = adm
+
     def get_series_admittance_matrices(self) -> ycalc.SeriesAdmittanceMatrices:
         """
 
@@ -1477,18 +1556,21 @@ class NumericalCircuit:
         nc.shunt_data = self.shunt_data.slice(elm_idx=shunt_idx, bus_idx=bus_idx, bus_map=bus_map)
         nc.vsc_data = self.vsc_data.slice(elm_idx=vsc_idx, bus_idx=bus_idx, bus_map=bus_map, logger=logger)
         nc.hvdc_data = self.hvdc_data.slice(elm_idx=hvdc_idx, bus_idx=bus_idx, bus_map=bus_map, logger=logger)
+        nc.use_cache = self.use_cache
 
         return nc
 
     def split_into_islands(self,
                            ignore_single_node_islands: bool = False,
                            consider_hvdc_as_island_links: bool = False,
-                           logger: Logger | None = None) -> List["NumericalCircuit"]:
+                           logger: Logger | None = None,
+                           idx_islands: List[IntVec] | None = None) -> List["NumericalCircuit"]:
         """
         Split circuit into islands
         :param ignore_single_node_islands: ignore islands composed of only one bus
         :param consider_hvdc_as_island_links: Does the HVDCLine works for the topology as a normal line?
         :param logger: Logger
+        :param idx_islands: (optional) bus indices of the islands, found in a previous split of the same topology
         :return: List[NumericCircuit]
         """
         if logger is None:
@@ -1497,10 +1579,33 @@ class NumericalCircuit:
         # detect the topology reductions
         self.process_reducible_branches()
 
-        # find the matching islands
-        adj = self.compute_adjacency_matrix(consider_hvdc_as_island_links=consider_hvdc_as_island_links)
+        if idx_islands is None:
+            if self.use_cache:
+                # the islands are kept in the cache by the content of the topology
+                key = ('islands', get_arrays_key(consider_hvdc_as_island_links,
+                                                 self.bus_data.active,
+                                                 self.passive_branch_data.F,
+                                                 self.passive_branch_data.T,
+                                                 self.passive_branch_data.active,
+                                                 self.vsc_data.F,
+                                                 self.vsc_data.T,
+                                                 self.vsc_data.F_dcn,
+                                                 self.vsc_data.active,
+                                                 self.hvdc_data.F,
+                                                 self.hvdc_data.T,
+                                                 self.hvdc_data.active))
+                idx_islands = COMPILATION_CACHE.get(key)
+            else:
+                key = None
+
+            if idx_islands is None:
+                # find the matching islands
+                adj = self.compute_adjacency_matrix(consider_hvdc_as_island_links=consider_hvdc_as_island_links)
+
+                idx_islands = tp.find_islands(adj=adj, active=self.bus_data.active)
 
-        idx_islands = tp.find_islands(adj=adj, active=self.bus_data.active)
+                if key is not None:
+                    COMPILATION_CACHE.set(key, idx_islands)
 
         circuit_islands = list()  # type: List[NumericalCircuit]
 
@@ -128,15 +128,15 @@ class PassiveBranchData(BranchParentData):
         data.G = self.G.copy()
         data.B = self.B.copy()
 
-        data.R0 = self.R.copy()
-        data.X0 = self.X.copy()
-        data.G0 = self.G.copy()
-        data.B0 = self.B.copy()
+        data.R0 = self.R0.copy()
+        data.X0 = self.X0.copy()
+        data.G0 = self.G0.copy()
+        data.B0 = self.B0.copy()
 
-        data.R2 = self.R.copy()
-        data.X2 = self.X.copy()
-        data.G2 = self.G.copy()
-        data.B2 = self.B.copy()
+        data.R2 = self.R2.copy()
+        data.X2 = self.X2.copy()
+        data.G2 = self.G2.copy()
+        data.B2 = self.B2.copy()
 
         data.conn = self.conn.copy()  # winding connection
         data.m_taps = self.m_taps.copy()
@@ -145,6 +145,11 @@ class PassiveBranchData(BranchParentData):
         data.virtual_tap_f = self.virtual_tap_f.copy()
         data.virtual_tap_t = self.virtual_tap_t.copy()
 
+        data.Yff3 = self.Yff3.copy()
+        data.Yft3 = self.Yft3.copy()
+        data.Ytf3 = self.Ytf3.copy()
+        data.Ytt3 = self.Ytt3.copy()
+
         data.phA = self.phA.copy()
         data.phB = self.phB.copy()
         data.phC = self.phC.copy()
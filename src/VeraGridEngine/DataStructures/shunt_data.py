@@ -134,6 +134,7 @@ class ShuntData:
         data.controllable = self.controllable.copy()
 
         data.Y = self.Y.copy()
+        data.Y3_star = self.Y3_star.copy()
 
         data.qmax = self.qmax.copy()
         data.qmin = self.qmin.copy()
@@ -6,6 +6,7 @@ import random
 import uuid
 import numpy as np
 from VeraGridEngine.Devices.profile import Profile
+from VeraGridEngine.Devices.model_revision import MODEL_REVISION
 from typing import List, Dict, AnyStr, Any, Union, Type, Tuple
 from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.enumerations import (DeviceType, TimeFrame, BuildStatus, WindingsConnection,
@@ -241,6 +242,7 @@ class EditableDevice:
         'non_editable_properties',
         'properties_with_profile',
         '__auto_update_enabled',
+        '_revision',
     )
 
     def __init__(self,
@@ -344,6 +346,43 @@ class EditableDevice:
     def __repr__(self) -> str:
         return get_action_symbol(self.action) + "::" + self.idtag + '::' + self.name
 
+    def __setattr__(self, key: str, value: Any) -> None:
+        """
+        Set an attribute, recording the modification in the model revision
+        :param key: attribute name
+        :param value: value
+        """
+        MODEL_REVISION.value += 1
+        object.__setattr__(self, '_revision', MODEL_REVISION.value)
+        object.__setattr__(self, key, value)
+
+    def get_revision(self) -> int:
+        """
+        Get the model revision of the last modification of the device or any of its profiles
+        :return: int
+        """
+        revision = self._revision
+
+        for prof_attr in self.properties_with_profile.values():
+            revision = max(revision, getattr(self, prof_attr).revision)
+
+        return revision
+
+    def is_modified_after(self, revision: int) -> bool:
+        """
+        Was the device or any of its profiles modified after a model revision?
+        :param revision: model revision (see get_model_revision)
+        :return: bool
+        """
+        if self._revision > revision:
+            return True
+
+        for prof_attr in self.properties_with_profile.values():
+            if getattr(self, prof_attr).revision > revision:
+                return True
+
+        return False
+
     def __hash__(self) -> int:
         # alternatively, return hash(repr(self))
         return int(self.idtag, 16)  # hex string to int
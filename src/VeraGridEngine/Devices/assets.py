@@ -399,6 +399,18 @@ class Assets:
             for elm in elements:
                 yield elm
 
+    def get_structure_key(self) -> int:
+        """
+        Get a key of the devices that form the model (which objects, in which order) and of the time profile.
+        The values of the devices are not considered, those are tracked by the model revision
+        :return: int
+        """
+        return hash((id(self._time_profile),
+                     self.get_time_number(),
+                     tuple(hash(tuple(map(id, elements)))
+                           for elements in (getattr(self, name) for name in Assets.__slots__)
+                           if isinstance(elements, list))))
+
     # ------------------------------------------------------------------------------------------------------------------
     # Time profile
     # ------------------------------------------------------------------------------------------------------------------
@@ -469,7 +481,8 @@ class Assets:
         :return:
         """
         if self.has_time_series:
-            return self._time_profile.values.astype(np.int64) // 10 ** 9
+            # the resolution of the array depends on how it was created, so convert it to seconds first
+            return self._time_profile.values.astype('datetime64[s]').astype(np.int64)
         else:
             return np.zeros(0, dtype=np.int64)
 
@@ -0,0 +1,81 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from typing import Dict, Tuple
+
+
+class ModelRevision:
+    """
+    Revision counter of the models in memory.
+    It is increased by every modification of the devices and their profiles, so that the data derived
+    from a model (i.e. the compiled numerical circuits) can be validated without comparing the model contents
+    """
+    __slots__ = ('value', 'last_touch')
+
+    def __init__(self) -> None:
+        """
+        Constructor
+        """
+        self.value: int = 0
+
+        # revision of the last modification that the devices could not see (see touch_model)
+        self.last_touch: int = 0
+
+    def increase(self) -> None:
+        """
+        Record a modification
+        """
+        self.value += 1
+
+
+# the devices of all the circuits share the counter: their revisions are stamps of it,
+# and each circuit takes the latest stamp of its own devices (see MultiCircuit.get_revision)
+MODEL_REVISION = ModelRevision()
+
+
+def get_model_revision() -> int:
+    """
+    Get the current revision of the models in memory
+    :return: int
+    """
+    return MODEL_REVISION.value
+
+
+def touch_model() -> None:
+    """
+    Record a modification that the devices cannot see
+    (i.e. numpy arrays of a profile or a device modified in-place)
+    """
+    MODEL_REVISION.value += 1
+    MODEL_REVISION.last_touch = MODEL_REVISION.value
+
+
+def get_last_touch() -> int:
+    """
+    Get the revision of the last modification that the devices could not see.
+    Since it is not known which devices were modified, all of them must be considered modified after it
+    :return: int
+    """
+    return MODEL_REVISION.last_touch
+
+
+class ModelSaveState:
+    """
+    State of a circuit when it was last saved to (or loaded from) a file,
+    to find out which device types were modified afterwards
+    """
+    __slots__ = ('file_name', 'file_time', 'revision', 'idtags')
+
+    def __init__(self, file_name: str, file_time: float, revision: int, idtags: Dict[str, Tuple[str, ...]]):
+        """
+        Constructor
+        :param file_name: name of the file
+        :param file_time: modification time of the file
+        :param revision: model revision
+        :param idtags: idtags of the devices of each object type {object type name: (idtag, ...)}
+        """
+        self.file_name: str = file_name
+        self.file_time: float = file_time
+        self.revision: int = revision
+        self.idtags: Dict[str, Tuple[str, ...]] = idtags
@@ -17,6 +17,7 @@ from scipy.sparse import csc_matrix, lil_matrix, coo_matrix
 
 from VeraGridEngine.Devices.assets import Assets
 from VeraGridEngine.Devices.Parents.editable_device import EditableDevice
+from VeraGridEngine.Devices.model_revision import ModelSaveState, get_model_revision, get_last_touch
 from VeraGridEngine.basic_structures import IntVec, Vec, Mat, CxVec, IntMat, CxMat
 
 import VeraGridEngine.Devices as dev
@@ -159,6 +160,9 @@ class MultiCircuit(Assets):
         'Sbase',
         'fBase',
         'logger',
+        'save_state',
+        '_revision',
+        '_revision_checked',
     )
 
     def __init__(self,
@@ -199,6 +203,35 @@ class MultiCircuit(Assets):
         # logger of events
         self.logger: Logger = Logger()
 
+        # state of the circuit in the file it was last saved to (or loaded from), for the incremental saves
+        self.save_state: Union[ModelSaveState, None] = None
+
+        # revision of the last modification of the devices of this circuit (see get_revision)
+        self._revision: int = 0
+
+        # model revision when self._revision was computed
+        self._revision_checked: int = -1
+
+    def get_revision(self) -> int:
+        """
+        Get the revision of this circuit: the model revision of the last modification of its devices
+        and their profiles (or of the last touch_model). The modifications of other circuits do not change it.
+        The devices are only explored again if any model was modified since the last call.
+        The structural modifications (adding or removing devices) are tracked by get_structure_key
+        :return: int
+        """
+        model_revision = get_model_revision()
+
+        if self._revision_checked != model_revision:
+            revision = get_last_touch()
+            for elm in self.items():
+                revision = max(revision, elm.get_revision())
+
+            self._revision = revision
+            self._revision_checked = model_revision
+
+        return self._revision
+
     def to_dict(self):
         """
         Create grid configuration data
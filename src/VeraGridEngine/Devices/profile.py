@@ -10,6 +10,7 @@ import numba as nb
 
 from VeraGridEngine.basic_structures import Numeric, NumericVec, IntVec
 from VeraGridEngine.enumerations import DeviceType
+from VeraGridEngine.Devices.model_revision import MODEL_REVISION
 from VeraGridEngine.Utils.Sparse.sparse_array import SparseArray, PROFILE_TYPES, check_type
 
 
@@ -93,6 +94,8 @@ class Profile:
         '_sparsity_threshold',
         '_dtype',
         '_initialized',
+        '_lazy',
+        '_revision',
     )
 
     def __init__(self,
@@ -109,6 +112,9 @@ class Profile:
         :param is_sparse: Is sparse? provide the value, if the array is provided, this is deduced from the array
         """
 
+        # model revision of the last modification of the profile
+        self._revision: int = MODEL_REVISION.value
+
         self._is_sparse: bool = is_sparse
 
         self._sparse_array: Union[SparseArray, None] = None
@@ -121,17 +127,99 @@ class Profile:
 
         self._initialized: bool = False
 
+        # (block, column, size, default value) of a profile that is only read from the block when accessed
+        self._lazy: Union[Tuple[Any, int, int, Numeric], None] = None
+
         if arr is not None:
             self.set(arr=arr)
 
+    @property
+    def revision(self) -> int:
+        """
+        Model revision of the last modification of the profile
+        :return: int
+        """
+        return self._revision
+
+    def _record_modification(self) -> None:
+        """
+        Record a modification of the profile in the model revision
+        """
+        MODEL_REVISION.value += 1
+        self._revision = MODEL_REVISION.value
+
     def clear(self):
         """
         Clear the profile
         :return:
         """
+        self._record_modification()
         self._sparse_array: Union[SparseArray, None] = None
         self._dense_array: Union[NumericVec, None] = None
         self._initialized: bool = False
+        self._lazy = None
+
+    @property
+    def is_lazy(self) -> bool:
+        """
+        Are the profile values still in the profiles block (not read yet)?
+        :return: bool
+        """
+        return self._lazy is not None
+
+    def set_lazy(self, block: Any, col: int, size: int, default_value: Numeric, is_sparse: bool) -> None:
+        """
+        Point the profile to a column of a (time, elements) profiles block, that is only read when accessed
+        :param block: numpy array or any object that supports numpy indexing (i.e. ProfileBlock)
+        :param col: column of the block
+        :param size: profile size
+        :param default_value: default value (for sparse profiles)
+        :param is_sparse: is the profile sparse once read?
+        """
+        self._record_modification()
+        self._lazy = (block, col, size, default_value)
+        self._is_sparse = is_sparse
+        self._sparse_array = None
+        self._dense_array = None
+        self._initialized = True
+
+    def materialize(self) -> None:
+        """
+        Read the values of a lazy profile from its block
+        """
+        if self._lazy is not None:
+            block, col, size, default_value = self._lazy
+            self._lazy = None
+            arr = np.array(block[:, col])
+
+            if self._is_sparse:
+                idx = np.where(arr != default_value)[0]
+                self.create_sparse(size=size,
+                                   default_value=default_value,
+                                   map_data={int(i): arr[i].item() for i in idx})
+            else:
+                self._dense_array = arr
+
+    def get_window(self, start: int, end: int) -> NumericVec:
+        """
+        Get the values of a time window without reading the rest of a lazy profile
+        :param start: first time index
+        :param end: last time index (not included)
+        :return: NumericVec
+        """
+        if self._lazy is not None:
+            block, col, size, default_value = self._lazy
+            return np.array(block[start:end, col])
+
+        elif self._is_sparse:
+            arr = np.full(end - start, self._sparse_array.default_value)
+            for key, val in self._sparse_array.get_map().items():
+                if start <= key < end:
+                    arr[key - start] = val
+            return arr
+
+        else:
+            return self._dense_array[start:end].copy()
 
     def info(self):
         """
@@ -141,6 +229,7 @@ class Profile:
         return {
             "me": hex(id(self)),
             "initialized": self._initialized,
+            "lazy": self._lazy is not None,
             "size": self.size(),
             "is_sparse": self._is_sparse,
             "sparsity_threshold": self._sparsity_threshold,
@@ -154,6 +243,7 @@ class Profile:
         Return the dictionary hosting the sparse data if this profile is sparse
         :return: Dict[int, Numeric]
         """
+        self.materialize()
         if self._sparse_array is not None:
             return self._sparse_array.get_map()
         else:
@@ -174,7 +264,9 @@ class Profile:
         Get the declared type
         :return: default_value
         """
-        if self.sparse_array is not None:
+        if self._lazy is not None:
+            return self._lazy[3] if self._is_sparse else 0
+        elif self.sparse_array is not None:
             return self.sparse_array.default_value
         else:
             return 0
@@ -218,6 +310,7 @@ class Profile:
         Sparse array getter
         :return: SparseArray or None
         """
+        self.materialize()
         return self._sparse_array
 
     @property
@@ -226,6 +319,7 @@ class Profile:
         Dense array getter
         :return: numpy array or None
         """
+        self.materialize()
         return self._dense_array
 
     def create_sparse(self, size: int, default_value: Numeric, map_data: Dict[int, Numeric] = None):
@@ -235,6 +329,8 @@ class Profile:
         :param default_value: default value
         :param map_data: map with the data
         """
+        self._record_modification()
+        self._lazy = None
         self._is_sparse = True
 
         try:
@@ -257,6 +353,8 @@ class Profile:
         :param size: size
         :param default_value: default value
         """
+        self._record_modification()
+        self._lazy = None
         self._is_sparse = False
         self._dense_array = np.full(size, default_value)
         self._sparse_array = None
@@ -268,6 +366,7 @@ class Profile:
         Get the profile sparsity
         :return: value (0 for fully dense, almost 1 for fully sparse)
         """
+        self.materialize()
         if self._is_sparse:
             return self._sparse_array.get_sparsity()
         else:
@@ -279,6 +378,7 @@ class Profile:
         :param arr: numpy array to set
         :return:
         """
+        self._record_modification()
 
         if not isinstance(arr, np.ndarray):
             print("You can only set numpy arrays")
@@ -290,6 +390,8 @@ class Profile:
             # Nothing to do
             return False
 
+        self._lazy = None
+
         if not check_type(dtype=self.dtype, value=arr[0]):
             try:
                 # try casting
@@ -356,6 +458,8 @@ class Profile:
         :param other: Profile
         :return: equal?
         """
+        self.materialize()
+        other.materialize()
         if self._is_sparse == other._is_sparse:
 
             if self._is_sparse:
@@ -384,7 +488,11 @@ class Profile:
         :param key: index position
         :return: value at "key"
         """
-        if self._is_sparse:
+        if self._lazy is not None:
+            # read the value straight from the block
+            return self._lazy[0][key, self._lazy[1]]
+
+        elif self._is_sparse:
             return self._sparse_array[key]
         else:
 
@@ -406,6 +514,8 @@ class Profile:
         :param key: item index
         :param value: value to set
         """
+        self._record_modification()
+        self.materialize()
         if isinstance(key, int):
 
             if self._is_sparse:
@@ -439,6 +549,7 @@ class Profile:
         Convert this profile to sparse
         :return: Nothing
         """
+        self.materialize()
         if self._is_sparse:
             self._dense_array = self._sparse_array.toarray()
             self._sparse_array = None
@@ -449,6 +560,8 @@ class Profile:
         Resize the profile
         :param n: new size
         """
+        self._record_modification()
+        self.materialize()
         if isinstance(n, int):
             if self._initialized:
                 if self._is_sparse:
@@ -471,6 +584,8 @@ class Profile:
         Resample this profile in-place
         :param indices: new indices
         """
+        self._record_modification()
+        self.materialize()
         if self._is_sparse:
             self._sparse_array.resample(indices=indices)
         else:
@@ -481,8 +596,10 @@ class Profile:
         Fill this profile with the same value
         :param value: any value
         """
+        self._record_modification()
         check_type(dtype=self.dtype, value=value)
 
+        self._lazy = None
         self.default_value = value
         self._is_sparse = True
         if self._sparse_array is None:
@@ -495,6 +612,8 @@ class Profile:
         Scale this profile with the same value
         :param value: any value
         """
+        self._record_modification()
+        self.materialize()
         if self._is_sparse:
 
             # Scale the map
@@ -511,6 +630,8 @@ class Profile:
         :return: integer
         """
         if self._initialized:
+            if self._lazy is not None:
+                return self._lazy[2]
             return self._sparse_array.size() if self._is_sparse else len(self._dense_array)
         else:
             return 0
@@ -521,6 +642,11 @@ class Profile:
         :return: NumericVec
         """
         if self.size() > 0:
+            if self._lazy is not None and self._is_sparse:
+                # sparse profiles return a new array anyway, so there is no need to keep the values
+                return np.array(self._lazy[0][:, self._lazy[1]])
+
+            self.materialize()
             if self._is_sparse:
                 return self._sparse_array.toarray()
             else:
@@ -548,6 +674,7 @@ class Profile:
         Get the sparse representation of the sparse data
         :return:
         """
+        self.materialize()
         return self._sparse_array.get_sparse_representation()
 
     def set_sparse_data_from_data(self, indptr, data):
@@ -556,6 +683,8 @@ class Profile:
         :param indptr: array of data indices
         :param data: array of data values
         """
+        self._record_modification()
+        self.materialize()
         self._sparse_array.set_sparse_data_from_data(indptr=indptr, data=data)
 
     def fix_nan(self, default_value: float = 0.0):
@@ -563,6 +692,8 @@ class Profile:
         Replace NaN values with default value in-place
         :param default_value: some value to replace the NaN with
         """
+        self._record_modification()
+        self.materialize()
         if self.dtype == float:
             if not self._is_sparse:
                 if self._dense_array is not None:
@@ -573,6 +704,7 @@ class Profile:
         Deep copy
         :return:
         """
+        self.materialize()
         new_prof = Profile(
             default_value=self.default_value,
             data_type=self.dtype,
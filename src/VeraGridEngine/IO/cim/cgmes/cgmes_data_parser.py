@@ -4,13 +4,19 @@
 # SPDX-License-Identifier: MPL-2.0
 
 import os
-from typing import Dict, List, Union, Callable, Tuple
+import zipfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Union, Callable, Tuple, BinaryIO, Generator
 import xml.etree.ElementTree as ET
 from VeraGridEngine.data_logger import DataLogger
 from VeraGridEngine.IO.base.base_circuit import BaseCircuit
 from VeraGridEngine.IO.veragrid.zip_interface import get_xml_from_zip, get_xml_content
 from VeraGridEngine.enumerations import CGMESVersions
 
+# minimum size of the xml files to parse them in parallel processes, below it starting the processes costs more
+PARALLEL_PARSING_MIN_SIZE = 32 * 1024 * 1024
+
 
 def find_id(child: ET.Element):
     """
@@ -57,6 +63,55 @@ def fix_child_result_datatype(child_result: Dict):
     return child_result
 
 
+def add_xml_child_to_dict(result: Dict, child: ET.Element) -> None:
+    """
+    Add an element to the dictionary representation of its parent
+    :param result: dictionary representing the parent element (modified in-place)
+    :param child: XML element
+    """
+    obj_id = find_id(child)
+    class_name = find_class_name(child)
+
+    if len(child) > 0:
+        child_result = parse_xml_to_dict(child)
+        child_result = fix_child_result_datatype(child_result)
+        objects_list = result.get(class_name, None)
+
+        if objects_list is None:
+            result[class_name] = {obj_id: child_result}
+        else:
+            objects_list[obj_id] = child_result
+    else:
+        if class_name not in result:
+            if child.text is None:
+                result[class_name] = obj_id  # it is a resource id
+            else:
+                result[class_name] = child.text
+        else:
+            if child.text is None:
+                t_set = set()
+                if isinstance(result[class_name], list):
+                    t_set.update(result[class_name])
+                else:
+                    t_set.add(result[class_name])
+
+                t_set.update([obj_id])  # it is a resource id
+                if len(t_set) > 1:
+                    result[class_name] = list(t_set)
+                else:
+                    result[class_name] = list(t_set)[0]
+            else:
+                t_set = {child.text}
+                if isinstance(result[class_name], list):
+                    t_set.update(result[class_name])
+                else:
+                    t_set.add(result[class_name])
+                if len(t_set) > 1:
+                    result[class_name] = list(t_set)
+                else:
+                    result[class_name] = list(t_set)[0]
+
+
 def parse_xml_to_dict(xml_element: ET.Element):
     """
     Parse element into dictionary
@@ -67,48 +122,44 @@ def parse_xml_to_dict(xml_element: ET.Element):
 
     for child in xml_element:
         # key = child.tag
+        add_xml_child_to_dict(result, child)
 
-        obj_id = find_id(child)
-        class_name = find_class_name(child)
+    return result
 
-        if len(child) > 0:
-            child_result = parse_xml_to_dict(child)
-            child_result = fix_child_result_datatype(child_result)
-            objects_list = result.get(class_name, None)
 
-            if objects_list is None:
-                result[class_name] = {obj_id: child_result}
-            else:
-                objects_list[obj_id] = child_result
+def iter_xml_objects(file_ptr: Union[BinaryIO, str]) -> Generator[ET.Element, None, None]:
+    """
+    Iterate the first level elements (the CIM objects) of an xml file while it is being read.
+    Each element is cleared once it has been consumed, so the whole document is never held in memory
+    :param file_ptr: binary file pointer (from file or zip file) or file path
+    :return: generator of the completely parsed first level elements
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file_ptr, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
         else:
-            if class_name not in result:
-                if child.text is None:
-                    result[class_name] = obj_id  # it is a resource id
-                else:
-                    result[class_name] = child.text
-            else:
-                if child.text is None:
-                    t_set = set()
-                    if isinstance(result[class_name], list):
-                        t_set.update(result[class_name])
-                    else:
-                        t_set.add(result[class_name])
+            depth -= 1
+            if depth == 1:
+                yield elem
+                # drop the consumed object (the root only holds the first level elements)
+                root.clear()
 
-                    t_set.update([obj_id])  # it is a resource id
-                    if len(t_set) > 1:
-                        result[class_name] = list(t_set)
-                    else:
-                        result[class_name] = list(t_set)[0]
-                else:
-                    t_set = {child.text}
-                    if isinstance(result[class_name], list):
-                        t_set.update(result[class_name])
-                    else:
-                        t_set.add(result[class_name])
-                    if len(t_set) > 1:
-                        result[class_name] = list(t_set)
-                    else:
-                        result[class_name] = list(t_set)[0]
+
+def parse_xml_file(file_ptr: Union[BinaryIO, str]) -> Dict:
+    """
+    Parse an xml file into a dictionary, streaming the file instead of building its whole tree.
+    The result is the same as parse_xml_to_dict of the document root.
+    :param file_ptr: binary file pointer (from file or zip file) or file path
+    :return: Dictionary representing the XML
+    """
+    result = dict()
+
+    for child in iter_xml_objects(file_ptr):
+        add_xml_child_to_dict(result, child)
 
     return result
 
@@ -216,6 +267,58 @@ def read_cgmes_files(cim_files: Union[List[str], str], logger: DataLogger) -> Di
     return data
 
 
+def get_cgmes_sources(cim_files: Union[List[str], str],
+                      logger: DataLogger) -> List[Tuple[str, str, Union[str, None], int]]:
+    """
+    Get the xml files contained in a list of .zip or xml files, without reading them
+    :param cim_files: list of file names
+    :param logger: DataLogger instance
+    :return: list of (file name as in read_cgmes_files, file path, zip member name or None, size in bytes)
+    """
+    # file name -> (file path, zip member name, size), the repeated names are overwritten like in read_cgmes_files
+    sources: Dict[str, Tuple[str, Union[str, None], int]] = dict()
+
+    if isinstance(cim_files, list):
+        files = [(f, os.path.basename(f)) for f in cim_files]
+    else:
+        files = [(cim_files, os.path.splitext(cim_files)[0])]
+
+    for f, xml_name in files:
+        _, file_extension = os.path.splitext(f)
+
+        if file_extension == '.xml':
+            sources[xml_name] = (f, None, os.path.getsize(f))
+
+        elif file_extension == '.zip':
+            try:
+                with zipfile.ZipFile(f) as zip_file_pointer:
+                    for info in zip_file_pointer.infolist():
+                        name, extension = os.path.splitext(info.filename)
+                        if extension == '.xml':
+                            sources[name] = (f, info.filename, info.file_size)
+            except zipfile.BadZipFile:
+                logger.add_error("BadZipFile", value=f)
+                print(f"BadZipFile {f}")
+
+    return [(name, file_path, member, size) for name, (file_path, member, size) in sources.items()]
+
+
+def parse_cgmes_source(file_path: str, member: Union[str, None] = None) -> Dict:
+    """
+    Parse a CGMES xml file (this runs in the worker processes)
+    :param file_path: path of the .xml or .zip file
+    :param member: name of the xml file inside the zip file (None if file_path is the xml file)
+    :return: Dictionary representing the XML
+    """
+    if member is None:
+        with open(file_path, 'rb') as file_ptr:
+            return parse_xml_file(file_ptr)
+    else:
+        with zipfile.ZipFile(file_path) as zip_file_pointer:
+            with zip_file_pointer.open(member) as file_ptr:
+                return parse_xml_file(file_ptr)
+
+
 def sort_cgmes_files(links: List[Tuple[str, str, str]]) -> List[str]:
     """
     Sorts the CIM files in the preferred reading order
@@ -274,12 +377,16 @@ class CgmesDataParser(BaseCircuit):
     def __init__(self,
                  text_func: Union[Callable, None] = None,
                  progress_func: Union[Callable, None] = None,
-                 logger=DataLogger()):
+                 logger=DataLogger(),
+                 max_workers: Union[int, None] = None,
+                 parallel_min_size: int = PARALLEL_PARSING_MIN_SIZE):
         """
         CIM circuit constructor
         :param text_func: text callback function (optional)
         :param progress_func: progress callback function (optional)
         :param logger: DataLogger
+        :param max_workers: number of processes parsing the xml files (None for the cpu count, 1 for serial)
+        :param parallel_min_size: minimum size in bytes of all the xml files to parse them in parallel
         """
         BaseCircuit.__init__(self)
 
@@ -287,6 +394,9 @@ class CgmesDataParser(BaseCircuit):
         self.progress_func = progress_func
         self.logger: DataLogger = logger
 
+        self.max_workers: Union[int, None] = max_workers
+        self.parallel_min_size: int = parallel_min_size
+
         # file: Cim data of the file
         self.parsed_data = dict()
 
@@ -315,6 +425,33 @@ class CgmesDataParser(BaseCircuit):
         if self.progress_func is not None:
             self.progress_func(val)
 
+    def parse_sources(self,
+                      sources: List[Tuple[str, str, Union[str, None], int]]) -> Generator[Tuple[str, Dict], None, None]:
+        """
+        Parse the xml files, in parallel processes if they are big enough
+        :param sources: list of (file name, file path, zip member name or None, size in bytes)
+        :return: generator of (file name, dictionary representing the XML) in the order of the sources
+        """
+        max_workers = os.cpu_count() if self.max_workers is None else self.max_workers
+        n_workers = min(max_workers, len(sources))
+        total_size = sum(size for _, _, _, size in sources)
+
+        if n_workers > 1 and total_size >= self.parallel_min_size:
+            # the xml parsing holds the GIL, the files (i.e. EQ, TP, SSH and SV) are parsed in different processes
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context()) as executor:
+                futures = [executor.submit(parse_cgmes_source, file_path, member)
+                           for _, file_path, member, _ in sources]
+
+                for (file_name, _, _, _), future in zip(sources, futures):
+                    name, _ = os.path.splitext(file_name)
+                    self.emit_text('Parsing xml structure of ' + name)
+                    yield file_name, future.result()
+        else:
+            for file_name, file_path, member, _ in sources:
+                name, _ = os.path.splitext(file_name)
+                self.emit_text('Parsing xml structure of ' + name)
+                yield file_name, parse_cgmes_source(file_path, member)
+
     def load_files(self, files: List[str]) -> None:
         """
         Load CIM file
@@ -331,14 +468,12 @@ class CgmesDataParser(BaseCircuit):
                           "http://iec.ch/TC57/ns/CIM/SteadyStateHypothesis-EU/3.0",
                           "http://iec.ch/TC57/ns/CIM/StateVariables-EU/3.0",
                           "http://iec.ch/TC57/ns/CIM/Topology-EU/3.0"]
-        # import the cim files' content into a dictionary
-        data = read_cgmes_files(cim_files=files, logger=self.logger)
+        # find the xml files, they are streamed while parsing them
+        sources = get_cgmes_sources(cim_files=files, logger=self.logger)
+
         # Parse the files
         i = 0
-        for file_name, file_data in data.items():
-            name, file_extension = os.path.splitext(file_name)
-            self.emit_text('Parsing xml structure of ' + name)
-            file_cgmes_data = parse_xml_text(file_data)
+        for file_name, file_cgmes_data in self.parse_sources(sources):
 
             full_models_dict = file_cgmes_data.get('FullModel', None)
             difference_full_models_dict = file_cgmes_data.get('DifferenceModel', None)
@@ -416,7 +551,7 @@ class CgmesDataParser(BaseCircuit):
                                       comment="This is not a proper CGMES file")
 
             # emit progress
-            self.emit_progress((i + 1) / len(data) * 100)
+            self.emit_progress((i + 1) / len(sources) * 100)
             i += 1
 
         self.emit_text('Parsing done!')
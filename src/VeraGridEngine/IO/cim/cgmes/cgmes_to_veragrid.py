@@ -2,7 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
-
+import time
 from typing import Dict, List, Tuple, Union
 import numpy as np
 import VeraGridEngine.IO.cim.cgmes.cgmes_enums as cgmes_enums
@@ -24,7 +24,6 @@ from VeraGridEngine.IO.cim.cgmes.cgmes_utils import (get_nominal_voltage,
                                                      get_regulating_control_params,
                                                      get_pu_values_power_transformer_end,
                                                      get_slack_id,
-                                                     find_object_by_idtag,
                                                      find_terminal_bus,
                                                      build_cgmes_limit_dicts,
                                                      get_voltage_shunt)
@@ -115,6 +114,86 @@ class Cn2BusBarLookup:
             return None
 
 
+class CgmesIndex:
+    """
+    Reverse-reference indices of a CGMES model.
+    They are built once per conversion, in a single pass over each object list,
+    so that the converters resolve the associations with dictionary lookups
+    instead of searching the object lists for every device.
+    """
+
+    def __init__(self, cgmes_model: CgmesCircuit, logger: DataLogger):
+        """
+        Constructor
+        :param cgmes_model: CgmesCircuit
+        :param logger: DataLogger
+        """
+        # conducting equipment uuid -> terminals
+        self.device_to_terminal_dict: Dict[str, List[CGMES_TERMINAL]] = get_gcdev_device_to_terminal_dict(
+            cgmes_model=cgmes_model,
+            logger=logger
+        )
+
+        # DC conducting equipment uuid -> DC terminals, and the DC grounds
+        (self.dc_device_to_terminal_dict,
+         self.ground_buses,
+         self.ground_nodes) = get_gcdev_dc_device_to_terminal_dict(cgmes_model=cgmes_model, logger=logger)
+
+        # DC terminal rdfid -> uuid of the DC devices whose first DC terminal it is
+        self.dc_terminal_to_devices_dict: Dict[str, List[str]] = dict()
+        for device_uuid, dc_terminals in self.dc_device_to_terminal_dict.items():
+            lst = self.dc_terminal_to_devices_dict.get(dc_terminals[0].rdfid, None)
+            if lst is None:
+                self.dc_terminal_to_devices_dict[dc_terminals[0].rdfid] = [device_uuid]
+            else:
+                lst.append(device_uuid)
+
+        # ConnectivityNode uuid -> TopologicalNode (or DCTopologicalNode)
+        self.cn_to_tn_dict: Dict[str, CGMES_TOPOLOGICAL_NODE] = dict()
+        tn_types = (cgmes_model.cgmes_assets.class_dict.get("TopologicalNode"),
+                    cgmes_model.cgmes_assets.class_dict.get("DCTopologicalNode"))
+        for cn_elm in cgmes_model.cgmes_assets.ConnectivityNode_list:
+            if isinstance(getattr(cn_elm, "TopologicalNode", None), tn_types):
+                self.cn_to_tn_dict[cn_elm.uuid] = cn_elm.TopologicalNode
+
+        # NonlinearShuntCompensator rdfid -> points sorted by section number
+        self.nl_shunt_points_dict: Dict[str, List[CGMES_ASSETS]] = dict()
+        for nl_sc_p in cgmes_model.cgmes_assets.NonlinearShuntCompensatorPoint_list:
+            if nl_sc_p.NonlinearShuntCompensator is not None and not isinstance(nl_sc_p.NonlinearShuntCompensator,
+                                                                                str):
+                lst = self.nl_shunt_points_dict.get(nl_sc_p.NonlinearShuntCompensator.rdfid, None)
+                if lst is None:
+                    self.nl_shunt_points_dict[nl_sc_p.NonlinearShuntCompensator.rdfid] = [nl_sc_p]
+                else:
+                    lst.append(nl_sc_p)
+
+        for point_list in self.nl_shunt_points_dict.values():
+            point_list.sort(key=lambda obj: obj.sectionNumber)
+
+
+class ConversionTimer:
+    """
+    Accumulates the time spent in each stage of the conversion
+    """
+
+    def __init__(self, timings: Union[Dict[str, float], None] = None):
+        """
+        Constructor
+        :param timings: dictionary to fill with the seconds per stage (a new one is created if None)
+        """
+        self.timings: Dict[str, float] = dict() if timings is None else timings
+        self._t0 = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """
+        Record the time elapsed since the previous lap as the time of a stage
+        :param stage: name of the stage
+        """
+        t = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (t - self._t0)
+        self._t0 = t
+
+
 def get_gcdev_voltage_dict(cgmes_model: CgmesCircuit,
                            logger: DataLogger) -> Dict[str, Tuple[float, float]]:
     """
@@ -314,6 +393,7 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
                     gc_model: MultiCircuit,
                     v_dict: Dict[str, Tuple[float, float]],
                     cn_look_up: Cn2BusBarLookup,
+                    cgmes_index: CgmesIndex,
                     skip_dc_import: bool,
                     buses_to_skip: List,
                     default_nominal_voltage: float,
@@ -325,6 +405,7 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
     :param gc_model: gcdevCircuit
     :param v_dict: Dict[str, Terminal]
     :param cn_look_up: CnLookup
+    :param cgmes_index: CgmesIndex
     :param logger: DataLogger
     :return: dictionary relating the TopologicalNode uuid to the gcdev CalculationNode
              Dict[str, gcdev.Bus], fatal error?
@@ -340,10 +421,11 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
     calc_node_dict: Dict[str, gcdev.Bus] = dict()
 
     tp_with_cn = set()
-    TopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("TopologicalNode")
-    DCTopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("DCTopologicalNode")
     line_tpe = cgmes_model.cgmes_assets.class_dict.get("Line")
 
+    vl_dict = {elm.idtag: elm for elm in gc_model.voltage_levels}
+    substation_dict = {elm.idtag: elm for elm in gc_model.substations}
+
     # First convert every CN to a bus
     for cn_elm in cgmes_model.cgmes_assets.ConnectivityNode_list:
 
@@ -396,12 +478,12 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
         calc_node_dict[gcdev_elm.idtag] = gcdev_elm
 
         # Record the associated TopologicalNode
-        if hasattr(cn_elm, "TopologicalNode"):
-            if isinstance(cn_elm.TopologicalNode, (TopologicalNode_tpe, DCTopologicalNode_tpe)):
-                tp_uid = cn_elm.TopologicalNode.uuid
-                tp_with_cn.add(tp_uid)
-                # we double-record such that the TP is considered later
-                calc_node_dict[tp_uid] = gcdev_elm
+        tp_node = cgmes_index.cn_to_tn_dict.get(cn_elm.uuid, None)
+        if tp_node is not None:
+            tp_uid = tp_node.uuid
+            tp_with_cn.add(tp_uid)
+            # we double-record such that the TP is considered later
+            calc_node_dict[tp_uid] = gcdev_elm
 
     # A TopologicalNode is only converted if there is no ConnectivityNode associated
     for tp_node in cgmes_model.cgmes_assets.TopologicalNode_list:
@@ -452,15 +534,9 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
             if tp_node.ConnectivityNodeContainer is not None:
 
                 if isinstance(tp_node.ConnectivityNodeContainer, str):
-                    volt_lev: gcdev.VoltageLevel | None = find_object_by_idtag(
-                        object_list=gc_model.voltage_levels,
-                        target_idtag=tp_node.ConnectivityNodeContainer
-                    )
+                    volt_lev: gcdev.VoltageLevel | None = vl_dict.get(tp_node.ConnectivityNodeContainer, None)
                 else:
-                    volt_lev: gcdev.VoltageLevel | None = find_object_by_idtag(
-                        object_list=gc_model.voltage_levels,
-                        target_idtag=tp_node.ConnectivityNodeContainer.uuid
-                    )
+                    volt_lev: gcdev.VoltageLevel | None = vl_dict.get(tp_node.ConnectivityNodeContainer.uuid, None)
 
                 if volt_lev is None:
                     if not isinstance(tp_node.ConnectivityNodeContainer, line_tpe):
@@ -470,10 +546,7 @@ def get_gcdev_buses(cgmes_model: CgmesCircuit,
                                            device_property="ConnectivityNodeContainer")
                 else:
                     if volt_lev.substation is not None:
-                        substation: gcdev.Substation | None = find_object_by_idtag(
-                            object_list=gc_model.substations,
-                            target_idtag=volt_lev.substation.idtag
-                        )
+                        substation: gcdev.Substation | None = substation_dict.get(volt_lev.substation.idtag, None)
                     else:
                         substation = None
 
@@ -795,9 +868,8 @@ def get_gcdev_hvdc_from_dcline_and_vscs(
         cgmes_model: CgmesCircuit,
         gcdev_model: MultiCircuit,
         dc_bus_dict: Dict[str, gcdev.Bus],
-        dc_device_to_terminal_dict: Dict[str, List[CGMES_DC_TERMINAL]],
+        cgmes_index: CgmesIndex,
         bus_dict: Dict[str, gcdev.Bus],
-        device_to_terminal_dict: Dict[str, List[CGMES_TERMINAL]],
         logger: DataLogger) -> None:
     """
     Convert the CGMES VcConverter to gcdev simplified HVDC lines
@@ -806,15 +878,20 @@ def get_gcdev_hvdc_from_dcline_and_vscs(
     :param cgmes_model: CgmesCircuit
     :param gcdev_model: gcdevCircuit
     :param dc_bus_dict:
-    :param dc_device_to_terminal_dict:
+    :param cgmes_index: CgmesIndex (with the AC and DC device to terminal dictionaries)
     :param bus_dict: Dict[str, gcdev.Bus]
-    :param device_to_terminal_dict: Dict[str, Terminal]
     :param logger: DataLogger
     :return: None
     """
     TopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("TopologicalNode")
     DCTopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("DCTopologicalNode")
 
+    device_to_terminal_dict = cgmes_index.device_to_terminal_dict
+    dc_device_to_terminal_dict = cgmes_index.dc_device_to_terminal_dict
+
+    # VsConverter uuid -> position, to keep the order of the list
+    vsc_position_dict = {vsc.uuid: i for i, vsc in enumerate(cgmes_model.cgmes_assets.VsConverter_list)}
+
     for dc_line_sgm in cgmes_model.cgmes_assets.DCLineSegment_list:
         # or in more general it is DCLine_list
 
@@ -829,13 +906,14 @@ def get_gcdev_hvdc_from_dcline_and_vscs(
         dc_terminals = dc_device_to_terminal_dict.get(dc_line_sgm.uuid, None)
 
         # get the VSC-s connected to this dc_buses
-        device_list = [device
-                       for device, term in dc_device_to_terminal_dict.items()
-                       if term[0] in dc_terminals]
+        vsc_positions = set()
+        for dc_term in (dc_terminals if dc_terminals is not None else list()):
+            for device in cgmes_index.dc_terminal_to_devices_dict.get(dc_term.rdfid, list()):
+                position = vsc_position_dict.get(device, None)
+                if position is not None:
+                    vsc_positions.add(position)
 
-        vsc_list = [vsc
-                    for vsc in cgmes_model.cgmes_assets.VsConverter_list
-                    if vsc.uuid in device_list]
+        vsc_list = [cgmes_model.cgmes_assets.VsConverter_list[i] for i in sorted(vsc_positions)]
 
         # ONLY one line + two converters structure can be simplified
         if len(vsc_list) != 2:
@@ -1668,6 +1746,9 @@ def get_transformer_tap_changers(cgmes_model: CgmesCircuit,
     phase_sy_class = cgmes_model.assets.PhaseTapChangerSymmetrical
     phase_as_class = cgmes_model.assets.PhaseTapChangerAsymmetrical
 
+    trafo2w_dict = {elm.idtag: elm for elm in gcdev_model.transformers2w}
+    trafo3w_dict = {elm.idtag: elm for elm in gcdev_model.transformers3w}
+
     # convert ac lines
     for device_list in [cgmes_model.cgmes_assets.RatioTapChanger_list,
                         cgmes_model.cgmes_assets.PhaseTapChangerSymmetrical_list,
@@ -1754,17 +1835,11 @@ def get_transformer_tap_changers(cgmes_model: CgmesCircuit,
                 trafo_id = tap_changer.TransformerEnd.PowerTransformer.uuid
 
                 # Search in Transformer 2W
-                gcdev_trafo = find_object_by_idtag(
-                    object_list=gcdev_model.transformers2w,
-                    target_idtag=trafo_id
-                )
+                gcdev_trafo = trafo2w_dict.get(trafo_id, None)
 
                 if gcdev_trafo is None:
                     # Search in Transformer 3W
-                    gcdev_trafo = find_object_by_idtag(
-                        object_list=gcdev_model.transformers3w,
-                        target_idtag=trafo_id
-                    )
+                    gcdev_trafo = trafo3w_dict.get(trafo_id, None)
 
                 if isinstance(gcdev_trafo, gcdev.Transformer2W):
 
@@ -1836,12 +1911,11 @@ def get_transformer_tap_changers(cgmes_model: CgmesCircuit,
                 elif isinstance(gcdev_trafo, gcdev.Transformer3W):
                     winding_id = tap_changer.TransformerEnd.uuid
                     # get the winding with the TapChanger
-                    winding_w_tc = find_object_by_idtag(
-                        object_list=[gcdev_trafo.winding1,
-                                     gcdev_trafo.winding2,
-                                     gcdev_trafo.winding3],
-                        target_idtag=winding_id
-                    )
+                    winding_w_tc = None
+                    for winding in (gcdev_trafo.winding1, gcdev_trafo.winding2, gcdev_trafo.winding3):
+                        if winding.idtag == winding_id:
+                            winding_w_tc = winding
+                            break
 
                     if winding_w_tc is not None:
                         winding_w_tc.tap_changer.init_from_cgmes(
@@ -1941,7 +2015,8 @@ def get_gcdev_controllable_shunts(
         bus_dict: Dict[str, gcdev.Bus],
         device_to_terminal_dict: Dict[str, List[CGMES_TERMINAL]],
         logger: DataLogger,
-        Sbase: float) -> None:
+        Sbase: float,
+        cgmes_index: Union[CgmesIndex, None] = None) -> None:
     """
     Convert the CGMES linear and non-linear shunt compensators
     to gcdev Controllable shunts.
@@ -1952,7 +2027,11 @@ def get_gcdev_controllable_shunts(
     :param device_to_terminal_dict: Dict[str, Terminal]
     :param Sbase: base power (100 MVA)
     :param logger:
+    :param cgmes_index: CgmesIndex with the non-linear shunt points (built if not given)
     """
+    if cgmes_index is None:
+        cgmes_index = CgmesIndex(cgmes_model=cgmes_model, logger=DataLogger())
+
     TopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("TopologicalNode")
     DCTopologicalNode_tpe = cgmes_model.cgmes_assets.class_dict.get("DCTopologicalNode")
 
@@ -2057,11 +2136,7 @@ def get_gcdev_controllable_shunts(
                 control_bus=controlled_bus,
             )
 
-            point_list = []
-            for nl_sc_p in cgmes_model.cgmes_assets.NonlinearShuntCompensatorPoint_list:
-                if nl_sc_p.NonlinearShuntCompensator == cgmes_elm:
-                    point_list.append(nl_sc_p)
-            point_list.sort(key=lambda obj: obj.sectionNumber)
+            point_list = cgmes_index.nl_shunt_points_dict.get(cgmes_elm.rdfid, list())
 
             Vnom = get_voltage_shunt(shunt=cgmes_elm, logger=logger)
 
@@ -2214,6 +2289,10 @@ def get_gcdev_substations(cgmes_model: CgmesCircuit,
     :param cgmes_model: CgmesCircuit
     :param gcdev_model: gcdevCircuit
     """
+    zone_dict = {elm.idtag: elm for elm in gcdev_model.zones}
+    area_dict = {elm.idtag: elm for elm in gcdev_model.areas}
+    community_dict = {elm.idtag: elm for elm in gcdev_model.communities}
+
     # convert substations
     for device_list in [cgmes_model.cgmes_assets.Substation_list]:
 
@@ -2221,19 +2300,10 @@ def get_gcdev_substations(cgmes_model: CgmesCircuit,
 
             community, area, zone = None, None, None
             if cgmes_model.cgmes_map_areas_like_raw:
-                zone = find_object_by_idtag(
-                    object_list=gcdev_model.zones,
-                    target_idtag=cgmes_elm.Region.uuid
-                )
-                area = find_object_by_idtag(
-                    object_list=gcdev_model.areas,
-                    target_idtag=cgmes_elm.Region.Region.uuid
-                )
+                zone = zone_dict.get(cgmes_elm.Region.uuid, None)
+                area = area_dict.get(cgmes_elm.Region.Region.uuid, None)
             else:
-                community = find_object_by_idtag(
-                    object_list=gcdev_model.communities,
-                    target_idtag=cgmes_elm.Region.uuid
-                )
+                community = community_dict.get(cgmes_elm.Region.uuid, None)
 
             if cgmes_elm.Location:
                 try:
@@ -2278,6 +2348,8 @@ def get_gcdev_voltage_levels(cgmes_model: CgmesCircuit,
     # dictionary relating the VoltageLevel idtag to the gcdev VoltageLevel
     volt_lev_dict: Dict[str, gcdev.VoltageLevel] = dict()
 
+    substation_dict = {elm.idtag: elm for elm in gcdev_model.substations}
+
     for cgmes_elm in cgmes_model.cgmes_assets.VoltageLevel_list:
 
         if not isinstance(cgmes_elm.BaseVoltage, str):  # if it is a string it was not substituted...
@@ -2289,10 +2361,7 @@ def get_gcdev_voltage_levels(cgmes_model: CgmesCircuit,
             )
 
             if cgmes_elm.Substation is not None:
-                subs = find_object_by_idtag(
-                    object_list=gcdev_model.substations,
-                    target_idtag=cgmes_elm.Substation.uuid  # gcdev_elm.idtag
-                )
+                subs = substation_dict.get(cgmes_elm.Substation.uuid, None)
 
                 if subs:
                     gcdev_elm.substation = subs
@@ -2408,6 +2477,9 @@ def get_gcdev_community(cgmes_model: CgmesCircuit,
     :param cgmes_model: CgmesCircuit
     :param gcdev_model: gcdevCircuit
     """
+    area_dict = {elm.idtag: elm for elm in gcdev_model.areas}
+    country_dict = {elm.idtag: elm for elm in gcdev_model.countries}
+
     for device_list in [cgmes_model.cgmes_assets.SubGeographicalRegion_list]:
 
         for cgmes_elm in device_list:
@@ -2420,10 +2492,7 @@ def get_gcdev_community(cgmes_model: CgmesCircuit,
                     # longitude=0.0
                 )
 
-                a = find_object_by_idtag(
-                    object_list=gcdev_model.areas,
-                    target_idtag=cgmes_elm.Region.uuid
-                )
+                a = area_dict.get(cgmes_elm.Region.uuid, None)
 
                 if a is not None:
                     gcdev_elm.area = a
@@ -2439,10 +2508,7 @@ def get_gcdev_community(cgmes_model: CgmesCircuit,
                     # longitude=0.0
                 )
 
-                c = find_object_by_idtag(
-                    object_list=gcdev_model.countries,
-                    target_idtag=cgmes_elm.Region.uuid
-                )
+                c = country_dict.get(cgmes_elm.Region.uuid, None)
 
                 if c is not None:
                     gcdev_elm.country = c
@@ -2479,7 +2545,8 @@ def get_header_mas(cgmes_model: CgmesCircuit,
 
 def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                       map_dc_to_hvdc_line: bool,
-                      logger: DataLogger) -> MultiCircuit:
+                      logger: DataLogger,
+                      timings: Union[Dict[str, float], None] = None) -> MultiCircuit:
     """
     Convert CGMES model to gcdev
 
@@ -2487,8 +2554,11 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
     :param map_dc_to_hvdc_line: Converters and DC lines from CGMES are converted
                                 to the simplified HvdcLine objects in VeraGrid
     :param logger: Logger object
+    :param timings: dictionary to fill with the seconds spent in each conversion stage (optional)
     :return: MultiCircuit
     """
+    timer = ConversionTimer(timings=timings)
+
     gc_model = MultiCircuit()  # roseta
     gc_model.comments = 'Converted from a CGMES file'
     Sbase = gc_model.Sbase
@@ -2506,19 +2576,17 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
     vl_dict = get_gcdev_voltage_levels(cgmes_model=cgmes_model,
                                        gcdev_model=gc_model,
                                        logger=logger)
+    timer.lap("containers")
 
     cn_look_up = Cn2BusBarLookup(cgmes_model)
 
     sv_volt_dict = get_gcdev_voltage_dict(cgmes_model=cgmes_model,
                                           logger=logger)
 
-    device_to_terminal_dict = get_gcdev_device_to_terminal_dict(cgmes_model=cgmes_model,
-                                                                logger=logger)
-
-    dc_device_to_terminal_dict, ground_buses, ground_nodes = get_gcdev_dc_device_to_terminal_dict(
-        cgmes_model=cgmes_model,
-        logger=logger
-    )
+    # reverse references used by all the converters
+    cgmes_index = CgmesIndex(cgmes_model=cgmes_model, logger=logger)
+    device_to_terminal_dict = cgmes_index.device_to_terminal_dict
+    timer.lap("indices")
 
     # NOTE: In VeraGrid there are only buses (as it should be)
     # hence, the ConnectivityNodes and TopologicalNodes are
@@ -2527,10 +2595,12 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                                             gc_model=gc_model,
                                             v_dict=sv_volt_dict,
                                             cn_look_up=cn_look_up,
+                                            cgmes_index=cgmes_index,
                                             skip_dc_import=map_dc_to_hvdc_line,
-                                            buses_to_skip=ground_buses,
+                                            buses_to_skip=cgmes_index.ground_buses,
                                             default_nominal_voltage=500.0,
                                             logger=logger)
+    timer.lap("buses")
 
     if fatal_error:
         return gc_model
@@ -2547,6 +2617,7 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                       calc_node_dict=bus_dict,
                       device_to_terminal_dict=device_to_terminal_dict,
                       logger=logger)
+    timer.lap("busbars")
 
     get_gcdev_loads(cgmes_model=cgmes_model,
                     gcdev_model=gc_model,
@@ -2565,6 +2636,7 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                          bus_dict=bus_dict,
                          device_to_terminal_dict=device_to_terminal_dict,
                          logger=logger)
+    timer.lap("injections")
 
     cgmes_model.emit_progress(86)
 
@@ -2574,6 +2646,7 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                        device_to_terminal_dict=device_to_terminal_dict,
                        logger=logger,
                        Sbase=Sbase)
+    timer.lap("lines")
 
     get_gcdev_ac_transformers(cgmes_model=cgmes_model,
                               gcdev_model=gc_model,
@@ -2586,6 +2659,7 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
                                  gcdev_model=gc_model,
                                  bus_dict=bus_dict,
                                  logger=logger)
+    timer.lap("transformers")
 
     get_gcdev_shunts(cgmes_model=cgmes_model,
                      gcdev_model=gc_model,
@@ -2599,24 +2673,23 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
         bus_dict=bus_dict,
         device_to_terminal_dict=device_to_terminal_dict,
         logger=logger,
-        Sbase=Sbase
+        Sbase=Sbase,
+        cgmes_index=cgmes_index
     )
+    timer.lap("shunts")
+
     get_gcdev_switches(cgmes_model=cgmes_model,
                        gcdev_model=gc_model,
                        bus_dict=bus_dict,
                        device_to_terminal_dict=device_to_terminal_dict,
                        logger=logger, )
+    timer.lap("switches")
 
     cgmes_model.emit_progress(91)
     cgmes_model.emit_text("Converting CGMES to VeraGrid - HVDC")
 
     # DC elements  ---------------------------------------------------------
 
-    dc_device_to_terminal_dict, ground_buses, ground_nodes = get_gcdev_dc_device_to_terminal_dict(
-        cgmes_model=cgmes_model,
-        logger=logger
-    )
-
     # dc_bus_dict = get_gcdev_dc_buses(
     #     cgmes_model=cgmes_model,
     #     gc_model=gc_model,
@@ -2643,9 +2716,8 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
             cgmes_model=cgmes_model,
             gcdev_model=gc_model,
             dc_bus_dict=bus_dict,
-            dc_device_to_terminal_dict=dc_device_to_terminal_dict,
+            cgmes_index=cgmes_index,
             bus_dict=bus_dict,
-            device_to_terminal_dict=device_to_terminal_dict,
             logger=logger,
         )
 
@@ -2659,7 +2731,7 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
             cgmes_model=cgmes_model,
             gcdev_model=gc_model,
             dc_bus_dict=bus_dict,
-            device_to_terminal_dict=dc_device_to_terminal_dict,
+            device_to_terminal_dict=cgmes_index.dc_device_to_terminal_dict,
             logger=logger,
         )
 
@@ -2667,11 +2739,12 @@ def cgmes_to_veragrid(cgmes_model: CgmesCircuit,
             cgmes_model=cgmes_model,
             gcdev_model=gc_model,
             dc_bus_dict=bus_dict,
-            dc_device_to_terminal_dict=dc_device_to_terminal_dict,
+            dc_device_to_terminal_dict=cgmes_index.dc_device_to_terminal_dict,
             bus_dict=bus_dict,
             device_to_terminal_dict=device_to_terminal_dict,
             logger=logger,
         )
+    timer.lap("hvdc")
 
     cgmes_model.emit_progress(100)
     cgmes_model.emit_text("Cgmes import done!")
@@ -18,7 +18,9 @@ from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.data_logger import DataLogger
 from VeraGridEngine.IO.veragrid.json_parser import save_json_file_v3
 from VeraGridEngine.IO.veragrid.excel_interface import save_excel, load_from_xls, interpret_excel_v3, interprete_excel_v2
-from VeraGridEngine.IO.veragrid.pack_unpack import gather_model_as_data_frames, parse_veragrid_data, gather_model_as_jsons
+from VeraGridEngine.IO.veragrid.pack_unpack import (gather_model_as_data_frames, parse_veragrid_data,
+                                                   gather_model_as_jsons, get_model_save_state,
+                                                   get_modified_object_types)
 from VeraGridEngine.IO.matpower.legacy.matpower_parser import interpret_data_v1
 from VeraGridEngine.IO.matpower.matpower_circuit import MatpowerCircuit
 from VeraGridEngine.IO.matpower.matpower_to_veragrid import matpower_to_veragrid
@@ -33,7 +35,8 @@ from VeraGridEngine.IO.epc.epc_parser import PowerWorldParser
 from VeraGridEngine.IO.cim.cim16.cim_parser import CIMImport, CIMExport
 from VeraGridEngine.IO.cim.cgmes.cgmes_circuit import CgmesCircuit, is_valid_cgmes
 from VeraGridEngine.IO.cim.cgmes.cgmes_to_veragrid import cgmes_to_veragrid
-from VeraGridEngine.IO.veragrid.zip_interface import save_veragrid_data_to_zip, get_frames_from_zip
+from VeraGridEngine.IO.veragrid.zip_interface import (save_veragrid_data_to_zip, save_veragrid_delta_to_zip,
+                                                      get_frames_from_zip, get_journal_state)
 from VeraGridEngine.IO.veragrid.sqlite_interface import save_data_frames_to_sqlite, open_data_frames_from_sqlite
 from VeraGridEngine.IO.veragrid.h5_interface import save_h5, open_h5
 from VeraGridEngine.IO.raw.rawx_parser_writer import parse_rawx, write_rawx
@@ -68,7 +71,11 @@ class FileSavingOptions:
                  cgmes_profiles: Union[None, List[CgmesProfileType]] = None,
                  cgmes_one_file_per_profile: bool = False,
                  cgmes_map_areas_like_raw: bool = False,
-                 raw_version: str = "33"):
+                 raw_version: str = "33",
+                 compress_profiles: bool = True,
+                 incremental: bool = False,
+                 max_journal_entries: int = 20,
+                 max_journal_ratio: float = 0.5):
         """
         Constructor
         :param cgmes_boundary_set: CGMES boundary set zip file path
@@ -80,6 +87,11 @@ class FileSavingOptions:
         :param cgmes_one_file_per_profile: use one file per profile?
         :param cgmes_map_areas_like_raw: use map areas like raw?
         :param raw_version: Version to use when exporting raw/rawx files
+        :param compress_profiles: compress the binary profiles of the .veragrid files?
+                                  (uncompressed profiles can be memory-mapped when opening with lazy profiles)
+        :param incremental: save the .veragrid files incrementally, appending only what changed since the last save
+        :param max_journal_entries: number of incremental saves after which the file is compacted
+        :param max_journal_ratio: proportion of the file held by the incremental saves after which it is compacted
         """
 
         self.cgmes_version: CGMESVersions = cgmes_version
@@ -113,6 +125,12 @@ class FileSavingOptions:
 
         self.raw_version = raw_version
 
+        self.compress_profiles = compress_profiles
+
+        self.incremental = incremental
+        self.max_journal_entries = max_journal_entries
+        self.max_journal_ratio = max_journal_ratio
+
     def get_power_flow_results(self) -> Union[None, PowerFlowResults]:
         """
         Try to extract the power flow results
@@ -134,7 +152,10 @@ class FileOpenOptions:
                  cgmes_map_areas_like_raw: bool = False,
                  try_to_map_dc_to_hvdc_line: bool = True,
                  crash_on_errors: bool = True,
-                 adjust_taps_to_discrete_positions: bool = False, ):
+                 adjust_taps_to_discrete_positions: bool = False,
+                 lazy_profiles: bool = False,
+                 max_workers: Union[int, None] = None,
+                 use_process_pool: bool = False):
         """
 
         :param cgmes_map_areas_like_raw: If active the CGMEs mapping will be:
@@ -147,11 +168,18 @@ class FileOpenOptions:
                                             to the simplified HvdcLine objects in VeraGrid
         :param crash_on_errors: Mainly debug feature to allow finding the exact crash issue when loading files
         :param adjust_taps_to_discrete_positions: Modify the tap angle and module to the discrete positions
+        :param lazy_profiles: Read the binary profiles of the .veragrid files only when they are accessed
+        :param max_workers: Number of workers decoding the .veragrid files and parsing the CGMES xml files
+                            (None for automatic, 1 for serial)
+        :param use_process_pool: Decode the .veragrid files with processes instead of threads
         """
         self.cgmes_map_areas_like_raw = cgmes_map_areas_like_raw
         self.try_to_map_dc_to_hvdc_line = try_to_map_dc_to_hvdc_line
         self.crash_on_errors = crash_on_errors
         self.adjust_taps_to_discrete_positions = adjust_taps_to_discrete_positions
+        self.lazy_profiles = lazy_profiles
+        self.max_workers = max_workers
+        self.use_process_pool = use_process_pool
 
 
 class FileOpen:
@@ -227,7 +255,8 @@ class FileOpen:
 
             if looks_like_cgmes:
                 data_parser = CgmesDataParser(text_func=text_func, progress_func=progress_func,
-                                              logger=self.cgmes_logger)
+                                              logger=self.cgmes_logger,
+                                              max_workers=self.options.max_workers)
                 data_parser.load_files(files=self.file_name)
                 self.cgmes_circuit = CgmesCircuit(cgmes_version=data_parser.cgmes_version, text_func=text_func,
                                                   cgmes_map_areas_like_raw=self.options.cgmes_map_areas_like_raw,
@@ -287,13 +316,17 @@ class FileOpen:
                     data_dictionary, self.json_files = get_frames_from_zip(self.file_name,
                                                                            text_func=text_func,
                                                                            progress_func=progress_func,
-                                                                           logger=self.logger)
+                                                                           logger=self.logger,
+                                                                           lazy_profiles=self.options.lazy_profiles,
+                                                                           max_workers=self.options.max_workers,
+                                                                           use_processes=self.options.use_process_pool)
                     # interpret file content
                     if data_dictionary is not None:
                         self.circuit = parse_veragrid_data(data=data_dictionary,
                                                            text_func=text_func,
                                                            progress_func=progress_func,
                                                            logger=self.logger)
+                        self.circuit.save_state = get_model_save_state(self.circuit, file_name=self.file_name)
                     else:
                         self.logger.add("Error while reading the file :(")
                         return None
@@ -304,7 +337,9 @@ class FileOpen:
                     data_dictionary, self.json_files = get_frames_from_zip(self.file_name,
                                                                            text_func=text_func,
                                                                            progress_func=progress_func,
-                                                                           logger=self.logger)
+                                                                           logger=self.logger,
+                                                                           max_workers=self.options.max_workers,
+                                                                           use_processes=self.options.use_process_pool)
                     # interpret file content
                     if data_dictionary is not None:
                         self.circuit = parse_veragrid_data(data=data_dictionary,
@@ -409,7 +444,8 @@ class FileOpen:
                     data_parser = CgmesDataParser(
                         text_func=text_func,
                         progress_func=progress_func,
-                        logger=self.cgmes_logger
+                        logger=self.cgmes_logger,
+                        max_workers=self.options.max_workers
                     )
                     data_parser.load_files(files=[self.file_name])
 
@@ -577,17 +613,52 @@ class FileSave:
                                           logger=logger,
                                           legacy=False)
 
-        model_data = gather_model_as_jsons(self.circuit)
-
-        save_veragrid_data_to_zip(dfs=dfs,
-                                  filename_zip=self.file_name,
-                                  model_data=model_data,
-                                  sessions_data=self.options.sessions_data,
-                                  diagrams=self.circuit.diagrams,
-                                  json_files=self.options.dictionary_of_json_files,
-                                  text_func=self.text_func,
-                                  progress_func=self.progress_func,
-                                  logger=logger)
+        if self.options.incremental and get_journal_state(
+                filename_zip=self.file_name,
+                max_journal_entries=self.options.max_journal_entries,
+                max_journal_ratio=self.options.max_journal_ratio) is not None:
+            # only the object types modified since the circuit was saved to (or loaded from) this file are gathered
+            modified_types = get_modified_object_types(self.circuit, file_name=self.file_name)
+        else:
+            modified_types = None
+
+        # the numeric profiles are stored as binary blocks instead of json
+        profile_blocks = dict()
+        model_data = gather_model_as_jsons(self.circuit,
+                                           profile_blocks=profile_blocks,
+                                           object_type_names=modified_types)
+
+        if self.options.incremental:
+            save_veragrid_delta_to_zip(dfs=dfs,
+                                       filename_zip=self.file_name,
+                                       model_data=model_data,
+                                       sessions_data=self.options.sessions_data,
+                                       diagrams=self.circuit.diagrams,
+                                       json_files=self.options.dictionary_of_json_files,
+                                       text_func=self.text_func,
+                                       progress_func=self.progress_func,
+                                       logger=logger,
+                                       profile_blocks=profile_blocks,
+                                       compress_profiles=self.options.compress_profiles,
+                                       max_journal_entries=self.options.max_journal_entries,
+                                       max_journal_ratio=self.options.max_journal_ratio,
+                                       unchanged_object_types=(None if modified_types is None else
+                                                               set(self.circuit.save_state.idtags.keys())
+                                                               - modified_types))
+        else:
+            save_veragrid_data_to_zip(dfs=dfs,
+                                      filename_zip=self.file_name,
+                                      model_data=model_data,
+                                      sessions_data=self.options.sessions_data,
+                                      diagrams=self.circuit.diagrams,
+                                      json_files=self.options.dictionary_of_json_files,
+                                      text_func=self.text_func,
+                                      progress_func=self.progress_func,
+                                      logger=logger,
+                                      profile_blocks=profile_blocks,
+                                      compress_profiles=self.options.compress_profiles)
+
+        self.circuit.save_state = get_model_save_state(self.circuit, file_name=self.file_name)
 
         return logger
 
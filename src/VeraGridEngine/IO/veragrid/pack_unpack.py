@@ -3,9 +3,10 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.  
 # SPDX-License-Identifier: MPL-2.0
 
+import os
 import json
 import math
-from typing import Dict, Union, List, Tuple, Any, Callable
+from typing import Dict, Union, List, Tuple, Any, Callable, Set
 import pandas as pd
 import numpy as np
 from enum import EnumMeta as EnumType
@@ -14,8 +15,10 @@ from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 import VeraGridEngine.Devices as dev
 from VeraGridEngine.Devices.Parents.editable_device import GCProp
 from VeraGridEngine.Devices.profile import Profile
+from VeraGridEngine.Devices.model_revision import ModelSaveState, get_model_revision, get_last_touch
 from VeraGridEngine.Devices.Dynamic.dynamic_model_host import DynamicModelHost
 from VeraGridEngine.Devices.types import ALL_DEV_TYPES, VERAGRID_FILE_TYPE
+from VeraGridEngine.IO.veragrid.profile_blocks import ProfileBlock
 from VeraGridEngine.enumerations import (DiagramType, DeviceType, SubObjectType, TapPhaseControl, TapModuleControl,
                                          ContingencyOperationTypes)
 
@@ -272,6 +275,26 @@ def profile_todict(profile: Profile) -> Dict[str, str]:
         }
 
 
+def profile_to_block(profile: Profile, block: np.ndarray, col: int) -> Dict[str, Any]:
+    """
+    Write the profile values into a column of a (time, elements) profiles block
+    and get the dictionary representation that points to that column
+    :param profile: Profile
+    :param block: profiles block of the device type and property (time, elements)
+    :param col: column of the block assigned to the profile
+    :return: dictionary with the sparse and default metadata and the block column
+    """
+    # lazy profiles are copied straight from their block without keeping their values
+    block[:, col] = profile.get_window(0, profile.size()) if profile.is_lazy else profile.toarray()
+
+    return {
+        'is_sparse': profile.is_sparse,
+        'size': profile.size(),
+        'default': profile.sparse_array.default_value if profile.is_sparse else profile.default_value,
+        'block': col
+    }
+
+
 def profile_todict_idtag(profile: Profile) -> Dict[str, str]:
     """
     Get a dictionary representation of the profile
@@ -336,16 +359,55 @@ def profile_todict_str(profile: Profile) -> Dict[str, str]:
         }
 
 
+def get_profile_from_block(profile: Profile,
+                           data: Dict[str, Any],
+                           block: Union[None, np.ndarray, ProfileBlock]) -> None:
+    """
+    Fill a profile from a column of a profiles block
+    :param profile: Profile object to fill in
+    :param data: Json dict data with the sparse and default metadata and the block column
+    :param block: profiles block of the device type and property (time, elements), None if missing.
+                  If it is a ProfileBlock, the profile is left lazy and its values are only read when accessed
+    :return: None
+    """
+    default_value = data['default']
+
+    if block is None:
+        # the block is missing, so we fill the profile with the default value
+        profile.create_sparse(default_value=default_value, size=data['size'])
+
+    else:
+        profile.set_lazy(block=block,
+                         col=data['block'],
+                         size=data['size'],
+                         default_value=default_value,
+                         is_sparse=bool(data['is_sparse']))
+
+        if not isinstance(block, ProfileBlock):
+            profile.materialize()
+
+    # mark as initialized
+    profile.set_initialized()
+
+
 def get_profile_from_dict(profile: Profile,
                           data: Dict[str, Union[str, Union[Any, Dict[str, Any]]]],
-                          collection: Union[None, Dict[str, Any]] = None):
+                          collection: Union[None, Dict[str, Any]] = None,
+                          block: Union[None, np.ndarray, ProfileBlock] = None):
     """
     Create a profile from json dict data
     :param profile: Profile object to fill in
     :param data: Json dict data
     :param collection: if the collection is provided, it will be used to convert idtags into objects
+    :param block: profiles block of the device type and property (time, elements),
+                  used if the json data points to a block column
     :return: None
     """
+    if 'block' in data:
+        # the values are stored in the binary profiles block
+        get_profile_from_block(profile=profile, data=data, block=block)
+        return
+
     default_value = data['default']
     is_sparse = bool(data['is_sparse'])
     # profile = Profile(default_value=default_value, is_sparse=bool(data['is_sparse']))
@@ -378,10 +440,16 @@ def get_profile_from_dict(profile: Profile,
     profile.set_initialized()
 
 
-def veragrid_object_to_json(elm: ALL_DEV_TYPES) -> Dict[str, str]:
+def veragrid_object_to_json(elm: ALL_DEV_TYPES,
+                            profile_blocks: Union[None, Dict[str, np.ndarray]] = None,
+                            block_cols: Union[None, Dict[str, int]] = None) -> Dict[str, str]:
     """
 
     :param elm:
+    :param profile_blocks: if provided, profiles blocks of the device type {property name: (time, profiles) array}
+                           where the numeric profiles are written instead of the json data
+    :param block_cols: columns of the profiles blocks assigned to the device profiles {property name: column},
+                       the profiles without a column are written in the json data
     :return:
     """
 
@@ -393,7 +461,14 @@ def veragrid_object_to_json(elm: ALL_DEV_TYPES) -> Dict[str, str]:
             data[name] = obj
 
             if prop.has_profile():
-                data[name + '_prof'] = profile_todict(elm.get_profile_by_prop(prop=prop))
+                profile = elm.get_profile_by_prop(prop=prop)
+                block = profile_blocks.get(name, None) if profile_blocks is not None else None
+                col = block_cols.get(name, None) if block_cols is not None else None
+
+                if block is not None and col is not None and profile.size() == block.shape[0]:
+                    data[name + '_prof'] = profile_to_block(profile=profile, block=block, col=col)
+                else:
+                    data[name + '_prof'] = profile_todict(profile)
 
         elif prop.tpe == SubObjectType.GeneratorQCurve:
             data[name] = obj.to_list()
@@ -437,10 +512,100 @@ def veragrid_object_to_json(elm: ALL_DEV_TYPES) -> Dict[str, str]:
     return data
 
 
-def gather_model_as_jsons(circuit: MultiCircuit) -> Dict[str, Dict[str, str]]:
+def get_profile_blocks(template_elm: ALL_DEV_TYPES,
+                       elements: List[ALL_DEV_TYPES],
+                       nt: int) -> Tuple[Dict[str, np.ndarray], List[Dict[str, int]]]:
+    """
+    Allocate the binary profiles blocks of a device type: one (time, profiles) array per numeric profiled property.
+    Only the dense profiles get a column of the blocks, the sparse ones (including those that only have the
+    default value) are kept as index/value maps in the json data of the devices
+    :param template_elm: device of the type
+    :param elements: devices of the type
+    :param nt: number of time steps
+    :return: {property name: (time, profiles) array}, columns of each device {property name: column}
+    """
+    blocks: Dict[str, np.ndarray] = dict()
+    block_cols: List[Dict[str, int]] = [dict() for _ in elements]
+
+    for name, prop in template_elm.registered_properties.items():
+        if prop.has_profile() and prop.tpe in [float, int, bool]:
+
+            n_cols = 0
+            for k, elm in enumerate(elements):
+                profile = elm.get_profile_by_prop(prop=prop)
+                if not profile.is_sparse and profile.size() == nt:
+                    block_cols[k][name] = n_cols
+                    n_cols += 1
+
+            if n_cols > 0:
+                # the blocks are column-major, so that each profile (and any time window of it) is contiguous
+                blocks[name] = np.zeros((nt, n_cols), dtype=prop.tpe, order='F')
+
+    return blocks, block_cols
+
+
+def get_model_save_state(circuit: MultiCircuit, file_name: str) -> ModelSaveState:
+    """
+    Get the state of a circuit that was just saved to (or loaded from) a file
+    :param circuit: MultiCircuit
+    :param file_name: name of the file
+    :return: ModelSaveState
+    """
+    object_types = get_objects_dictionary()
+    del object_types['branch']
+
+    idtags = {object_type_name: tuple(elm.idtag for elm in circuit.get_elements_by_type(object_sample.device_type))
+              for object_type_name, object_sample in object_types.items()}
+
+    return ModelSaveState(file_name=file_name,
+                          file_time=os.path.getmtime(file_name),
+                          revision=get_model_revision(),
+                          idtags=idtags)
+
+
+def get_modified_object_types(circuit: MultiCircuit, file_name: str) -> Union[None, Set[str]]:
+    """
+    Get the object types of a circuit that were modified since it was saved to (or loaded from) a file:
+    those whose devices or profiles were modified, added or removed
+    :param circuit: MultiCircuit
+    :param file_name: name of the file
+    :return: set of object type names, None if unknown (the circuit was not saved to that file, or the file changed)
+    """
+    state = circuit.save_state
+
+    if (state is None or state.file_name != file_name or not os.path.exists(file_name)
+            or os.path.getmtime(file_name) != state.file_time or get_last_touch() > state.revision):
+        return None
+
+    # the profiles resized to the time index count as modifications
+    if circuit.has_time_series:
+        circuit.ensure_profiles_exist()
+
+    object_types = get_objects_dictionary()
+    del object_types['branch']
+
+    modified = set()
+    for object_type_name, object_sample in object_types.items():
+        elements = circuit.get_elements_by_type(object_sample.device_type)
+
+        if (tuple(elm.idtag for elm in elements) != state.idtags.get(object_type_name, ())
+                or any(elm.is_modified_after(state.revision) for elm in elements)):
+            modified.add(object_type_name)
+
+    return modified
+
+
+def gather_model_as_jsons(circuit: MultiCircuit,
+                          profile_blocks: Union[None, Dict[str, Dict[str, np.ndarray]]] = None,
+                          object_type_names: Union[None, Set[str]] = None
+                          ) -> Dict[str, Dict[str, str]]:
     """
     Transform a MultiCircuit into a collection of Json files
     :param circuit:
+    :param profile_blocks: if provided, this dictionary is filled with the numeric profiles of each device type
+                           as binary blocks {object type name: {property name: (time, elements) array}}
+                           and the json data of the profiles only keeps the metadata and the block column
+    :param object_type_names: if provided, only these object types are gathered (see get_modified_object_types)
     :return:
     """
 
@@ -457,14 +622,27 @@ def gather_model_as_jsons(circuit: MultiCircuit) -> Dict[str, Dict[str, str]]:
     # generic object iteration
     for object_type_name, object_sample in object_types.items():
 
+        if object_type_names is not None and object_type_name not in object_type_names:
+            continue
+
         object_json = list()
 
         lists_of_objects = circuit.get_elements_by_type(object_sample.device_type)
 
         if len(lists_of_objects) > 0:
 
+            if profile_blocks is not None and circuit.get_time_number() > 0:
+                type_blocks, block_cols = get_profile_blocks(template_elm=object_sample,
+                                                             elements=lists_of_objects,
+                                                             nt=circuit.get_time_number())
+                if len(type_blocks):
+                    profile_blocks[object_type_name] = type_blocks
+            else:
+                type_blocks = None
+                block_cols = [None] * len(lists_of_objects)
+
             for k, elm in enumerate(lists_of_objects):
-                obj_data = veragrid_object_to_json(elm)
+                obj_data = veragrid_object_to_json(elm, profile_blocks=type_blocks, block_cols=block_cols[k])
                 object_json.append(obj_data)
 
         data[object_type_name] = object_json
@@ -990,7 +1168,8 @@ def search_and_apply_json_profile(json_entry: Dict[str, Dict[str, Union[str, Uni
                                   gc_prop: GCProp,
                                   elm: ALL_DEV_TYPES,
                                   property_value: Any,
-                                  collection: Union[None, Dict[str, Any]] = None) -> None:
+                                  collection: Union[None, Dict[str, Any]] = None,
+                                  profile_blocks: Union[None, Dict[str, np.ndarray]] = None) -> None:
     """
     Search from the property profiles into the json and apply it
     :param json_entry: Json entry of an object
@@ -998,6 +1177,7 @@ def search_and_apply_json_profile(json_entry: Dict[str, Dict[str, Union[str, Uni
     :param elm: THe device to set the profile into
     :param property_value: The snapshot value
     :param collection: if the collection is provided, it will be used to convert idtags into objects
+    :param profile_blocks: binary profiles blocks of the device type {property name: (time, elements) array}
     :return: None
     """
     if gc_prop.has_profile():
@@ -1013,14 +1193,16 @@ def search_and_apply_json_profile(json_entry: Dict[str, Dict[str, Union[str, Uni
         else:
             get_profile_from_dict(profile=profile,
                                   data=json_profile,
-                                  collection=collection)
+                                  collection=collection,
+                                  block=profile_blocks.get(gc_prop.name, None) if profile_blocks is not None else None)
 
 
 def parse_object_type_from_json(template_elm: ALL_DEV_TYPES,
                                 data_list: List[Dict[str, Dict[str, str]]],
                                 elements_dict_by_type: Dict[DeviceType, Dict[str, ALL_DEV_TYPES]],
                                 time_profile: pd.DatetimeIndex,
-                                logger: Logger):
+                                logger: Logger,
+                                profile_blocks: Union[None, Dict[str, np.ndarray]] = None):
     """
 
     :param template_elm:
@@ -1028,6 +1210,7 @@ def parse_object_type_from_json(template_elm: ALL_DEV_TYPES,
     :param elements_dict_by_type:
     :param time_profile:
     :param logger:
+    :param profile_blocks: binary profiles blocks of the device type {property name: (time, elements) array}
     :return:
     """
     # dictionary to be filled with this type of objects
@@ -1190,7 +1373,8 @@ def parse_object_type_from_json(template_elm: ALL_DEV_TYPES,
                                 search_and_apply_json_profile(json_entry=json_entry,
                                                               gc_prop=gc_prop,
                                                               elm=elm,
-                                                              property_value=val)
+                                                              property_value=val,
+                                                              profile_blocks=profile_blocks)
 
                             elif gc_prop.tpe == int:
                                 # set the value directly
@@ -1199,7 +1383,8 @@ def parse_object_type_from_json(template_elm: ALL_DEV_TYPES,
                                 search_and_apply_json_profile(json_entry=json_entry,
                                                               gc_prop=gc_prop,
                                                               elm=elm,
-                                                              property_value=val)
+                                                              property_value=val,
+                                                              profile_blocks=profile_blocks)
 
                             elif gc_prop.tpe == bool:
                                 # set the value directly
@@ -1208,7 +1393,8 @@ def parse_object_type_from_json(template_elm: ALL_DEV_TYPES,
                                 search_and_apply_json_profile(json_entry=json_entry,
                                                               gc_prop=gc_prop,
                                                               elm=elm,
-                                                              property_value=val)
+                                                              property_value=val,
+                                                              profile_blocks=profile_blocks)
 
                             elif isinstance(gc_prop.tpe, EnumType):
 
@@ -1450,6 +1636,7 @@ def parse_veragrid_data(data: VERAGRID_FILE_TYPE,
     # New way of parsing information from .model files (Json files)
     # These files are just .json stored in the model_data inside the zip file
     model_data = data.get('model_data', None)
+    profile_blocks = data.get('profiles', dict())
     if model_data is not None:
 
         if len(model_data) > 0:
@@ -1488,7 +1675,9 @@ def parse_veragrid_data(data: VERAGRID_FILE_TYPE,
                                                                         data_list=data_list,
                                                                         elements_dict_by_type=elements_dict_by_type,
                                                                         time_profile=circuit.time_profile,
-                                                                        logger=logger)
+                                                                        logger=logger,
+                                                                        profile_blocks=profile_blocks.get(
+                                                                            object_type_key, None))
 
                     # set/augment the dictionary per type for later
                     prev_dict = elements_dict_by_type.get(template_elm.device_type, dict())
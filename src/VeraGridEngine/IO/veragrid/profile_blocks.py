@@ -0,0 +1,146 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import os
+import struct
+import weakref
+import zipfile
+import numpy as np
+from typing import Tuple, Union, Any
+
+# blocks that read from a file, to be released before that file is overwritten
+_file_blocks: "weakref.WeakSet[ProfileBlock]" = weakref.WeakSet()
+
+
+def get_zip_member_data_offset(file_name: str, info: zipfile.ZipInfo) -> int:
+    """
+    Get the position in the file of the data of a zip member
+    :param file_name: zip file name
+    :param info: ZipInfo of the member
+    :return: offset in bytes
+    """
+    with open(file_name, 'rb') as fp:
+        fp.seek(info.header_offset)
+        header = fp.read(zipfile.sizeFileHeader)
+
+    # the local header has its own file name and extra field lengths
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+
+    return info.header_offset + zipfile.sizeFileHeader + name_len + extra_len
+
+
+def read_npy_header(fp) -> Tuple[Tuple[int, ...], bool, np.dtype]:
+    """
+    Read the header of a .npy file leaving the file pointer at the start of the data
+    :param fp: file pointer at the start of the .npy content
+    :return: shape, fortran order, dtype
+    """
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(fp)
+    else:
+        return np.lib.format.read_array_header_2_0(fp)
+
+
+class ProfileBlock:
+    """
+    Binary profiles block (time, elements) of a device type and property stored inside a .veragrid file.
+    Nothing is read until the block values are accessed: if the member is stored uncompressed, the file
+    is memory-mapped, otherwise the member is decompressed into memory on the first access.
+    """
+
+    def __init__(self, file_name: str, member_name: str):
+        """
+        Constructor
+        :param file_name: zip file name
+        :param member_name: name of the .npy member inside the zip file
+        """
+        self.file_name = os.path.abspath(file_name)
+        self.member_name = member_name
+
+        self._array: Union[np.ndarray, np.memmap, None] = None
+
+        _file_blocks.add(self)
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Has the block been read or mapped?
+        """
+        return self._array is not None
+
+    @property
+    def is_mapped(self) -> bool:
+        """
+        Is the block memory-mapped from the file?
+        """
+        return isinstance(self._array, np.memmap)
+
+    def get_array(self) -> Union[np.ndarray, np.memmap]:
+        """
+        Get the (time, elements) array, mapping or reading it on the first access
+        :return: array
+        """
+        if self._array is None:
+            with zipfile.ZipFile(self.file_name) as f_zip:
+                info = f_zip.getinfo(self.member_name)
+
+                if info.compress_type == zipfile.ZIP_STORED:
+                    offset = get_zip_member_data_offset(self.file_name, info)
+                    with open(self.file_name, 'rb') as fp:
+                        fp.seek(offset)
+                        shape, fortran_order, dtype = read_npy_header(fp)
+                        offset = fp.tell()
+
+                    self._array = np.memmap(self.file_name, dtype=dtype, mode='r', shape=shape,
+                                            order='F' if fortran_order else 'C', offset=offset)
+                else:
+                    with f_zip.open(self.member_name) as fp:
+                        self._array = np.load(fp, allow_pickle=False)
+
+        return self._array
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """
+        Shape of the block
+        """
+        return self.get_array().shape
+
+    def __getitem__(self, key: Any) -> Any:
+        """
+        Get values of the block without copying the rest of it
+        :param key: numpy index
+        :return: values
+        """
+        return self.get_array()[key]
+
+    def get_column(self, col: int) -> np.ndarray:
+        """
+        Get a copy of the profile stored in a column
+        :param col: column index
+        :return: array
+        """
+        return np.array(self.get_array()[:, col])
+
+    def release(self) -> None:
+        """
+        Read the block into memory and stop using the file (i.e. before overwriting it)
+        """
+        self._array = np.array(self.get_array())
+        _file_blocks.discard(self)
+
+
+def release_profile_blocks(file_name: str) -> None:
+    """
+    Read into memory all the profile blocks that still depend on a file.
+    This must be called before overwriting a file that may have been opened with lazy profiles.
+    :param file_name: file name
+    """
+    file_name = os.path.abspath(file_name)
+    for block in list(_file_blocks):
+        if block.file_name == file_name:
+            block.release()
@@ -4,17 +4,25 @@
 # SPDX-License-Identifier: MPL-2.0
 from __future__ import annotations
 import os
-from typing import Dict, Union, Any
+import json
+import zipfile
+import tempfile
+from io import BytesIO
+from typing import Dict, Union, Any, Tuple, Generator
 from uuid import uuid4, getnode
 import numpy as np
+import pandas as pd
 
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 from VeraGridEngine.enumerations import (SimulationTypes, JobStatus)
-from VeraGridEngine.basic_structures import Logger
-from VeraGridEngine.IO.veragrid.pack_unpack import gather_model_as_jsons
+from VeraGridEngine.basic_structures import Logger, IntVec, Vec, StrVec, StrMat, DateVec
+from VeraGridEngine.IO.veragrid.pack_unpack import gather_model_as_jsons, gather_model_as_data_frames
+from VeraGridEngine.IO.veragrid.zip_interface import save_veragrid_data_to_zip, get_zip_model_hash
+from VeraGridEngine.IO.veragrid.generic_io_functions import CustomJSONizer
 from VeraGridEngine.IO.file_system import get_create_veragrid_folder
 from VeraGridEngine.Simulations.driver_handler import create_driver
 from VeraGridEngine.Simulations.types import DRIVER_OBJECTS, RESULTS_OBJECTS
+from VeraGridEngine.Simulations.results_template import ResultsTemplate
 
 try:
     import requests
@@ -32,12 +40,16 @@ class RemoteInstruction:
 
     def __init__(self,
                  operation: Union[None, SimulationTypes] = None,
-                 data: Union[None, Dict[str, Dict[str, str]]] = None):
+                 data: Union[None, Dict[str, Dict[str, str]]] = None,
+                 time_indices: Union[None, IntVec] = None):
         """
         RemoteInstruction
         :param operation: SimulationTypes
         :param data: data previously generated with get_data()
+        :param time_indices: time indices to simulate (None for all of them)
         """
+        self.time_indices: Union[None, IntVec] = time_indices
+
         if data is None:
             self.operation: Union[None, SimulationTypes] = operation
 
@@ -65,7 +77,8 @@ class RemoteInstruction:
         return {
             'operation': self.operation.value if self.operation is not None else None,
             "user": self.user,
-            "mac": self.mac
+            "mac": self.mac,
+            "time_indices": [int(t) for t in self.time_indices] if self.time_indices is not None else None
         }
 
     def parse_data(self, data: Dict[str, Dict[str, str]]):
@@ -77,6 +90,9 @@ class RemoteInstruction:
         self.operation = SimulationTypes(data['operation'])
         self.user = data['user']
 
+        time_indices = data.get('time_indices', None)
+        self.time_indices = np.array(time_indices, dtype=int) if time_indices is not None else None
+
 
 class RemoteJob:
     """
@@ -101,7 +117,12 @@ class RemoteJob:
 
         self.status: JobStatus = JobStatus.Waiting
 
+        # last progress text and value (0~100) reported by the simulation
         self.progress: str = ""
+        self.progress_value: float = 0.0
+
+        # error message if the job failed
+        self.msg: str = ""
 
         if data is not None:
             self.parse_data(data)
@@ -113,6 +134,13 @@ class RemoteJob:
         """
         self.status = JobStatus.Cancelled
 
+    def is_finished(self) -> bool:
+        """
+        Has the job reached a final state?
+        :return: bool
+        """
+        return self.status in (JobStatus.Done, JobStatus.Failed, JobStatus.Cancelled)
+
     def get_data(self) -> dict:
         """
 
@@ -123,7 +151,9 @@ class RemoteJob:
             "grid_name": self.grid_name,
             "instruction": self.instruction.get_data(),
             "status": self.status.value,
-            "progress": self.progress
+            "progress": self.progress,
+            "progress_value": self.progress_value,
+            "msg": self.msg
         }
 
     def parse_data(self, data: Dict[str, Any]):
@@ -135,6 +165,8 @@ class RemoteJob:
         self.id_tag = data['id_tag']
         self.grid_name = data['grid_name']
         self.progress = data['progress']
+        self.progress_value = data.get('progress_value', 0.0)
+        self.msg = data.get('msg', "")
         self.status = JobStatus(data['status'])
         self.instruction = RemoteInstruction(data=data['instruction'])
 
@@ -249,7 +281,7 @@ def run_job(grid: MultiCircuit, job: RemoteJob) -> DRIVER_OBJECTS | None:
     driver: DRIVER_OBJECTS | None = create_driver(
         grid=grid,
         driver_tpe=job.instruction.operation,
-        time_indices=None
+        time_indices=job.instruction.time_indices
     )
 
     if driver is not None:
@@ -258,3 +290,230 @@ def run_job(grid: MultiCircuit, job: RemoteJob) -> DRIVER_OBJECTS | None:
         job.status = JobStatus.Done
 
     return driver
+
+
+def save_job_results(results: ResultsTemplate, file_path: str) -> None:
+    """
+    Write the results of a job to the job results file.
+    The numeric arrays are stored as binary .npy members, the rest (names, reports, ...) as json
+    :param results: results object of the driver
+    :param file_path: path of the .zip file
+    """
+    others: Dict[str, Any] = dict()
+
+    with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as f_zip:
+
+        for arr_name, arr_prop in results.data_variables.items():
+
+            arr = getattr(results, arr_name)
+
+            if arr_prop.tpe == DateVec and arr is not None:
+                arr = np.asarray(pd.DatetimeIndex(arr).values.astype('datetime64[ns]'))
+
+            if isinstance(arr, np.ndarray) and arr.dtype.kind in 'biufcM':
+                with BytesIO() as buffer:
+                    np.save(buffer, arr, allow_pickle=False)
+                    f_zip.writestr(f"results/{arr_name}.npy", buffer.getvalue())
+
+            elif isinstance(arr, np.ndarray):
+                others[arr_name] = arr.tolist()
+
+            elif hasattr(arr, 'get_dict'):
+                others[arr_name] = arr.get_dict()
+
+            else:
+                others[arr_name] = arr
+
+        f_zip.writestr("results.json", json.dumps(others, cls=CustomJSONizer))
+
+
+def read_job_results(file_path: str, results: ResultsTemplate) -> None:
+    """
+    Read the results of a job from the job results file
+    :param file_path: path of the .zip file
+    :param results: results object of the same type (and dimensions) to fill in-place
+    """
+    with zipfile.ZipFile(file_path, 'r') as f_zip:
+
+        for name in f_zip.namelist():
+            if name.startswith("results/") and name.endswith(".npy"):
+                arr_name = name[len("results/"):-len(".npy")]
+                arr_prop = results.data_variables.get(arr_name, None)
+
+                if arr_prop is not None:
+                    with f_zip.open(name) as fp:
+                        arr = np.load(fp, allow_pickle=False)
+
+                    setattr(results, arr_name, pd.to_datetime(arr) if arr_prop.tpe == DateVec else arr)
+
+        others = json.loads(f_zip.read("results.json"))
+
+    for arr_name, arr_data in others.items():
+        arr_prop = results.data_variables.get(arr_name, None)
+
+        if arr_prop is None:
+            continue
+
+        curr = getattr(results, arr_name, None)
+
+        if hasattr(curr, 'parse_data') and arr_data is not None:
+            curr.parse_data(arr_data)
+
+        elif arr_prop.tpe in (StrVec, StrMat, IntVec, Vec) and arr_data is not None:
+            setattr(results, arr_name, np.array(arr_data))
+
+        else:
+            setattr(results, arr_name, arr_data)
+
+
+def save_model_payload(circuit: MultiCircuit, file_path: str) -> str:
+    """
+    Write the model in the binary format used to send it to a server (a .veragrid file without results).
+    Sending a model does not change its version, so that the same model always gives the same hash
+    :param circuit: MultiCircuit
+    :param file_path: path of the file to write
+    :return: model content hash
+    """
+    model_version = circuit.model_version
+
+    logger = Logger()
+    dfs = gather_model_as_data_frames(circuit, logger=logger, legacy=False)
+    profile_blocks = dict()
+    model_data = gather_model_as_jsons(circuit, profile_blocks=profile_blocks)
+
+    save_veragrid_data_to_zip(dfs=dfs,
+                              filename_zip=file_path,
+                              model_data=model_data,
+                              sessions_data=list(),
+                              diagrams=list(),
+                              json_files=dict(),
+                              logger=logger,
+                              profile_blocks=profile_blocks,
+                              compress_profiles=True)
+
+    circuit.model_version = model_version
+
+    return get_zip_model_hash(file_path)
+
+
+def iter_file_chunks(file_path: str, chunk_size: int = 1024 * 1024) -> Generator[bytes, None, None]:
+    """
+    Read a file in chunks, to stream it
+    :param file_path: file path
+    :param chunk_size: chunk size in bytes
+    :return: generator of bytes
+    """
+    with open(file_path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def upload_model(base_url: str, file_path: str, model_hash: str, certificate: Union[str, bool],
+                 chunk_size: int = 1024 * 1024) -> bool:
+    """
+    Upload a model payload to a server, unless the server has it already
+    :param base_url: server url
+    :param file_path: model payload file (see save_model_payload)
+    :param model_hash: model content hash
+    :param certificate: SSL certificate path
+    :param chunk_size: upload chunk size in bytes
+    :return: ok?
+    """
+    if REQUESTS_AVAILABLE:
+        response = requests.get(url=f"{base_url}/models/{model_hash}", verify=certificate, timeout=10)
+
+        if response.status_code == 200:
+            # the server has it cached
+            return True
+
+        # stream the file with chunked transfer encoding
+        response = requests.put(url=f"{base_url}/models/{model_hash}",
+                                data=iter_file_chunks(file_path, chunk_size=chunk_size),
+                                headers={"Content-Type": "application/octet-stream"},
+                                verify=certificate)
+
+        return response.status_code == 200
+    else:
+        print(f"Requests not available due to an error on import")
+        return False
+
+
+def send_model_job(base_url: str,
+                   circuit: MultiCircuit,
+                   instruction: RemoteInstruction,
+                   certificate: Union[str, bool]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Send a job to a server using the binary model transport: the model is uploaded only if the server
+    does not have it already, and then the job instruction is sent
+    :param base_url: server url
+    :param circuit: MultiCircuit
+    :param instruction: RemoteInstruction
+    :param certificate: SSL certificate path
+    :return: server response, ok?
+    """
+    if not REQUESTS_AVAILABLE:
+        print(f"Requests not available due to an error on import")
+        return {"success": False, "msg": "requests not available"}, False
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = os.path.join(folder, "model.veragrid")
+        model_hash = save_model_payload(circuit=circuit, file_path=file_path)
+
+        if not upload_model(base_url=base_url, file_path=file_path, model_hash=model_hash, certificate=certificate):
+            return {"success": False, "msg": "Could not upload the model"}, False
+
+    response = requests.post(url=f"{base_url}/models/{model_hash}/jobs",
+                             json={'name': circuit.name, 'instruction': instruction.get_data()},
+                             verify=certificate)
+    try:
+        return response.json(), True
+    except requests.exceptions.JSONDecodeError:
+        return response.text, False
+
+
+def get_job_status(base_url: str, job_id: str, certificate: str) -> Union[RemoteJob, None]:
+    """
+    Ask the server for the status of a job
+    :param base_url: server url
+    :param job_id: job id tag
+    :param certificate: SSL certificate path
+    :return: RemoteJob or None if the job was not found
+    """
+    if REQUESTS_AVAILABLE:
+        response = requests.get(url=f"{base_url}/jobs/{job_id}", verify=certificate, timeout=10)
+
+        if response.status_code == 200:
+            return RemoteJob(data=response.json())
+        else:
+            return None
+    else:
+        print(f"Requests not available due to an error on import")
+        return None
+
+
+def download_job_results(base_url: str, job_id: str, certificate: str, file_path: str,
+                         chunk_size: int = 1024 * 1024) -> bool:
+    """
+    Stream the results file of a job from the server
+    :param base_url: server url
+    :param job_id: job id tag
+    :param certificate: SSL certificate path
+    :param file_path: local file path to write
+    :param chunk_size: download chunk size in bytes
+    :return: ok?
+    """
+    if REQUESTS_AVAILABLE:
+        with requests.get(url=f"{base_url}/download_results/{job_id}", stream=True, verify=certificate) as response:
+
+            if response.status_code == 200:
+                with open(file_path, "wb") as file:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            file.write(chunk)
+                return True
+            else:
+                print(response.status_code, response.text)
+                return False
+    else:
+        print(f"Requests not available due to an error on import")
+        return False
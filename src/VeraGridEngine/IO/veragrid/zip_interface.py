@@ -3,34 +3,57 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
 import json
+import time
+import hashlib
 from io import StringIO, TextIOWrapper, BytesIO, BufferedReader
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 import chardet
 import pandas as pd
 import zipfile
 from warnings import warn
-from typing import List, Dict, Union, Callable, Tuple, Any
+from typing import List, Dict, Union, Callable, Tuple, Any, Generator, Set
 from VeraGridEngine.Devices.types import VERAGRID_FILE_TYPE
 from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.IO.veragrid.generic_io_functions import parse_config_df, CustomJSONizer
+from VeraGridEngine.IO.veragrid.profile_blocks import ProfileBlock, release_profile_blocks
+from VeraGridEngine.Utils.process_pool import run_in_process_pool
 from VeraGridEngine.Simulations.results_template import DriverToSave
 import VeraGridEngine.Devices as dev
 
+# version of the binary profiles layout (profiles/<object type>/<property>.npy blocks)
+PROFILES_LAYOUT_VERSION = 1
+PROFILES_LAYOUT_MEMBER = "profiles/layout.version"
 
-def save_results_in_zip(f_zip_ptr: zipfile.ZipFile,
-                        filename_zip: str,
-                        sessions_data: List[DriverToSave],
-                        text_func: Union[None, Callable[[str], None]] = None,
-                        progress_func: Union[None, Callable[[float], None]] = None):
+
+# file of the fingerprints of the members written by a full save
+JOURNAL_BASE_MANIFEST = "journal/base.manifest"
+
+
+def get_fingerprint(content: Union[bytes, str]) -> str:
     """
+    Get the fingerprint of the content of a zip member
+    :param content: bytes or string written to the zip file
+    :return: hexadecimal hash
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
 
-    :param f_zip_ptr:
-    :param filename_zip:
-    :param sessions_data:
-    :param text_func:
-    :param progress_func:
-    :return:
+
+def iter_results_members(sessions_data: List[DriverToSave],
+                         filename_zip: str,
+                         text_func: Union[None, Callable[[str], None]] = None,
+                         progress_func: Union[None, Callable[[float], None]] = None
+                         ) -> Generator[Tuple[str, Union[bytes, str], int], None, None]:
+    """
+    Serialize the results of the sessions as zip members
+    :param sessions_data: List of DriverToSave instances, representing the results drivers data
+    :param filename_zip: name of the zip file (for the messages)
+    :param text_func: pointer to function that prints the names
+    :param progress_func: pointer to function that prints the progress 0~100
+    :return: generator of (member name, content, compression type)
     """
     # pre-count the sessions
     n_items = len(sessions_data)
@@ -62,7 +85,7 @@ def save_results_in_zip(f_zip_ptr: zipfile.ZipFile,
                             pd.DataFrame(data=arr).to_parquet(buffer)
 
                         # save the buffer to the zip file
-                        f_zip_ptr.writestr(filename + ".parquet", buffer.getvalue())
+                        yield filename + ".parquet", buffer.getvalue(), zipfile.ZIP_DEFLATED
 
                     except ValueError as e:
                         warn(str(e))
@@ -77,7 +100,149 @@ def save_results_in_zip(f_zip_ptr: zipfile.ZipFile,
                 # save the DataFrame to the buffer, protocol4 is to be compatible with python 3.6
                 session_data.logger.to_df().to_parquet(buffer)
                 # save the buffer to the zip file
-                f_zip_ptr.writestr(filename, buffer.getvalue())
+                yield filename, buffer.getvalue(), zipfile.ZIP_DEFLATED
+
+
+def save_results_in_zip(f_zip_ptr: zipfile.ZipFile,
+                        filename_zip: str,
+                        sessions_data: List[DriverToSave],
+                        text_func: Union[None, Callable[[str], None]] = None,
+                        progress_func: Union[None, Callable[[float], None]] = None):
+    """
+
+    :param f_zip_ptr:
+    :param filename_zip:
+    :param sessions_data:
+    :param text_func:
+    :param progress_func:
+    :return:
+    """
+    for filename, content, compress_type in iter_results_members(sessions_data=sessions_data,
+                                                                 filename_zip=filename_zip,
+                                                                 text_func=text_func,
+                                                                 progress_func=progress_func):
+        f_zip_ptr.writestr(filename, content, compress_type=compress_type)
+
+
+def iter_veragrid_members(dfs: Dict[str, pd.DataFrame],
+                          filename_zip: str,
+                          model_data: Dict[str, Dict[str, str]],
+                          sessions_data: List[DriverToSave],
+                          diagrams: List[Union[dev.MapDiagram, dev.SchematicDiagram]],
+                          json_files: Dict[str, dict],
+                          text_func: Union[None, Callable[[str], None]] = None,
+                          progress_func: Union[None, Callable[[float], None]] = None,
+                          logger=Logger(),
+                          profile_blocks: Union[None, Dict[str, Dict[str, np.ndarray]]] = None,
+                          compress_profiles: bool = True
+                          ) -> Generator[Tuple[str, Union[bytes, str], int], None, None]:
+    """
+    Serialize the model as zip members, one at a time
+    :param dfs: dictionary of pandas dataFrames {name: DataFrame}
+    :param filename_zip: file name where to save all (for the messages)
+    :param model_data: dictionary of json data opposed to the dataframes collection
+    :param sessions_data: List of DriverToSave instances, representing the results drivers data
+    :param diagrams: List of Diagram objects
+    :param json_files: List of configuration json files to save Dict[file_name, dictionary to save]
+    :param text_func: pointer to function that prints the names
+    :param progress_func: pointer to function that prints the progress 0~100
+    :param logger: Logger object
+    :param profile_blocks: binary profiles blocks {object type name: {property name: (time, elements) array}}
+                           referenced by the model data (see gather_model_as_jsons)
+    :param compress_profiles: compress the profiles blocks? otherwise they can be memory-mapped when loading
+    :return: generator of (member name, content, compression type)
+    """
+    n = len(dfs)
+    n_failed = 0
+
+    # save the config files
+    for name, value in json_files.items():
+        filename = name + ".json"
+        yield filename, json.dumps(value), zipfile.ZIP_DEFLATED
+
+    # save the VeraGrid object as json data
+    for object_type_name, object_data in model_data.items():
+        filename = "model_data/" + object_type_name + ".model"
+        try:
+            yield filename, json.dumps(object_data, indent=4, cls=CustomJSONizer), zipfile.ZIP_DEFLATED
+        except TypeError as e:
+            logger.add_error(msg=str(e), device_class=object_type_name)
+            warn(f"{object_type_name}: {e}")
+
+    # save the binary profiles blocks
+    if profile_blocks is not None and len(profile_blocks):
+        yield PROFILES_LAYOUT_MEMBER, str(PROFILES_LAYOUT_VERSION), zipfile.ZIP_DEFLATED
+
+        for object_type_name, type_blocks in profile_blocks.items():
+            for property_name, block in type_blocks.items():
+                filename = "profiles/" + object_type_name + "/" + property_name + ".npy"
+
+                if text_func is not None:
+                    text_func('Flushing ' + filename + ' to ' + filename_zip + '...')
+
+                with BytesIO() as buffer:
+                    np.save(buffer, block, allow_pickle=False)
+                    yield filename, buffer.getvalue(), (zipfile.ZIP_DEFLATED if compress_profiles
+                                                        else zipfile.ZIP_STORED)
+
+    # save diagrams
+    for diagram in diagrams:
+        filename = "diagrams/" + diagram.idtag + ".diagram"
+        yield filename, json.dumps(diagram.get_data_dict(), indent=4), zipfile.ZIP_DEFLATED
+
+    # for each DataFrame and name...
+    i = 0
+    for name, df in dfs.items():
+
+        if text_func is not None:
+            text_func('Flushing ' + name + ' to ' + filename_zip + '...')
+
+        if progress_func is not None:
+            progress_func((i + 1) / n * 100)
+
+        if name.endswith('_prof'):
+
+            # compose the csv file name
+            filename = name + ".parquet"
+
+            # open a string buffer
+            try:  # try parquet file
+                with BytesIO() as buffer:
+                    # save the DataFrame to the buffer, protocol4 is to be compatible with python 3.6
+                    df.to_parquet(buffer)
+                    content = buffer.getvalue()
+
+            except:  # otherwise just use csv
+                n_failed += 1
+                filename = name + ".csv"
+                with StringIO() as buffer:
+                    df.to_csv(buffer, index=False)  # save the DataFrame to the buffer
+                    content = buffer.getvalue()
+
+            # save the buffer to the zip file
+            yield filename, content, zipfile.ZIP_DEFLATED
+
+        else:
+            # compose the csv file name
+            filename = name + ".csv"
+
+            # open a string buffer
+            with StringIO() as buffer:
+                df.to_csv(buffer, index=False)  # save the DataFrame to the buffer
+                content = buffer.getvalue()
+
+            yield filename, content, zipfile.ZIP_DEFLATED  # save the buffer to the zip file
+
+        i += 1
+
+    # Save the results into the zip file
+    yield from iter_results_members(sessions_data=sessions_data,
+                                    filename_zip=filename_zip,
+                                    text_func=text_func,
+                                    progress_func=progress_func)
+
+    if n_failed:
+        print('Failed to pickle several profiles, but saved them as csv.\nFor improved speed install Pandas >= 1.2')
 
 
 def save_veragrid_data_to_zip(dfs: Dict[str, pd.DataFrame],
@@ -88,9 +253,12 @@ def save_veragrid_data_to_zip(dfs: Dict[str, pd.DataFrame],
                               json_files: Dict[str, dict],
                               text_func: Union[None, Callable[[str], None]] = None,
                               progress_func: Union[None, Callable[[float], None]] = None,
-                              logger=Logger()):
+                              logger=Logger(),
+                              profile_blocks: Union[None, Dict[str, Dict[str, np.ndarray]]] = None,
+                              compress_profiles: bool = True):
     """
     Save a list of DataFrames to a zip file without saving to disk the csv files
+    The fingerprints of the members are stored too, so that the next saves can be incremental
     :param dfs: dictionary of pandas dataFrames {name: DataFrame}
     :param filename_zip: file name where to save all
     :param model_data: dictionary of json data opposed to the dataframes collection
@@ -100,81 +268,255 @@ def save_veragrid_data_to_zip(dfs: Dict[str, pd.DataFrame],
     :param text_func: pointer to function that prints the names
     :param progress_func: pointer to function that prints the progress 0~100
     :param logger: Logger object
+    :param profile_blocks: binary profiles blocks {object type name: {property name: (time, elements) array}}
+                           referenced by the model data (see gather_model_as_jsons)
+    :param compress_profiles: compress the profiles blocks? otherwise they can be memory-mapped when loading
     """
+    # the profiles opened lazily from this file must be read before overwriting it
+    release_profile_blocks(filename_zip)
+
+    fingerprints: Dict[str, str] = dict()
 
-    n = len(dfs)
-    n_failed = 0
     # open zip file for writing
     with zipfile.ZipFile(filename_zip, 'w', zipfile.ZIP_DEFLATED) as f_zip_ptr:
 
-        # save the config files
-        for name, value in json_files.items():
-            filename = name + ".json"
-            f_zip_ptr.writestr(filename, json.dumps(value))
+        for filename, content, compress_type in iter_veragrid_members(dfs=dfs,
+                                                                      filename_zip=filename_zip,
+                                                                      model_data=model_data,
+                                                                      sessions_data=sessions_data,
+                                                                      diagrams=diagrams,
+                                                                      json_files=json_files,
+                                                                      text_func=text_func,
+                                                                      progress_func=progress_func,
+                                                                      logger=logger,
+                                                                      profile_blocks=profile_blocks,
+                                                                      compress_profiles=compress_profiles):
+            f_zip_ptr.writestr(filename, content, compress_type=compress_type)
+            fingerprints[filename] = get_fingerprint(content)
 
-        # save the VeraGrid object as json data
-        for object_type_name, object_data in model_data.items():
-            filename = "model_data/" + object_type_name + ".model"
-            try:
-                f_zip_ptr.writestr(filename, json.dumps(object_data, indent=4, cls=CustomJSONizer))
-            except TypeError as e:
-                logger.add_error(msg=str(e), device_class=object_type_name)
-                warn(f"{object_type_name}: {e}")
+        f_zip_ptr.writestr(JOURNAL_BASE_MANIFEST, json.dumps({'fingerprints': fingerprints}))
 
-        # save diagrams
-        for diagram in diagrams:
-            filename = "diagrams/" + diagram.idtag + ".diagram"
-            f_zip_ptr.writestr(filename, json.dumps(diagram.get_data_dict(), indent=4))
 
-        # for each DataFrame and name...
-        i = 0
-        for name, df in dfs.items():
+def get_journal_entries(zip_file_pointer: zipfile.ZipFile) -> List[int]:
+    """
+    Get the journal entries of a .veragrid file in order
+    :param zip_file_pointer: opened zip file
+    :return: list of entry numbers
+    """
+    entries = list()
+    for name in zip_file_pointer.namelist():
+        if name.startswith("journal/") and name.endswith(".manifest") and name != JOURNAL_BASE_MANIFEST:
+            entries.append(int(name[len("journal/"):-len(".manifest")]))
+    entries.sort()
+    return entries
 
-            if text_func is not None:
-                text_func('Flushing ' + name + ' to ' + filename_zip + '...')
 
-            if progress_func is not None:
-                progress_func((i + 1) / n * 100)
+def get_zip_members_map(zip_file_pointer: zipfile.ZipFile) -> Dict[str, str]:
+    """
+    Get the members of a .veragrid file, resolving the journal of the incremental saves
+    :param zip_file_pointer: opened zip file
+    :return: {member name: name of the zip entry holding its latest content}
+    """
+    members = {name: name for name in zip_file_pointer.namelist()
+               if not name.startswith("journal/") and not name.endswith("/")}
 
-            if name.endswith('_prof'):
+    for k in get_journal_entries(zip_file_pointer):
+        manifest = json.loads(zip_file_pointer.read(f"journal/{k}.manifest"))
 
-                # compose the csv file name
-                filename = name + ".parquet"
+        for name in manifest['removed']:
+            members.pop(name, None)
 
-                # open a string buffer
-                try:  # try parquet file
-                    with BytesIO() as buffer:
-                        # save the DataFrame to the buffer, protocol4 is to be compatible with python 3.6
-                        df.to_parquet(buffer)
-                        # save the buffer to the zip file
-                        f_zip_ptr.writestr(filename, buffer.getvalue())
-
-                except:  # otherwise just use csv
-                    n_failed += 1
-                    filename = name + ".csv"
-                    with StringIO() as buffer:
-                        df.to_csv(buffer, index=False)  # save the DataFrame to the buffer
-                        f_zip_ptr.writestr(filename, buffer.getvalue())  # save the buffer to the zip file
-            else:
-                # compose the csv file name
-                filename = name + ".csv"
+        for name in manifest['written']:
+            members[name] = f"journal/{k}/{name}"
 
-                # open a string buffer
-                with StringIO() as buffer:
-                    df.to_csv(buffer, index=False)  # save the DataFrame to the buffer
-                    f_zip_ptr.writestr(filename, buffer.getvalue())  # save the buffer to the zip file
+    return members
 
-            i += 1
 
-        # Save the results into the zip file
-        save_results_in_zip(f_zip_ptr=f_zip_ptr,
-                            filename_zip=filename_zip,
-                            sessions_data=sessions_data,
-                            text_func=text_func,
-                            progress_func=progress_func)
+def get_zip_model_hash(filename_zip: str) -> str:
+    """
+    Get a hash of the model content of a .veragrid file, computed from the fingerprints of its members.
+    Unlike the hash of the file bytes, it does not depend on the zip timestamps, and the results are not part of it.
+    The fingerprints are computed from the bytes of the members (not read from the journal manifests),
+    so that the hash can be used to verify the content of a file received from others.
+    :param filename_zip: .veragrid file name
+    :return: hexadecimal hash
+    """
+    with zipfile.ZipFile(filename_zip) as f_zip_ptr:
+        content = sorted((name, get_fingerprint(f_zip_ptr.read(entry_name)))
+                         for name, entry_name in get_zip_members_map(f_zip_ptr).items()
+                         if not name.startswith('sessions/'))
+
+    return get_fingerprint(json.dumps(content))
+
+
+def get_member_object_type(filename: str) -> Union[None, str]:
+    """
+    Get the object type of the model data or profiles block held by a zip member
+    :param filename: member name
+    :return: object type name, None if the member does not belong to an object type
+    """
+    if filename.startswith("model_data/") and filename.endswith(".model"):
+        return filename[len("model_data/"):-len(".model")]
+
+    parts = filename.split("/")
+    if len(parts) == 3 and parts[0] == "profiles":
+        return parts[1]
+
+    return None
 
-    if n_failed:
-        print('Failed to pickle several profiles, but saved them as csv.\nFor improved speed install Pandas >= 1.2')
+
+def get_journal_state(filename_zip: str,
+                      max_journal_entries: int = 20,
+                      max_journal_ratio: float = 0.5) -> Union[None, Tuple[int, Dict[str, str]]]:
+    """
+    Get the state of the journal of a .veragrid file to save it incrementally
+    :param filename_zip: name of the zip file
+    :param max_journal_entries: number of journal entries after which the file is compacted
+    :param max_journal_ratio: proportion of the file size held by the journal after which the file is compacted
+    :return: number of the next journal entry, fingerprints of the members in the last save
+             or None if the file must be fully saved (missing, not readable or to be compacted)
+    """
+    if not os.path.exists(filename_zip):
+        return None
+
+    try:
+        with zipfile.ZipFile(filename_zip) as f_zip_ptr:
+            entries = get_journal_entries(f_zip_ptr)
+            manifest_name = f"journal/{entries[-1]}.manifest" if len(entries) else JOURNAL_BASE_MANIFEST
+            previous = json.loads(f_zip_ptr.read(manifest_name))['fingerprints']
+
+            journal_size = sum(info.compress_size for info in f_zip_ptr.infolist()
+                               if info.filename.startswith("journal/"))
+
+    except (zipfile.BadZipFile, KeyError):
+        return None
+
+    if len(entries) >= max_journal_entries or journal_size > max_journal_ratio * os.path.getsize(filename_zip):
+        # compact
+        return None
+
+    return (entries[-1] + 1 if len(entries) else 1), previous
+
+
+def save_veragrid_delta_to_zip(dfs: Dict[str, pd.DataFrame],
+                               filename_zip: str,
+                               model_data: Dict[str, Dict[str, str]],
+                               sessions_data: List[DriverToSave],
+                               diagrams: List[Union[dev.MapDiagram, dev.SchematicDiagram]],
+                               json_files: Dict[str, dict],
+                               text_func: Union[None, Callable[[str], None]] = None,
+                               progress_func: Union[None, Callable[[float], None]] = None,
+                               logger=Logger(),
+                               profile_blocks: Union[None, Dict[str, Dict[str, np.ndarray]]] = None,
+                               compress_profiles: bool = True,
+                               max_journal_entries: int = 20,
+                               max_journal_ratio: float = 0.5,
+                               unchanged_object_types: Union[None, Set[str]] = None) -> bool:
+    """
+    Save incrementally: only the members whose content changed since the last save
+    (i.e. the device types, profiles blocks or results that were modified) are appended to the file
+    as a new journal entry. The existing content of the file is not rewritten.
+    If the file cannot be saved incrementally, or the journal is too large, the file is compacted with a full save.
+    :param dfs: dictionary of pandas dataFrames {name: DataFrame}
+    :param filename_zip: file name where to save all
+    :param model_data: dictionary of json data opposed to the dataframes collection
+    :param sessions_data: List of DriverToSave instances, representing the results drivers data
+    :param diagrams: List of Diagram objects
+    :param json_files: List of configuration json files to save Dict[file_name, dictionary to save]
+    :param text_func: pointer to function that prints the names
+    :param progress_func: pointer to function that prints the progress 0~100
+    :param logger: Logger object
+    :param profile_blocks: binary profiles blocks {object type name: {property name: (time, elements) array}}
+    :param compress_profiles: compress the profiles blocks?
+    :param max_journal_entries: number of journal entries after which the file is compacted
+    :param max_journal_ratio: proportion of the file size held by the journal after which the file is compacted
+    :param unchanged_object_types: object types that are not in the model data because they were not modified
+                                   since the last save (see get_modified_object_types). Only valid if the file
+                                   can be saved incrementally (see get_journal_state)
+    :return: True if the save was incremental, False if the file was fully rewritten
+    """
+    kwargs = dict(dfs=dfs,
+                  filename_zip=filename_zip,
+                  model_data=model_data,
+                  sessions_data=sessions_data,
+                  diagrams=diagrams,
+                  json_files=json_files,
+                  text_func=text_func,
+                  progress_func=progress_func,
+                  logger=logger,
+                  profile_blocks=profile_blocks,
+                  compress_profiles=compress_profiles)
+
+    journal_state = get_journal_state(filename_zip=filename_zip,
+                                      max_journal_entries=max_journal_entries,
+                                      max_journal_ratio=max_journal_ratio)
+
+    if journal_state is None:
+        if unchanged_object_types:
+            raise ValueError(f"{filename_zip} must be fully saved, but the model data lacks the unchanged object types")
+
+        save_veragrid_data_to_zip(**kwargs)
+        return False
+
+    k, previous = journal_state
+    fingerprints: Dict[str, str] = dict()
+    written: List[str] = list()
+
+    # the members of the unchanged object types are not serialized again, they keep their content in the file
+    if unchanged_object_types:
+        for filename, fingerprint in previous.items():
+            if get_member_object_type(filename) in unchanged_object_types:
+                fingerprints[filename] = fingerprint
+
+    # appending does not move the existing members, so the lazy profiles mapped from the file remain valid
+    with zipfile.ZipFile(filename_zip, 'a', zipfile.ZIP_DEFLATED) as f_zip_ptr:
+
+        for filename, content, compress_type in iter_veragrid_members(**kwargs):
+            fingerprint = get_fingerprint(content)
+            fingerprints[filename] = fingerprint
+
+            if previous.get(filename, None) != fingerprint:
+                f_zip_ptr.writestr(f"journal/{k}/{filename}", content, compress_type=compress_type)
+                written.append(filename)
+
+        if PROFILES_LAYOUT_MEMBER in previous and PROFILES_LAYOUT_MEMBER not in fingerprints:
+            # the layout is only written with the profiles of the gathered object types
+            if any(filename.startswith("profiles/") for filename in fingerprints):
+                fingerprints[PROFILES_LAYOUT_MEMBER] = previous[PROFILES_LAYOUT_MEMBER]
+
+        removed = [filename for filename in previous.keys() if filename not in fingerprints]
+
+        f_zip_ptr.writestr(f"journal/{k}.manifest", json.dumps({'written': written,
+                                                                 'removed': removed,
+                                                                 'fingerprints': fingerprints}))
+
+    return True
+
+
+def compact_veragrid_zip(filename_zip: str) -> None:
+    """
+    Rewrite a .veragrid file merging its journal of incremental saves
+    :param filename_zip: name of the zip file
+    """
+    # the profiles opened lazily from this file must be read before replacing it
+    release_profile_blocks(filename_zip)
+
+    tmp_file_name = filename_zip + ".tmp"
+    fingerprints: Dict[str, str] = dict()
+
+    with zipfile.ZipFile(filename_zip) as f_zip_src:
+        members = get_zip_members_map(f_zip_src)
+
+        with zipfile.ZipFile(tmp_file_name, 'w', zipfile.ZIP_DEFLATED) as f_zip_ptr:
+            for filename, member_name in members.items():
+                content = f_zip_src.read(member_name)
+                f_zip_ptr.writestr(filename, content,
+                                   compress_type=f_zip_src.getinfo(member_name).compress_type)
+                fingerprints[filename] = get_fingerprint(content)
+
+            f_zip_ptr.writestr(JOURNAL_BASE_MANIFEST, json.dumps({'fingerprints': fingerprints}))
+
+    os.replace(tmp_file_name, filename_zip)
 
 
 def save_results_only(filename_zip: str,
@@ -267,20 +609,128 @@ def read_data_frame_from_zip(file_pointer,
         return None
 
 
+def read_profile_block_from_zip(file_pointer: zipfile.ZipExtFile,
+                                name: str,
+                                extension: str,
+                                logger: Logger) -> Union[None, np.ndarray]:
+    """
+    Read a binary profiles block (or check the layout version) from the profiles folder of a .veragrid file
+    :param file_pointer: Pointer to the file within the zip file
+    :param name: name of the file within the zip file without extension (profiles/<object type>/<property>)
+    :param extension: extension of the file
+    :param logger: Logger
+    :return: (time, elements) array or None if the file is not a block
+    """
+    if extension == '.version':
+        version = int(file_pointer.read().decode())
+        if version > PROFILES_LAYOUT_VERSION:
+            logger.add_error("Unsupported profiles layout version, upgrade VeraGrid",
+                             value=version,
+                             expected_value=PROFILES_LAYOUT_VERSION)
+
+    elif extension == '.npy':
+        try:
+            return np.load(file_pointer, allow_pickle=False)
+        except ValueError as e:
+            logger.add_error(str(e), device=file_pointer.name)
+
+    else:
+        logger.add_info("Unsupported file type inside the profiles of the .veragrid", value=name + extension)
+
+    return None
+
+
+def decode_zip_member(zip_file_pointer: zipfile.ZipFile,
+                      file_name: str,
+                      entry_name: Union[str, None] = None) -> Tuple[Any, Logger, float]:
+    """
+    Decode a member of a .veragrid file
+    :param zip_file_pointer: opened zip file
+    :param file_name: name of the member
+    :param entry_name: name of the zip entry holding the member content, if different (journal entries)
+    :return: decoded value (None if it could not be decoded), Logger of the decoding, elapsed time (s)
+    """
+    t0 = time.time()
+    logger = Logger()
+    value = None
+
+    # split the file name into name and extension
+    name, extension = os.path.splitext(file_name)
+
+    # create a buffer to read the file
+    with zip_file_pointer.open(file_name if entry_name is None else entry_name) as file_pointer:
+
+        try:
+            if name.lower() == "config":
+                value = pd.read_csv(file_pointer, index_col=0)
+
+            elif name.startswith("profiles/"):
+                value = read_profile_block_from_zip(file_pointer=file_pointer,
+                                                    name=name,
+                                                    extension=extension,
+                                                    logger=logger)
+
+            elif extension in ['.json', '.diagram', '.model']:
+                value = json.load(file_pointer)
+
+            elif extension in ['.csv', '.npy', '.pkl', '.parquet']:
+                value = read_data_frame_from_zip(file_pointer, extension, logger=logger)
+
+            else:
+                logger.add_info("Unsupported file type inside .veragrid", value=file_name)
+
+        except EOFError:
+            logger.add_error("EOF error", device=file_pointer.name)
+
+        except zipfile.BadZipFile:
+            logger.add_error("Bad zip file error", device=file_pointer.name)
+
+    return value, logger, time.time() - t0
+
+
+def _decode_zip_member_process(process_data: Dict, file_name: str,
+                               entry_name: str) -> Tuple[Tuple[Any, float], Logger]:
+    """
+    Decode a member of the zip file inside a process of the pool
+    :param process_data: data of the process, with the zip file name as context
+    :param file_name: name of the member
+    :param entry_name: name of the zip entry holding the member content
+    :return: (decoded value, elapsed time (s)), Logger
+    """
+    if 'zip' not in process_data:
+        # the zip file is opened once per process
+        process_data['zip'] = zipfile.ZipFile(process_data['context'])
+
+    value, logger, elapsed = decode_zip_member(zip_file_pointer=process_data['zip'],
+                                               file_name=file_name,
+                                               entry_name=entry_name)
+    return (value, elapsed), logger
+
+
 def get_frames_from_zip(file_name_zip: str,
                         text_func: Union[None, Callable[[str], None]] = None,
                         progress_func: Union[None, Callable[[float], None]] = None,
-                        logger=Logger()) -> Tuple[VERAGRID_FILE_TYPE, Dict[str, Any]]:
+                        logger=Logger(),
+                        lazy_profiles: bool = False,
+                        max_workers: Union[int, None] = None,
+                        use_processes: bool = False) -> Tuple[VERAGRID_FILE_TYPE, Dict[str, Any]]:
     """
     Open the csv files from a zip file
+    The members are decoded in parallel, and the sessions results are not read
+    (they are loaded on demand with load_session_driver_objects)
     :param file_name_zip: name of the zip file
-    :param text_func: pointer to function that prints the names
+    :param text_func: pointer to function that prints the names and decoding times
     :param progress_func: pointer to function that prints the progress 0~100
     :param logger:
+    :param lazy_profiles: if true, the binary profiles are only read when accessed
+    :param max_workers: number of workers decoding the members (None for the executor's default, 1 for serial)
+    :param use_processes: use a process pool instead of a thread pool?
+                          (processes also parallelize the json parsing, at the cost of sending back the results)
     :return: list of DataFrames
     """
     data = {'diagrams': list(),
-            'model_data': dict()}
+            'model_data': dict(),
+            'profiles': dict()}
     json_files = dict()
 
     # open the zip file
@@ -289,77 +739,113 @@ def get_frames_from_zip(file_name_zip: str,
     except zipfile.BadZipFile:
         return data, json_files
 
-    names = zip_file_pointer.namelist()
+    with zip_file_pointer:
 
-    n = len(names)
+        # resolve the journal of the incremental saves
+        members = get_zip_members_map(zip_file_pointer)
 
-    # for each file in the zip file...
-    for i, file_name in enumerate(names):
+        names = list()
+        for file_name, entry_name in members.items():
+            name, extension = os.path.splitext(file_name)
 
-        # split the file name into name and extension
-        name, extension = os.path.splitext(file_name)
+            if name.startswith("sessions/"):
+                # the results are loaded on demand
+                pass
 
-        if text_func is not None:
-            text_func('Unpacking ' + name + ' from ' + file_name_zip)
+            elif lazy_profiles and name.startswith("profiles/") and extension == '.npy':
+                # just point to the block, nothing is read
+                _, object_type_name, property_name = name.split("/")
+                type_blocks = data['profiles'].get(object_type_name, None)
+                if type_blocks is None:
+                    type_blocks = dict()
+                    data['profiles'][object_type_name] = type_blocks
+                type_blocks[property_name] = ProfileBlock(file_name=file_name_zip, member_name=entry_name)
 
-        if progress_func is not None:
-            progress_func((i + 1) / n * 100)
+            else:
+                names.append(file_name)
+
+        n = len(names)
+        values: List[Any] = [None] * n
+        n_done = 0
+
+        def store(i: int, value: Any, elapsed: float) -> None:
+            """
+            Store a decoded member
+            :param i: member index
+            :param value: decoded value
+            :param elapsed: decoding time (s)
+            """
+            nonlocal n_done
+            values[i] = value
+            n_done += 1
 
-        # create a buffer to read the file
-        file_pointer = zip_file_pointer.open(file_name)
+            if text_func is not None:
+                text_func(f'Unpacked {names[i]} from {file_name_zip} in {elapsed:.3f} s')
 
-        try:
-            if name.lower() == "config":
-                df = pd.read_csv(file_pointer, index_col=0)
-                data = parse_config_df(df, data)
+            if progress_func is not None:
+                progress_func(n_done / n * 100)
+
+        if max_workers == 1 or n < 2:
+            for i, file_name in enumerate(names):
+                value, member_logger, elapsed = decode_zip_member(zip_file_pointer, file_name, members[file_name])
+                logger += member_logger
+                store(i, value, elapsed)
+
+        elif use_processes:
+            run_in_process_pool(func=_decode_zip_member_process,
+                                args_list=[(file_name, members[file_name]) for file_name in names],
+                                context=file_name_zip,
+                                n_workers=max_workers if max_workers is not None else os.cpu_count(),
+                                store_func=lambda i, result: store(i, *result),
+                                logger=logger)
+
+        else:
+            # the zip file is safe for concurrent reading, and the decompression and decoding
+            # of the binary members release the GIL
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(decode_zip_member, zip_file_pointer, file_name, members[file_name]): i
+                           for i, file_name in enumerate(names)}
+                try:
+                    for future in as_completed(futures):
+                        value, member_logger, elapsed = future.result()
+                        logger += member_logger
+                        store(futures[future], value, elapsed)
+                finally:
+                    # on errors, the members not started are dropped
+                    for future in futures:
+                        future.cancel()
 
-            elif extension == '.json':
-                json_files[name] = json.load(file_pointer)
+    # assemble the data in the order of the file
+    for file_name, value in zip(names, values):
 
-            elif extension == '.diagram':
-                data['diagrams'].append(json.load(file_pointer))
+        if value is None:
+            continue
 
-            elif extension == '.model':
-                folder, object_name = name.split("/")
-                data['model_data'][object_name] = json.load(file_pointer)
+        name, extension = os.path.splitext(file_name)
 
-            elif extension == '.csv':
-                df = pd.read_csv(file_pointer, index_col=None)
-                data[name] = df
+        if name.lower() == "config":
+            data = parse_config_df(value, data)
 
-            elif extension == '.npy':
-                try:
-                    df = np.load(file_pointer)
-                except ValueError:
-                    df = np.load(file_pointer, allow_pickle=True)
-                data[name] = df
+        elif name.startswith("profiles/"):
+            _, object_type_name, property_name = name.split("/")
+            type_blocks = data['profiles'].get(object_type_name, None)
+            if type_blocks is None:
+                type_blocks = dict()
+                data['profiles'][object_type_name] = type_blocks
+            type_blocks[property_name] = value
 
-            elif extension == '.pkl':
-                try:
-                    df = pd.read_pickle(file_pointer)
-                    data[name] = df
-                except ValueError as e:
-                    logger.add_error(str(e), device=file_pointer.name)
-                except AttributeError as e:
-                    logger.add_error(str(e) + ' Upgrading pandas might help.', device=file_pointer.name)
-
-            elif extension == '.parquet':
-                try:
-                    df = pd.read_parquet(file_pointer)
-                    data[name] = df
-                except ValueError as e:
-                    logger.add_error(str(e), device=file_pointer.name)
-                except AttributeError as e:
-                    logger.add_error(str(e) + ' Upgrading pandas might help.', device=file_pointer.name)
+        elif extension == '.json':
+            json_files[name] = value
 
-            else:
-                logger.add_info("Unsupported file type inside .veragrid", value=file_name)
+        elif extension == '.diagram':
+            data['diagrams'].append(value)
 
-        except EOFError:
-            logger.add_error("EOF error", device=file_pointer.name)
+        elif extension == '.model':
+            folder, object_name = name.split("/")
+            data['model_data'][object_name] = value
 
-        except zipfile.BadZipFile:
-            logger.add_error("Bad zip file error", device=file_pointer.name)
+        else:
+            data[name] = value
 
     return data, json_files
 
@@ -375,7 +861,8 @@ def get_session_tree(file_name_zip: str):
     except zipfile.BadZipFile:
         return dict()
 
-    names = zip_file_pointer.namelist()
+    with zip_file_pointer:
+        names = get_zip_members_map(zip_file_pointer).keys()
 
     data = dict()
 
@@ -416,21 +903,21 @@ def load_session_driver_objects(file_name_zip: str,
 
     data = dict()
 
-    # traverse the zip names and pick all those that start with sessions_data/session_name/study_name
-    for name in zip_file_pointer.namelist():
-        if '/' in name:
-            path = name.split('/')
-            if len(path) > 3:
-                if path[0].lower() == 'sessions' and session_name == path[1] and study_name == path[2]:
-                    # create a buffer to read the file
-                    file_pointer = zip_file_pointer.open(name)
-
-                    # split the file name into name and extension
-                    _, extension = os.path.splitext(name)
-                    arr_name = path[3].replace(extension, '')
-
-                    # read the data
-                    data[arr_name] = read_data_frame_from_zip(file_pointer, extension)
+    with zip_file_pointer:
+        # traverse the zip names and pick all those that start with sessions_data/session_name/study_name
+        for name, entry_name in get_zip_members_map(zip_file_pointer).items():
+            if '/' in name:
+                path = name.split('/')
+                if len(path) > 3:
+                    if path[0].lower() == 'sessions' and session_name == path[1] and study_name == path[2]:
+                        # create a buffer to read the file
+                        with zip_file_pointer.open(entry_name) as file_pointer:
+                            # split the file name into name and extension
+                            _, extension = os.path.splitext(name)
+                            arr_name = path[3].replace(extension, '')
+
+                            # read the data
+                            data[arr_name] = read_data_frame_from_zip(file_pointer, extension)
 
     return data
 
@@ -272,6 +272,135 @@ def compute_atc_list(br_idx: IntVec, contingency_br_idx: IntVec, lodf: Mat, alph
     return results
 
 
+@nb.njit(cache=True)
+def get_atc_contingency_pairs(br_idx: IntVec, contingency_br_idx: IntVec, lodf: Mat,
+                              threshold: float) -> Tuple[IntVec, IntVec]:
+    """
+    Get the (monitored, contingency) branch pairs with a relevant LODF.
+    The LODF only depends on the topology, hence the pairs are shared by the time steps with the same topology
+    :param br_idx: array of branch indices to analyze
+    :param contingency_br_idx: array of branch indices to fail
+    :param lodf: Line outage distribution factors (n-branch, n-outage branch)
+    :param threshold: value that determines if a line is studied for the ATC calculation
+    :return: monitored branch indices, contingency branch indices (in the compute_atc_list order)
+    """
+    n = 0
+    for m in br_idx:
+        for c in contingency_br_idx:
+            if m != c and abs(lodf[m, c]) > threshold:
+                n += 1
+
+    pair_m = np.empty(n, dtype=np.int64)
+    pair_c = np.empty(n, dtype=np.int64)
+    k = 0
+    for m in br_idx:
+        for c in contingency_br_idx:
+            if m != c and abs(lodf[m, c]) > threshold:
+                pair_m[k] = m
+                pair_c[k] = c
+                k += 1
+
+    return pair_m, pair_c
+
+
+@nb.njit(cache=True)
+def compute_atc_ts(time_indices: IntVec, pair_m: IntVec, pair_c: IntVec, lodf: Mat, alpha: Mat, flows: Mat,
+                   rates: Mat, contingency_rates: Mat, base_exchange: Vec, threshold: float) -> Mat:
+    """
+    Compute the available transfer capacity (ATC) of several time steps with the same topology
+    :param time_indices: time index of each row of alpha, flows, rates and contingency_rates (nt)
+    :param pair_m: monitored branch indices (see get_atc_contingency_pairs)
+    :param pair_c: contingency branch indices (see get_atc_contingency_pairs)
+    :param lodf: Line outage distribution factors (n-branch, n-outage branch)
+    :param alpha: Branch sensitivities to the exchange [p.u.] (nt, n-branch)
+    :param flows: Branches power injected at the "from" side [MW] (nt, n-branch)
+    :param rates: Branches rates (nt, n-branch)
+    :param contingency_rates: Branches contingency rates (nt, n-branch)
+    :param base_exchange: amount already exchanged between areas (nt)
+    :param threshold: value that determines if a line is studied for the ATC calculation
+    :return: report matrix with the columns of compute_atc_list, ordered by time and then as compute_atc_list
+    """
+    nt = len(time_indices)
+    npairs = len(pair_m)
+
+    # count the results to allocate them at once
+    n = 0
+    for t in range(nt):
+        for k in range(npairs):
+            m = pair_m[k]
+            c = pair_c[k]
+            if abs(alpha[t, m]) > threshold:
+                beta = alpha[t, m] + lodf[m, c] * alpha[t, c]
+                if abs(beta) > threshold:
+                    n += 1
+
+    results = np.empty((n, 15))
+    i = 0
+    for t in range(nt):
+        for k in range(npairs):
+            m = pair_m[k]
+            c = pair_c[k]
+
+            if abs(alpha[t, m]) > threshold:
+
+                beta = alpha[t, m] + lodf[m, c] * alpha[t, c]
+
+                if abs(beta) > threshold:
+
+                    # compute the ATC in "N"
+                    if alpha[t, m] > 0:
+                        atc_n = (rates[t, m] - flows[t, m]) / alpha[t, m]
+                    else:
+                        atc_n = (-rates[t, m] - flows[t, m]) / alpha[t, m]
+
+                    # compute the ATC in "N-1"
+                    contingency_flow = flows[t, m] + lodf[m, c] * flows[t, c]
+                    if beta > 0:
+                        atc_mc = (contingency_rates[t, m] - contingency_flow) / beta
+                    else:
+                        atc_mc = (-contingency_rates[t, m] - contingency_flow) / beta
+
+                    final_atc = min(atc_mc, atc_n)
+
+                    results[i, 0] = time_indices[t]
+                    results[i, 1] = m
+                    results[i, 2] = c
+                    results[i, 3] = alpha[t, m]
+                    results[i, 4] = beta
+                    results[i, 5] = lodf[m, c]
+                    results[i, 6] = atc_n
+                    results[i, 7] = atc_mc
+                    results[i, 8] = final_atc
+                    results[i, 9] = final_atc + base_exchange[t]
+                    results[i, 10] = flows[t, m]
+                    results[i, 11] = contingency_flow
+                    results[i, 12] = flows[t, m] / (rates[t, m] + 1e-9) * 100.0
+                    results[i, 13] = contingency_flow / (contingency_rates[t, m] + 1e-9) * 100.0
+                    results[i, 14] = base_exchange[t]
+                    i += 1
+
+    return results
+
+
+def sort_atc_report(report: Mat, max_report_elements: int = -1) -> Mat:
+    """
+    Sort the report rows of each time step by NTC, keeping the time order
+    :param report: report matrix (see compute_atc_ts)
+    :param max_report_elements: maximum number of rows to keep per time step (-1 for all)
+    :return: sorted report matrix
+    """
+    report = report[np.lexsort((report[:, 9], report[:, 0])), :]
+
+    if max_report_elements > 0 and report.shape[0] > 0:
+        # position of each row among the rows of its time step
+        pos = np.arange(report.shape[0])
+        is_first = np.r_[True, report[1:, 0] != report[:-1, 0]]
+        rank = pos - np.maximum.accumulate(np.where(is_first, pos, 0))
+        report = report[rank < max_report_elements, :]
+
+    return report
+
+
 class AvailableTransferCapacityResults(ResultsTemplate):
 
     def __init__(self, br_names, bus_names, rates, contingency_rates: Vec,
@@ -31,7 +31,8 @@ class AvailableTransferCapacityOptions(OptionsTemplate):
                  mode: AvailableTransferMode = AvailableTransferMode.Generation,
                  max_report_elements: int = -1,
                  use_clustering: bool = False,
-                 cluster_number: int = 200):
+                 cluster_number: int = 200,
+                 tile_size: int = 1000000):
         """
         Available Transfer Capacity Options
         :param distributed_slack: Distribute the slack effect?
@@ -52,6 +53,8 @@ class AvailableTransferCapacityOptions(OptionsTemplate):
         :param mode: AvailableTransferMode
         :param max_report_elements: maximum number of elements to show in the report (-1 for all)
         :param use_clustering: Use clustering?
+        :param cluster_number: number of clusters
+        :param tile_size: maximum number of (time step, monitored branch, contingency) combinations evaluated at once
         """
         OptionsTemplate.__init__(self, name="AvailableTransferCapacityOptions")
 
@@ -79,6 +82,7 @@ class AvailableTransferCapacityOptions(OptionsTemplate):
         self.max_report_elements = max_report_elements
         self.use_clustering = use_clustering
         self.cluster_number = cluster_number
+        self.tile_size = tile_size
 
         self.register(key="distributed_slack", tpe=bool)
         self.register(key="correct_values", tpe=bool)
@@ -99,3 +103,4 @@ class AvailableTransferCapacityOptions(OptionsTemplate):
         self.register(key="max_report_elements", tpe=int)
         self.register(key="use_clustering", tpe=bool)
         self.register(key="cluster_number", tpe=int)
+        self.register(key="tile_size", tpe=int)
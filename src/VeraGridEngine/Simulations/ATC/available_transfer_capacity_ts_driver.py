@@ -10,11 +10,10 @@ from typing import Union, List
 
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
-from VeraGridEngine.Simulations.LinearFactors.linear_analysis_options import LinearAnalysisOptions
-from VeraGridEngine.Simulations.LinearFactors.linear_analysis_ts_driver import LinearAnalysisTimeSeriesDriver
-from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis
-from VeraGridEngine.Simulations.ATC.available_transfer_capacity_driver import compute_atc_list, compute_alpha, \
-    compute_dP
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearAnalysisTs
+from VeraGridEngine.Simulations.ATC.available_transfer_capacity_driver import (compute_dP,
+                                                                              get_atc_contingency_pairs,
+                                                                              compute_atc_ts, sort_atc_report)
 from VeraGridEngine.Simulations.ATC.available_transfer_capacity_options import AvailableTransferCapacityOptions
 from VeraGridEngine.Simulations.results_table import ResultsTable
 from VeraGridEngine.Simulations.results_template import ResultsTemplate
@@ -31,7 +30,8 @@ class AvailableTransferCapacityTimeSeriesResults(ResultsTemplate):
     """
 
     def __init__(self, br_names: StrVec, bus_names: StrVec, rates: Mat, contingency_rates: Mat, time_array: DateVec,
-                 clustering_results: Union[ClusteringResults, None] = None):
+                 clustering_results: Union[ClusteringResults, None] = None,
+                 time_indices: Union[IntVec, None] = None):
         """
 
         :param br_names:
@@ -39,6 +39,8 @@ class AvailableTransferCapacityTimeSeriesResults(ResultsTemplate):
         :param rates:
         :param contingency_rates:
         :param time_array:
+        :param clustering_results:
+        :param time_indices: time indices of the time_array (the report refers to these)
         """
         ResultsTemplate.__init__(
             self,
@@ -51,6 +53,9 @@ class AvailableTransferCapacityTimeSeriesResults(ResultsTemplate):
             study_results_type=StudyResultsType.AvailableTransferCapacity
         )
 
+        if not self.using_clusters:
+            self.time_indices = time_indices
+
         # self.time_array = time_array
         self.branch_names = np.array(br_names, dtype=object)
         self.bus_names = bus_names
@@ -228,7 +233,8 @@ class AvailableTransferCapacityTimeSeriesDriver(TimeSeriesDriverTemplate):
             rates=self.grid.get_branch_rates_prof(),
             contingency_rates=self.grid.get_branch_contingency_rates_prof(),
             time_array=self.grid.time_profile[self.time_indices],
-            clustering_results=clustering_results
+            clustering_results=clustering_results,
+            time_indices=self.time_indices
         )
 
     def get_steps(self) -> List[str]:
@@ -249,61 +255,39 @@ class AvailableTransferCapacityTimeSeriesDriver(TimeSeriesDriverTemplate):
                       AvailableTransferMode.Load: 2,
                       AvailableTransferMode.GenerationAndLoad: 3}
 
+        if self.options.use_provided_flows and self.options.Pf is None:
+            msg = 'The option to use the provided flows is enabled, but no flows are available'
+            self.logger.add_error(msg)
+            raise Exception(msg)
+
         # declare the linear analysis
         self.report_text("Analyzing...")
         self.report_progress(0.0)
 
-        la_options = LinearAnalysisOptions(
-            distribute_slack=self.options.distributed_slack,
-            correct_values=self.options.correct_values,
-        )
-
-        la_driver = LinearAnalysisTimeSeriesDriver(
-            grid=self.grid,
-            options=la_options,
-            time_indices=self.time_indices
-        )
-
-        la_driver.copy_signals(other=self)
-
-        la_driver.run()
+        # the linear factors are computed once per topology
+        lin_ts = LinearAnalysisTs(grid=self.grid,
+                                  distributed_slack=True,
+                                  correct_values=False,
+                                  time_indices=self.time_indices)
 
         # get the branch indices to analyze
         nc = compile_numerical_circuit_at(self.grid, logger=self.logger)
         br_idx = nc.passive_branch_data.get_monitor_enabled_indices()
         con_br_idx = nc.passive_branch_data.get_contingency_enabled_indices()
 
-        # declare the results
-        self.results.clear()
-
+        # gather the injections and the power shifts of every time step
+        nt = len(self.time_indices)
+        P = np.zeros((nt, nc.nbus))
+        dP = np.zeros((nt, nc.nbus))
+        P_hvdc = np.zeros((nt, nc.hvdc_data.nelm))
         for it, t in enumerate(self.time_indices):
-
-            self.report_text('Available transfer capacity at ' + str(self.grid.time_profile[t]))
-
             nc = compile_numerical_circuit_at(circuit=self.grid, t_idx=t)
+            P[it, :] = nc.get_power_injections().real
+            P_hvdc[it, :] = nc.hvdc_data.Pset
 
-            linear_analysis = LinearAnalysis(
-                nc=nc,
-                distributed_slack=True,
-                correct_values=False,
-            )
-
-            P: Vec = nc.get_power_injections().real
-
-            # get flow
-            if self.options.use_provided_flows:
-                flows_t = self.options.Pf[t, :]
-
-                if self.options.Pf is None:
-                    msg = 'The option to use the provided flows is enabled, but no flows are available'
-                    self.logger.add_error(msg)
-                    raise Exception(msg)
-            else:
-                flows_t: Vec = linear_analysis.get_flows(Sbus=P, P_hvdc=nc.hvdc_data.Pset)
-
-            # compute the branch exchange sensitivity (alpha)
-            dP = compute_dP(
-                P0=P,
+            # compute the bus injection increments due to the exchange
+            dP[it, :] = compute_dP(
+                P0=P[it, :],
                 P_installed=nc.bus_data.installed_power,
                 Pgen=nc.generator_data.get_injections_per_bus().real,
                 Pload=nc.load_data.get_injections_per_bus().real,
@@ -313,53 +297,78 @@ class AvailableTransferCapacityTimeSeriesDriver(TimeSeriesDriverTemplate):
                 dT=1.0
             )
 
-            alpha = compute_alpha(
-                ptdf=linear_analysis.PTDF,
-                dP=dP,
-                dT=1.0
-            )
+        t_pos = {t: it for it, t in enumerate(self.time_indices)}
+
+        # declare the results
+        self.results.clear()
+        reports: List[Mat] = list()
+        n_done = 0
+
+        for t_rep, group_time_indices in lin_ts.groups.items():
+
+            self.report_text('Available transfer capacity of the topology at ' + str(self.grid.time_profile[t_rep]))
+
+            lin: LinearAnalysis = lin_ts.get_linear_analysis_at(t_rep)
+            time_idx = np.array(group_time_indices, dtype=int)
+            pos = np.array([t_pos[t] for t in group_time_indices], dtype=int)
+
+            # get the flows
+            if self.options.use_provided_flows:
+                flows = self.options.Pf[time_idx, :]
+            else:
+                flows = lin.get_flows2d(Sbus=P[pos, :], P_hvdc=P_hvdc[pos, :])
+
+            # compute the branch exchange sensitivities (alpha) of all the time steps at once
+            alpha = (lin.PTDF @ dP[pos, :].T).T
 
             # base exchange
-            base_exchange = (self.options.inter_area_branch_sense * flows_t[self.options.inter_area_branch_idx]).sum()
+            base_exchange = flows[:, self.options.inter_area_branch_idx] @ self.options.inter_area_branch_sense
 
             # consider the HVDC transfer
             if self.options.Pf_hvdc is not None:
                 if len(self.options.idx_hvdc_br):
-                    base_exchange += (self.options.inter_area_hvdc_branch_sense
-                                      * self.options.Pf_hvdc[t, self.options.idx_hvdc_br]).sum()
-
-            # compute ATC
-            report = compute_atc_list(br_idx=br_idx,
-                                      contingency_br_idx=con_br_idx,
-                                      lodf=linear_analysis.LODF,
-                                      alpha=alpha,
-                                      flows=flows_t,
-                                      rates=self.results.rates[t, :],
-                                      contingency_rates=self.results.contingency_rates[t, :],
-                                      base_exchange=base_exchange,
-                                      time_idx=t,
-                                      threshold=self.options.threshold)
-
-            report = np.array(report, dtype=object)
-
-            # sort by NTC
-            report = report[report[:, 9].argsort()]
-
-            # curtail report
-            if self.options.max_report_elements > 0:
-                report = report[:self.options.max_report_elements, :]
-
-            # post-process and store the results
-            if self.results.raw_report is None:
-                self.results.raw_report = report
-            else:
-                self.results.raw_report = np.r_[self.results.raw_report, report]
-
-            self.report_progress2(it, len(self.time_indices))
+                    base_exchange += (self.options.Pf_hvdc[np.ix_(time_idx, self.options.idx_hvdc_br)]
+                                      @ self.options.inter_area_hvdc_branch_sense)
+
+            # the contingencies that may limit the ATC only depend on the topology
+            pair_m, pair_c = get_atc_contingency_pairs(br_idx=br_idx,
+                                                       contingency_br_idx=con_br_idx,
+                                                       lodf=lin.LODF,
+                                                       threshold=self.options.threshold)
+
+            # compute ATC by tiles of time steps to bound the memory
+            tile = max(1, self.options.tile_size // max(1, len(pair_m)))
+            for a in range(0, len(pos), tile):
+                b = min(a + tile, len(pos))
+
+                report = compute_atc_ts(time_indices=time_idx[a:b],
+                                        pair_m=pair_m,
+                                        pair_c=pair_c,
+                                        lodf=lin.LODF,
+                                        alpha=alpha[a:b, :],
+                                        flows=flows[a:b, :],
+                                        rates=self.results.rates[time_idx[a:b], :],
+                                        contingency_rates=self.results.contingency_rates[time_idx[a:b], :],
+                                        base_exchange=base_exchange[a:b],
+                                        threshold=self.options.threshold)
+
+                # sort by NTC and curtail the report of each time step
+                reports.append(sort_atc_report(report=report,
+                                               max_report_elements=self.options.max_report_elements))
+
+                n_done += b - a
+                self.report_progress2(n_done, nt)
+
+                if self.__cancel__:
+                    break
 
             if self.__cancel__:
                 break
 
+        # post-process and store the results
+        self.results.raw_report = sort_atc_report(report=np.concatenate(reports, axis=0) if len(reports)
+                                                  else np.zeros((0, 15)))
+
         self.report_text('Building the report...')
         self.results.make_report()
 
@@ -0,0 +1,194 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Union
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearMultiContingency
+from VeraGridEngine.basic_structures import IntVec, Vec, BoolVec
+
+
+class ContingencyScreening:
+    """
+    Result of the linear screening of the contingencies:
+    the estimated post-contingency loadings rank the contingencies that must be verified with AC power flows
+    """
+
+    def __init__(self, ncon: int, nbr: int = 0):
+        """
+        Constructor
+        :param ncon: number of contingencies
+        :param nbr: number of branches
+        """
+        # maximum estimated loading of the monitored branches (p.u.)
+        self.max_loading: Vec = np.zeros(ncon, dtype=float)
+
+        # performance index: sum of the squared estimated loadings of the monitored branches
+        self.performance_index: Vec = np.zeros(ncon, dtype=float)
+
+        # contingencies to verify with AC power flows
+        self.verify: BoolVec = np.zeros(ncon, dtype=bool)
+
+        # estimated flow increments of every contingency (nbr, ncon), empty for the injection contingencies
+        self.flow_increments: sp.csc_matrix = sp.csc_matrix((nbr, ncon), dtype=float)
+
+    @property
+    def ncon(self) -> int:
+        """
+        Number of contingencies
+        """
+        return len(self.verify)
+
+    def get_verify_indices(self) -> IntVec:
+        """
+        Get the indices of the contingencies to verify with AC power flows
+        :return: IntVec
+        """
+        return np.where(self.verify)[0]
+
+    def get_estimated_flows(self, ic: int, base_flow: Vec) -> Vec:
+        """
+        Get the estimated post-contingency active power flows of a contingency
+        :param ic: contingency index
+        :param base_flow: base case branch active power flows (MW) used in the screening
+        :return: estimated branch flows (MW)
+        """
+        return base_flow + self.flow_increments[:, [ic]].toarray()[:, 0]
+
+
+def get_stacked_flow_increments(multi_contingencies: List[LinearMultiContingency],
+                                base_flow: Vec,
+                                hvdc_flow: Union[Vec, None] = None) -> sp.csc_matrix:
+    """
+    Estimate the post-contingency active power flow increments of all the contingencies at once.
+    The MLODF (and HVDC ODF) factors of every contingency are stacked side by side into one
+    (nbr, sum of outaged elements) matrix, and the base flows of the outaged elements are
+    placed in a (sum of outaged elements, ncon) matrix, so a single sparse product gives all the increments.
+    The injection contingencies are not estimated (empty columns).
+    :param multi_contingencies: LinearMultiContingency of each contingency group
+    :param base_flow: base case branch active power flows (MW)
+    :param hvdc_flow: base case HVDC active power flows (MW)
+    :return: flow increments (nbr, ncon)
+    """
+    nbr = len(base_flow)
+    ncon = len(multi_contingencies)
+
+    factors = list()
+    values = list()
+    columns = list()
+
+    for ic, multi_contingency in enumerate(multi_contingencies):
+
+        if multi_contingency.has_injection_contingencies():
+            continue
+
+        if len(multi_contingency.branch_indices):
+            # MLODF[k, βδ] x Pf0[βδ]
+            factors.append(multi_contingency.mlodf_factors)
+            values.append(base_flow[multi_contingency.branch_indices])
+            columns.append(np.full(len(multi_contingency.branch_indices), ic, dtype=int))
+
+        if len(multi_contingency.hvdc_indices) and hvdc_flow is not None:
+            factors.append(multi_contingency.hvdc_odf)
+            values.append(hvdc_flow[multi_contingency.hvdc_indices])
+            columns.append(np.full(len(multi_contingency.hvdc_indices), ic, dtype=int))
+
+    if len(factors) == 0:
+        return sp.csc_matrix((nbr, ncon), dtype=float)
+
+    stacked_factors = sp.hstack(factors, format='csc')
+    values = np.concatenate(values)
+    columns = np.concatenate(columns)
+    flows_to_contingency = sp.csc_matrix((values, (np.arange(len(values)), columns)),
+                                         shape=(len(values), ncon))
+
+    return (stacked_factors @ flows_to_contingency).tocsc()
+
+
+def screen_contingencies(multi_contingencies: List[LinearMultiContingency],
+                         base_flow: Vec,
+                         hvdc_flow: Union[Vec, None],
+                         rates: Vec,
+                         mon_idx: IntVec,
+                         margin: float = 0.1,
+                         top_n: int = 0,
+                         tolerance: float = 1e-3,
+                         block_size: int = 1000) -> ContingencyScreening:
+    """
+    Screen the contingencies with the linear factors (PTDF/LODF).
+    A contingency is verified with an AC power flow if:
+        - its estimated maximum loading is over 1 - margin (borderline or overloaded)
+        - it is one of the top_n contingencies by performance index
+        - it has injection contingencies (they are not estimated here)
+        - its estimation is not valid: the outaged branches keep some flow, or their flow
+          is not redistributed to any other branch (i.e. the contingency splits the grid)
+    :param multi_contingencies: LinearMultiContingency of each contingency group
+    :param base_flow: base case branch active power flows (MW), preferably from the AC base case
+    :param hvdc_flow: base case HVDC active power flows (MW)
+    :param rates: branch ratings (MW)
+    :param mon_idx: indices of the monitored branches
+    :param margin: loading safety margin (p.u.)
+    :param top_n: number of top ranked contingencies always verified
+    :param tolerance: relative flow tolerance in the outaged branches to consider the estimation valid
+    :param block_size: number of contingencies whose monitored loadings are densified at once
+    :return: ContingencyScreening
+    """
+    ncon = len(multi_contingencies)
+    screening = ContingencyScreening(ncon=ncon, nbr=len(base_flow))
+
+    if len(mon_idx) == 0 or ncon == 0:
+        return screening
+
+    screening.flow_increments = get_stacked_flow_increments(multi_contingencies=multi_contingencies,
+                                                            base_flow=base_flow,
+                                                            hvdc_flow=hvdc_flow)
+
+    # the injection contingencies are not estimated
+    injection = np.array([mc.has_injection_contingencies() for mc in multi_contingencies], dtype=bool)
+
+    # validity of the estimation, checked over the outaged branches of all the contingencies at once
+    n_outaged = np.array([0 if inj else len(mc.branch_indices)
+                          for mc, inj in zip(multi_contingencies, injection)], dtype=int)
+    if n_outaged.sum() > 0:
+        out_br = np.concatenate([mc.branch_indices for mc, n in zip(multi_contingencies, n_outaged) if n > 0])
+        out_con = np.repeat(np.arange(ncon), n_outaged)
+
+        # the outaged branches must not keep any flow
+        out_flow = base_flow[out_br] + np.asarray(screening.flow_increments[out_br, out_con]).ravel()
+        kept_flow = np.abs(out_flow) > tolerance * (np.abs(base_flow[out_br]) + 1.0)
+
+        # the flow of each outaged branch must be redistributed to some other branch
+        mlodf_nnz = np.concatenate([np.diff(mc.mlodf_factors.indptr)
+                                    for mc, n in zip(multi_contingencies, n_outaged) if n > 0])
+        not_redistributed = mlodf_nnz <= n_outaged[out_con]
+
+        invalid = np.bincount(out_con, weights=kept_flow | not_redistributed, minlength=ncon) > 0
+    else:
+        invalid = np.zeros(ncon, dtype=bool)
+
+    # estimated loadings of the monitored branches, densified by blocks of contingencies
+    increments_mon = screening.flow_increments[mon_idx, :].tocsc()
+    base_mon = base_flow[mon_idx]
+    rates_mon = rates[mon_idx] + 1e-9
+    for a in range(0, ncon, block_size):
+        b = min(a + block_size, ncon)
+        loading_mon = np.abs(base_mon[:, np.newaxis] + increments_mon[:, a:b].toarray()) / rates_mon[:, np.newaxis]
+        screening.max_loading[a:b] = loading_mon.max(axis=0)
+        screening.performance_index[a:b] = np.sum(loading_mon * loading_mon, axis=0)
+
+    # the linear factors could not represent these contingencies
+    not_estimated = injection | invalid
+    screening.max_loading[not_estimated] = np.inf
+    screening.performance_index[not_estimated] = np.inf
+    screening.verify[not_estimated] = True
+
+    screening.verify |= screening.max_loading >= 1.0 - margin
+
+    if top_n > 0:
+        ranking = np.argsort(-screening.performance_index, kind='stable')
+        screening.verify[ranking[:top_n]] = True
+
+    return screening
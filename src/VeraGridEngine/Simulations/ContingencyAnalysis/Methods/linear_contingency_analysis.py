@@ -22,7 +22,8 @@ def linear_contingency_analysis(grid: MultiCircuit,
                                 calling_class: ContingencyAnalysisDriver,
                                 t=None,
                                 t_prob=1.0,
-                                logger: Logger | None = None, ) -> ContingencyAnalysisResults:
+                                logger: Logger | None = None,
+                                use_cache: bool = False) -> ContingencyAnalysisResults:
     """
     Run N-1 simulation in series with HELM, non-linear solution
     :param grid: MultiCircuit
@@ -32,6 +33,7 @@ def linear_contingency_analysis(grid: MultiCircuit,
     :param t: time index, if None the snapshot is used
     :param t_prob: probability of te time
     :param logger: logger instance
+    :param use_cache: use the compilation cache (for the numerical circuit and its linear factors)
     :return: returns the results
     """
 
@@ -39,7 +41,7 @@ def linear_contingency_analysis(grid: MultiCircuit,
         calling_class.report_text('Analyzing outage distribution factors in a non-linear fashion...')
 
     # set the numerical circuit
-    nc = compile_numerical_circuit_at(grid, t_idx=t)
+    nc = compile_numerical_circuit_at(grid, t_idx=t, use_cache=use_cache)
 
     # get areas info
     area_names, bus_area_indices, F, T, hvdc_F, hvdc_T = grid.get_branch_areas_info()
@@ -51,7 +53,9 @@ def linear_contingency_analysis(grid: MultiCircuit,
                                          branch_names=nc.passive_branch_data.names,
                                          bus_names=nc.bus_data.names,
                                          bus_types=nc.bus_data.bus_types,
-                                         con_names=linear_multiple_contingencies.get_contingency_group_names())
+                                         con_names=linear_multiple_contingencies.get_contingency_group_names(),
+                                         store_dense=options.store_dense_results,
+                                         store=options.get_results_store())
 
     linear_analysis = LinearAnalysis(nc=nc,
                                      distributed_slack=options.lin_options.distribute_slack,
@@ -96,9 +100,12 @@ def linear_contingency_analysis(grid: MultiCircuit,
         c_flow = multi_contingency.get_contingency_flows(base_branches_flow=flows_n, injections=injections)
         c_loading = c_flow / (nc.passive_branch_data.rates + 1e-9)
 
-        results.Sf[ic, :] = c_flow  # already in MW
-        results.Sbus[ic, :] = Pbus
-        results.loading[ic, :] = c_loading
+        results.set_contingency_results(ic=ic,
+                                        t_idx=t,
+                                        mon_idx=mon_idx,
+                                        Sf=c_flow,  # already in MW
+                                        Sbus=Pbus,
+                                        loading=c_loading)
         results.report.analyze(t=t,
                                t_prob=t_prob,
                                mon_idx=mon_idx,
@@ -3,28 +3,256 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
 from __future__ import annotations
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Union, List, Dict, Tuple
 import numpy as np
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Devices.Aggregation.contingency import Contingency
+from VeraGridEngine.Devices.Aggregation.contingency_group import ContingencyGroup
 from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
+from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
 from VeraGridEngine.Simulations.PowerFlow.power_flow_worker import multi_island_pf_nc
 from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions, SolverType
-from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearMultiContingencies
+from VeraGridEngine.Simulations.PowerFlow.power_flow_results import PowerFlowResults
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import (LinearAnalysis, LinearMultiContingencies,
+                                                                     LinearMultiContingency)
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_options import ContingencyAnalysisOptions
-from VeraGridEngine.basic_structures import Logger
+from VeraGridEngine.Simulations.ContingencyAnalysis.Methods.contingency_screening import screen_contingencies
+from VeraGridEngine.basic_structures import Logger, IntVec, Vec, Mat, CxVec
+from VeraGridEngine.Utils.process_pool import ProcessPool, run_in_process_pool
 
 if TYPE_CHECKING:
     from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_driver import ContingencyAnalysisDriver
 
 
+class NonlinearContingencyTask:
+    """
+    Everything needed to run and analyze the contingency groups of a time step,
+    without references to the MultiCircuit, so that it can be sent to other processes
+    """
+
+    def __init__(self,
+                 nc: NumericalCircuit,
+                 options: ContingencyAnalysisOptions,
+                 pf_opts: PowerFlowOptions,
+                 pf_res_0: PowerFlowResults,
+                 contingency_groups: List[ContingencyGroup],
+                 contingencies: List[List[Contingency]],
+                 multi_contingencies: Union[List[LinearMultiContingency], None],
+                 PTDF: Union[Mat, None],
+                 available_power: Vec,
+                 mon_idx: IntVec,
+                 F: IntVec,
+                 T: IntVec,
+                 bus_area_indices: IntVec,
+                 area_names: List[str],
+                 t_idx: Union[None, int],
+                 t_prob: float):
+        """
+        Constructor
+        :param nc: NumericalCircuit at the time step
+        :param options: ContingencyAnalysisOptions
+        :param pf_opts: PowerFlowOptions
+        :param pf_res_0: base case PowerFlowResults
+        :param contingency_groups: contingency groups used
+        :param contingencies: list of contingencies of each group
+        :param multi_contingencies: LinearMultiContingency of each group (only for SRAP)
+        :param PTDF: PTDF (only for SRAP)
+        :param available_power: power available per bus for SRAP
+        :param mon_idx: indices of the monitored branches
+        :param F: branch from bus indices
+        :param T: branch to bus indices
+        :param bus_area_indices: area index of each bus
+        :param area_names: area names
+        :param t_idx: time index, if None the snapshot is used
+        :param t_prob: probability of te time
+        """
+        self.nc = nc
+        self.options = options
+        self.pf_opts = pf_opts
+        self.V0: CxVec = pf_res_0.voltage
+        self.Sf0: CxVec = pf_res_0.Sf
+        self.loading0: CxVec = pf_res_0.loading
+        self.contingency_groups = contingency_groups
+        self.contingencies = contingencies
+        self.multi_contingencies = multi_contingencies
+        self.PTDF = PTDF
+        self.available_power = available_power
+        self.mon_idx = mon_idx
+        self.F = F
+        self.T = T
+        self.bus_area_indices = bus_area_indices
+        self.area_names = area_names
+        self.t_idx = t_idx
+        self.t_prob = t_prob
+
+    @property
+    def ncon(self) -> int:
+        """
+        Number of contingency groups
+        """
+        return len(self.contingency_groups)
+
+    def run(self, ic: int, report: ContingencyResultsReport, srap_used_power: Mat,
+            logger: Logger) -> PowerFlowResults:
+        """
+        Run the power flow of a contingency group and analyze it
+        :param ic: contingency group index
+        :param report: ContingencyResultsReport to fill
+        :param srap_used_power: (branch, nbus) matrix to store the SRAP usage
+        :param logger: Logger
+        :return: PowerFlowResults of the contingency
+        """
+        # set the status
+        self.nc.set_con_or_ra_status(self.contingencies[ic])
+
+        # run
+        pf_res = multi_island_pf_nc(nc=self.nc,
+                                    options=self.pf_opts,
+                                    V_guess=self.V0,
+                                    logger=logger)
+
+        report.analyze(t=self.t_idx,
+                       t_prob=self.t_prob,
+                       mon_idx=self.mon_idx,
+                       nc=self.nc,
+                       base_flow=np.abs(self.Sf0),
+                       base_loading=np.abs(self.loading0),
+                       contingency_flows=np.abs(pf_res.Sf),
+                       contingency_loadings=np.abs(pf_res.loading),
+                       contingency_idx=ic,
+                       contingency_group=self.contingency_groups[ic],
+                       using_srap=self.options.use_srap,
+                       srap_ratings=self.nc.passive_branch_data.protection_rates,
+                       srap_max_power=self.options.srap_max_power,
+                       srap_deadband=self.options.srap_deadband,
+                       contingency_deadband=self.options.contingency_deadband,
+                       multi_contingency=self.multi_contingencies[ic] if self.options.use_srap else None,
+                       PTDF=self.PTDF,
+                       available_power=self.available_power,
+                       srap_used_power=srap_used_power,
+                       F=self.F,
+                       T=self.T,
+                       bus_area_indices=self.bus_area_indices,
+                       area_names=self.area_names,
+                       top_n=self.options.srap_top_n,
+                       report_base_case=False)
+
+        # revert the status
+        self.nc.set_con_or_ra_status(self.contingencies[ic], revert=True)
+
+        return pf_res
+
+
+def _run_contingency_chunk(process_data: Dict,
+                           ics: List[int]) -> Tuple[Tuple[List[int], List[Tuple[CxVec, CxVec, CxVec, CxVec]],
+                                                          ContingencyResultsReport, Union[Mat, None]], Logger]:
+    """
+    Run a chunk of contingency groups inside a process of the pool
+    :param process_data: data of the process, with the NonlinearContingencyTask as context
+    :param ics: contingency group indices
+    :return: (indices, (Sf, Sbus, loading, voltage) of each group, report, SRAP used power (if SRAP)), Logger
+    """
+    task: NonlinearContingencyTask = process_data['context']
+    logger = Logger()
+    report = ContingencyResultsReport()
+    srap_used_power = np.zeros((task.nc.nbr, task.nc.nbus), dtype=float) if task.options.use_srap else None
+    rows = list()
+
+    for ic in ics:
+        pf_res = task.run(ic=ic, report=report, srap_used_power=srap_used_power, logger=logger)
+        rows.append((pf_res.Sf, pf_res.Sbus, pf_res.loading, pf_res.voltage))
+
+    return (ics, rows, report, srap_used_power), logger
+
+
+def run_nonlinear_contingencies_parallel(task: NonlinearContingencyTask,
+                                         results: ContingencyAnalysisResults,
+                                         n_workers: int,
+                                         calling_class: ContingencyAnalysisDriver | None,
+                                         logger: Logger,
+                                         ics: Union[List[int], IntVec, None] = None,
+                                         chunks_per_worker: int = 4,
+                                         pool: Union[ProcessPool, None] = None) -> bool:
+    """
+    Run the contingency groups in a pool of processes.
+    Each process holds its own copy of the circuit, so no circuit is shared while mutated.
+    The report fragments are merged in the contingency order, so the report is the same as the serial one.
+    :param task: NonlinearContingencyTask
+    :param results: ContingencyAnalysisResults to fill
+    :param n_workers: number of processes
+    :param calling_class: ContingencyAnalysisDriver (optional, for the progress and cancellation)
+    :param logger: Logger
+    :param ics: contingency group indices to run (None for all)
+    :param chunks_per_worker: approximate number of chunks per worker (for load balancing)
+    :param pool: ProcessPool to reuse (i.e. among the time steps), if None a pool is created for this run
+    :return: True if completed, False if cancelled
+    """
+    ics = list(range(task.ncon)) if ics is None else [int(ic) for ic in ics]
+    chunk_size = max(1, int(np.ceil(len(ics) / (n_workers * chunks_per_worker))))
+    chunks = [ics[i:i + chunk_size] for i in range(0, len(ics), chunk_size)]
+
+    def store_chunk(i: int, chunk_results: Tuple[List[int], List[Tuple[CxVec, CxVec, CxVec, CxVec]],
+                                                 ContingencyResultsReport, Union[Mat, None]]) -> None:
+        """
+        Store the results of a chunk
+        :param i: chunk index
+        :param chunk_results: indices, (Sf, Sbus, loading, voltage) of each group, report, SRAP used power
+        """
+        chunk_ics, rows, report, srap_used_power = chunk_results
+
+        for ic, (Sf, Sbus, loading, voltage) in zip(chunk_ics, rows):
+            results.set_contingency_results(ic=ic,
+                                            t_idx=task.t_idx,
+                                            mon_idx=task.mon_idx,
+                                            Sf=Sf,
+                                            Sbus=Sbus,
+                                            loading=loading,
+                                            voltage=voltage)
+
+        results.report += report
+        if srap_used_power is not None:
+            results.srap_used_power += srap_used_power
+
+    if calling_class is not None:
+        report_progress2 = calling_class.report_progress2 if task.t_idx is None else None
+        is_cancel = calling_class.is_cancel
+    else:
+        report_progress2 = None
+        is_cancel = None
+
+    if pool is None:
+        return run_in_process_pool(func=_run_contingency_chunk,
+                                   args_list=[(chunk,) for chunk in chunks],
+                                   context=task,
+                                   n_workers=n_workers,
+                                   store_func=store_chunk,
+                                   logger=logger,
+                                   ordered=True,
+                                   weights=[len(chunk) for chunk in chunks],
+                                   report_progress2=report_progress2,
+                                   is_cancel=is_cancel)
+    else:
+        pool.set_context(task)
+        return pool.run(func=_run_contingency_chunk,
+                        args_list=[(chunk,) for chunk in chunks],
+                        store_func=store_chunk,
+                        logger=logger,
+                        ordered=True,
+                        weights=[len(chunk) for chunk in chunks],
+                        report_progress2=report_progress2,
+                        is_cancel=is_cancel)
+
+
 def nonlinear_contingency_analysis(grid: MultiCircuit,
                                    options: ContingencyAnalysisOptions,
                                    linear_multiple_contingencies: LinearMultiContingencies,
                                    calling_class: ContingencyAnalysisDriver,
                                    t_idx: Union[None, int] = None,
                                    t_prob: float = 1.0,
-                                   logger: Logger | None = None, ) -> ContingencyAnalysisResults:
+                                   logger: Logger | None = None,
+                                   pool: ProcessPool | None = None) -> ContingencyAnalysisResults:
     """
     Run a contingency analysis using the power flow options
     :param grid: MultiCircuit
@@ -34,6 +262,7 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
     :param t_idx: time index, if None the snapshot is used
     :param t_prob: probability of te time
     :param logger: logging object
+    :param pool: ProcessPool to reuse with options.n_workers > 1 (i.e. among the time steps)
     :return: returns the results (ContingencyAnalysisResults)
     """
     if logger is None:
@@ -58,7 +287,9 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
                                          branch_names=nc.passive_branch_data.names,
                                          bus_names=nc.bus_data.names,
                                          bus_types=nc.bus_data.bus_types,
-                                         con_names=linear_multiple_contingencies.get_contingency_group_names())
+                                         con_names=linear_multiple_contingencies.get_contingency_group_names(),
+                                         store_dense=options.store_dense_results,
+                                         store=options.get_results_store())
 
     # get contingency groups dictionary
     mon_idx = nc.passive_branch_data.get_monitor_enabled_indices()
@@ -67,77 +298,124 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
     pf_res_0 = multi_island_pf_nc(nc=nc,
                                   options=pf_opts)
 
-    if options.use_srap:
+    if options.use_srap or options.use_linear_screening:
 
-        # we need the PTDF for this
+        # we need the PTDF for this (the screening alone only needs the contingency columns)
         linear_analysis = LinearAnalysis(nc=nc,
                                          distributed_slack=options.lin_options.distribute_slack,
-                                         correct_values=options.lin_options.correct_values)
+                                         correct_values=options.lin_options.correct_values,
+                                         lazy=not options.use_srap)
 
         linear_multiple_contingencies.compute(lin=linear_analysis,
                                               ptdf_threshold=options.lin_options.ptdf_threshold,
                                               lodf_threshold=options.lin_options.lodf_threshold)
 
+    else:
+        linear_analysis = None
+
+    if options.use_srap:
         PTDF = linear_analysis.PTDF
+        multi_contingencies = linear_multiple_contingencies.multi_contingencies
 
     else:
         PTDF = None
+        multi_contingencies = None
 
     available_power = nc.generator_data.get_injections_per_bus().real
 
-    # for each contingency group
-    for ic, contingency_group in enumerate(linear_multiple_contingencies.contingency_groups_used):
+    contingency_groups = linear_multiple_contingencies.contingency_groups_used
 
-        # get the group's contingencies
-        contingencies = linear_multiple_contingencies.contingency_group_dict[contingency_group.idtag]
+    task = NonlinearContingencyTask(
+        nc=nc,
+        options=options,
+        pf_opts=pf_opts,
+        pf_res_0=pf_res_0,
+        contingency_groups=contingency_groups,
+        contingencies=[linear_multiple_contingencies.contingency_group_dict[group.idtag]
+                       for group in contingency_groups],
+        multi_contingencies=multi_contingencies,
+        PTDF=PTDF,
+        available_power=available_power,
+        mon_idx=mon_idx,
+        F=F,
+        T=T,
+        bus_area_indices=bus_area_indices,
+        area_names=area_names,
+        t_idx=t_idx,
+        t_prob=t_prob
+    )
 
-        # set the status
-        nc.set_con_or_ra_status(contingencies)
+    # the base case overloads are reported once, before the contingencies
+    results.report.analyze_base_case(t=t_idx,
+                                     t_prob=t_prob,
+                                     mon_idx=mon_idx,
+                                     nc=nc,
+                                     base_flow=np.abs(pf_res_0.Sf),
+                                     srap_ratings=nc.passive_branch_data.protection_rates,
+                                     F=F,
+                                     T=T,
+                                     bus_area_indices=bus_area_indices,
+                                     area_names=area_names)
+
+    if options.use_linear_screening:
+        # screen the contingencies with the linear factors departing from the AC base case flows
+        screening = screen_contingencies(multi_contingencies=linear_multiple_contingencies.multi_contingencies,
+                                         base_flow=pf_res_0.Sf.real,
+                                         hvdc_flow=pf_res_0.Pf_hvdc,
+                                         rates=nc.passive_branch_data.rates,
+                                         mon_idx=mon_idx,
+                                         margin=options.screening_margin,
+                                         top_n=options.screening_top_n)
+        ics = screening.get_verify_indices()
+
+        # the contingencies not verified keep the linear estimation of the flows, flagged as such;
+        # their voltages are not estimated
+        for ic in np.where(~screening.verify)[0]:
+            flow = screening.get_estimated_flows(ic=ic, base_flow=pf_res_0.Sf.real)
+            results.set_contingency_results(ic=ic,
+                                            t_idx=t_idx,
+                                            mon_idx=mon_idx,
+                                            Sf=flow.astype(complex),
+                                            Sbus=pf_res_0.Sbus,
+                                            loading=(flow / (nc.passive_branch_data.rates + 1e-9)).astype(complex),
+                                            voltage=None,
+                                            linear_estimate=True)
+
+        logger.add_info(msg="Contingencies verified with AC power flows after the linear screening",
+                        value=f"{len(ics)} of {task.ncon}")
+    else:
+        ics = np.arange(task.ncon)
+
+    if options.n_workers > 1 and len(ics) > 1:
+        run_nonlinear_contingencies_parallel(task=task,
+                                             results=results,
+                                             n_workers=options.n_workers,
+                                             calling_class=calling_class,
+                                             logger=logger,
+                                             ics=ics,
+                                             pool=pool)
+        return results
+
+    # for each contingency group
+    for k, ic in enumerate(ics):
+
+        contingency_group = contingency_groups[ic]
 
         # report progress
         if t_idx is None and calling_class is not None:
             calling_class.report_text(f'Contingency group: {contingency_group.name}')
-            calling_class.report_progress2(ic, len(linear_multiple_contingencies.contingency_groups_used) * 100)
+            calling_class.report_progress2(k, len(ics))
 
         # run
-        pf_res = multi_island_pf_nc(nc=nc,
-                                    options=pf_opts,
-                                    V_guess=pf_res_0.voltage,
-                                    logger=logger)
-
-        results.Sf[ic, :] = pf_res.Sf
-        results.Sbus[ic, :] = pf_res.Sbus
-        results.loading[ic, :] = pf_res.loading
-        results.voltage[ic, :] = pf_res.voltage
-        multi_contingency = linear_multiple_contingencies.multi_contingencies[ic] if options.use_srap else None
-
-        results.report.analyze(t=t_idx,
-                               t_prob=t_prob,
-                               mon_idx=mon_idx,
-                               nc=nc,
-                               base_flow=np.abs(pf_res_0.Sf),
-                               base_loading=np.abs(pf_res_0.loading),
-                               contingency_flows=np.abs(pf_res.Sf),
-                               contingency_loadings=np.abs(pf_res.loading),
-                               contingency_idx=ic,
-                               contingency_group=contingency_group,
-                               using_srap=options.use_srap,
-                               srap_ratings=nc.passive_branch_data.protection_rates,
-                               srap_max_power=options.srap_max_power,
-                               srap_deadband=options.srap_deadband,
-                               contingency_deadband=options.contingency_deadband,
-                               multi_contingency=multi_contingency,
-                               PTDF=PTDF,
-                               available_power=available_power,
-                               srap_used_power=results.srap_used_power,
-                               F=F,
-                               T=T,
-                               bus_area_indices=bus_area_indices,
-                               area_names=area_names,
-                               top_n=options.srap_top_n)
+        pf_res = task.run(ic=ic, report=results.report, srap_used_power=results.srap_used_power, logger=logger)
 
-        # set the status
-        nc.set_con_or_ra_status(contingencies, revert=True)
+        results.set_contingency_results(ic=ic,
+                                        t_idx=t_idx,
+                                        mon_idx=mon_idx,
+                                        Sf=pf_res.Sf,
+                                        Sbus=pf_res.Sbus,
+                                        loading=pf_res.loading,
+                                        voltage=pf_res.voltage)
 
         if calling_class is not None:
             if calling_class.is_cancel():
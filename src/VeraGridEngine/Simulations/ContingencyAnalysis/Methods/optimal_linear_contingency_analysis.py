@@ -58,7 +58,9 @@ def optimal_linear_contingency_analysis(grid: MultiCircuit,
                                          branch_names=nc.passive_branch_data.names,
                                          bus_names=nc.bus_data.names,
                                          bus_types=nc.bus_data.bus_types,
-                                         con_names=linear_multiple_contingencies.get_contingency_group_names())
+                                         con_names=linear_multiple_contingencies.get_contingency_group_names(),
+                                         store_dense=options.store_dense_results,
+                                         store=options.get_results_store())
 
     linear_analysis = LinearAnalysis(nc=nc,
                                      distributed_slack=options.lin_options.distribute_slack,
@@ -123,9 +125,12 @@ def optimal_linear_contingency_analysis(grid: MultiCircuit,
         c_flow = multi_contingency.get_contingency_flows(base_branches_flow=flows_n, injections=injections)
         c_loading = c_flow / (nc.passive_branch_data.rates + 1e-9)
 
-        results.Sf[ic, :] = c_flow  # already in MW
-        results.Sbus[ic, :] = Pbus
-        results.loading[ic, :] = c_loading
+        results.set_contingency_results(ic=ic,
+                                        t_idx=t,
+                                        mon_idx=mon_idx,
+                                        Sf=c_flow,  # already in MW
+                                        Sbus=Pbus,
+                                        loading=c_loading)
         results.report.analyze(t=t,
                                t_prob=t_prob,
                                mon_idx=mon_idx,
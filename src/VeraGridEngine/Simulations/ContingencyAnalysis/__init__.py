@@ -8,3 +8,4 @@ from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_results
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_ts_driver import ContingencyAnalysisTimeSeriesDriver
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_ts_results import ContingencyAnalysisTimeSeriesResults
 
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_results_store import ContingencyResultsStore
@@ -6,7 +6,7 @@ import numpy as np
 import numba as nb
 import pandas as pd
 from scipy.sparse import csc_matrix
-from typing import List, Union, Any
+from typing import List, Dict, Union, Any
 from VeraGridEngine.basic_structures import IntVec, StrMat, StrVec, Vec, Mat
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
 from VeraGridEngine.Devices import ContingencyGroup
@@ -159,6 +159,34 @@ class ContingencyTableEntry:
         """
         return self.__hdr__
 
+    def get_dict(self) -> Dict[str, Any]:
+        """
+        Get data to pass via json (the complex flows are passed as [real, imag])
+        :return: dictionary of the constructor arguments
+        """
+        data = dict()
+        for key, val in vars(self).items():
+            if isinstance(val, (complex, np.complexfloating)):
+                data[key] = [float(val.real), float(val.imag)]
+            elif isinstance(val, np.generic):
+                data[key] = val.item()
+            else:
+                data[key] = val
+        return data
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "ContingencyTableEntry":
+        """
+        Create an entry from the data created with get_dict
+        :param data: dictionary of the constructor arguments
+        :return: ContingencyTableEntry
+        """
+        kwargs = dict(data)
+        for key in ('base_flow', 'post_contingency_flow', 'post_srap_flow'):
+            if isinstance(kwargs[key], list):
+                kwargs[key] = complex(kwargs[key][0], kwargs[key][1])
+        return ContingencyTableEntry(**kwargs)
+
     def to_list(self, time_array: Union[pd.DatetimeIndex, None], time_format='%Y/%m/%d  %H:%M.%S') -> List[Any]:
         """
         Get a list representation of this entry
@@ -295,6 +323,20 @@ class ContingencyResultsReport:
         """
         self.entries += other.entries
 
+    def get_dict(self) -> List[Dict[str, Any]]:
+        """
+        Get data to pass via json
+        :return: list of entries data
+        """
+        return [e.get_dict() for e in self.entries]
+
+    def parse_data(self, data: List[Dict[str, Any]]):
+        """
+        Parse the data created with get_dict
+        :param data: list of entries data
+        """
+        self.entries = [ContingencyTableEntry.from_dict(entry_data) for entry_data in data]
+
     def size(self) -> int:
         """
         Get the size
@@ -482,6 +524,60 @@ class ContingencyResultsReport:
             self.add_entry(entry)
         return self
 
+    def analyze_base_case(self,
+                          t: Union[None, int],
+                          t_prob: float,
+                          mon_idx: IntVec,
+                          nc: NumericalCircuit,
+                          base_flow: Vec,
+                          srap_ratings: Vec,
+                          F: Vec = None,
+                          T: Vec = None,
+                          bus_area_indices: Vec = None,
+                          area_names: Vec = None):
+        """
+        Add the base case overloads to the report
+        :param t: time index
+        :param t_prob: probability of te time
+        :param mon_idx: array of monitored branch indices
+        :param nc: NumericalCircuit
+        :param base_flow: base flows array
+        :param srap_ratings: Array of protection ratings of the branches
+        :param F:
+        :param T:
+        :param bus_area_indices:
+        :param area_names:
+        """
+        for m in mon_idx:
+            if len(area_names):
+                area_from = area_names[bus_area_indices[F[m]]]
+                area_to = area_names[bus_area_indices[T[m]]]
+            else:
+                area_from = ""
+                area_to = ""
+
+            if abs(base_flow[m]) > nc.passive_branch_data.rates[m]:  # only add if overloaded
+
+                self.add(time_index=t if t is not None else 0,
+                         t_prob=t_prob,
+                         area_from=area_from,
+                         area_to=area_to,
+                         base_name=nc.passive_branch_data.names[m],
+                         contingency_name='Base',
+                         base_rating=nc.passive_branch_data.rates[m],
+                         contingency_rating=nc.passive_branch_data.contingency_rates[m],
+                         srap_rating=srap_ratings[m],
+                         base_flow=abs(base_flow[m]),
+                         post_contingency_flow=0.0,
+                         post_srap_flow=0.0,
+                         base_loading=abs(base_flow[m]) / (nc.passive_branch_data.rates[m] + 1e-9),
+                         post_contingency_loading=0.0,
+                         post_srap_loading=0.0,
+                         msg_ov='Overload not acceptable',
+                         msg_srap='SRAP not applicable',
+                         srap_power=0.0,
+                         solved_by_srap=False)
+
     def analyze(self,
                 t: Union[None, int],
                 t_prob: float,
@@ -508,7 +604,8 @@ class ContingencyResultsReport:
                 bus_area_indices: Vec = None,
                 area_names: Vec = None,
                 top_n: int = 5,
-                detailed_massive_report: bool = True):
+                detailed_massive_report: bool = True,
+                report_base_case: bool = True):
         """
         Analyze contingency results and add them to the report
         :param t: time index
@@ -537,40 +634,22 @@ class ContingencyResultsReport:
         :param area_names:
         :param top_n: maximum number of nodes affecting the oveload
         :param detailed_massive_report: Generate massive report
+        :param report_base_case: report the base case overloads with the contingency 0?
+                                 (set to False when they are reported with analyze_base_case)
         """
 
         # Reporting base case
-        if contingency_idx == 0:  # only doing it once per hour
-
-            for m in mon_idx:
-                if len(area_names):
-                    area_from = area_names[bus_area_indices[F[m]]]
-                    area_to = area_names[bus_area_indices[T[m]]]
-                else:
-                    area_from = ""
-                    area_to = ""
-
-                if abs(base_flow[m]) > nc.passive_branch_data.rates[m]:  # only add if overloaded
-
-                    self.add(time_index=t if t is not None else 0,
-                             t_prob=t_prob,
-                             area_from=area_from,
-                             area_to=area_to,
-                             base_name=nc.passive_branch_data.names[m],
-                             contingency_name='Base',
-                             base_rating=nc.passive_branch_data.rates[m],
-                             contingency_rating=nc.passive_branch_data.contingency_rates[m],
-                             srap_rating=srap_ratings[m],
-                             base_flow=abs(base_flow[m]),
-                             post_contingency_flow=0.0,
-                             post_srap_flow=0.0,
-                             base_loading=abs(base_flow[m]) / (nc.passive_branch_data.rates[m] + 1e-9),
-                             post_contingency_loading=0.0,
-                             post_srap_loading=0.0,
-                             msg_ov='Overload not acceptable',
-                             msg_srap='SRAP not applicable',
-                             srap_power=0.0,
-                             solved_by_srap=False)
+        if contingency_idx == 0 and report_base_case:  # only doing it once per hour
+            self.analyze_base_case(t=t,
+                                   t_prob=t_prob,
+                                   mon_idx=mon_idx,
+                                   nc=nc,
+                                   base_flow=base_flow,
+                                   srap_ratings=srap_ratings,
+                                   F=F,
+                                   T=T,
+                                   bus_area_indices=bus_area_indices,
+                                   area_names=area_names)
 
         # Now evalueting the effect of contingencies
         for m in mon_idx:  # for each monitored branch ...
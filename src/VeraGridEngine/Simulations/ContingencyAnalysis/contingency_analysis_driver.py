@@ -26,6 +26,7 @@ from VeraGridEngine.Compilers.circuit_to_bentayga import BENTAYGA_AVAILABLE
 from VeraGridEngine.Compilers.circuit_to_newton_pa import (NEWTON_PA_AVAILABLE, newton_pa_contingencies,
                                                            translate_newton_pa_contingencies)
 from VeraGridEngine.Compilers.circuit_to_pgm import PGM_AVAILABLE
+from VeraGridEngine.Utils.process_pool import ProcessPool
 
 
 class ContingencyAnalysisDriver(DriverTemplate):
@@ -69,6 +70,12 @@ class ContingencyAnalysisDriver(DriverTemplate):
         else:
             self.linear_multiple_contingencies: LinearMultiContingencies = linear_multiple_contingencies
 
+        # pool of processes for the AC contingencies, set by the time series driver to reuse it among the time steps
+        self.pool: Union[ProcessPool, None] = None
+
+        # use the compilation cache in the linear contingencies? set by the drivers that compile the same steps again
+        self.use_cache: bool = False
+
         # N-K results
         self.results = ContingencyAnalysisResults(
             ncon=self.grid.get_contingency_groups_number(),
@@ -118,7 +125,8 @@ class ContingencyAnalysisDriver(DriverTemplate):
                     calling_class=self,
                     t_idx=t_idx,
                     t_prob=t_prob,
-                    logger=self.logger
+                    logger=self.logger,
+                    pool=self.pool
                 )
 
             elif self.options.contingency_method == ContingencyMethod.PTDF:
@@ -129,7 +137,8 @@ class ContingencyAnalysisDriver(DriverTemplate):
                     calling_class=self,
                     t=t_idx,
                     t_prob=t_prob,
-                    logger=self.logger
+                    logger=self.logger,
+                    use_cache=self.use_cache
                 )
 
             elif self.options.contingency_method == ContingencyMethod.HELM:
@@ -9,6 +9,7 @@ from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOpt
 from VeraGridEngine.Simulations.LinearFactors.linear_analysis_options import LinearAnalysisOptions
 from VeraGridEngine.Devices.Aggregation.contingency_group import ContingencyGroup
 from VeraGridEngine.Simulations.options_template import OptionsTemplate
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_results_store import ContingencyResultsStore
 
 
 class ContingencyAnalysisOptions(OptionsTemplate):
@@ -29,7 +30,15 @@ class ContingencyAnalysisOptions(OptionsTemplate):
                  detailed_massive_report: bool = False,
                  contingency_deadband: float = 0.0,
                  contingency_method=ContingencyMethod.PowerFlow,
-                 contingency_groups: Union[List[ContingencyGroup], None] = None):
+                 contingency_groups: Union[List[ContingencyGroup], None] = None,
+                 store_dense_results: bool = True,
+                 results_loading_threshold: float = 1.0,
+                 results_top_k: int = 0,
+                 results_file_name: str = "",
+                 n_workers: int = 1,
+                 use_linear_screening: bool = False,
+                 screening_margin: float = 0.1,
+                 screening_top_n: int = 0):
         """
         ContingencyAnalysisOptions
         :param use_provided_flows: Use the provided flows?
@@ -48,6 +57,18 @@ class ContingencyAnalysisOptions(OptionsTemplate):
         :param contingency_deadband: Deadband to report contingencies
         :param contingency_method: ContingencyEngine to use (PowerFlow, PTDF, ...)
         :param contingency_groups: List of contingencies to use, if None all will be used
+        :param store_dense_results: Store the dense (contingency, branch) and (contingency, bus) results?
+                                    otherwise, only the aggregates and the monitored values over
+                                    results_loading_threshold are kept, bounding the memory used.
+        :param results_loading_threshold: Minimum loading (p.u.) of the monitored values kept in the sparse store
+        :param results_top_k: If greater than zero, only the top-k loaded monitored branches per contingency are kept
+        :param results_file_name: Parquet file where the sparse store is streamed to (time series), empty for none
+        :param n_workers: Number of processes used to run the contingency groups (PowerFlow method)
+        :param use_linear_screening: Screen the contingencies with the linear factors and only verify
+                                     the ranked, borderline and overloaded ones with AC power flows (PowerFlow method)
+        :param screening_margin: Loading margin (p.u.): contingencies with an estimated loading over
+                                 1 - screening_margin are verified with AC power flows
+        :param screening_top_n: Number of contingencies with the highest performance index always verified
         """
         OptionsTemplate.__init__(self, name="ContingencyAnalysisOptions")
 
@@ -77,6 +98,22 @@ class ContingencyAnalysisOptions(OptionsTemplate):
 
         self.contingency_groups: Union[List[ContingencyGroup], None] = contingency_groups
 
+        self.store_dense_results: bool = store_dense_results
+
+        self.results_loading_threshold: float = results_loading_threshold
+
+        self.results_top_k: int = results_top_k
+
+        self.results_file_name: str = results_file_name
+
+        self.n_workers: int = n_workers
+
+        self.use_linear_screening: bool = use_linear_screening
+
+        self.screening_margin: float = screening_margin
+
+        self.screening_top_n: int = screening_top_n
+
         self.register(key="use_provided_flows", tpe=bool)
         self.register(key="Pf", tpe=SubObjectType.Array)
         self.register(key="contingency_method", tpe=ContingencyMethod)
@@ -90,3 +127,26 @@ class ContingencyAnalysisOptions(OptionsTemplate):
         self.register(key="detailed_massive_report", tpe=bool)
         self.register(key="contingency_deadband", tpe=float)
         self.register(key="contingency_groups", tpe=SubObjectType.ObjectsList)
+        self.register(key="store_dense_results", tpe=bool)
+        self.register(key="results_loading_threshold", tpe=float)
+        self.register(key="results_top_k", tpe=int)
+        self.register(key="results_file_name", tpe=str)
+        self.register(key="n_workers", tpe=int)
+        self.register(key="use_linear_screening", tpe=bool)
+        self.register(key="screening_margin", tpe=float)
+        self.register(key="screening_top_n", tpe=int)
+
+    def get_results_store(self, streaming: bool = False) -> Union[ContingencyResultsStore, None]:
+        """
+        Get the sparse results store to use, if the dense results are not stored
+        :param streaming: stream the store to results_file_name? (if any)
+        :return: ContingencyResultsStore or None
+        """
+        if self.store_dense_results:
+            return None
+        else:
+            return ContingencyResultsStore(loading_threshold=self.results_loading_threshold,
+                                           top_k=self.results_top_k,
+                                           file_name=self.results_file_name if (streaming and
+                                                                                self.results_file_name != "")
+                                           else None)
@@ -3,13 +3,17 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.  
 # SPDX-License-Identifier: MPL-2.0
 
+from __future__ import annotations
 
 import numpy as np
+from typing import Union
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
 from VeraGridEngine.Simulations.results_table import ResultsTable
 from VeraGridEngine.Simulations.results_template import ResultsTemplate
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
-from VeraGridEngine.basic_structures import IntVec, StrVec, CxMat, Mat
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_results_store import ContingencyResultsStore
+from VeraGridEngine.Utils.NumericalMethods.weldorf_online_stddev import WeldorfOnlineStdDevMat
+from VeraGridEngine.basic_structures import IntVec, StrVec, CxMat, Mat, Vec, CxVec, BoolVec
 from VeraGridEngine.enumerations import StudyResultsType, ResultTypes, DeviceType
 
 
@@ -19,7 +23,9 @@ class ContingencyAnalysisResults(ResultsTemplate):
     """
 
     def __init__(self, ncon: int, nbus: int, nbr: int,
-                 bus_names: StrVec, branch_names: StrVec, bus_types: IntVec, con_names: StrVec):
+                 bus_names: StrVec, branch_names: StrVec, bus_types: IntVec, con_names: StrVec,
+                 store_dense: bool = True,
+                 store: Union[ContingencyResultsStore, None] = None):
         """
         ContingencyAnalysisResults
         :param ncon: number of contingencies
@@ -29,6 +35,9 @@ class ContingencyAnalysisResults(ResultsTemplate):
         :param branch_names: branch names
         :param bus_types: bus types array
         :param con_names: contingency names
+        :param store_dense: store the dense (ncon, nbus) and (ncon, nbr) matrices?
+                            otherwise only the per-branch aggregates and the sparse store are kept
+        :param store: ContingencyResultsStore where to keep the monitored values over a threshold (optional)
         """
         ResultsTemplate.__init__(
             self,
@@ -40,6 +49,11 @@ class ContingencyAnalysisResults(ResultsTemplate):
                 ResultTypes.ContingencyAnalysisReport,
                 ResultTypes.SrapUsedPower
 
+            ] if store_dense else [
+                ResultTypes.BranchActivePowerFrom,
+                ResultTypes.BranchLoading,
+                ResultTypes.ContingencyAnalysisReport,
+                ResultTypes.SrapUsedPower
             ],
             time_array=None,
             clustering_results=None,
@@ -51,12 +65,31 @@ class ContingencyAnalysisResults(ResultsTemplate):
         self.bus_types = bus_types
         self.con_names = con_names
 
-        self.voltage: CxMat = np.ones((ncon, nbus), dtype=complex)
-        self.Sbus: CxMat = np.zeros((ncon, nbus), dtype=complex)
-        self.Sf: CxMat = np.zeros((ncon, nbr), dtype=complex)
-        self.loading: CxMat = np.zeros((ncon, nbr), dtype=complex)
+        self.store_dense = store_dense
+
+        # the dense matrices are empty if not stored
+        nrow = ncon if store_dense else 0
+        self.voltage: CxMat = np.ones((nrow, nbus), dtype=complex)
+        self.Sbus: CxMat = np.zeros((nrow, nbus), dtype=complex)
+        self.Sf: CxMat = np.zeros((nrow, nbr), dtype=complex)
+        self.loading: CxMat = np.zeros((nrow, nbr), dtype=complex)
         self.srap_used_power = np.zeros((nbr, nbus), dtype=float)
 
+        # aggregates over the contingencies, always computed
+        self.max_Sbus: Vec = np.zeros(nbus, dtype=float)
+        self.max_flows: Vec = np.zeros(nbr, dtype=float)
+        self.max_loading: Vec = np.zeros(nbr, dtype=float)
+        self.overload_count: IntVec = np.zeros(nbr, dtype=int)
+        self.sum_overload: Vec = np.zeros(nbr, dtype=float)
+        self.overload_stats = WeldorfOnlineStdDevMat(nrow=1, ncol=nbr)
+        self.n_set = 0
+
+        # contingencies whose results are the linear estimation of the screening instead of an AC power flow
+        self.linear_estimate: BoolVec = np.zeros(ncon, dtype=bool)
+
+        # sparse store of the monitored values
+        self.store: Union[ContingencyResultsStore, None] = store
+
         self.report: ContingencyResultsReport = ContingencyResultsReport()
 
         self.register(name='branch_names', tpe=StrVec)
@@ -70,8 +103,77 @@ class ContingencyAnalysisResults(ResultsTemplate):
         self.register(name='loading', tpe=CxMat)
         self.register(name='srap_used_power', tpe=Mat)
 
+        self.register(name='max_Sbus', tpe=Vec)
+        self.register(name='max_flows', tpe=Vec)
+        self.register(name='max_loading', tpe=Vec)
+        self.register(name='overload_count', tpe=IntVec)
+        self.register(name='sum_overload', tpe=Vec)
+        self.register(name='linear_estimate', tpe=BoolVec)
+
         self.register(name='report', tpe=ContingencyResultsReport)
 
+    @property
+    def ncon(self) -> int:
+        """
+        Number of contingencies
+        """
+        return len(self.con_names)
+
+    @property
+    def nbranch(self) -> int:
+        """
+        Number of branches
+        """
+        return len(self.branch_names)
+
+    def set_contingency_results(self,
+                                ic: int,
+                                t_idx: Union[int, None],
+                                mon_idx: IntVec,
+                                Sf: CxVec,
+                                Sbus: CxVec,
+                                loading: CxVec,
+                                voltage: Union[CxVec, None] = None,
+                                linear_estimate: bool = False) -> None:
+        """
+        Set the results of a contingency: the dense rows (if stored), the aggregates and the sparse store
+        :param ic: contingency index
+        :param t_idx: time index (None for the snapshot)
+        :param mon_idx: indices of the monitored branches
+        :param Sf: post-contingency branch flows
+        :param Sbus: post-contingency bus injections
+        :param loading: post-contingency branch loadings
+        :param voltage: post-contingency voltages (optional)
+        :param linear_estimate: the results are the linear estimation of the screening, not an AC power flow
+        """
+        self.linear_estimate[ic] = linear_estimate
+
+        if self.store_dense:
+            self.Sf[ic, :] = Sf
+            self.Sbus[ic, :] = Sbus
+            self.loading[ic, :] = loading
+            if voltage is not None:
+                self.voltage[ic, :] = voltage
+
+        flows_abs = np.abs(Sf)
+        loading_abs = np.abs(loading)
+        overloading = np.where(loading_abs > 1.0, loading_abs, 0.0)
+
+        if self.n_set == 0:
+            self.max_Sbus = np.real(Sbus).astype(float)
+        else:
+            self.max_Sbus = np.maximum(self.max_Sbus, np.real(Sbus))
+
+        self.max_flows = np.maximum(self.max_flows, flows_abs)
+        self.max_loading = np.maximum(self.max_loading, loading_abs)
+        self.overload_count += overloading > 1.0
+        self.sum_overload += overloading
+        self.overload_stats.update(0, overloading)
+        self.n_set += 1
+
+        if self.store is not None:
+            self.store.add(t_idx=t_idx, contingency_idx=ic, mon_idx=mon_idx, flows=Sf, loadings=loading)
+
     def apply_new_rates(self, nc: NumericalCircuit):
         """
         Apply new rates
@@ -80,6 +182,17 @@ class ContingencyAnalysisResults(ResultsTemplate):
         rates = nc.Rates
         self.loading = self.Sf / (rates + 1e-9)
 
+    def get_store_dense(self, value: str = 'loading') -> Mat:
+        """
+        Get a dense (contingency, branch) matrix from the sparse store, zero where nothing was stored
+        :param value: 'Pf', 'Qf' or 'loading'
+        :return: Mat
+        """
+        if self.store is None:
+            return np.zeros((self.ncon, self.nbranch))
+        else:
+            return self.store.get_dense(ncon=self.ncon, nbr=self.nbranch, value=value)
+
     @staticmethod
     def get_steps():
         """
@@ -152,7 +265,7 @@ class ContingencyAnalysisResults(ResultsTemplate):
         elif result_type == ResultTypes.BranchActivePowerFrom:
 
             return ResultsTable(
-                data=self.Sf.real,
+                data=self.Sf.real if self.store_dense else self.get_store_dense(value='Pf'),
                 index=index,
                 columns=self.branch_names,
                 title=result_type.value,
@@ -164,7 +277,7 @@ class ContingencyAnalysisResults(ResultsTemplate):
         elif result_type == ResultTypes.BranchLoading:
 
             return ResultsTable(
-                data=self.loading.real * 100,
+                data=(self.loading.real if self.store_dense else self.get_store_dense(value='loading')) * 100,
                 index=index,
                 columns=self.branch_names,
                 title=result_type.value,
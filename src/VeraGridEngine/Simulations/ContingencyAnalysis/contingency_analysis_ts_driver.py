@@ -21,6 +21,9 @@ from VeraGridEngine.Simulations.Clustering.clustering_results import ClusteringR
 from VeraGridEngine.Compilers.circuit_to_newton_pa import newton_pa_contingencies, translate_contingency_report
 from VeraGridEngine.Compilers.circuit_to_gslv import (gslv_contingencies)
 from VeraGridEngine.Utils.NumericalMethods.weldorf_online_stddev import WeldorfOnlineStdDevMat
+from VeraGridEngine.Utils.process_pool import ProcessPool
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_ts_worker import (
+    ContingencyTimeStepAggregates, ContingencyTimeSeriesTask, run_contingency_ts_parallel)
 
 
 class ContingencyAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
@@ -71,6 +74,34 @@ class ContingencyAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
                                                                           add_vsc=False,
                                                                           add_switch=True), dtype=str)
 
+    @staticmethod
+    def store_time_step(results: ContingencyAnalysisTimeSeriesResults,
+                        std_dev_counter: WeldorfOnlineStdDevMat,
+                        it: int,
+                        agg: ContingencyTimeStepAggregates) -> None:
+        """
+        Store the aggregates over the contingencies of a time step
+        :param results: ContingencyAnalysisTimeSeriesResults
+        :param std_dev_counter: overload statistics per time step
+        :param it: time position
+        :param agg: ContingencyTimeStepAggregates
+        """
+        # use the aggregates over the contingencies, so that the dense results are not needed
+        results.S[it, :] = agg.max_Sbus
+        results.max_flows[it, :] = agg.max_flows
+        results.max_loading[it, :] = agg.max_loading
+        results.overload_count[it, :] = agg.overload_count
+        results.sum_overload[it, :] = agg.sum_overload
+        results.std_dev_overload[it, :] = agg.max_loading
+        std_dev_counter.set_row(it, agg.overload_stats)
+
+        if results.store is not None and agg.store is not None:
+            # the store streams the chunk of this time step to disk (if set to)
+            results.store += agg.store
+
+        results.srap_used_power += agg.srap_used_power
+        results.report += agg.report
+
     def run_contingency_analysis(self) -> ContingencyAnalysisTimeSeriesResults:
         """
         Run a contngency analysis in series
@@ -96,63 +127,94 @@ class ContingencyAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
             bus_names=self.grid.get_bus_names(),
             bus_types=np.ones(nb, dtype=int),
             con_names=con_names,
-            clustering_results=self.clustering_results
+            clustering_results=self.clustering_results,
+            store=self.options.get_results_store(streaming=True)
         )
 
+        std_dev_counter = WeldorfOnlineStdDevMat(nrow=results.nt, ncol=results.nbranch)
+
+        if self.clustering_results is not None:
+            t_prob = self.clustering_results.sampled_probabilities
+        else:
+            t_prob = np.full(len(self.time_indices), 1.0 / len(self.time_indices))
+
+        if 1 < self.options.n_workers <= len(self.time_indices):
+            # the time steps are split among the processes, each one runs all the contingencies of its steps
+            self.report_text("Running the time steps in parallel...")
+            completed = run_contingency_ts_parallel(
+                task=ContingencyTimeSeriesTask(grid=self.grid,
+                                               options=self.options,
+                                               time_indices=self.time_indices,
+                                               t_prob=t_prob),
+                n_workers=self.options.n_workers,
+                store_func=lambda it, agg: self.store_time_step(results=results,
+                                                                std_dev_counter=std_dev_counter,
+                                                                it=it,
+                                                                agg=agg),
+                logger=self.logger,
+                report_progress2=self.report_progress2,
+                is_cancel=self.is_cancel
+            )
+
+            if results.store is not None:
+                results.store.close()
+
+            if completed:
+                std_dev_counter.finalize()
+                results.mean_overload = std_dev_counter.mean
+                results.std_dev_overload = std_dev_counter.std_dev
+
+            return results
+
         cdriver = ContingencyAnalysisDriver(grid=self.grid,
                                             options=self.options,
                                             linear_multiple_contingencies=None  # it is computed inside
                                             )
 
         if self.options.contingency_method == ContingencyMethod.PTDF:
+            # the linear contingencies compile the same time steps and compute the same factors again:
+            # both passes share them through the compilation cache
             linear = LinearAnalysisTimeSeriesDriver(
                 grid=self.grid,
-                options=self.options,
-                time_indices=self.time_indices
+                options=self.options.lin_options,
+                time_indices=self.time_indices,
+                use_cache=True
             )
             linear.run()
+            cdriver.use_cache = True
 
-        std_dev_counter = WeldorfOnlineStdDevMat(nrow=results.nt, ncol=results.nbranch)
-
-        for it, t in enumerate(self.time_indices):
-
-            self.report_text('Contingency at ' + str(self.grid.time_profile[t]))
-            self.report_progress2(it, len(self.time_indices))
-
-            if self.clustering_results is not None:
-                t_prob = self.clustering_results.sampled_probabilities[it]
-            else:
-                t_prob = 1.0 / len(self.time_indices)
-
-            res_t = cdriver.run_at(t_idx=int(t), t_prob=t_prob)
-
-            results.S[it, :] = res_t.Sbus.real.max(axis=0)
-
-            results.max_flows[it, :] = np.abs(res_t.Sf).max(axis=0)
-
-            # Note: Loading is (ncon, nbranch)
+        if self.options.contingency_method == ContingencyMethod.PowerFlow and self.options.n_workers > 1:
+            # fewer time steps than processes: each time step runs its contingency groups in the pool,
+            # the processes are started once and reused by all the time steps
+            cdriver.pool = ProcessPool(n_workers=self.options.n_workers)
 
-            loading_abs = np.abs(res_t.loading)
-            overloading = loading_abs.copy()
-            overloading[overloading <= 1.0] = 0
+        try:
+            for it, t in enumerate(self.time_indices):
 
-            for k in range(results.ncon):
-                std_dev_counter.update(it, overloading[k, :])
+                self.report_text('Contingency at ' + str(self.grid.time_profile[t]))
+                self.report_progress2(it, len(self.time_indices))
 
-            results.max_loading[it, :] = loading_abs.max(axis=0)
-            results.overload_count[it, :] = np.count_nonzero(overloading > 1.0)
-            results.sum_overload[it, :] = overloading.sum(axis=0)
+                res_t = cdriver.run_at(t_idx=int(t), t_prob=float(t_prob[it]))
 
-            results.std_dev_overload[it, :] = np.abs(res_t.loading).max(axis=0)
+                self.store_time_step(results=results,
+                                     std_dev_counter=std_dev_counter,
+                                     it=it,
+                                     agg=ContingencyTimeStepAggregates(res_t))
 
-            results.srap_used_power += res_t.srap_used_power
-            results.report += res_t.report
+                # TODO: think what to do about this
+                # results.report.merge(res_t.report)
 
-            # TODO: think what to do about this
-            # results.report.merge(res_t.report)
+                if self.__cancel__:
+                    if results.store is not None:
+                        results.store.close()
+                    return results
+        finally:
+            if cdriver.pool is not None:
+                cdriver.pool.shutdown()
+                cdriver.pool = None
 
-            if self.__cancel__:
-                return results
+        if results.store is not None:
+            results.store.close()
 
         # compute the mean
         std_dev_counter.finalize()
@@ -10,6 +10,7 @@ from VeraGridEngine.Simulations.results_table import ResultsTable
 from VeraGridEngine.Simulations.results_template import ResultsTemplate
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
 from VeraGridEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_results_store import ContingencyResultsStore
 from VeraGridEngine.basic_structures import DateVec, IntVec, StrVec, Mat
 from VeraGridEngine.enumerations import StudyResultsType, ResultTypes, DeviceType
 from VeraGridEngine.Simulations.Clustering.clustering_results import ClusteringResults
@@ -28,7 +29,8 @@ class ContingencyAnalysisTimeSeriesResults(ResultsTemplate):
                  branch_names: StrVec,
                  bus_types: IntVec,
                  con_names: StrVec,
-                 clustering_results: Union[ClusteringResults, None]):
+                 clustering_results: Union[ClusteringResults, None],
+                 store: Union[ContingencyResultsStore, None] = None):
         """
         ContingencyAnalysisTimeSeriesResults
         :param n: number of nodes
@@ -39,6 +41,7 @@ class ContingencyAnalysisTimeSeriesResults(ResultsTemplate):
         :param bus_types: array of bus types
         :param con_names: array of contingency names
         :param clustering_results: Clustering results if applicable
+        :param store: ContingencyResultsStore where the monitored values over a threshold are kept (optional)
         """
 
         ResultsTemplate.__init__(
@@ -96,6 +99,9 @@ class ContingencyAnalysisTimeSeriesResults(ResultsTemplate):
 
         self.report: ContingencyResultsReport = ContingencyResultsReport()
 
+        # sparse store of the monitored values of all the time steps
+        self.store: Union[ContingencyResultsStore, None] = store
+
         self.register(name='branch_names', tpe=StrVec)
         self.register(name='bus_names', tpe=StrVec)
         self.register(name='bus_types', tpe=IntVec)
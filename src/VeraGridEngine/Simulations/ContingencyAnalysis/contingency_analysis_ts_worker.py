@@ -0,0 +1,140 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import copy
+import numpy as np
+from typing import Callable, Dict, List, Tuple, Union
+
+from VeraGridEngine.basic_structures import Logger, IntVec, Vec, Mat
+from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_options import ContingencyAnalysisOptions
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_driver import ContingencyAnalysisDriver
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
+from VeraGridEngine.Simulations.ContingencyAnalysis.contingency_results_store import ContingencyResultsStore
+from VeraGridEngine.Utils.NumericalMethods.weldorf_online_stddev import WeldorfOnlineStdDevMat
+from VeraGridEngine.Utils.process_pool import run_in_process_pool
+
+
+class ContingencyTimeStepAggregates:
+    """
+    Aggregates over the contingencies of a time step: what the time series keeps of each
+    ContingencyAnalysisResults, so that the dense (contingency, branch) matrices never travel between processes
+    """
+
+    def __init__(self, res_t: ContingencyAnalysisResults):
+        """
+        Constructor
+        :param res_t: ContingencyAnalysisResults of the time step
+        """
+        self.max_Sbus: Vec = res_t.max_Sbus
+        self.max_flows: Vec = res_t.max_flows
+        self.max_loading: Vec = res_t.max_loading
+        self.overload_count: int = int(res_t.overload_count.sum())
+        self.sum_overload: Vec = res_t.sum_overload
+        self.overload_stats: WeldorfOnlineStdDevMat = res_t.overload_stats
+        self.srap_used_power: Mat = res_t.srap_used_power
+        self.report: ContingencyResultsReport = res_t.report
+        self.store: Union[ContingencyResultsStore, None] = res_t.store
+
+
+class ContingencyTimeSeriesTask:
+    """
+    Everything needed to run the contingency analysis of some time steps in a process of the pool.
+    The grid and the options travel together, so that the contingency groups of the options
+    remain the grid devices in the worker processes
+    """
+
+    def __init__(self, grid: MultiCircuit, options: ContingencyAnalysisOptions, time_indices: IntVec, t_prob: Vec):
+        """
+        Constructor
+        :param grid: MultiCircuit
+        :param options: ContingencyAnalysisOptions
+        :param time_indices: time indices of the driver (the chunks positions refer to these)
+        :param t_prob: probability of each time position
+        """
+        self.grid = grid
+        self.time_indices = time_indices
+        self.t_prob = t_prob
+
+        # each process runs its time steps serially: the processes are not nested
+        self.options = copy.copy(options)
+        self.options.n_workers = 1
+
+
+def get_contingency_ts_chunks(nt: int, n_workers: int, chunks_per_worker: int = 4) -> List[List[int]]:
+    """
+    Split the time positions into contiguous chunks
+    :param nt: number of time positions
+    :param n_workers: number of workers
+    :param chunks_per_worker: approximate number of chunks per worker (for load balancing)
+    :return: list of lists of positions
+    """
+    chunk_size = max(1, int(np.ceil(nt / (n_workers * chunks_per_worker))))
+    return [list(range(i, min(i + chunk_size, nt))) for i in range(0, nt, chunk_size)]
+
+
+def _run_contingency_ts_chunk(process_data: Dict,
+                              positions: List[int]) -> Tuple[List[ContingencyTimeStepAggregates], Logger]:
+    """
+    Run the contingency analysis of a chunk of time positions inside a process of the pool
+    :param process_data: data of the process, with the ContingencyTimeSeriesTask as context
+    :param positions: positions in the driver time indices
+    :return: aggregates of each position, Logger
+    """
+    task: ContingencyTimeSeriesTask = process_data['context']
+
+    if 'driver' not in process_data:
+        # the linear contingencies are built once per process
+        process_data['driver'] = ContingencyAnalysisDriver(grid=task.grid,
+                                                           options=task.options,
+                                                           linear_multiple_contingencies=None)
+
+    cdriver = process_data['driver']
+    cdriver.logger = Logger()
+
+    aggregates = list()
+    for it in positions:
+        res_t = cdriver.run_at(t_idx=int(task.time_indices[it]), t_prob=float(task.t_prob[it]))
+        aggregates.append(ContingencyTimeStepAggregates(res_t))
+
+    return aggregates, cdriver.logger
+
+
+def run_contingency_ts_parallel(task: ContingencyTimeSeriesTask,
+                                n_workers: int,
+                                store_func: Callable[[int, ContingencyTimeStepAggregates], None],
+                                logger: Logger,
+                                report_progress2: Union[Callable[[int, int], None], None] = None,
+                                is_cancel: Union[Callable[[], bool], None] = None) -> bool:
+    """
+    Run the contingency analysis time series in a pool of processes, splitting the time steps among them.
+    The aggregates are stored in the time order, so the report and the store do not depend on
+    the order in which the chunks are finished.
+    :param task: ContingencyTimeSeriesTask
+    :param n_workers: number of processes
+    :param store_func: function storing the aggregates of a time position in the results
+    :param logger: Logger
+    :param report_progress2: (optional) progress function (current, total)
+    :param is_cancel: (optional) function returning True if the simulation must stop
+    :return: True if completed, False if cancelled
+    """
+    chunks = get_contingency_ts_chunks(nt=len(task.time_indices), n_workers=n_workers)
+
+    def store_chunk(i: int, aggregates: List[ContingencyTimeStepAggregates]) -> None:
+        for it, agg in zip(chunks[i], aggregates):
+            store_func(it, agg)
+
+    return run_in_process_pool(func=_run_contingency_ts_chunk,
+                               args_list=[(chunk,) for chunk in chunks],
+                               context=task,
+                               n_workers=n_workers,
+                               store_func=store_chunk,
+                               logger=logger,
+                               ordered=True,
+                               weights=[len(chunk) for chunk in chunks],
+                               report_progress2=report_progress2,
+                               is_cancel=is_cancel)
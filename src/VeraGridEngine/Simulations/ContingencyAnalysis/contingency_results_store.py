@@ -0,0 +1,222 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, List, Union
+from scipy.sparse import coo_matrix
+from VeraGridEngine.basic_structures import IntVec, Vec, CxVec, Mat
+
+# columns of the store
+CONTINGENCY_STORE_COLUMNS = ('time_idx', 'contingency_idx', 'branch_idx', 'Pf', 'Qf', 'loading')
+
+CONTINGENCY_STORE_SCHEMA = pa.schema([('time_idx', pa.int32()),
+                                      ('contingency_idx', pa.int32()),
+                                      ('branch_idx', pa.int32()),
+                                      ('Pf', pa.float64()),
+                                      ('Qf', pa.float64()),
+                                      ('loading', pa.float64())])
+
+
+class ContingencyResultsStore:
+    """
+    Sparse (COO) store of the post-contingency flows of the monitored branches.
+    Only the values with a loading over a threshold are kept, optionally only the top-k per contingency.
+    If a file name is given, the values are streamed to a parquet file in chunks,
+    so that the memory used is bounded by the buffer size.
+    """
+
+    def __init__(self,
+                 loading_threshold: float = 1.0,
+                 top_k: int = 0,
+                 file_name: Union[str, None] = None,
+                 buffer_size: int = 1000000):
+        """
+        Constructor
+        :param loading_threshold: minimum loading (p.u.) of the values to keep
+        :param top_k: if greater than zero, maximum number of values kept per contingency (the most loaded ones)
+        :param file_name: parquet file name to stream the values into (None to keep them in memory)
+        :param buffer_size: number of values kept in memory before writing to the file
+        """
+        self.loading_threshold = loading_threshold
+        self.top_k = top_k
+        self.file_name = file_name
+        self.buffer_size = buffer_size
+
+        # buffer of chunks
+        self._chunks: Dict[str, List[np.ndarray]] = {col: list() for col in CONTINGENCY_STORE_COLUMNS}
+        self._buffered = 0
+
+        # number of values written to the file
+        self._written = 0
+        self._writer: Union[pq.ParquetWriter, None] = None
+
+        # once the file is closed, the new values stay in memory
+        self._closed = False
+
+    def __len__(self) -> int:
+        return self._buffered + self._written
+
+    def size(self) -> int:
+        """
+        Get the number of values stored
+        :return: int
+        """
+        return len(self)
+
+    def add(self,
+            t_idx: Union[int, None],
+            contingency_idx: int,
+            mon_idx: IntVec,
+            flows: Union[Vec, CxVec],
+            loadings: Union[Vec, CxVec]) -> None:
+        """
+        Add the results of a contingency
+        :param t_idx: time index (None for the snapshot)
+        :param contingency_idx: contingency group index
+        :param mon_idx: indices of the monitored branches
+        :param flows: post-contingency flows of all the branches (MW / MVA)
+        :param loadings: post-contingency loadings of all the branches (p.u.)
+        """
+        loading_mon = np.abs(loadings[mon_idx])
+        sel = np.where(loading_mon >= self.loading_threshold)[0]
+
+        if 0 < self.top_k < len(sel):
+            sel = sel[np.argpartition(-loading_mon[sel], self.top_k)[:self.top_k]]
+            sel.sort()
+
+        if len(sel) == 0:
+            return
+
+        br_idx = mon_idx[sel]
+        f = flows[br_idx]
+        n = len(br_idx)
+
+        self._append(time_idx=np.full(n, -1 if t_idx is None else t_idx, dtype=np.int32),
+                     contingency_idx=np.full(n, contingency_idx, dtype=np.int32),
+                     branch_idx=br_idx.astype(np.int32),
+                     Pf=np.real(f).astype(float),
+                     Qf=np.imag(f).astype(float),
+                     loading=np.real(loadings[br_idx]).astype(float))
+
+    def _append(self, **arrays: np.ndarray) -> None:
+        """
+        Append arrays of values to the buffer
+        :param arrays: one array per column
+        """
+        for col in CONTINGENCY_STORE_COLUMNS:
+            self._chunks[col].append(arrays[col])
+
+        self._buffered += len(arrays['loading'])
+
+        if self.file_name is not None and self._buffered >= self.buffer_size:
+            self.flush()
+
+    def _concat_buffer(self) -> Dict[str, np.ndarray]:
+        """
+        Get the buffered values as a dictionary of arrays
+        :return: column -> array
+        """
+        return {col: (np.concatenate(self._chunks[col]) if len(self._chunks[col])
+                      else np.zeros(0, dtype=CONTINGENCY_STORE_SCHEMA.field(col).type.to_pandas_dtype()))
+                for col in CONTINGENCY_STORE_COLUMNS}
+
+    def flush(self) -> None:
+        """
+        Write the buffered values to the file (if any)
+        """
+        if self.file_name is None or self._closed or self._buffered == 0:
+            return
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.file_name, schema=CONTINGENCY_STORE_SCHEMA)
+
+        table = pa.Table.from_pydict(self._concat_buffer(), schema=CONTINGENCY_STORE_SCHEMA)
+        self._writer.write_table(table)
+        self._written += self._buffered
+
+        self._chunks = {col: list() for col in CONTINGENCY_STORE_COLUMNS}
+        self._buffered = 0
+
+    def close(self) -> None:
+        """
+        Write the pending values and close the file (if any).
+        The drivers call it at the end of the run, before the values are read.
+        The values added afterwards are kept in memory
+        """
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._closed = True
+
+    def merge(self, other: "ContingencyResultsStore") -> None:
+        """
+        Add the values of another (in-memory) store
+        :param other: ContingencyResultsStore
+        """
+        data = other.get_arrays()
+        if len(data['loading']):
+            self._append(**data)
+
+    def __iadd__(self, other: "ContingencyResultsStore"):
+        """
+        Incremental addition of stores
+        :param other: ContingencyResultsStore
+        :return: self
+        """
+        self.merge(other)
+        return self
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Get all the values as a dictionary of arrays (the file values are read back)
+        :return: column -> array
+        :raises RuntimeError: if the store is streaming to a file that was not closed yet
+        """
+        if self._writer is not None:
+            raise RuntimeError(f"The contingency results file {self.file_name} is incomplete until the store "
+                               f"is closed (see ContingencyResultsStore.close)")
+
+        data = self._concat_buffer()
+
+        if self._written > 0:
+            table = pq.read_table(self.file_name)
+            data = {col: np.concatenate((table.column(col).to_numpy(), data[col]))
+                    for col in CONTINGENCY_STORE_COLUMNS}
+
+        return data
+
+    def get_df(self) -> pd.DataFrame:
+        """
+        Get the values as a DataFrame
+        :return: DataFrame
+        """
+        return pd.DataFrame(data=self.get_arrays(), columns=list(CONTINGENCY_STORE_COLUMNS))
+
+    def get_dense(self, ncon: int, nbr: int, value: str = 'loading', t_idx: Union[int, None] = None) -> Mat:
+        """
+        Get a dense (contingency, branch) matrix of one of the values, the values not stored are zero
+        :param ncon: number of contingencies
+        :param nbr: number of branches
+        :param value: 'Pf', 'Qf' or 'loading'
+        :param t_idx: time index to use (None for a snapshot, only valid if a single time step was stored)
+        :return: Mat
+        :raises ValueError: if t_idx is None and the store holds several time steps
+        """
+        data = self.get_arrays()
+
+        if t_idx is None:
+            if len(np.unique(data['time_idx'])) > 1:
+                raise ValueError("The store holds several time steps, the time index must be provided")
+            sel = slice(None)
+        else:
+            sel = data['time_idx'] == t_idx
+
+        return coo_matrix((data[value][sel], (data['contingency_idx'][sel], data['branch_idx'][sel])),
+                          shape=(ncon, nbr)).toarray()
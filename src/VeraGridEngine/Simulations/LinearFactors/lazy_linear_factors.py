@@ -0,0 +1,624 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+import scipy.sparse as sp
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Tuple, Union
+from scipy.sparse.linalg import splu
+
+from VeraGridEngine.basic_structures import Vec, IntVec, Mat
+
+
+class LinearFactorsIsland:
+    """
+    Linear factors source of an island: the factorized reduced susceptance matrix of the island
+    (or its dense PTDF and LODF for the islands that cannot be factorized, i.e. ACDC islands)
+    """
+
+    def __init__(self,
+                 bus_idx: IntVec,
+                 br_idx: IntVec,
+                 F: IntVec,
+                 T: IntVec,
+                 Bf: Union[sp.csc_matrix, None] = None,
+                 Bpqpv: Union[sp.csc_matrix, None] = None,
+                 no_slack: Union[IntVec, None] = None,
+                 distribute_slack: bool = True,
+                 correct_values: bool = False,
+                 ptdf: Union[Mat, None] = None,
+                 lodf: Union[Mat, None] = None,
+                 numerical_zero: float = 1e-10):
+        """
+        Constructor
+        :param bus_idx: original indices of the island buses
+        :param br_idx: original indices of the island branches
+        :param F: island "from" bus indices of the island branches
+        :param T: island "to" bus indices of the island branches
+        :param Bf: Bus-branch "from" susceptance matrix of the island
+        :param Bpqpv: DC-linear susceptance matrix of the island already sliced
+        :param no_slack: array of sorted pq and pv node indices of the island
+        :param distribute_slack: distribute the slack?
+        :param correct_values: correct the LODF values out of the interval
+        :param ptdf: dense island PTDF (replaces Bf, Bpqpv and no_slack)
+        :param lodf: dense island LODF (replaces Bf, Bpqpv and no_slack)
+        :param numerical_zero: value considered zero in numerical terms
+        """
+        self.bus_idx = bus_idx
+        self.br_idx = br_idx
+        self.F = F
+        self.T = T
+        self.Bf = Bf
+        self.no_slack = no_slack
+        self.distribute_slack = distribute_slack
+        self.correct_values = correct_values
+        self.numerical_zero = numerical_zero
+
+        self.ptdf = ptdf
+        self.lodf = lodf
+
+        # factorize once, every column or row of the factors is a couple of triangular solves
+        self.lu = splu(Bpqpv.tocsc()) if ptdf is None else None
+
+        # diagonal of the branch outage PTDF (computed on the first LODF rows request)
+        self._lodf_diag: Union[Vec, None] = None
+
+    @property
+    def nbus(self) -> int:
+        """
+        Number of buses of the island
+        """
+        return len(self.bus_idx)
+
+    @property
+    def nbr(self) -> int:
+        """
+        Number of branches of the island
+        """
+        return len(self.br_idx)
+
+    def _solve_theta(self, dP: Mat) -> Mat:
+        """
+        Compute the angle increments of some injection increments
+        :param dP: injection increments (island buses, k)
+        :return: angle increments (island buses, k)
+        """
+        dTheta = np.zeros((self.nbus, dP.shape[1]))
+        dTheta[self.no_slack, :] = self.lu.solve(np.ascontiguousarray(dP[self.no_slack, :]))
+        return dTheta
+
+    def ptdf_columns(self, cols: IntVec) -> Mat:
+        """
+        Compute some PTDF columns
+        :param cols: island bus indices
+        :return: PTDF[:, cols] (island branches, len(cols))
+        """
+        if self.ptdf is not None:
+            return self.ptdf[:, cols]
+
+        n = self.nbus
+        k = len(cols)
+
+        if self.distribute_slack:
+            dP = np.full((n, k), -1.0 / (n - 1))
+        else:
+            dP = np.zeros((n, k))
+        dP[cols, np.arange(k)] = 1.0
+
+        return self.Bf @ self._solve_theta(dP)
+
+    def ptdf_rows(self, rows: IntVec) -> Mat:
+        """
+        Compute some PTDF rows with transposed solves
+        :param rows: island branch indices
+        :return: PTDF[rows, :] (len(rows), island buses)
+        """
+        if self.ptdf is not None:
+            return self.ptdf[rows, :]
+
+        n = self.nbus
+
+        # PTDF[rows, :] = Bf[rows, no_slack] Bpqpv^-1 dP[no_slack, :]
+        bf_rows = self.Bf[rows, :][:, self.no_slack].toarray()
+        y = self.lu.solve(np.ascontiguousarray(bf_rows.T), trans='T').T
+
+        if self.distribute_slack:
+            H = np.repeat(-y.sum(axis=1, keepdims=True) / (n - 1), n, axis=1)
+            H[:, self.no_slack] += y * (n / (n - 1))
+        else:
+            H = np.zeros((len(rows), n))
+            H[:, self.no_slack] = y
+
+        return H
+
+    def ptdf_dot(self, P: Union[Vec, Mat]) -> Union[Vec, Mat]:
+        """
+        Compute PTDF @ P without forming the PTDF
+        :param P: island bus injections (island buses) or (island buses, k)
+        :return: island branch flows
+        """
+        if self.ptdf is not None:
+            return self.ptdf @ P
+
+        P2 = P.reshape(self.nbus, -1)
+
+        if self.distribute_slack:
+            # dP @ P with dP[i, i] = 1 and dP[i, j] = -1 / (n - 1)
+            n = self.nbus
+            dP = (n * P2 - P2.sum(axis=0)) / (n - 1)
+        else:
+            dP = P2
+
+        flows = self.Bf @ self._solve_theta(dP)
+
+        return flows.reshape(-1) if P.ndim == 1 else flows
+
+    def lodf_columns(self, cols: IntVec) -> Mat:
+        """
+        Compute some LODF columns
+        :param cols: island branch indices
+        :return: LODF[:, cols] (island branches, len(cols))
+        """
+        if self.lodf is not None:
+            return self.lodf[:, cols]
+
+        k = len(cols)
+        ck = np.arange(k)
+
+        H = self.Bf @ self._solve_theta(self._branch_outage_injections(cols))
+
+        div = 1.0 - H[cols, ck]
+        ok = np.abs(div) > self.numerical_zero
+        LODF = np.zeros((self.nbr, k))
+        LODF[:, ok] = H[:, ok] / div[ok]
+
+        LODF[cols, ck] = -1.0
+
+        if self.correct_values:
+            LODF[LODF > 1.2] = 0
+            LODF[LODF < -1.2] = 0
+
+        return LODF
+
+    def _branch_outage_injections(self, cols: IntVec) -> Mat:
+        """
+        Injection increments whose flows are the branch outage PTDF columns
+        :param cols: island branch indices
+        :return: dP (island buses, len(cols))
+        """
+        k = len(cols)
+        ck = np.arange(k)
+
+        # H[:, j] = PTDF[:, F[j]] - PTDF[:, T[j]] and dP[:, f] - dP[:, t] = e_f - e_t
+        # (scaled by n / (n - 1) if the slack is distributed)
+        dp = self.nbus / (self.nbus - 1) if self.distribute_slack else 1.0
+        dP = np.zeros((self.nbus, k))
+        dP[self.F[cols], ck] += dp
+        dP[self.T[cols], ck] -= dp
+        return dP
+
+    def lodf_diagonal(self, block_size: int = 256) -> Vec:
+        """
+        Compute the diagonal of the branch outage PTDF, H[j, j] = PTDF[j, F[j]] - PTDF[j, T[j]].
+        The LODF rows need it for every branch of the island, so it is computed once in blocks of columns,
+        keeping only their diagonal values.
+        :param block_size: number of columns solved at once
+        :return: H diagonal (island branches)
+        """
+        if self._lodf_diag is None:
+            diag = np.zeros(self.nbr)
+            for a in range(0, self.nbr, block_size):
+                cols = np.arange(a, min(a + block_size, self.nbr))
+                theta = self._solve_theta(self._branch_outage_injections(cols))
+
+                # H[cols, cols] pairwise, without the rest of the block
+                diag[cols] = np.asarray(self.Bf[cols, :].multiply(theta.T).sum(axis=1)).reshape(-1)
+
+            self._lodf_diag = diag
+
+        return self._lodf_diag
+
+    def lodf_rows(self, rows: IntVec) -> Mat:
+        """
+        Compute some LODF rows from the PTDF rows
+        :param rows: island branch indices
+        :return: LODF[rows, :] (len(rows), island branches)
+        """
+        if self.lodf is not None:
+            return self.lodf[rows, :]
+
+        k = len(rows)
+        rk = np.arange(k)
+
+        ptdf = self.ptdf_rows(rows)
+        H = ptdf[:, self.F] - ptdf[:, self.T]
+
+        div = 1.0 - self.lodf_diagonal()
+        ok = np.abs(div) > self.numerical_zero
+        LODF = np.zeros((k, self.nbr))
+        LODF[:, ok] = H[:, ok] / div[ok]
+
+        LODF[rk, rows] = -1.0
+
+        if self.correct_values:
+            LODF[LODF > 1.2] = 0
+            LODF[LODF < -1.2] = 0
+
+        return LODF
+
+
+class LruColumnCache:
+    """
+    LRU cache of computed vectors (columns or rows of a factors matrix).
+    If a threshold is given, the values are stored sparse, discarding the ones under the threshold.
+    """
+
+    def __init__(self, size: int, length: int, threshold: float = 0.0):
+        """
+        Constructor
+        :param size: maximum number of vectors stored
+        :param length: length of the vectors
+        :param threshold: absolute value under which the values are discarded (0 stores the vectors dense)
+        """
+        self.size = size
+        self.length = length
+        self.threshold = threshold
+        self._data: OrderedDict[int, Union[Vec, Tuple[IntVec, Vec]]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._data
+
+    def clear(self) -> None:
+        """
+        Forget all the vectors
+        """
+        self._data.clear()
+
+    def get(self, key: int) -> Union[Vec, None]:
+        """
+        Get a vector
+        :param key: column or row index
+        :return: dense vector or None if not stored
+        """
+        entry = self._data.get(key, None)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        if self.threshold > 0:
+            idx, val = entry
+            x = np.zeros(self.length)
+            x[idx] = val
+            return x
+        else:
+            return entry
+
+    def set(self, key: int, x: Vec) -> None:
+        """
+        Store a vector
+        :param key: column or row index
+        :param x: dense vector
+        """
+        if self.size <= 0:
+            return
+
+        if self.threshold > 0:
+            idx = np.where(np.abs(x) > self.threshold)[0]
+            self._data[key] = (idx, x[idx])
+        else:
+            self._data[key] = x.copy()
+
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+
+class LazyFactorsMatrix(ABC):
+    """
+    Matrix-like object whose columns (or rows) are computed on demand and cached.
+    It supports the numpy indexing used with the dense factors:
+    M[:, j], M[:, idx], M[idx, :], M[i, j], M[idx1, idx2] (pairwise) and M[np.ix_(idx1, idx2)]
+    """
+
+    def __init__(self,
+                 islands: List[LinearFactorsIsland],
+                 shape: Tuple[int, int],
+                 cache_size: int = 1024,
+                 threshold: float = 0.0):
+        """
+        Constructor
+        :param islands: list of LinearFactorsIsland
+        :param shape: shape of the full matrix
+        :param cache_size: maximum number of columns (and rows) kept in memory
+        :param threshold: absolute value under which the cached values are discarded (0 to keep them all)
+        """
+        self.islands = islands
+        self.shape = shape
+        self.ndim = 2
+        self.dtype = np.dtype(float)
+        self.threshold = threshold
+
+        self._col_cache = LruColumnCache(size=cache_size, length=shape[0], threshold=threshold)
+        self._row_cache = LruColumnCache(size=cache_size, length=shape[1], threshold=threshold)
+
+        # position of each row and column in the islands (-1 if not in any computed island)
+        self._row_island, self._row_local = self._get_locations(self.shape[0], self._island_rows())
+        self._col_island, self._col_local = self._get_locations(self.shape[1], self._island_cols())
+
+    def _island_rows(self) -> List[IntVec]:
+        """
+        Original indices of the rows of each island
+        """
+        return [island.br_idx for island in self.islands]
+
+    @abstractmethod
+    def _island_cols(self) -> List[IntVec]:
+        """
+        Original indices of the columns of each island
+        """
+        pass
+
+    @abstractmethod
+    def _compute_columns(self, island: LinearFactorsIsland, local_cols: IntVec) -> Mat:
+        """
+        Compute the island columns
+        :param island: LinearFactorsIsland
+        :param local_cols: island column indices
+        :return: (island rows, len(local_cols))
+        """
+        pass
+
+    @abstractmethod
+    def _compute_rows(self, island: LinearFactorsIsland, local_rows: IntVec) -> Mat:
+        """
+        Compute the island rows
+        :param island: LinearFactorsIsland
+        :param local_rows: island row indices
+        :return: (len(local_rows), island columns)
+        """
+        pass
+
+    @abstractmethod
+    def _island_col_idx(self, island: LinearFactorsIsland) -> IntVec:
+        """
+        Original indices of the columns of an island
+        """
+        pass
+
+    @staticmethod
+    def _get_locations(n: int, island_idx: List[IntVec]) -> Tuple[IntVec, IntVec]:
+        """
+        Get the island and local index of each original index
+        :param n: number of original indices
+        :param island_idx: original indices of each island
+        :return: island of each index, local index of each index
+        """
+        isl = np.full(n, -1, dtype=int)
+        loc = np.full(n, -1, dtype=int)
+        for k, idx in enumerate(island_idx):
+            isl[idx] = k
+            loc[idx] = np.arange(len(idx))
+        return isl, loc
+
+    @property
+    def cache_hits(self) -> int:
+        """
+        Number of vectors served from the cache
+        """
+        return self._col_cache.hits + self._row_cache.hits
+
+    @property
+    def cache_misses(self) -> int:
+        """
+        Number of vectors not found in the cache
+        """
+        return self._col_cache.misses + self._row_cache.misses
+
+    def clear_cache(self) -> None:
+        """
+        Forget the computed columns and rows
+        """
+        self._col_cache.clear()
+        self._row_cache.clear()
+
+    def get_columns(self, cols: IntVec) -> Mat:
+        """
+        Get a number of full columns
+        :param cols: column indices
+        :return: (nrows, len(cols))
+        """
+        cols = np.asarray(cols, dtype=int)
+        res = np.zeros((self.shape[0], len(cols)))
+        missing = dict()  # island -> list of positions in cols
+
+        for p, j in enumerate(cols):
+            x = self._col_cache.get(j)
+            if x is None:
+                k = self._col_island[j]
+                if k >= 0:
+                    missing.setdefault(k, list()).append(p)
+            else:
+                res[:, p] = x
+
+        for k, positions in missing.items():
+            island = self.islands[k]
+            positions = np.array(positions, dtype=int)
+            local_cols = self._col_local[cols[positions]]
+
+            # compute each column once, even if repeated
+            unique_cols, inverse = np.unique(local_cols, return_inverse=True)
+            values = self._compute_columns(island, unique_cols)
+
+            for q, lc in enumerate(unique_cols):
+                x = np.zeros(self.shape[0])
+                x[island.br_idx] = values[:, q]
+                self._col_cache.set(int(self._island_col_idx(island)[lc]), x)
+
+            res[np.ix_(island.br_idx, positions)] = values[:, inverse]
+
+        return res
+
+    def get_rows(self, rows: IntVec) -> Mat:
+        """
+        Get a number of full rows
+        :param rows: row indices
+        :return: (len(rows), ncols)
+        """
+        rows = np.asarray(rows, dtype=int)
+        res = np.zeros((len(rows), self.shape[1]))
+        missing = dict()  # island -> list of positions in rows
+
+        for p, i in enumerate(rows):
+            x = self._row_cache.get(i)
+            if x is None:
+                k = self._row_island[i]
+                if k >= 0:
+                    missing.setdefault(k, list()).append(p)
+            else:
+                res[p, :] = x
+
+        for k, positions in missing.items():
+            island = self.islands[k]
+            positions = np.array(positions, dtype=int)
+            local_rows = self._row_local[rows[positions]]
+            col_idx = self._island_col_idx(island)
+
+            unique_rows, inverse = np.unique(local_rows, return_inverse=True)
+            values = self._compute_rows(island, unique_rows)
+
+            for q, lr in enumerate(unique_rows):
+                x = np.zeros(self.shape[1])
+                x[col_idx] = values[q, :]
+                self._row_cache.set(int(island.br_idx[lr]), x)
+
+            res[np.ix_(positions, col_idx)] = values[inverse, :]
+
+        return res
+
+    @staticmethod
+    def _parse_index(key, n: int) -> Tuple[IntVec, bool, bool, bool]:
+        """
+        Parse an index of one dimension
+        :param key: int, slice, list, array (1D, 2D from np.ix_ or boolean)
+        :param n: dimension size
+        :return: indices, is scalar, is full slice, is fancy index
+        """
+        if isinstance(key, (int, np.integer)):
+            k = int(key)
+            return np.array([k + n if k < 0 else k], dtype=int), True, False, False
+
+        if isinstance(key, slice):
+            full = key == slice(None)
+            return np.arange(n)[key], False, full, False
+
+        arr = np.asarray(key)
+        if arr.dtype == bool:
+            arr = np.where(arr.reshape(-1))[0]
+        arr = arr.reshape(-1).astype(int)
+        arr[arr < 0] += n
+        return arr, False, False, True
+
+    def __getitem__(self, key) -> Union[Mat, Vec, float]:
+        """
+        Get values of the matrix
+        :param key: numpy-like index
+        :return: values
+        """
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+
+        rkey, ckey = key
+        is_ix = (isinstance(rkey, np.ndarray) and rkey.ndim == 2) or (isinstance(ckey, np.ndarray) and ckey.ndim == 2)
+
+        rows, r_scalar, r_full, r_fancy = self._parse_index(rkey, self.shape[0])
+        cols, c_scalar, c_full, c_fancy = self._parse_index(ckey, self.shape[1])
+
+        if c_full and not r_full:
+            block = self.get_rows(rows)
+        else:
+            block = self.get_columns(cols)[rows, :]
+
+        if r_fancy and c_fancy and not is_ix:
+            # numpy pairwise fancy indexing
+            return block[np.arange(len(rows)), np.arange(len(cols))]
+
+        if r_scalar and c_scalar:
+            return block[0, 0]
+        if r_scalar:
+            return block[0, :]
+        if c_scalar:
+            return block[:, 0]
+        return block
+
+    def toarray(self) -> Mat:
+        """
+        Get the full dense matrix (computing all the columns)
+        :return: Mat
+        """
+        return self.get_columns(np.arange(self.shape[1]))
+
+    def __array__(self, dtype=None, copy=None) -> Mat:
+        arr = self.toarray()
+        return arr if dtype is None else arr.astype(dtype)
+
+
+class LazyPTDF(LazyFactorsMatrix):
+    """
+    PTDF (branches, buses) computed on demand from the factorized island susceptance matrices
+    """
+
+    def _island_cols(self) -> List[IntVec]:
+        return [island.bus_idx for island in self.islands]
+
+    def _island_col_idx(self, island: LinearFactorsIsland) -> IntVec:
+        return island.bus_idx
+
+    def _compute_columns(self, island: LinearFactorsIsland, local_cols: IntVec) -> Mat:
+        return island.ptdf_columns(local_cols)
+
+    def _compute_rows(self, island: LinearFactorsIsland, local_rows: IntVec) -> Mat:
+        return island.ptdf_rows(local_rows)
+
+    def __matmul__(self, P: Union[Vec, Mat]) -> Union[Vec, Mat]:
+        """
+        Compute PTDF @ P with one solve per island (the PTDF is never formed)
+        :param P: bus injections (nbus) or (nbus, k)
+        :return: branch flows (nbr) or (nbr, k)
+        """
+        flows = np.zeros((self.shape[0],) + P.shape[1:])
+        for island in self.islands:
+            flows[island.br_idx, ...] = island.ptdf_dot(P[island.bus_idx, ...])
+        return flows
+
+
+class LazyLODF(LazyFactorsMatrix):
+    """
+    LODF (branches, branches) computed on demand from the factorized island susceptance matrices
+    """
+
+    def _island_cols(self) -> List[IntVec]:
+        return [island.br_idx for island in self.islands]
+
+    def _island_col_idx(self, island: LinearFactorsIsland) -> IntVec:
+        return island.br_idx
+
+    def _compute_columns(self, island: LinearFactorsIsland, local_cols: IntVec) -> Mat:
+        return island.lodf_columns(local_cols)
+
+    def _compute_rows(self, island: LinearFactorsIsland, local_rows: IntVec) -> Mat:
+        return island.lodf_rows(local_rows)
@@ -8,6 +8,7 @@ import numpy as np
 import numba as nb
 import warnings
 import scipy.sparse as sp
+from collections import OrderedDict
 from typing import List, Dict, Tuple, TYPE_CHECKING
 
 from scipy.sparse import lil_matrix
@@ -16,11 +17,13 @@ from scipy.sparse.linalg import spsolve as scipy_spsolve
 from VeraGridEngine.enumerations import DeviceType
 from VeraGridEngine.basic_structures import Logger, Vec, IntVec, CxVec, Mat, ObjVec, CxMat, BoolVec, IntMat
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
+from VeraGridEngine.DataStructures.compilation_cache import COMPILATION_CACHE, get_content_key
 from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
 from VeraGridEngine.Devices.Aggregation.contingency_group import ContingencyGroup
 from VeraGridEngine.Devices.Aggregation.contingency import Contingency
 from VeraGridEngine.Simulations.Derivatives.ac_jacobian import AC_jacobian
 from VeraGridEngine.Simulations.Derivatives.csc_derivatives import dSf_dV_csc
+from VeraGridEngine.Simulations.LinearFactors.lazy_linear_factors import LinearFactorsIsland, LazyPTDF, LazyLODF
 from VeraGridEngine.Utils.Sparse.csc import dense_to_csc
 import VeraGridEngine.Utils.Sparse.csc2 as csc
 from VeraGridEngine.Utils.MIP.selected_interface import lpDot1D_changes
@@ -371,6 +374,20 @@ def create_M_numba(lodf: Mat, branch_contingency_indices) -> Mat:
     return M
 
 
+def get_linear_factors_key(nc: NumericalCircuit) -> int:
+    """
+    Get a key of the data that determines the linear factors (topology, reactances, taps and slack),
+    so that the contingency factors can be reused among time steps that share it
+    :param nc: NumericalCircuit
+    :return: int
+    """
+    return hash((nc.passive_branch_data.active.tobytes(),
+                 nc.passive_branch_data.X.tobytes(),
+                 nc.active_branch_data.tap_module.tobytes(),
+                 nc.bus_data.bus_types.tobytes(),
+                 nc.bus_data.active.tobytes()))
+
+
 class LinearAnalysis:
     """
     Linear Analysis
@@ -380,15 +397,40 @@ class LinearAnalysis:
                  nc: NumericalCircuit,
                  distributed_slack: bool = True,
                  correct_values: bool = False,
-                 logger: Logger = Logger()):
+                 logger: Logger = Logger(),
+                 lazy: bool = False,
+                 cache_size: int = 1024,
+                 sparse_threshold: float = 0.0):
         """
         Linear Analysis constructor
         :param nc: numerical circuit instance
         :param distributed_slack: boolean to distribute slack
         :param correct_values: boolean to fix out layer values
+        :param logger: Logger
+        :param lazy: if true, only the island susceptance matrices are factorized and the PTDF and LODF
+                     columns (or rows) are computed on demand, otherwise the dense PTDF and LODF are computed
+        :param cache_size: (lazy mode) maximum number of PTDF and LODF columns (and rows) kept in memory
+        :param sparse_threshold: (lazy mode) absolute value under which the cached factors are discarded
         """
 
         self.logger: Logger = logger
+        self.lazy = lazy
+
+        # if the circuit was compiled with the cache, the dense factors are kept in the cache by its content
+        # (the key is taken before splitting the islands, that modifies the circuit)
+        if nc.use_cache and not lazy:
+            key = ('LinearAnalysis', get_content_key(nc), distributed_slack, correct_values)
+        else:
+            key = None
+        cached = COMPILATION_CACHE.get(key) if key is not None else None
+
+        if cached is not None:
+            factors, factors_logger = cached
+            self.PTDF, self.LODF, self.HvdcDF, self.HvdcODF, self.VscDF, self.VscODF = [arr.copy() for arr in factors]
+            self.logger += factors_logger
+            return
+
+        n_logs = len(self.logger)
 
         islands: List[NumericalCircuit] = nc.split_into_islands()
         n_br = nc.nbr
@@ -396,8 +438,11 @@ class LinearAnalysis:
         n_hvdc = nc.hvdc_data.nelm
         n_vsc = nc.vsc_data.nelm
 
-        self.PTDF = np.zeros((n_br, n_bus))
-        self.LODF = np.zeros((n_br, n_br))
+        if lazy:
+            factors_islands: List[LinearFactorsIsland] = list()
+        else:
+            self.PTDF = np.zeros((n_br, n_bus))
+            self.LODF = np.zeros((n_br, n_br))
 
         self.HvdcDF: Mat = np.zeros((n_br, n_hvdc))
         self.HvdcODF: Mat = np.zeros((n_br, n_hvdc))
@@ -420,6 +465,23 @@ class LinearAnalysis:
                                                          logger=self.logger,
                                                          distribute_slack=distributed_slack)
 
+                        elif lazy:
+                            adml = island.get_linear_admittance_matrices(indices=indices)
+
+                            # keep the factorized island, the factors are computed when requested
+                            factors_islands.append(
+                                LinearFactorsIsland(bus_idx=island.bus_data.original_idx,
+                                                    br_idx=island.passive_branch_data.original_idx,
+                                                    F=island.passive_branch_data.F,
+                                                    T=island.passive_branch_data.T,
+                                                    Bf=adml.Bf.tocsr(),
+                                                    Bpqpv=adml.get_Bred(pqpv=indices.no_slack),
+                                                    no_slack=indices.no_slack,
+                                                    distribute_slack=distributed_slack,
+                                                    correct_values=correct_values)
+                            )
+                            continue
+
                         else:
                             adml = island.get_linear_admittance_matrices(indices=indices)
 
@@ -431,19 +493,29 @@ class LinearAnalysis:
                                                     no_slack=indices.no_slack,
                                                     distribute_slack=distributed_slack)
 
-                        # assign the PTDF to the main PTDF matrix
-                        self.PTDF[np.ix_(island.passive_branch_data.original_idx,
-                                         island.bus_data.original_idx)] = ptdf_island
-
                         # compute the island LODF
                         lodf_island = make_lodf(Cf=island.passive_branch_data.Cf.tocsc(),
                                                 Ct=island.passive_branch_data.Ct.tocsc(),
                                                 PTDF=ptdf_island,
                                                 correct_values=correct_values)
 
-                        # assign the LODF to the main LODF matrix
-                        self.LODF[np.ix_(island.passive_branch_data.original_idx,
-                                         island.passive_branch_data.original_idx)] = lodf_island
+                        if lazy:
+                            factors_islands.append(
+                                LinearFactorsIsland(bus_idx=island.bus_data.original_idx,
+                                                    br_idx=island.passive_branch_data.original_idx,
+                                                    F=island.passive_branch_data.F,
+                                                    T=island.passive_branch_data.T,
+                                                    ptdf=ptdf_island,
+                                                    lodf=lodf_island)
+                            )
+                        else:
+                            # assign the PTDF to the main PTDF matrix
+                            self.PTDF[np.ix_(island.passive_branch_data.original_idx,
+                                             island.bus_data.original_idx)] = ptdf_island
+
+                            # assign the LODF to the main LODF matrix
+                            self.LODF[np.ix_(island.passive_branch_data.original_idx,
+                                             island.passive_branch_data.original_idx)] = lodf_island
                     else:
                         self.logger.add_error('No PQ or PV nodes', 'Island {}'.format(n_island))
 
@@ -456,6 +528,12 @@ class LinearAnalysis:
             # there are no islands
             pass
 
+        if lazy:
+            self.PTDF = LazyPTDF(islands=factors_islands, shape=(n_br, n_bus),
+                                 cache_size=cache_size, threshold=sparse_threshold)
+            self.LODF = LazyLODF(islands=factors_islands, shape=(n_br, n_br),
+                                 cache_size=cache_size, threshold=sparse_threshold)
+
         # compute the HVDC PTDF (HVDC lines, Buses)
         # A_hvdc = lil_matrix((n_bus, n_hvdc))
         for k in range(n_hvdc):
@@ -480,6 +558,13 @@ class LinearAnalysis:
 
         # self.VscDF = self.PTDF @ A_vsc
 
+        if key is not None:
+            factors_logger = Logger()
+            factors_logger.entries = self.logger.entries[n_logs:]
+            COMPILATION_CACHE.set(key, ([arr.copy() for arr in (self.PTDF, self.LODF, self.HvdcDF,
+                                                                 self.HvdcODF, self.VscDF, self.VscODF)],
+                                        factors_logger))
+
     def get_transfer_limits(self, flows: np.ndarray, rates: Vec):
         """
         Compute the maximum transfer limits of each branch in normal operation
@@ -488,7 +573,7 @@ class LinearAnalysis:
         :return: Max transfer limits vector (n-branch)
         """
         return make_transfer_limits(
-            ptdf=self.PTDF,
+            ptdf=np.asarray(self.PTDF),
             flows=flows,
             rates=rates
         )
@@ -523,7 +608,7 @@ class LinearAnalysis:
         :return: branch active power Sf (time, nbranch)
         """
         if Sbus.ndim == 2:
-            Pf = np.dot(self.PTDF, Sbus.real.T).T
+            Pf = (self.PTDF @ Sbus.real.T).T
 
             if P_hvdc is not None:
                 Pf += np.dot(self.HvdcDF, P_hvdc.T).T
@@ -763,10 +848,12 @@ class LinearMultiContingencies:
     LinearMultiContingencies
     """
 
-    def __init__(self, grid: MultiCircuit, contingency_groups_used: List[ContingencyGroup]):
+    def __init__(self, grid: MultiCircuit, contingency_groups_used: List[ContingencyGroup], cache_size: int = 8):
         """
         Constructor
         :param grid: MultiCircuit
+        :param contingency_groups_used: list of contingency groups to compute
+        :param cache_size: number of computed topologies kept to be reused (see compute)
         """
         self.grid: MultiCircuit = grid
 
@@ -798,6 +885,10 @@ class LinearMultiContingencies:
         # list of LinearMultiContingency objects that are used later to compute the contingency flows
         self.multi_contingencies: List[LinearMultiContingency] = list()
 
+        # LRU cache of computed multi_contingencies: (topology key, thresholds) -> list of LinearMultiContingency
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple[int, float, float], List[LinearMultiContingency]] = OrderedDict()
+
     @property
     def contingency_group_dict(self) -> Dict[str, List[Contingency]]:
         """
@@ -813,22 +904,132 @@ class LinearMultiContingencies:
         """
         return [elm.name for elm in self.contingency_groups_used]
 
+    def load_cached(self,
+                    topology_key: int,
+                    ptdf_threshold: float = 0.0001,
+                    lodf_threshold: float = 0.0001) -> bool:
+        """
+        Set the multi_contingencies computed before for a topology key, if any
+        :param topology_key: key of the topology (see get_linear_factors_key)
+        :param ptdf_threshold: threshold to discard values
+        :param lodf_threshold: Threshold for LODF conversion to sparse
+        :return: True if found
+        """
+        key = (topology_key, ptdf_threshold, lodf_threshold)
+        cached = self._cache.get(key, None)
+
+        if cached is None:
+            return False
+
+        self._cache.move_to_end(key)
+        self.multi_contingencies = list(cached)
+        return True
+
+    def compute_mlodf(self,
+                      lin: LinearAnalysis,
+                      lodf_threshold: float = 0.0001,
+                      batch_size: int = 10000000) -> Dict[int, sp.csc_matrix]:
+        """
+        Compute the multiple outage LODF (MLODF) of all the groups with branch contingencies.
+        The groups are batched by number of outaged branches: the LODF columns of a batch are fetched at once,
+        all the small M systems of the batch are solved in one call, and the results are converted to sparse at once.
+        :param lin: LinearAnalysis instance
+        :param lodf_threshold: Threshold for LODF conversion to sparse
+        :param batch_size: maximum number of dense values (batch groups x outaged branches x branches) per batch
+        :return: contingency group index -> MLODF[k, βδ] (branches, outaged branches)
+        """
+        nbr = lin.LODF.shape[0]
+
+        # group the contingency groups by outage size
+        groups_by_size: Dict[int, List[int]] = dict()
+        for ic, contingency_indices in enumerate(self.contingency_indices_list):
+            k = len(contingency_indices.branch_contingency_indices)
+            if k > 0:
+                groups_by_size.setdefault(k, list()).append(ic)
+
+        mlodf_dict: Dict[int, sp.csc_matrix] = dict()
+
+        for k, ics in groups_by_size.items():
+
+            n_batch = max(1, batch_size // (k * max(nbr, 1)))
+            ar = np.arange(k)
+
+            for a in range(0, len(ics), n_batch):
+                ics_b = ics[a:a + n_batch]
+                g = len(ics_b)
+
+                # outaged branches of the batch (g, k)
+                bci = np.array([self.contingency_indices_list[ic].branch_contingency_indices for ic in ics_b],
+                               dtype=int)
+
+                # fetch every LODF column once
+                u_cols, inv = np.unique(bci.ravel(), return_inverse=True)
+                inv = inv.reshape(g, k)
+                L_u = lin.LODF[:, u_cols]
+
+                # L[q] = LODF[:, bci[q]]: (g, branches, k)
+                L = np.moveaxis(L_u[:, inv], 0, 1)
+
+                if k == 1:
+                    X = L
+                else:
+                    # M[q] = 1 at the diagonal and -LODF[bci[q], bci[q]] elsewhere: (g, k, k)
+                    M = -L[np.arange(g)[:, None], bci, :]
+                    M[:, ar, ar] = 1.0
+
+                    # MLODF[q] = L[q] M[q]^-1  ->  M[q]^T MLODF[q]^T = L[q]^T
+                    Mt = np.transpose(M, (0, 2, 1))
+                    Lt = np.transpose(L, (0, 2, 1))
+                    try:
+                        X = np.transpose(np.linalg.solve(Mt, Lt), (0, 2, 1))
+
+                    except np.linalg.LinAlgError:
+                        # some M is singular, solve one by one
+                        X = np.empty_like(L)
+                        for q in range(g):
+                            try:
+                                X[q] = L[q] @ np.linalg.inv(M[q])
+                            except np.linalg.LinAlgError:
+                                # Done to capture antenna when computing multiples contingencies
+                                X[q] = L[q] @ np.linalg.pinv(M[q])
+
+                # convert the whole batch to sparse at once (branches, g * k), then split
+                X_sp = dense_to_csc(mat=np.ascontiguousarray(np.moveaxis(X, 0, 1).reshape(nbr, g * k)),
+                                    threshold=lodf_threshold)
+
+                for q, ic in enumerate(ics_b):
+                    mlodf_dict[ic] = X_sp[:, q * k:(q + 1) * k]
+
+        return mlodf_dict
+
     def compute(self,
                 lin: LinearAnalysis,
                 ptdf_threshold: float = 0.0001,
-                lodf_threshold: float = 0.0001) -> None:
+                lodf_threshold: float = 0.0001,
+                topology_key: int | None = None,
+                batch_size: int = 10000000) -> None:
         """
         Make the LODF with any contingency combination using the declared contingency objects
         :param lin: LinearAnalysis instance
         :param ptdf_threshold: threshold to discard values
         :param lodf_threshold: Threshold for LODF conversion to sparse
+        :param topology_key: (optional) key of the topology of lin (see get_linear_factors_key),
+                             if given the results are cached and reused by the calls with the same key
+        :param batch_size: maximum number of dense values per batch of the MLODF computation
         :return: None
         """
+        if topology_key is not None and self.load_cached(topology_key=topology_key,
+                                                         ptdf_threshold=ptdf_threshold,
+                                                         lodf_threshold=lodf_threshold):
+            return
 
         # lodf: Mat = lin.LODF
         # ptdf: Mat = lin.PTDF
         self.multi_contingencies.clear()
 
+        # MLODF[k, βδ] of all the groups with branch contingencies
+        mlodf_dict = self.compute_mlodf(lin=lin, lodf_threshold=lodf_threshold, batch_size=batch_size)
+
         # for each contingency group
         for ic, contingency_group in enumerate(self.contingency_groups_used):
 
@@ -842,20 +1043,7 @@ class LinearMultiContingencies:
                 # + MLODF[k, bd] * PTDF[bd, i] * dP[i]
                 # + PTDF[k, i] * dPi
 
-                # Compute M matrix [n, n] (lodf relating the outaged lines to each other)
-                M = create_M_numba(lodf=lin.LODF,
-                                   branch_contingency_indices=contingency_indices.branch_contingency_indices)
-                L = lin.LODF[:, contingency_indices.branch_contingency_indices]
-
-                try:
-                    # Compute LODF for the multiple failure MLODF[k, βδ]
-                    mlodf_factors = dense_to_csc(mat=L @ np.linalg.inv(M),
-                                                 threshold=lodf_threshold)
-
-                except np.linalg.LinAlgError:
-                    # Done to capture antenna when computing multiples contingencies
-                    mlodf_factors = dense_to_csc(mat=L @ np.linalg.pinv(M),
-                                                 threshold=lodf_threshold)
+                mlodf_factors = mlodf_dict[ic]
 
                 if len(contingency_indices.bus_contingency_indices) > 0:
                     # this is PTDF[k, i]
@@ -885,9 +1073,7 @@ class LinearMultiContingencies:
                 # + LODF[k, c] * PTDF[c, i] * dPi
                 # + PTDF[k, i] * dPi
 
-                # append values
-                mlodf_factors = dense_to_csc(mat=lin.LODF[:, contingency_indices.branch_contingency_indices],
-                                             threshold=lodf_threshold)
+                mlodf_factors = mlodf_dict[ic]
 
                 if len(contingency_indices.bus_contingency_indices) > 0:
                     # single branch and single bus contingency
@@ -941,6 +1127,13 @@ class LinearMultiContingencies:
                 )
             )
 
+        if topology_key is not None and self.cache_size > 0:
+            key = (topology_key, ptdf_threshold, lodf_threshold)
+            self._cache[key] = list(self.multi_contingencies)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
 
 class LinearAnalysisTs:
     """
@@ -949,12 +1142,14 @@ class LinearAnalysisTs:
 
     def __init__(self, grid: MultiCircuit,
                  distributed_slack: bool = True,
-                 correct_values: bool = False):
+                 correct_values: bool = False,
+                 time_indices: IntVec | None = None):
         """
         Constructor
         :param grid: MultiCircuit instance
         :param distributed_slack: boolean to distribute slack
         :param correct_values: boolean to fix out layer values
+        :param time_indices: time indices to consider (optional, all if None)
         """
 
         if not grid.has_time_series:
@@ -964,7 +1159,16 @@ class LinearAnalysisTs:
         mat: IntMat = grid.get_branch_active_time_array()
 
         # analyze how many PTDF's we need to get
-        self.groups, self.mapping = find_different_states(mat)
+        if time_indices is None:
+            self.groups, self.mapping = find_different_states(mat)
+        else:
+            groups, mapping = find_different_states(mat[time_indices, :])
+
+            # refer the groups to the time indices (the time steps not considered map to -1)
+            self.groups: Dict[int, List[int]] = {time_indices[rep]: [time_indices[i] for i in rows]
+                                                 for rep, rows in groups.items()}
+            self.mapping = np.full(mat.shape[0], -1, dtype=int)
+            self.mapping[time_indices] = time_indices[mapping]
 
         self._linear_analysis: Dict[int, LinearAnalysis] = dict()
 
@@ -979,6 +1183,14 @@ class LinearAnalysisTs:
         self.nbus = grid.get_bus_number()
         self.nt = grid.get_time_number()
 
+    def get_linear_analysis_at(self, t_idx: int) -> LinearAnalysis:
+        """
+        Get the linear analysis of the topology of a time step
+        :param t_idx: Time index
+        :return: LinearAnalysis
+        """
+        return self._linear_analysis[self.mapping[t_idx]]
+
     def get_flows_at(self, t_idx: int, P: CxVec | Vec) -> CxVec | Vec:
         """
         Get the flows at a time step
@@ -28,13 +28,17 @@ class LinearAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
                  options: Union[LinearAnalysisOptions, None] = None,
                  time_indices: Union[IntVec, None] = None,
                  clustering_results: Union[ClusteringResults, None] = None,
-                 opf_time_series_results=None):
+                 opf_time_series_results=None,
+                 use_cache: bool = False):
         """
         TimeSeries Analysis constructor
         :param grid: MultiCircuit instance
         :param options: LinearAnalysisOptions instance (optional)
         :param time_indices: array of time indices to simulate (optional)
         :param clustering_results: ClusteringResults instance (optional)
+        :param opf_time_series_results: OPF time series results (optional)
+        :param use_cache: keep the compilations and the linear factors in the compilation cache,
+                          for the callers that compute the same time steps again
         """
         TimeSeriesDriverTemplate.__init__(
             self,
@@ -47,6 +51,8 @@ class LinearAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
 
         self.opf_time_series_results = opf_time_series_results
 
+        self.use_cache = use_cache
+
         self.drivers: Dict[int, LinearAnalysis] = dict()
 
         self.results = LinearAnalysisTimeSeriesResults(
@@ -84,6 +90,7 @@ class LinearAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
             nc: NumericalCircuit = compile_numerical_circuit_at(circuit=self.grid,
                                                                 t_idx=t,
                                                                 opf_results=self.opf_time_series_results,
+                                                                use_cache=self.use_cache,
                                                                 logger=self.logger)
 
             driver_ = LinearAnalysis(
@@ -28,7 +28,9 @@ from VeraGridEngine.DataStructures.bus_data import BusData
 from VeraGridEngine.basic_structures import Logger, Vec, IntVec, BoolVec, CxMat, Mat, ObjVec
 from VeraGridEngine.Utils.MIP.selected_interface import LpExp, LpVar, LpModel, join
 from VeraGridEngine.enumerations import TapPhaseControl, HvdcControlType, AvailableTransferMode, ConverterControlType
-from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearMultiContingencies
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import (LinearAnalysis, LinearMultiContingencies,
+                                                                      get_linear_factors_key)
+from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
 from VeraGridEngine.Simulations.ATC.available_transfer_capacity_driver import compute_alpha, compute_alpha_n1, compute_dP
 from VeraGridEngine.IO.file_system import opf_file_path
 
@@ -2143,7 +2145,9 @@ def run_linear_ntc_opf(grid: MultiCircuit,
                        progress_func: Union[None, Callable[[float], None]] = None,
                        export_model_fname: Union[None, str] = None,
                        verbose: int = 0,
-                       robust: bool = False) -> NtcVars:
+                       robust: bool = False,
+                       warm_start: HighsWarmStart | None = None,
+                       linear_multi_contingencies: LinearMultiContingencies | None = None) -> NtcVars:
     """
 
     :param grid: MultiCircuit instance
@@ -2167,6 +2171,9 @@ def run_linear_ntc_opf(grid: MultiCircuit,
     :param export_model_fname: Export the model into LP and MPS?
     :param verbose: Verbosity level
     :param robust: Robust optimization?
+    :param warm_start: HighsWarmStart of the previous time step, to start HiGHS from its basis (optional)
+    :param linear_multi_contingencies: LinearMultiContingencies reused among the time steps,
+                                       its factors are computed once per topology (optional)
     :return: NtcVars class with the results
     """
     mode_2_int = {
@@ -2367,11 +2374,22 @@ def run_linear_ntc_opf(grid: MultiCircuit,
             if len(contingency_groups_used) > 0:
 
                 # declare the multi-contingencies analysis and compute
-                mctg = LinearMultiContingencies(grid=grid,
-                                                contingency_groups_used=contingency_groups_used)
-                mctg.compute(lin=ls,
-                             ptdf_threshold=lodf_threshold,
-                             lodf_threshold=lodf_threshold)
+                if linear_multi_contingencies is None:
+                    mctg = LinearMultiContingencies(grid=grid,
+                                                    contingency_groups_used=contingency_groups_used)
+                else:
+                    mctg = linear_multi_contingencies
+
+                # the contingency factors are reused among the time steps with the same topology
+                topology_key = get_linear_factors_key(nc)
+
+                if not mctg.load_cached(topology_key=topology_key,
+                                        ptdf_threshold=lodf_threshold,
+                                        lodf_threshold=lodf_threshold):
+                    mctg.compute(lin=ls,
+                                 ptdf_threshold=lodf_threshold,
+                                 lodf_threshold=lodf_threshold,
+                                 topology_key=topology_key)
 
                 alpha_n1 = compute_alpha_n1(
                     ptdf=ls.PTDF,
@@ -2430,7 +2448,8 @@ def run_linear_ntc_opf(grid: MultiCircuit,
         print('LP model saved as:', export_model_fname)
 
     # solve the model
-    status = lp_model.solve(robust=robust, show_logs=verbose > 0, progress_text=progress_text)
+    status = lp_model.solve(robust=robust, show_logs=verbose > 0, progress_text=progress_text,
+                            warm_start=warm_start)
 
     # gather the results
     logger.add_info(msg="Status", value=lp_model.status2string(status))
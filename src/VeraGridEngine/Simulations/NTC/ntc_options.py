@@ -30,7 +30,9 @@ class OptimalNetTransferCapacityOptions(OptionsTemplate):
                  consider_contingencies: bool = False,
                  strict_formulation: bool = False,
                  opf_options: OptimalPowerFlowOptions | None = None,
-                 lin_options: LinearAnalysisOptions | None = None, ):
+                 lin_options: LinearAnalysisOptions | None = None,
+                 warm_start: bool = True,
+                 n_workers: int = 1):
         """
         OptimalNetTransferCapacityOptions
         :param sending_bus_idx: array of area "from" bus indices
@@ -48,6 +50,8 @@ class OptimalNetTransferCapacityOptions(OptionsTemplate):
         :param strict_formulation: Use the strict formulation
         :param opf_options: OptimalPowerFlowOptions
         :param lin_options: LinearAnalysisOptions
+        :param warm_start: hand each time step to HiGHS starting from the solver state of the previous one
+        :param n_workers: number of processes to solve the time steps (1: run in this process)
         """
         OptionsTemplate.__init__(self, name="OptimalNetTransferCapacityOptions")
 
@@ -75,6 +79,9 @@ class OptimalNetTransferCapacityOptions(OptionsTemplate):
         else:
             self.lin_options: LinearAnalysisOptions = lin_options
 
+        self.warm_start: bool = warm_start
+        self.n_workers: int = n_workers
+
         self.register(key="sending_bus_idx", tpe=SubObjectType.Array)
         self.register(key="receiving_bus_idx", tpe=SubObjectType.Array)
         self.register(key="transfer_method", tpe=AvailableTransferMode)
@@ -89,3 +96,5 @@ class OptimalNetTransferCapacityOptions(OptionsTemplate):
         self.register(key="strict_formulation", tpe=bool)
         self.register(key="opf_options", tpe=DeviceType.SimulationOptionsDevice)
         self.register(key="lin_options", tpe=DeviceType.SimulationOptionsDevice)
+        self.register(key="warm_start", tpe=bool)
+        self.register(key="n_workers", tpe=int)
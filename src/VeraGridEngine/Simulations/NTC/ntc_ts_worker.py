@@ -0,0 +1,172 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from typing import Callable, Dict, List, Tuple, Union
+
+from VeraGridEngine.basic_structures import Logger, IntVec
+from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Simulations.NTC.ntc_opf import run_linear_ntc_opf, NtcVars
+from VeraGridEngine.Simulations.NTC.ntc_opf_strict import run_linear_ntc_opf_strict
+from VeraGridEngine.Simulations.NTC.ntc_options import OptimalNetTransferCapacityOptions
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import LinearMultiContingencies
+from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
+from VeraGridEngine.Utils.process_pool import run_in_process_pool
+
+
+def get_ntc_ts_chunks(nt: int, n_workers: int, chunks_per_worker: int = 4) -> List[IntVec]:
+    """
+    Split the time positions into contiguous chunks, so that each time step is warm started from the previous one
+    :param nt: number of time positions
+    :param n_workers: number of workers
+    :param chunks_per_worker: approximate number of chunks per worker (for load balancing)
+    :return: list of arrays of positions
+    """
+    chunk_size = max(1, int(np.ceil(nt / (n_workers * chunks_per_worker))))
+    return [np.arange(i, min(i + chunk_size, nt)) for i in range(0, nt, chunk_size)]
+
+
+class NtcTimeStepTask:
+    """
+    Everything needed to solve the NTC optimization of the time steps
+    """
+
+    def __init__(self, grid: MultiCircuit, options: OptimalNetTransferCapacityOptions, time_indices: IntVec):
+        """
+        Constructor
+        :param grid: MultiCircuit
+        :param options: OptimalNetTransferCapacityOptions
+        :param time_indices: time indices of the driver (the positions refer to these)
+        """
+        self.grid = grid
+        self.options = options
+        self.time_indices = time_indices
+
+    def get_warm_start(self) -> Union[HighsWarmStart, None]:
+        """
+        Get the solver state to be kept between consecutive time steps
+        :return: HighsWarmStart or None if the warm start is disabled
+        """
+        return HighsWarmStart() if self.options.warm_start else None
+
+    def get_linear_multi_contingencies(self) -> Union[LinearMultiContingencies, None]:
+        """
+        Get the contingencies structure to be kept between the time steps (its factors are cached by topology)
+        :return: LinearMultiContingencies or None if the contingencies are not considered
+        """
+        if not self.options.consider_contingencies:
+            return None
+
+        return LinearMultiContingencies(grid=self.grid,
+                                        contingency_groups_used=self.options.opf_options.contingency_groups_used)
+
+    def run(self,
+            position: int,
+            warm_start: Union[HighsWarmStart, None],
+            linear_multi_contingencies: Union[LinearMultiContingencies, None],
+            logger: Logger) -> NtcVars:
+        """
+        Solve the NTC optimization of a time step
+        :param position: time position (in the driver time indices)
+        :param warm_start: HighsWarmStart of the previous time step (None to solve from scratch)
+        :param linear_multi_contingencies: LinearMultiContingencies reused among the time steps
+        :param logger: Logger
+        :return: NtcVars
+        """
+        if self.options.strict_formulation:
+            run_linear_ntc = run_linear_ntc_opf_strict
+        else:
+            run_linear_ntc = run_linear_ntc_opf
+
+        return run_linear_ntc(
+            grid=self.grid,
+            t=self.time_indices[position],  # only one time index at a time
+            solver_type=self.options.opf_options.mip_solver,
+            zonal_grouping=self.options.opf_options.zonal_grouping,
+            skip_generation_limits=self.options.skip_generation_limits,
+            consider_contingencies=self.options.consider_contingencies,
+            contingency_groups_used=self.options.opf_options.contingency_groups_used,
+            lodf_threshold=self.options.lin_options.lodf_threshold,
+            bus_a1_idx=self.options.sending_bus_idx,
+            bus_a2_idx=self.options.receiving_bus_idx,
+            logger=logger,
+            progress_text=None,
+            progress_func=None,
+            export_model_fname=self.options.opf_options.export_model_fname,
+            verbose=self.options.opf_options.verbose,
+            robust=self.options.opf_options.robust,
+            warm_start=warm_start,
+            linear_multi_contingencies=linear_multi_contingencies
+        )
+
+
+def _run_ntc_chunk(process_data: Dict, positions: IntVec) -> Tuple[List[Tuple[int, NtcVars]], Logger]:
+    """
+    Solve a chunk of time positions inside a process of the pool
+    :param process_data: data of the process, with the NtcTimeStepTask as context
+    :param positions: positions in the driver time indices
+    :return: list of (position, NtcVars), Logger
+    """
+    task: NtcTimeStepTask = process_data['context']
+
+    if 'warm_start' not in process_data:
+        # the chunks of a process are solved one after the other, they can share the solver state and the factors
+        process_data['warm_start'] = task.get_warm_start()
+        process_data['mctg'] = task.get_linear_multi_contingencies()
+
+    logger = Logger()
+    solutions = list()
+    for position in positions:
+        ntc_vars = task.run(position=position,
+                            warm_start=process_data['warm_start'],
+                            linear_multi_contingencies=process_data['mctg'],
+                            logger=logger)
+
+        # the LP model stays in the process
+        ntc_vars.model = None
+        solutions.append((position, ntc_vars))
+
+    return solutions, logger
+
+
+def run_ntc_ts_parallel(task: NtcTimeStepTask,
+                        n_workers: int,
+                        store_func: Callable[[int, NtcVars], None],
+                        logger: Logger,
+                        report_progress2: Union[Callable[[int, int], None], None] = None,
+                        is_cancel: Union[Callable[[], bool], None] = None) -> bool:
+    """
+    Solve the NTC time steps in a pool of processes (the time steps are independent)
+    :param task: NtcTimeStepTask
+    :param n_workers: number of processes
+    :param store_func: function storing the solution of a time position in the results
+    :param logger: Logger
+    :param report_progress2: (optional) progress function (current, total)
+    :param is_cancel: (optional) function returning True if the simulation must stop
+    :return: True if completed, False if cancelled
+    """
+    chunks = get_ntc_ts_chunks(nt=len(task.time_indices), n_workers=n_workers)
+
+    def store_chunk(i: int, solutions: List[Tuple[int, NtcVars]]) -> None:
+        """
+        Store the solutions of a chunk
+        :param i: chunk index
+        :param solutions: list of (position, NtcVars)
+        """
+        for position, ntc_vars in solutions:
+            store_func(position, ntc_vars)
+
+    # the solutions are stored in the time order, like in the serial run
+    return run_in_process_pool(func=_run_ntc_chunk,
+                               args_list=[(chunk,) for chunk in chunks],
+                               context=task,
+                               n_workers=n_workers,
+                               store_func=store_chunk,
+                               logger=logger,
+                               ordered=True,
+                               weights=[len(chunk) for chunk in chunks],
+                               report_progress2=report_progress2,
+                               is_cancel=is_cancel)
@@ -37,7 +37,8 @@ from VeraGridEngine.basic_structures import Logger, Vec, IntVec, DateVec, Mat
 from VeraGridEngine.Utils.MIP.selected_interface import LpExp, LpVar, LpModel, lpDot, join
 from VeraGridEngine.enumerations import HvdcControlType, ZonalGrouping, MIPSolvers, TapPhaseControl, ConverterControlType
 from VeraGridEngine.Simulations.LinearFactors.linear_analysis import (LinearAnalysis, LinearMultiContingency,
-                                                                      LinearMultiContingencies)
+                                                                      LinearMultiContingencies,
+                                                                      get_linear_factors_key)
 
 
 def get_contingency_flow_with_filter(multi_contingency: LinearMultiContingency,
@@ -1888,6 +1889,9 @@ def run_linear_opf_ts(grid: MultiCircuit,
     # objective function
     f_obj: Union[LpExp, float] = 0.0
 
+    # contingency structures (computed once, their factors are cached by topology)
+    mctg: Union[LinearMultiContingencies, None] = None
+
     for local_t_idx, global_t_idx in enumerate(time_indices):  # use time_indices = [None] to simulate the snapshot
 
         # time indices:
@@ -2057,18 +2061,27 @@ def run_linear_opf_ts(grid: MultiCircuit,
                     # The contingencies' formulation uses the total nodal injection stored in bus_vars,
                     # hence, this step goes before the add_linear_node_balance function
 
-                    # compute the PTDF and LODF
-                    ls = LinearAnalysis(nc=nc,
-                                        distributed_slack=False,
-                                        correct_values=True)
-
-                    # Compute the more generalistic contingency structures
-                    mctg = LinearMultiContingencies(grid=grid,
-                                                    contingency_groups_used=contingency_groups_used)
-
-                    mctg.compute(lin=ls,
-                                 ptdf_threshold=lodf_threshold,
-                                 lodf_threshold=lodf_threshold)
+                    if mctg is None:
+                        # Compute the more generalistic contingency structures
+                        mctg = LinearMultiContingencies(grid=grid,
+                                                        contingency_groups_used=contingency_groups_used)
+
+                    # the contingency factors are reused among the time steps with the same topology
+                    topology_key = get_linear_factors_key(nc)
+
+                    if not mctg.load_cached(topology_key=topology_key,
+                                            ptdf_threshold=lodf_threshold,
+                                            lodf_threshold=lodf_threshold):
+                        # factorize the grid, only the PTDF and LODF columns of the contingencies are computed
+                        ls = LinearAnalysis(nc=nc,
+                                            distributed_slack=False,
+                                            correct_values=True,
+                                            lazy=True)
+
+                        mctg.compute(lin=ls,
+                                     ptdf_threshold=lodf_threshold,
+                                     lodf_threshold=lodf_threshold,
+                                     topology_key=topology_key)
 
                     # formulate the contingencies
                     f_obj += add_linear_branches_contingencies_formulation(
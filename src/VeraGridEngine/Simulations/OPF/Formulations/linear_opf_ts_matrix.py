@@ -0,0 +1,1817 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+
+"""
+This file implements the DC-OPF for time series of linear_opf_ts with a matrix based model builder:
+The variables are declared in blocks, the constraints are added as sparse triplets,
+and the resulting CSC matrix is handed straight to HiGHS, without any python object per variable.
+The formulation is the same as in linear_opf_ts.
+"""
+from __future__ import annotations
+import os
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Union, Tuple, Callable
+
+from VeraGridEngine.IO.file_system import opf_file_path
+from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Devices.Aggregation.inter_aggregation_info import InterAggregationInfo
+from VeraGridEngine.Devices.Aggregation.contingency_group import ContingencyGroup
+from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at
+from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
+from VeraGridEngine.DataStructures.generator_data import GeneratorData
+from VeraGridEngine.DataStructures.battery_data import BatteryData
+from VeraGridEngine.DataStructures.load_data import LoadData
+from VeraGridEngine.DataStructures.passive_branch_data import PassiveBranchData
+from VeraGridEngine.DataStructures.active_branch_data import ActiveBranchData
+from VeraGridEngine.DataStructures.hvdc_data import HvdcData
+from VeraGridEngine.DataStructures.vsc_data import VscData
+from VeraGridEngine.DataStructures.bus_data import BusData
+from VeraGridEngine.basic_structures import Logger, Vec, IntVec, BoolVec, DateVec, Mat
+from VeraGridEngine.Utils.MIP.matrix_model import (MatrixLpModel, MatrixLpExp, MatrixVarArray, HighsWarmStart,
+                                                   HIGHS_AVAILABLE)
+from VeraGridEngine.enumerations import (HvdcControlType, ZonalGrouping, MIPSolvers, TapPhaseControl,
+                                         ConverterControlType)
+from VeraGridEngine.Simulations.LinearFactors.linear_analysis import (LinearAnalysis, LinearMultiContingencies,
+                                                                      LinearMultiContingency,
+                                                                      get_linear_factors_key)
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import (OpfVars, BusVars, LoadVars, GenerationVars,
+                                                                       BatteryVars, BranchVars, HvdcVars, VscVars,
+                                                                       run_linear_opf_ts)
+
+
+def get_connectivity(bus_idx: IntVec, nbus: int) -> sp.csr_matrix:
+    """
+    Get the element-bus connectivity matrix, the elements without bus are not connected
+    :param bus_idx: bus index of the elements (-1 for no bus)
+    :param nbus: number of buses
+    :return: CSR matrix (n_elm, nbus)
+    """
+    idx = np.where(bus_idx > -1)[0]
+    return sp.csr_matrix((np.ones(len(idx)), (idx, bus_idx[idx])), shape=(len(bus_idx), nbus))
+
+
+def get_nonzero_rows(mat: Union[sp.spmatrix, np.ndarray]) -> IntVec:
+    """
+    Get the rows of a matrix with non-zero values
+    :param mat: sparse or dense matrix
+    :return: row indices
+    """
+    coo = sp.coo_matrix(mat)
+    return np.unique(coo.row[coo.data != 0.0])
+
+
+class MatrixBusVars:
+    """
+    Struct to store the bus related values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixBusVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of buses
+        """
+        self.Va = MatrixVarArray(nt=nt, n=n_elm)
+        self.Vm = MatrixVarArray(nt=nt, n=n_elm, const=1.0)
+
+        # kirchhoff constraint of each bus (-1 if none)
+        self.kirchhoff = np.full((nt, n_elm), -1, dtype=int)
+
+    def get_values(self, model: MatrixLpModel) -> BusVars:
+        """
+        Return the BusVars with the values of the solution
+        :param model: MatrixLpModel
+        :return: BusVars
+        """
+        nt, n_elm = self.kirchhoff.shape
+        data = BusVars(nt=nt, n_elm=n_elm)
+
+        x = model.col_values
+        data.Va = self.Va.get_values(x)
+        data.Vm = self.Vm.get_values(x)
+        data.Pinj = np.zeros((nt, n_elm), dtype=float)
+
+        has_cst = self.kirchhoff > -1
+        data.shadow_prices = np.zeros((nt, n_elm), dtype=float)
+        data.shadow_prices[has_cst] = model.get_dual_values(self.kirchhoff[has_cst])
+
+        return data
+
+
+class MatrixLoadVars:
+    """
+    Struct to store the load related values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixLoadVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of loads
+        """
+        self.shedding = MatrixVarArray(nt=nt, n=n_elm)
+        self.p = MatrixVarArray(nt=nt, n=n_elm)
+        self.shedding_cost = MatrixVarArray(nt=nt, n=n_elm)
+
+    def get_values(self, Sbase: float, x: Vec) -> LoadVars:
+        """
+        Return the LoadVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param x: values of the model columns
+        :return: LoadVars
+        """
+        nt, n_elm = self.p.col.shape
+        data = LoadVars(nt=nt, n_elm=n_elm)
+        data.shedding = self.shedding.get_values(x) * Sbase
+        data.p = self.p.get_values(x) * Sbase
+        data.shedding_cost = self.shedding_cost.get_values(x) * Sbase
+        return data
+
+
+class MatrixGenerationVars:
+    """
+    Struct to store the generation values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixGenerationVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of generators
+        """
+        self.p = MatrixVarArray(nt=nt, n=n_elm)
+        self.shedding = MatrixVarArray(nt=nt, n=n_elm)
+        self.producing = MatrixVarArray(nt=nt, n=n_elm)
+        self.starting_up = MatrixVarArray(nt=nt, n=n_elm)
+        self.shutting_down = MatrixVarArray(nt=nt, n=n_elm)
+        self.invested = MatrixVarArray(nt=nt, n=n_elm)
+
+        # cost = cost_p · p + cost_shedding · shedding + cost_producing · producing
+        #        + cost_starting_up · starting_up + cost_0
+        self.cost_p = np.zeros((nt, n_elm), dtype=float)
+        self.cost_shedding = np.zeros((nt, n_elm), dtype=float)
+        self.cost_producing = np.zeros((nt, n_elm), dtype=float)
+        self.cost_starting_up = np.zeros((nt, n_elm), dtype=float)
+        self.cost_0 = np.zeros((nt, n_elm), dtype=float)
+
+    def add_cost_to_objective(self, t: int, idx: IntVec, model: MatrixLpModel) -> None:
+        """
+        Add the cost of some generators to the objective function
+        :param t: time index
+        :param idx: generator indices
+        :param model: MatrixLpModel
+        """
+        self.p.add_to_objective(t=t, idx=idx, weights=self.cost_p[t, idx], model=model)
+        self.shedding.add_to_objective(t=t, idx=idx, weights=self.cost_shedding[t, idx], model=model)
+        self.producing.add_to_objective(t=t, idx=idx, weights=self.cost_producing[t, idx], model=model)
+        self.starting_up.add_to_objective(t=t, idx=idx, weights=self.cost_starting_up[t, idx], model=model)
+        model.add_offset(float(np.sum(self.cost_0[t, idx])))
+
+    def get_values(self, Sbase: float, x: Vec) -> GenerationVars:
+        """
+        Return the GenerationVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param x: values of the model columns
+        :return: GenerationVars
+        """
+        nt, n_elm = self.p.col.shape
+        data = GenerationVars(nt=nt, n_elm=n_elm)
+
+        p = self.p.get_values(x)
+        shedding = self.shedding.get_values(x)
+        producing = self.producing.get_values(x)
+        starting_up = self.starting_up.get_values(x)
+
+        data.p = p * Sbase
+        data.shedding = shedding * Sbase
+        data.producing = np.round(producing).astype(bool)
+        data.starting_up = np.round(starting_up).astype(bool)
+        data.shutting_down = np.round(self.shutting_down.get_values(x)).astype(bool)
+        data.invested = np.round(self.invested.get_values(x)).astype(bool)
+        data.cost = (self.cost_p * p
+                     + self.cost_shedding * shedding
+                     + self.cost_producing * producing
+                     + self.cost_starting_up * starting_up
+                     + self.cost_0) * Sbase
+        return data
+
+
+class MatrixBatteryVars:
+    """
+    Struct to store the battery values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixBatteryVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of batteries
+        """
+        # p = p_pos - p_neg
+        self.p_pos = MatrixVarArray(nt=nt, n=n_elm)
+        self.p_neg = MatrixVarArray(nt=nt, n=n_elm)
+        self.e = MatrixVarArray(nt=nt, n=n_elm)
+        self.shedding = MatrixVarArray(nt=nt, n=n_elm)
+        self.producing = MatrixVarArray(nt=nt, n=n_elm)
+        self.starting_up = MatrixVarArray(nt=nt, n=n_elm)
+        self.shutting_down = MatrixVarArray(nt=nt, n=n_elm)
+
+    def add_p_to_exp(self, t: int, idx: IntVec, exp: MatrixLpExp, rows: IntVec,
+                     factor: Union[Vec, float] = 1.0) -> None:
+        """
+        Add the power of some batteries to some expressions
+        :param t: time index
+        :param idx: battery indices
+        :param exp: MatrixLpExp
+        :param rows: expression indices matching idx
+        :param factor: factors
+        """
+        factor = np.broadcast_to(np.asarray(factor, dtype=float), len(idx))
+        self.p_pos.add_to_exp(t=t, idx=idx, exp=exp, rows=rows, factor=factor)
+        self.p_neg.add_to_exp(t=t, idx=idx, exp=exp, rows=rows, factor=-factor)
+
+    def get_values(self, Sbase: float, x: Vec) -> BatteryVars:
+        """
+        Return the BatteryVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param x: values of the model columns
+        :return: BatteryVars
+        """
+        nt, n_elm = self.e.col.shape
+        data = BatteryVars(nt=nt, n_elm=n_elm)
+        data.p = (self.p_pos.get_values(x) - self.p_neg.get_values(x)) * Sbase
+        data.e = self.e.get_values(x) * Sbase
+        data.shedding = self.shedding.get_values(x) * Sbase
+        data.producing = np.round(self.producing.get_values(x)).astype(int)
+        data.starting_up = np.round(self.starting_up.get_values(x)).astype(int)
+        data.shutting_down = np.round(self.shutting_down.get_values(x)).astype(int)
+        data.cost = np.zeros((nt, n_elm), dtype=float)
+        data.invested = np.zeros((nt, n_elm), dtype=bool)
+        return data
+
+
+class MatrixBranchVars:
+    """
+    Struct to store the branch related values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixBranchVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of branches
+        """
+        self.flow_slacks_pos = MatrixVarArray(nt=nt, n=n_elm)
+        self.flow_slacks_neg = MatrixVarArray(nt=nt, n=n_elm)
+        self.tap_angles = MatrixVarArray(nt=nt, n=n_elm)
+
+        # the flows are computed from the bus voltages: bk · (V[F] - V[T] + tap angle)
+        self.F = np.zeros(n_elm, dtype=int)
+        self.T = np.zeros(n_elm, dtype=int)
+        self.bk = np.zeros((nt, n_elm), dtype=float)
+        self.dc = np.zeros((nt, n_elm), dtype=bool)
+
+        self.overload_cost = np.zeros((nt, n_elm), dtype=float)
+        self.rates = np.zeros((nt, n_elm), dtype=float)
+
+        # t, m, c, constraint row, positive slack column, negative slack column, flow constant
+        self.contingency_data: List[Tuple[int, IntVec, int, IntVec, IntVec, IntVec, Vec]] = list()
+
+    def get_values(self, Sbase: float, model: MatrixLpModel, Va: Mat, Vm: Mat) -> BranchVars:
+        """
+        Return the BranchVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param model: MatrixLpModel
+        :param Va: bus voltage angles (nt, nbus)
+        :param Vm: bus voltage modules (nt, nbus)
+        :return: BranchVars
+        """
+        nt, n_elm = self.bk.shape
+        data = BranchVars(nt=nt, n_elm=n_elm)
+        data.rates = self.rates
+
+        x = model.col_values
+        tap_angles = self.tap_angles.get_values(x)
+        ac_flows = self.bk * (Va[:, self.F] - Va[:, self.T] + tap_angles)
+        dc_flows = self.bk * (Vm[:, self.F] - Vm[:, self.T])
+        flows = np.where(self.dc, dc_flows, ac_flows)
+
+        data.flows = flows * Sbase
+        data.flow_slacks_pos = self.flow_slacks_pos.get_values(x) * Sbase
+        data.flow_slacks_neg = self.flow_slacks_neg.get_values(x) * Sbase
+        data.tap_angles = tap_angles
+        data.overload_cost = self.overload_cost * (data.flow_slacks_pos + data.flow_slacks_neg)
+        data.loading = data.flows / (data.rates + 1e-20)
+
+        for t, m, c, rows, pos_slack, neg_slack, const in self.contingency_data:
+            pos_val = model.get_values(pos_slack)
+            neg_val = model.get_values(neg_slack)
+            flow_val = model.get_row_values(rows) + const - pos_val + neg_val
+            for i in range(len(m)):
+                data.contingency_flow_data.append((t, m[i], c, flow_val[i], neg_val[i], pos_val[i]))
+
+        return data
+
+
+class MatrixHvdcVars:
+    """
+    Struct to store the HVDC related values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixHvdcVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of HVDC lines
+        """
+        # flow = set point or variable + angle_droop · (Va[F] - Va[T])
+        self.flows = MatrixVarArray(nt=nt, n=n_elm)
+        self.F = np.zeros(n_elm, dtype=int)
+        self.T = np.zeros(n_elm, dtype=int)
+        self.angle_droop = np.zeros((nt, n_elm), dtype=float)
+
+        self.rates = np.zeros((nt, n_elm), dtype=float)
+
+    def get_values(self, Sbase: float, x: Vec, Va: Mat) -> HvdcVars:
+        """
+        Return the HvdcVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param x: values of the model columns
+        :param Va: bus voltage angles (nt, nbus)
+        :return: HvdcVars
+        """
+        nt, n_elm = self.rates.shape
+        data = HvdcVars(nt=nt, n_elm=n_elm)
+        data.rates = self.rates
+        flows = self.flows.get_values(x) + self.angle_droop * (Va[:, self.F] - Va[:, self.T])
+        data.flows = flows * Sbase
+        data.loading = data.flows / (data.rates + 1e-20)
+        return data
+
+
+class MatrixVscVars:
+    """
+    Struct to store the VSC related values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, n_elm: int):
+        """
+        MatrixVscVars structure
+        :param nt: Number of time steps
+        :param n_elm: Number of converters
+        """
+        self.flows = MatrixVarArray(nt=nt, n=n_elm)
+        self.F = np.zeros(n_elm, dtype=int)
+        self.T = np.zeros(n_elm, dtype=int)
+        self.rates = np.zeros((nt, n_elm), dtype=float)
+
+    def get_values(self, Sbase: float, x: Vec) -> VscVars:
+        """
+        Return the VscVars with the values of the solution
+        :param Sbase: Base power (100 MVA)
+        :param x: values of the model columns
+        :return: VscVars
+        """
+        nt, n_elm = self.rates.shape
+        data = VscVars(nt=nt, n_elm=n_elm)
+        data.rates = self.rates
+        data.flows = self.flows.get_values(x) * Sbase
+        data.loading = data.flows / (data.rates + 1e-20)
+        return data
+
+
+class MatrixOpfVars:
+    """
+    Structure to host the opf values of the matrix formulation
+    """
+
+    def __init__(self, nt: int, nbus: int, ng: int, nb: int, nl: int, nbr: int, n_hvdc: int, n_vsc: int,
+                 n_fluid_node: int, n_fluid_path: int, n_fluid_inj: int):
+        """
+        Constructor
+        :param nt: number of time steps
+        :param nbus: number of nodes
+        :param ng: number of generators
+        :param nb: number of batteries
+        :param nl: number of loads
+        :param nbr: number of branches
+        :param n_hvdc: number of HVDC
+        :param n_vsc: number of VSC
+        :param n_fluid_node: number of fluid nodes
+        :param n_fluid_path: number of fluid paths
+        :param n_fluid_inj: number of fluid injections
+        """
+        self.nt = nt
+        self.nbus = nbus
+        self.ng = ng
+        self.nb = nb
+        self.nl = nl
+        self.nbr = nbr
+        self.n_hvdc = n_hvdc
+        self.n_vsc = n_vsc
+        self.n_fluid_node = n_fluid_node
+        self.n_fluid_path = n_fluid_path
+        self.n_fluid_inj = n_fluid_inj
+
+        self.acceptable_solution = False
+
+        self.bus_vars = MatrixBusVars(nt=nt, n_elm=nbus)
+        self.load_vars = MatrixLoadVars(nt=nt, n_elm=nl)
+        self.gen_vars = MatrixGenerationVars(nt=nt, n_elm=ng)
+        self.batt_vars = MatrixBatteryVars(nt=nt, n_elm=nb)
+        self.branch_vars = MatrixBranchVars(nt=nt, n_elm=nbr)
+        self.hvdc_vars = MatrixHvdcVars(nt=nt, n_elm=n_hvdc)
+        self.vsc_vars = MatrixVscVars(nt=nt, n_elm=n_vsc)
+
+        # element-bus connectivity to compute the nodal balance
+        self.C_load = sp.csr_matrix((nl, nbus))
+        self.C_gen = sp.csr_matrix((ng, nbus))
+        self.C_batt = sp.csr_matrix((nb, nbus))
+
+    def get_values(self, Sbase: float, model: MatrixLpModel,
+                   gen_emissions_rates_matrix: sp.csc_matrix,
+                   gen_fuel_rates_matrix: sp.csc_matrix,
+                   gen_tech_shares_matrix: sp.csc_matrix,
+                   batt_tech_shares_matrix: sp.csc_matrix) -> OpfVars:
+        """
+        Return the OpfVars with the values of the solution
+        :return: OpfVars instance
+        """
+        data = OpfVars(nt=self.nt,
+                       nbus=self.nbus,
+                       ng=self.ng,
+                       nb=self.nb,
+                       nl=self.nl,
+                       nbr=self.nbr,
+                       n_hvdc=self.n_hvdc,
+                       n_vsc=self.n_vsc,
+                       n_fluid_node=self.n_fluid_node,
+                       n_fluid_path=self.n_fluid_path,
+                       n_fluid_inj=self.n_fluid_inj,
+                       n_cap_buses=0)
+
+        x = model.col_values
+        data.bus_vars = self.bus_vars.get_values(model=model)
+        data.nodal_capacity_vars.P = np.zeros((self.nt, 0), dtype=float)
+        data.load_vars = self.load_vars.get_values(Sbase=Sbase, x=x)
+        data.gen_vars = self.gen_vars.get_values(Sbase=Sbase, x=x)
+        data.batt_vars = self.batt_vars.get_values(Sbase=Sbase, x=x)
+        data.branch_vars = self.branch_vars.get_values(Sbase=Sbase, model=model,
+                                                       Va=data.bus_vars.Va, Vm=data.bus_vars.Vm)
+        data.hvdc_vars = self.hvdc_vars.get_values(Sbase=Sbase, x=x, Va=data.bus_vars.Va)
+        data.vsc_vars = self.vsc_vars.get_values(Sbase=Sbase, x=x)
+
+        # nodal generation (p.u.) and power balance (MW)
+        bv = self.branch_vars
+        hv = self.hvdc_vars
+        vv = self.vsc_vars
+        Pgen = data.gen_vars.p @ self.C_gen + data.batt_vars.p @ self.C_batt
+        Pbalance = Pgen - data.load_vars.p @ self.C_load
+        for F, T, flows in ((bv.F, bv.T, data.branch_vars.flows),
+                            (hv.F, hv.T, data.hvdc_vars.flows),
+                            (vv.F, vv.T, data.vsc_vars.flows)):
+            for t in range(self.nt):
+                np.add.at(Pbalance[t, :], F, -flows[t, :])
+                np.add.at(Pbalance[t, :], T, flows[t, :])
+        data.bus_vars.Pgen = Pgen / Sbase
+        data.bus_vars.Pbalance = Pbalance
+
+        data.fluid_node_vars.p2x_flow = np.zeros((self.nt, self.n_fluid_node), dtype=float)
+        data.fluid_node_vars.current_level = np.zeros((self.nt, self.n_fluid_node), dtype=float)
+        data.fluid_node_vars.spillage = np.zeros((self.nt, self.n_fluid_node), dtype=float)
+        data.fluid_node_vars.flow_in = np.zeros((self.nt, self.n_fluid_node), dtype=float)
+        data.fluid_node_vars.flow_out = np.zeros((self.nt, self.n_fluid_node), dtype=float)
+        data.fluid_path_vars.flow = np.zeros((self.nt, self.n_fluid_path), dtype=float)
+        data.fluid_inject_vars.flow = np.zeros((self.nt, self.n_fluid_inj), dtype=float)
+
+        data.sys_vars = data.sys_vars.compute(gen_emissions_rates_matrix=gen_emissions_rates_matrix,
+                                              gen_fuel_rates_matrix=gen_fuel_rates_matrix,
+                                              gen_tech_shares_matrix=gen_tech_shares_matrix,
+                                              batt_tech_shares_matrix=batt_tech_shares_matrix,
+                                              gen_p=data.gen_vars.p,
+                                              batt_p=data.batt_vars.p,
+                                              gen_cost=data.gen_vars.cost,
+                                              shedding_cost=data.load_vars.shedding_cost)
+
+        data.acceptable_solution = self.acceptable_solution
+
+        return data
+
+
+def get_dt(time_array: DateVec, t: int) -> float:
+    """
+    Get the time increment in hours from the previous time step (as the scalar formulation does)
+    :param time_array: complete time array
+    :param t: time step
+    :return: time increment in hours
+    """
+    if time_array is not None and len(time_array) > 1:
+        return (time_array[t] - time_array[t - 1]).seconds / 3600.0
+    else:
+        return 1.0
+
+
+def add_matrix_bus_formulation(t: int,
+                               bus_data_t: BusData,
+                               dc_slack: BoolVec,
+                               bus_vars: MatrixBusVars,
+                               model: MatrixLpModel) -> None:
+    """
+    Declare the bus voltage variables: angles for the AC buses and modules for the DC buses
+    :param t: time index
+    :param bus_data_t: BusData
+    :param dc_slack: DC buses whose voltage is set by a converter (Vm = 1)
+    :param bus_vars: MatrixBusVars
+    :param model: MatrixLpModel
+    """
+    is_dc = bus_data_t.is_dc.astype(bool)
+    cols = model.add_vars(n=bus_data_t.nbus,
+                          lb=np.where(is_dc, bus_data_t.Vmin, bus_data_t.angle_min),
+                          ub=np.where(is_dc, bus_data_t.Vmax, bus_data_t.angle_max))
+
+    ac = np.where(~is_dc)[0]
+    dc = np.where(is_dc & ~dc_slack)[0]
+    bus_vars.Va.set(t=t, idx=ac, cols=cols[ac])
+    bus_vars.Vm.set(t=t, idx=dc, cols=cols[dc])
+
+
+def add_matrix_load_formulation(t: int,
+                                Sbase: float,
+                                load_data_t: LoadData,
+                                load_vars: MatrixLoadVars,
+                                balance: MatrixLpExp,
+                                model: MatrixLpModel) -> None:
+    """
+    Add the loads with their shedding
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param load_data_t: LoadData
+    :param load_vars: MatrixLoadVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    """
+    bus_idx = load_data_t.bus_idx
+    p_set = load_data_t.S.real / Sbase
+    active = load_data_t.active.astype(bool) & (bus_idx > -1)
+
+    shed = np.where(active & (p_set > 0.0))[0]
+    fixed = np.where(active & (p_set <= 0.0))[0]
+
+    cols = model.add_vars(n=len(shed), lb=0.0, ub=p_set[shed], cost=load_data_t.cost[shed])
+
+    load_vars.shedding.set(t=t, idx=shed, cols=cols)
+    load_vars.shedding_cost.set(t=t, idx=shed, cols=cols, coef=load_data_t.cost[shed])
+    load_vars.p.set(t=t, idx=shed, cols=cols, coef=-1.0, const=p_set[shed])
+    load_vars.p.set(t=t, idx=fixed, const=p_set[fixed])
+
+    idx = np.where(active)[0]
+    load_vars.p.add_to_exp(t=t, idx=idx, exp=balance, rows=bus_idx[idx], factor=-1.0)
+
+
+def add_status_formulation(t: int,
+                           idx: IntVec,
+                           p_exp: MatrixLpExp,
+                           pmin: Vec,
+                           pmax: Vec,
+                           producing: MatrixVarArray,
+                           starting_up: MatrixVarArray,
+                           shutting_down: MatrixVarArray,
+                           skip_generation_limits: bool,
+                           model: MatrixLpModel) -> IntVec:
+    """
+    Add the unit commitment variables and constraints of some devices
+    :param t: time index
+    :param idx: device indices
+    :param p_exp: power expressions of the devices (len(idx))
+    :param pmin: minimum power of the devices (p.u.)
+    :param pmax: maximum power of the devices (p.u.)
+    :param producing: MatrixVarArray
+    :param starting_up: MatrixVarArray
+    :param shutting_down: MatrixVarArray
+    :param skip_generation_limits: skip the generation limits?
+    :param model: MatrixLpModel
+    :return: producing columns
+    """
+    n = len(idx)
+    rows = np.arange(n)
+
+    prod = model.add_vars(n=n, lb=0, ub=1, is_int=True)
+    su = model.add_vars(n=n, lb=0, ub=1, is_int=True)
+    sd = model.add_vars(n=n, lb=0, ub=1, is_int=True)
+    producing.set(t=t, idx=idx, cols=prod)
+    starting_up.set(t=t, idx=idx, cols=su)
+    shutting_down.set(t=t, idx=idx, cols=sd)
+
+    if not skip_generation_limits:
+        # pmin · producing <= p <= pmax · producing
+        for limit, lb, ub in ((pmin, 0.0, 1e20), (pmax, -1e20, 0.0)):
+            exp = MatrixLpExp(n)
+            exp.add_exp(p_exp, rows=rows)
+            exp.add_terms(rows=rows, cols=prod, vals=-limit)
+            model.add_exp_csts(exp, lb=lb, ub=ub)
+
+    # starting_up - shutting_down == producing(t) - producing(t-1)
+    exp = MatrixLpExp(n)
+    exp.add_terms(rows=rows, cols=su, vals=1.0)
+    exp.add_terms(rows=rows, cols=sd, vals=-1.0)
+    exp.add_terms(rows=rows, cols=prod, vals=-1.0)
+    if t == 0:
+        # the devices were active before
+        exp.add_const(rows=rows, vals=1.0)
+    else:
+        producing.add_to_exp(t=t - 1, idx=idx, exp=exp, rows=rows, factor=1.0)
+    model.add_exp_csts(exp, lb=0.0, ub=0.0)
+
+    # starting_up + shutting_down <= 1
+    model.add_csts(n=n, rows=np.r_[rows, rows], cols=np.r_[su, sd], vals=1.0, lb=-1e20, ub=1.0)
+
+    return prod
+
+
+def add_matrix_generation_formulation(t: int,
+                                      Sbase: float,
+                                      time_array: DateVec,
+                                      gen_data_t: GeneratorData,
+                                      gen_vars: MatrixGenerationVars,
+                                      balance: MatrixLpExp,
+                                      model: MatrixLpModel,
+                                      unit_commitment: bool,
+                                      ramp_constraints: bool,
+                                      skip_generation_limits: bool,
+                                      all_generators_fixed: bool,
+                                      use_glsk_as_cost: bool) -> None:
+    """
+    Add the generation formulation
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param time_array: complete time array
+    :param gen_data_t: GeneratorData
+    :param gen_vars: MatrixGenerationVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :param unit_commitment: formulate unit commitment?
+    :param ramp_constraints: formulate ramp constraints?
+    :param skip_generation_limits: skip the generation limits?
+    :param all_generators_fixed: All generators take their snapshot or profile values
+                                 instead of resorting to dispatchable status
+    :param use_glsk_as_cost: if true, the GLSK values are used instead of the traditional costs
+    """
+    bus_idx = gen_data_t.bus_idx
+    active = gen_data_t.active.astype(bool) & (bus_idx > -1)
+    if all_generators_fixed:
+        dispatchable = np.zeros(gen_data_t.nelm, dtype=bool)
+    else:
+        dispatchable = active & gen_data_t.dispatchable.astype(bool)
+
+    if use_glsk_as_cost:
+        cost_1 = gen_data_t.shift_key
+        cost_0 = np.zeros(gen_data_t.nelm)
+    else:
+        cost_1 = gen_data_t.cost_1
+        cost_0 = gen_data_t.cost_0
+
+    pmin = gen_data_t.pmin / Sbase
+    pmax = gen_data_t.pmax / Sbase
+
+    # dispatchable generators ------------------------------------------------------------------------------------------
+    d = np.where(dispatchable)[0]
+    nd = len(d)
+
+    if unit_commitment:
+        p_cols = model.add_vars(n=nd, lb=-1e20, ub=1e20)
+        gen_vars.p.set(t=t, idx=d, cols=p_cols)
+
+        p_exp = MatrixLpExp(nd)
+        p_exp.add_terms(rows=np.arange(nd), cols=p_cols, vals=1.0)
+        add_status_formulation(t=t, idx=d, p_exp=p_exp, pmin=pmin[d], pmax=pmax[d],
+                               producing=gen_vars.producing,
+                               starting_up=gen_vars.starting_up,
+                               shutting_down=gen_vars.shutting_down,
+                               skip_generation_limits=skip_generation_limits,
+                               model=model)
+
+        gen_vars.cost_producing[t, d] = cost_0[d]
+        gen_vars.cost_starting_up[t, d] = gen_data_t.startup_cost[d]
+    else:
+        if skip_generation_limits:
+            p_cols = model.add_vars(n=nd, lb=-1e20, ub=1e20)
+        else:
+            p_cols = model.add_vars(n=nd, lb=pmin[d], ub=pmax[d])
+        gen_vars.p.set(t=t, idx=d, cols=p_cols)
+        gen_vars.cost_0[t, d] = cost_0[d]
+
+    gen_vars.cost_p[t, d] = cost_1[d]
+    gen_vars.invested.set(t=t, idx=d, const=1.0)
+
+    if ramp_constraints and t > 0:
+        r = d[(gen_data_t.ramp_up[d] < gen_data_t.pmax[d]) & (gen_data_t.ramp_down[d] < gen_data_t.pmax[d])]
+        if len(r):
+            # - ramp_down · dt <= P(t) - P(t-1) <= ramp_up · dt
+            dt = get_dt(time_array=time_array, t=t)
+            rows = np.arange(len(r))
+            exp = MatrixLpExp(len(r))
+            gen_vars.p.add_to_exp(t=t, idx=r, exp=exp, rows=rows, factor=1.0)
+            gen_vars.p.add_to_exp(t=t - 1, idx=r, exp=exp, rows=rows, factor=-1.0)
+            model.add_exp_csts(exp,
+                               lb=-gen_data_t.ramp_down[r] / Sbase * dt,
+                               ub=gen_data_t.ramp_up[r] / Sbase * dt)
+
+    # non-dispatchable generators: their power may only be shed ---------------------------------------------------------
+    nd_idx = np.where(active & ~dispatchable)[0]
+    p = gen_data_t.p[nd_idx] / Sbase
+    pos = nd_idx[p > 0]
+    neg = nd_idx[p < 0]
+
+    pos_cols = model.add_vars(n=len(pos), lb=0.0, ub=gen_data_t.p[pos] / Sbase)
+    neg_cols = model.add_vars(n=len(neg), lb=0.0, ub=-gen_data_t.p[neg] / Sbase)
+    gen_vars.shedding.set(t=t, idx=pos, cols=pos_cols)
+    gen_vars.shedding.set(t=t, idx=neg, cols=neg_cols)
+    gen_vars.p.set(t=t, idx=nd_idx, const=p)
+    gen_vars.p.set(t=t, idx=pos, cols=pos_cols, coef=-1.0, const=gen_data_t.p[pos] / Sbase)
+    gen_vars.p.set(t=t, idx=neg, cols=neg_cols, coef=1.0, const=gen_data_t.p[neg] / Sbase)
+
+    gen_vars.producing.set(t=t, idx=nd_idx, const=1.0)
+    gen_vars.cost_shedding[t, nd_idx] = cost_1[nd_idx]
+    gen_vars.cost_p[t, nd_idx] = cost_1[nd_idx]
+    gen_vars.cost_0[t, nd_idx] = cost_0[nd_idx]
+
+    # objective and balance ---------------------------------------------------------------------------------------------
+    a = np.where(active)[0]
+    gen_vars.add_cost_to_objective(t=t, idx=a, model=model)
+    gen_vars.p.add_to_exp(t=t, idx=a, exp=balance, rows=bus_idx[a], factor=1.0)
+
+
+def add_matrix_battery_formulation(t: int,
+                                   Sbase: float,
+                                   time_array: DateVec,
+                                   batt_data_t: BatteryData,
+                                   batt_vars: MatrixBatteryVars,
+                                   balance: MatrixLpExp,
+                                   model: MatrixLpModel,
+                                   unit_commitment: bool,
+                                   ramp_constraints: bool,
+                                   skip_generation_limits: bool,
+                                   energy_0: Vec) -> None:
+    """
+    Add the batteries formulation
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param time_array: complete time array
+    :param batt_data_t: BatteryData
+    :param batt_vars: MatrixBatteryVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :param unit_commitment: formulate unit commitment?
+    :param ramp_constraints: formulate ramp constraints?
+    :param skip_generation_limits: skip the generation limits?
+    :param energy_0: initial value of the energy stored (MWh)
+    """
+    bus_idx = batt_data_t.bus_idx
+    active = batt_data_t.active.astype(bool) & (bus_idx > -1)
+    dispatchable = active & batt_data_t.dispatchable.astype(bool)
+
+    a = np.where(active)[0]
+    pos_cols = np.full(batt_data_t.nelm, -1, dtype=int)
+    neg_cols = np.full(batt_data_t.nelm, -1, dtype=int)
+    pos_cols[a] = model.add_vars(n=len(a), lb=0.0, ub=1e20, cost=batt_data_t.cost_1[a])
+    neg_cols[a] = model.add_vars(n=len(a), lb=0.0, ub=1e20)
+    batt_vars.p_pos.set(t=t, idx=a, cols=pos_cols[a])
+    batt_vars.p_neg.set(t=t, idx=a, cols=neg_cols[a])
+
+    # dispatchable batteries -------------------------------------------------------------------------------------------
+    d = np.where(dispatchable)[0]
+    nd = len(d)
+    rows = np.arange(nd)
+
+    if unit_commitment:
+        p_exp = MatrixLpExp(nd)
+        batt_vars.add_p_to_exp(t=t, idx=d, exp=p_exp, rows=rows)
+        prod = add_status_formulation(t=t, idx=d, p_exp=p_exp,
+                                      pmin=batt_data_t.pmin[d] / Sbase,
+                                      pmax=batt_data_t.pmax[d] / Sbase,
+                                      producing=batt_vars.producing,
+                                      starting_up=batt_vars.starting_up,
+                                      shutting_down=batt_vars.shutting_down,
+                                      skip_generation_limits=skip_generation_limits,
+                                      model=model)
+        model.add_cost(prod, batt_data_t.cost_0[d])
+        model.add_cost(batt_vars.starting_up.col[t, d], batt_data_t.startup_cost[d])
+    else:
+        model.add_offset(float(np.sum(batt_data_t.cost_0[d])))
+        if not skip_generation_limits:
+            model.set_var_bounds(pos_cols[d], lb=0.0, ub=batt_data_t.pmax[d] / Sbase)
+            model.set_var_bounds(neg_cols[d], lb=0.0, ub=-batt_data_t.pmin[d] / Sbase)
+
+    if nd > 0:
+        dt = get_dt(time_array=time_array, t=t)
+
+        if ramp_constraints and t > 0:
+            r = d[(batt_data_t.ramp_up[d] < batt_data_t.pmax[d]) & (batt_data_t.ramp_down[d] < batt_data_t.pmax[d])]
+            if len(r):
+                # - ramp_down · dt <= P(t) - P(t-1) <= ramp_up · dt
+                r_rows = np.arange(len(r))
+                exp = MatrixLpExp(len(r))
+                batt_vars.add_p_to_exp(t=t, idx=r, exp=exp, rows=r_rows, factor=1.0)
+                batt_vars.add_p_to_exp(t=t - 1, idx=r, exp=exp, rows=r_rows, factor=-1.0)
+                model.add_exp_csts(exp,
+                                   lb=-batt_data_t.ramp_down[r] / Sbase * dt,
+                                   ub=batt_data_t.ramp_up[r] / Sbase * dt)
+
+        if t > 0:
+            # energy decreases / increases with power · dt
+            e_cols = model.add_vars(n=nd, lb=batt_data_t.e_min[d] / Sbase, ub=batt_data_t.e_max[d] / Sbase)
+            batt_vars.e.set(t=t, idx=d, cols=e_cols)
+
+            exp = MatrixLpExp(nd)
+            exp.add_terms(rows=rows, cols=e_cols, vals=1.0)
+            batt_vars.e.add_to_exp(t=t - 1, idx=d, exp=exp, rows=rows, factor=-1.0)
+            exp.add_terms(rows=rows, cols=pos_cols[d], vals=-dt * batt_data_t.discharge_efficiency[d])
+            exp.add_terms(rows=rows, cols=neg_cols[d], vals=dt * batt_data_t.charge_efficiency[d])
+            model.add_exp_csts(exp, lb=0.0, ub=0.0)
+        else:
+            # set the initial energy value
+            batt_vars.e.set(t=t, idx=d, const=energy_0[d] / Sbase)
+
+    # non-dispatchable batteries: their power may only be shed ---------------------------------------------------------
+    nd_idx = np.where(active & ~dispatchable)[0]
+    model.add_offset(float(np.sum(batt_data_t.cost_0[nd_idx])))
+    batt_vars.producing.set(t=t, idx=nd_idx, const=1.0)
+
+    p = batt_data_t.p[nd_idx] / Sbase
+    for sel, sign in ((nd_idx[p > 0], 1.0), (nd_idx[p < 0], -1.0)):
+        # p_pos - p_neg == p -/+ shedding
+        p_sel = batt_data_t.p[sel] / Sbase
+        shed = model.add_vars(n=len(sel), lb=0.0, ub=sign * p_sel, cost=batt_data_t.cost_1[sel])
+        batt_vars.shedding.set(t=t, idx=sel, cols=shed)
+        n = len(sel)
+        sel_rows = np.arange(n)
+        model.add_csts(n=n,
+                       rows=np.r_[sel_rows, sel_rows, sel_rows],
+                       cols=np.r_[pos_cols[sel], neg_cols[sel], shed],
+                       vals=np.r_[np.ones(n), -np.ones(n), np.full(n, sign)],
+                       lb=p_sel, ub=p_sel)
+
+    # balance ----------------------------------------------------------------------------------------------------------
+    batt_vars.add_p_to_exp(t=t, idx=a, exp=balance, rows=bus_idx[a], factor=1.0)
+
+
+def add_matrix_branches_formulation(t: int,
+                                    Sbase: float,
+                                    branch_data_t: PassiveBranchData,
+                                    ctrl_branch_data_t: ActiveBranchData,
+                                    branch_vars: MatrixBranchVars,
+                                    bus_vars: MatrixBusVars,
+                                    balance: MatrixLpExp,
+                                    model: MatrixLpModel,
+                                    inf: float = 1e20) -> MatrixLpExp:
+    """
+    Formulate the branches
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param branch_data_t: PassiveBranchData
+    :param ctrl_branch_data_t: ActiveBranchData
+    :param branch_vars: MatrixBranchVars
+    :param bus_vars: MatrixBusVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :param inf: number considered infinite
+    :return: branch flow expressions
+    """
+    nbr = branch_data_t.nelm
+    F = branch_data_t.F
+    T = branch_data_t.T
+    active = branch_data_t.active.astype(bool)
+    is_dc = active & branch_data_t.dc.astype(bool)
+    is_ac = active & ~is_dc
+
+    branch_vars.F = F
+    branch_vars.T = T
+    branch_vars.rates[t, :] = branch_data_t.rates
+
+    # DC branches use the resistance and the AC branches the reactance
+    with np.errstate(divide='ignore'):
+        bk_dc = np.where(branch_data_t.R == 0.0, 1e-20, 1.0 / branch_data_t.R)
+        bk_ac = np.where(branch_data_t.X == 0.0, 1e-20, 1.0 / branch_data_t.X)
+    bk = np.where(is_dc, bk_dc, np.where(is_ac, bk_ac, 0.0))
+    branch_vars.bk[t, :] = bk
+    branch_vars.dc[t, :] = is_dc
+
+    flows = MatrixLpExp(nbr)
+
+    ac = np.where(is_ac)[0]
+    bus_vars.Va.add_to_exp(t=t, idx=F[ac], exp=flows, rows=ac, factor=bk[ac])
+    bus_vars.Va.add_to_exp(t=t, idx=T[ac], exp=flows, rows=ac, factor=-bk[ac])
+
+    # phase shifters
+    ps = ac[ctrl_branch_data_t.tap_phase_control_mode[ac] == TapPhaseControl.Pf]
+    tap_cols = model.add_vars(n=len(ps),
+                              lb=ctrl_branch_data_t.tap_angle_min[ps],
+                              ub=ctrl_branch_data_t.tap_angle_max[ps])
+    branch_vars.tap_angles.set(t=t, idx=ps, cols=tap_cols)
+    flows.add_terms(rows=ps, cols=tap_cols, vals=bk[ps])
+
+    dc = np.where(is_dc)[0]
+    bus_vars.Vm.add_to_exp(t=t, idx=F[dc], exp=flows, rows=dc, factor=bk[dc])
+    bus_vars.Vm.add_to_exp(t=t, idx=T[dc], exp=flows, rows=dc, factor=-bk[dc])
+
+    # power injected and subtracted due to the flows
+    balance.add_exp(flows, rows=F, factor=-1.0)
+    balance.add_exp(flows, rows=T, factor=1.0)
+
+    # add the flow constraint if monitored
+    mon = np.where(active & branch_data_t.monitor_loading.astype(bool))[0]
+    n_mon = len(mon)
+    if n_mon > 0:
+        overload_cost = branch_data_t.overload_cost[mon]
+        pos_cols = model.add_vars(n=n_mon, lb=0.0, ub=inf, cost=overload_cost)
+        neg_cols = model.add_vars(n=n_mon, lb=0.0, ub=inf, cost=overload_cost)
+        branch_vars.flow_slacks_pos.set(t=t, idx=mon, cols=pos_cols)
+        branch_vars.flow_slacks_neg.set(t=t, idx=mon, cols=neg_cols)
+        branch_vars.overload_cost[t, mon] = overload_cost
+
+        # -rate <= flow + slack_pos - slack_neg <= rate
+        A = flows.get_matrix(n_cols=model.n_cols)[mon, :].tocoo()
+        rows = np.arange(n_mon)
+        rate = branch_data_t.rates[mon] / Sbase
+        const = flows.const[mon]
+        model.add_csts(n=n_mon,
+                       rows=np.r_[A.row, rows, rows],
+                       cols=np.r_[A.col, pos_cols, neg_cols],
+                       vals=np.r_[A.data, np.ones(n_mon), -np.ones(n_mon)],
+                       lb=-rate - const,
+                       ub=rate - const)
+
+    return flows
+
+
+def get_contingency_monitored_mask(contingency: LinearMultiContingency, n_br: int) -> BoolVec:
+    """
+    Get the monitored branches whose flow changes with a contingency
+    :param contingency: LinearMultiContingency
+    :param n_br: number of branches
+    :return: boolean array (n_br)
+    """
+    mask = np.zeros(n_br, dtype=bool)
+
+    for idx, factors in ((contingency.branch_indices, contingency.mlodf_factors),
+                         (contingency.hvdc_indices, contingency.hvdc_odf),
+                         (contingency.vsc_indices, contingency.vsc_odf)):
+        if len(idx) > 0:
+            mask[get_nonzero_rows(factors)] = True
+
+    if len(contingency.bus_indices) > 0:
+        mask[get_nonzero_rows(contingency.compensated_ptdf_factors)] = True
+
+    return mask
+
+
+def add_matrix_contingency_flow_limits(t: int,
+                                       c: int,
+                                       m: IntVec,
+                                       contingency: LinearMultiContingency,
+                                       rates: Vec,
+                                       Pf: sp.csr_matrix,
+                                       P_hvdc: sp.csr_matrix,
+                                       P_vsc: sp.csr_matrix,
+                                       branch_flows: MatrixLpExp,
+                                       hvdc_flows: MatrixLpExp,
+                                       vsc_flows: MatrixLpExp,
+                                       branch_vars: MatrixBranchVars,
+                                       model: MatrixLpModel) -> None:
+    """
+    Formulate the flow limits of some monitored branches after a contingency
+    :param t: time index
+    :param c: contingency index
+    :param m: monitored branch indices
+    :param contingency: LinearMultiContingency
+    :param rates: branch rates in p.u. (nbr)
+    :param Pf: matrix of the branch flow expressions
+    :param P_hvdc: matrix of the HVDC flow expressions
+    :param P_vsc: matrix of the VSC flow expressions
+    :param branch_flows: branch flow expressions
+    :param hvdc_flows: HVDC flow expressions
+    :param vsc_flows: VSC flow expressions
+    :param branch_vars: MatrixBranchVars
+    :param model: MatrixLpModel
+    """
+    # contingency flow = base flow + factors x flow of the failed elements
+    A = Pf[m, :]
+    const = branch_flows.const[m].copy()
+    for idx, factors, P, exp in ((contingency.branch_indices, contingency.mlodf_factors, Pf, branch_flows),
+                                 (contingency.hvdc_indices, contingency.hvdc_odf, P_hvdc, hvdc_flows),
+                                 (contingency.vsc_indices, contingency.vsc_odf, P_vsc, vsc_flows)):
+        if len(idx) > 0:
+            factors_m = sp.csr_matrix(factors)[m, :]
+            A = A + factors_m @ P[idx, :]
+            const += factors_m @ exp.const[idx]
+
+    A = A.tocsr()
+    has_terms = np.diff(A.indptr) > 0
+    m = m[has_terms]
+    A = A[has_terms, :].tocoo()
+    const = const[has_terms]
+    n = len(m)
+
+    if n == 0:
+        return
+
+    pos_slack = model.add_vars(n=n, lb=0.0, ub=1e20, cost=1.0)
+    neg_slack = model.add_vars(n=n, lb=0.0, ub=1e20, cost=1.0)
+
+    # -rate <= contingency flow + slack_pos - slack_neg <= rate
+    rows = np.arange(n)
+    rate = rates[m]
+    cst_rows = model.add_csts(n=n,
+                              rows=np.r_[A.row, rows, rows],
+                              cols=np.r_[A.col, pos_slack, neg_slack],
+                              vals=np.r_[A.data, np.ones(n), -np.ones(n)],
+                              lb=-rate - const,
+                              ub=rate - const)
+
+    branch_vars.contingency_data.append((t, m, c, cst_rows, pos_slack, neg_slack, const))
+
+
+def add_matrix_branches_contingencies_formulation(t: int,
+                                                  Sbase: float,
+                                                  branch_data_t: PassiveBranchData,
+                                                  branch_flows: MatrixLpExp,
+                                                  hvdc_flows: MatrixLpExp,
+                                                  vsc_flows: MatrixLpExp,
+                                                  branch_vars: MatrixBranchVars,
+                                                  model: MatrixLpModel,
+                                                  linear_multi_contingencies: LinearMultiContingencies) -> None:
+    """
+    Formulate the branch flows limits after the contingencies
+    Note: the injection increments of the contingencies are not formulated (as in the scalar formulation)
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param branch_data_t: PassiveBranchData
+    :param branch_flows: branch flow expressions
+    :param hvdc_flows: HVDC flow expressions
+    :param vsc_flows: VSC flow expressions
+    :param branch_vars: MatrixBranchVars
+    :param model: MatrixLpModel
+    :param linear_multi_contingencies: LinearMultiContingencies
+    """
+    n_cols = model.n_cols
+    Pf = branch_flows.get_matrix(n_cols=n_cols)
+    P_hvdc = hvdc_flows.get_matrix(n_cols=n_cols)
+    P_vsc = vsc_flows.get_matrix(n_cols=n_cols)
+    rates = branch_data_t.rates / Sbase
+
+    for c, contingency in enumerate(linear_multi_contingencies.multi_contingencies):
+
+        # the monitored branches that change with the contingency
+        m = np.where(get_contingency_monitored_mask(contingency=contingency, n_br=branch_flows.n))[0]
+
+        if len(m) > 0:
+            add_matrix_contingency_flow_limits(t=t, c=c, m=m,
+                                               contingency=contingency,
+                                               rates=rates,
+                                               Pf=Pf, P_hvdc=P_hvdc, P_vsc=P_vsc,
+                                               branch_flows=branch_flows,
+                                               hvdc_flows=hvdc_flows,
+                                               vsc_flows=vsc_flows,
+                                               branch_vars=branch_vars,
+                                               model=model)
+
+
+class MatrixLazyContingencies:
+    """
+    Contingency constraints generated lazily: the model is solved without them, the post-contingency flows
+    of all the contingencies are evaluated with the solution, and only the violated limits are formulated
+    before solving again. This is repeated until no limit is violated.
+    The result is the same as formulating all the contingency constraints upfront,
+    since the constraints that are never added are fulfilled by the final solution
+    """
+
+    def __init__(self, nbus: int, tolerance: float = 1e-6):
+        """
+        Constructor
+        :param nbus: number of buses
+        :param tolerance: flow violation tolerance in p.u.
+        """
+        self.nbus = nbus
+        self.tolerance = tolerance
+
+        # topology key -> contingencies of the topology
+        self.contingencies: Dict[int, List[LinearMultiContingency]] = dict()
+
+        # topology key -> list of (t, rates in p.u., branch flows, hvdc flows, vsc flows)
+        self.time_data: Dict[int, List[Tuple[int, Vec, MatrixLpExp, MatrixLpExp, MatrixLpExp]]] = dict()
+
+        # (topology key, contingency index) -> monitored branches mask
+        self._monitored: Dict[Tuple[int, int], BoolVec] = dict()
+
+        # (t, contingency index) -> branches whose contingency limits are formulated
+        self._formulated: Dict[Tuple[int, int], BoolVec] = dict()
+
+        self.n_iterations = 0
+        self.n_constraints = 0
+
+    def register(self, t: int, topology_key: int, rates: Vec,
+                 branch_flows: MatrixLpExp, hvdc_flows: MatrixLpExp, vsc_flows: MatrixLpExp,
+                 linear_multi_contingencies: LinearMultiContingencies) -> None:
+        """
+        Register a time step whose contingency constraints are to be generated lazily
+        :param t: time index
+        :param topology_key: key of the topology (see get_linear_factors_key)
+        :param rates: branch rates in p.u.
+        :param branch_flows: branch flow expressions
+        :param hvdc_flows: HVDC flow expressions
+        :param vsc_flows: VSC flow expressions
+        :param linear_multi_contingencies: LinearMultiContingencies with the factors of the topology
+        """
+        if topology_key not in self.contingencies:
+            self.contingencies[topology_key] = list(linear_multi_contingencies.multi_contingencies)
+            self.time_data[topology_key] = list()
+
+        self.time_data[topology_key].append((t, rates, branch_flows, hvdc_flows, vsc_flows))
+
+    def get_monitored(self, topology_key: int, c: int, n_br: int) -> BoolVec:
+        """
+        Get the monitored branches of a contingency of a topology
+        :param topology_key: key of the topology
+        :param c: contingency index
+        :param n_br: number of branches
+        :return: boolean array (n_br)
+        """
+        mask = self._monitored.get((topology_key, c), None)
+        if mask is None:
+            mask = get_contingency_monitored_mask(contingency=self.contingencies[topology_key][c], n_br=n_br)
+            self._monitored[(topology_key, c)] = mask
+        return mask
+
+    def add_violated(self, model: MatrixLpModel, branch_vars: MatrixBranchVars) -> int:
+        """
+        Formulate the contingency limits violated by the current solution of the model
+        :param model: MatrixLpModel (solved)
+        :param branch_vars: MatrixBranchVars
+        :return: number of monitored branches formulated
+        """
+        x = model.col_values
+        n_cols = model.n_cols
+        n_added = 0
+
+        for topology_key, time_data in self.time_data.items():
+
+            # evaluate the base flows of all the time steps of the topology at once (elements, time)
+            Pf = np.column_stack([branch_flows.evaluate(x) for _, _, branch_flows, _, _ in time_data])
+            P_hvdc = np.column_stack([hvdc_flows.evaluate(x) for _, _, _, hvdc_flows, _ in time_data])
+            P_vsc = np.column_stack([vsc_flows.evaluate(x) for _, _, _, _, vsc_flows in time_data])
+            rates = np.column_stack([rates for _, rates, _, _, _ in time_data])
+            injections = np.zeros((self.nbus, len(time_data)))  # the injection increments are not formulated
+
+            # flow matrices of the time steps, computed only if needed
+            matrices: Dict[int, Tuple[sp.csr_matrix, sp.csr_matrix, sp.csr_matrix]] = dict()
+
+            for c, contingency in enumerate(self.contingencies[topology_key]):
+
+                monitored = self.get_monitored(topology_key=topology_key, c=c, n_br=Pf.shape[0])
+                if not np.any(monitored):
+                    continue
+
+                flows = contingency.get_contingency_flows(base_branches_flow=Pf,
+                                                          injections=injections,
+                                                          hvdc_flow=P_hvdc,
+                                                          vsc_flow=P_vsc)
+
+                violated = (np.abs(flows) > rates + self.tolerance) & monitored[:, np.newaxis]
+
+                for j in np.where(np.any(violated, axis=0))[0]:
+                    t, rates_t, branch_flows, hvdc_flows, vsc_flows = time_data[j]
+
+                    formulated = self._formulated.get((t, c), None)
+                    if formulated is None:
+                        formulated = np.zeros(Pf.shape[0], dtype=bool)
+                        self._formulated[(t, c)] = formulated
+
+                    m = np.where(violated[:, j] & ~formulated)[0]
+                    if len(m) == 0:
+                        continue
+
+                    formulated[m] = True
+
+                    if j not in matrices:
+                        matrices[j] = (branch_flows.get_matrix(n_cols=n_cols),
+                                       hvdc_flows.get_matrix(n_cols=n_cols),
+                                       vsc_flows.get_matrix(n_cols=n_cols))
+                    Pf_t, P_hvdc_t, P_vsc_t = matrices[j]
+
+                    add_matrix_contingency_flow_limits(t=t, c=c, m=m,
+                                                       contingency=contingency,
+                                                       rates=rates_t,
+                                                       Pf=Pf_t, P_hvdc=P_hvdc_t, P_vsc=P_vsc_t,
+                                                       branch_flows=branch_flows,
+                                                       hvdc_flows=hvdc_flows,
+                                                       vsc_flows=vsc_flows,
+                                                       branch_vars=branch_vars,
+                                                       model=model)
+                    n_added += len(m)
+
+        self.n_iterations += 1
+        self.n_constraints += n_added
+
+        return n_added
+
+
+def add_matrix_hvdc_formulation(t: int,
+                                Sbase: float,
+                                hvdc_data_t: HvdcData,
+                                hvdc_vars: MatrixHvdcVars,
+                                bus_vars: MatrixBusVars,
+                                balance: MatrixLpExp,
+                                model: MatrixLpModel) -> MatrixLpExp:
+    """
+    Formulate the HVDC lines
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param hvdc_data_t: HvdcData
+    :param hvdc_vars: MatrixHvdcVars
+    :param bus_vars: MatrixBusVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :return: HVDC flow expressions
+    """
+    F = hvdc_data_t.F
+    T = hvdc_data_t.T
+    active = hvdc_data_t.active.astype(bool)
+    rates = hvdc_data_t.rates / Sbase
+
+    hvdc_vars.F = F
+    hvdc_vars.T = T
+    hvdc_vars.rates[t, :] = hvdc_data_t.rates
+
+    free_mode = active & (hvdc_data_t.control_mode == HvdcControlType.type_0_free)
+    pset_mode = active & (hvdc_data_t.control_mode == HvdcControlType.type_1_Pset)
+
+    unknown = np.where(active & ~free_mode & ~pset_mode)[0]
+    if len(unknown):
+        raise Exception('OPF: Unknown HVDC control mode {}'.format(hvdc_data_t.control_mode[unknown[0]]))
+
+    flows = MatrixLpExp(hvdc_data_t.nelm)
+
+    # set the flow based on the angular difference
+    f = np.where(free_mode)[0]
+    P0 = hvdc_data_t.Pset[f] / Sbase
+    k = hvdc_data_t.angle_droop[f]
+    hvdc_vars.flows.set(t=t, idx=f, const=P0)
+    hvdc_vars.angle_droop[t, f] = k
+    flows.add_const(rows=f, vals=P0)
+    bus_vars.Va.add_to_exp(t=t, idx=F[f], exp=flows, rows=f, factor=k)
+    bus_vars.Va.add_to_exp(t=t, idx=T[f], exp=flows, rows=f, factor=-k)
+
+    # dispatchable flow within the rates or fixed flow at the set point (within the rates)
+    p = np.where(pset_mode)[0]
+    dispatchable = hvdc_data_t.dispatchable[p].astype(bool)
+    P0 = np.clip(hvdc_data_t.Pset[p] / Sbase, -rates[p], rates[p])
+    cols = model.add_vars(n=len(p),
+                          lb=np.where(dispatchable, -rates[p], P0),
+                          ub=np.where(dispatchable, rates[p], P0))
+    hvdc_vars.flows.set(t=t, idx=p, cols=cols)
+    flows.add_terms(rows=p, cols=cols, vals=1.0)
+
+    # add the injections matching the flow
+    balance.add_exp(flows, rows=F, factor=-1.0)
+    balance.add_exp(flows, rows=T, factor=1.0)
+
+    return flows
+
+
+def get_vsc_dc_slack(vsc_data_t: VscData, nbus: int) -> BoolVec:
+    """
+    Get the buses whose DC voltage is set by a converter
+    :param vsc_data_t: VscData
+    :param nbus: number of buses
+    :return: boolean array (nbus)
+    """
+    dc_slack = np.zeros(nbus, dtype=bool)
+    vm_dc = vsc_data_t.active.astype(bool) & ((vsc_data_t.control1 == ConverterControlType.Vm_dc) |
+                                              (vsc_data_t.control2 == ConverterControlType.Vm_dc))
+    dc_slack[vsc_data_t.F[vm_dc]] = True
+    return dc_slack
+
+
+def add_matrix_vsc_formulation(t: int,
+                               Sbase: float,
+                               vsc_data_t: VscData,
+                               vsc_vars: MatrixVscVars,
+                               balance: MatrixLpExp,
+                               model: MatrixLpModel) -> MatrixLpExp:
+    """
+    Formulate the converters
+    :param t: time index
+    :param Sbase: base power (100 MVA)
+    :param vsc_data_t: VscData
+    :param vsc_vars: MatrixVscVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :return: VSC flow expressions
+    """
+    vsc_vars.F = vsc_data_t.F
+    vsc_vars.T = vsc_data_t.T
+    vsc_vars.rates[t, :] = vsc_data_t.rates
+
+    a = np.where(vsc_data_t.active.astype(bool))[0]
+    rates = vsc_data_t.rates[a] / Sbase
+    cols = model.add_vars(n=len(a), lb=-rates, ub=rates)
+    vsc_vars.flows.set(t=t, idx=a, cols=cols)
+
+    flows = MatrixLpExp(vsc_data_t.nelm)
+    flows.add_terms(rows=a, cols=cols, vals=1.0)
+
+    # add the injections matching the flow
+    balance.add_exp(flows, rows=vsc_data_t.F, factor=-1.0)
+    balance.add_exp(flows, rows=vsc_data_t.T, factor=1.0)
+
+    return flows
+
+
+def add_matrix_node_balance(t: int,
+                            vd: IntVec,
+                            bus_data: BusData,
+                            bus_vars: MatrixBusVars,
+                            balance: MatrixLpExp,
+                            model: MatrixLpModel,
+                            logger: Logger) -> None:
+    """
+    Add the Kirchhoff nodal equality
+    :param t: time index
+    :param vd: List of slack node indices
+    :param bus_data: BusData
+    :param bus_vars: MatrixBusVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    :param logger: Logger
+    """
+    has_terms = balance.has_terms()
+    k = np.where(has_terms)[0]
+    A = balance.get_matrix(n_cols=model.n_cols)[k, :]
+    bus_vars.kirchhoff[t, k] = model.add_matrix_csts(A, lb=-balance.const[k], ub=-balance.const[k])
+
+    # the isolated buses get their angle set to zero
+    isolated = np.where(~has_terms)[0]
+    for i in isolated:
+        logger.add_warning("bus isolated", device=bus_data.names[i] + f'@t={t}')
+
+    va_col = bus_vars.Va.col[t, isolated]
+    iso = isolated[va_col > -1]
+    bus_vars.kirchhoff[t, iso] = model.add_csts(n=len(iso), rows=np.arange(len(iso)), cols=va_col[va_col > -1],
+                                                vals=1.0, lb=0.0, ub=0.0)
+
+    # set the slack angles
+    Va = np.angle(bus_data.Vbus[vd])
+    va_col = bus_vars.Va.col[t, vd]
+    model.set_var_bounds(va_col[va_col > -1], lb=Va[va_col > -1], ub=Va[va_col > -1])
+
+
+def add_matrix_copper_plate_balance(t: int,
+                                    bus_vars: MatrixBusVars,
+                                    balance: MatrixLpExp,
+                                    model: MatrixLpModel) -> None:
+    """
+    Add the copper plate equality
+    :param t: time index
+    :param bus_vars: MatrixBusVars
+    :param balance: nodal balance expressions
+    :param model: MatrixLpModel
+    """
+    if np.any(balance.has_terms()):
+        A = sp.csr_matrix(balance.get_matrix(n_cols=model.n_cols).sum(axis=0))
+        total = -np.sum(balance.const)
+        bus_vars.kirchhoff[t, 0] = model.add_matrix_csts(A, lb=total, ub=total)[0]
+
+
+def add_exp_to_objective(exp: MatrixLpExp, weights: Vec, model: MatrixLpModel) -> None:
+    """
+    Add the weighted expressions to the objective function
+    :param exp: MatrixLpExp
+    :param weights: weight of each expression
+    :param model: MatrixLpModel
+    """
+    model.add_cost(exp.cols.values, weights[exp.rows.values] * exp.vals.values)
+    model.add_offset(float(np.sum(weights * exp.const)))
+
+
+def is_supported_by_matrix_builder(grid: MultiCircuit,
+                                   solver_type: MIPSolvers,
+                                   zonal_grouping: ZonalGrouping,
+                                   generation_expansion_planning: bool,
+                                   optimize_nodal_capacity: bool,
+                                   capacity_nodes_idx: Union[IntVec, None],
+                                   robust: bool) -> bool:
+    """
+    Check if the problem can be formulated with the matrix builder
+    :return: True if it can be formulated
+    """
+    return (HIGHS_AVAILABLE
+            and solver_type == MIPSolvers.HIGHS
+            and zonal_grouping in (ZonalGrouping.NoGrouping, ZonalGrouping.All)
+            and not generation_expansion_planning
+            and not optimize_nodal_capacity
+            and capacity_nodes_idx is None
+            and not robust
+            and grid.get_fluid_nodes_number() == 0)
+
+
+def run_linear_opf_ts_matrix(grid: MultiCircuit,
+                             time_indices: Union[IntVec, None],
+                             solver_type: MIPSolvers = MIPSolvers.HIGHS,
+                             zonal_grouping: ZonalGrouping = ZonalGrouping.NoGrouping,
+                             skip_generation_limits: bool = False,
+                             consider_contingencies: bool = False,
+                             contingency_groups_used: Union[List[ContingencyGroup], None] = None,
+                             unit_commitment: bool = False,
+                             ramp_constraints: bool = False,
+                             generation_expansion_planning: bool = False,
+                             all_generators_fixed: bool = False,
+                             lodf_threshold: float = 0.001,
+                             maximize_inter_area_flow: bool = False,
+                             inter_aggregation_info: InterAggregationInfo | None = None,
+                             energy_0: Union[Vec, None] = None,
+                             fluid_level_0: Union[Vec, None] = None,
+                             optimize_nodal_capacity: bool = False,
+                             nodal_capacity_sign: float = 1.0,
+                             capacity_nodes_idx: Union[IntVec, None] = None,
+                             use_glsk_as_cost: bool = False,
+                             logger: Logger = Logger(),
+                             progress_text: Union[None, Callable[[str], None]] = None,
+                             progress_func: Union[None, Callable[[float], None]] = None,
+                             export_model_fname: Union[None, str] = None,
+                             verbose: int = 0,
+                             robust: bool = False,
+                             warm_start: Union[HighsWarmStart, None] = None,
+                             lazy_contingencies: bool = False) -> OpfVars:
+    """
+    Run linear optimal power flow building the model with matrices (see run_linear_opf_ts).
+    The problems that the matrix builder does not support (other solvers than HiGHS, hydro, nodal capacity,
+    generation expansion planning, robust solving and area grouping) are run with run_linear_opf_ts.
+    :param grid: MultiCircuit instance
+    :param time_indices: Time indices (in the general scheme)
+    :param solver_type: MIP solver to use
+    :param zonal_grouping: Zonal grouping?
+    :param skip_generation_limits: Skip the generation limits?
+    :param consider_contingencies: Consider the contingencies?
+    :param contingency_groups_used: List of contingency groups to use
+    :param unit_commitment: Formulate unit commitment?
+    :param ramp_constraints: Formulate ramp constraints?
+    :param generation_expansion_planning: Generation expansion planning?
+    :param all_generators_fixed: All generators take their snapshot or profile values
+                                 instead of resorting to dispatchable status
+    :param lodf_threshold: LODF threshold value to consider contingencies
+    :param maximize_inter_area_flow: Maximize the inter-area flow?
+    :param inter_aggregation_info: Inter rea (or country, etc) information
+    :param energy_0: Vector of initial energy for batteries (size: Number of batteries)
+    :param fluid_level_0: initial fluid level of the nodes
+    :param optimize_nodal_capacity: Optimize the nodal capacity? (optional)
+    :param nodal_capacity_sign: if > 0 the generation is maximized, if < 0 the load is maximized
+    :param capacity_nodes_idx: Array of bus indices to optimize their nodal capacity for
+    :param use_glsk_as_cost: if true, the GLSK values are used instead of the traditional costs
+    :param logger: logger instance
+    :param progress_text: Text progress callback
+    :param progress_func: Numerical progress callback
+    :param export_model_fname: Export the model into LP and MPS?
+    :param verbose: verbosity level
+    :param robust: Robust optimization?
+    :param warm_start: HighsWarmStart of the previous solve, to reuse the solver model or its basis (optional)
+    :param lazy_contingencies: formulate only the contingency constraints violated by the solution,
+                               re-solving until there are no violations (see MatrixLazyContingencies)
+    :return: OpfVars
+    """
+    if not is_supported_by_matrix_builder(grid=grid,
+                                          solver_type=solver_type,
+                                          zonal_grouping=zonal_grouping,
+                                          generation_expansion_planning=generation_expansion_planning,
+                                          optimize_nodal_capacity=optimize_nodal_capacity,
+                                          capacity_nodes_idx=capacity_nodes_idx,
+                                          robust=robust):
+        logger.add_info("The matrix LP builder does not support this problem, using the default builder")
+        return run_linear_opf_ts(grid=grid,
+                                 time_indices=time_indices,
+                                 solver_type=solver_type,
+                                 zonal_grouping=zonal_grouping,
+                                 skip_generation_limits=skip_generation_limits,
+                                 consider_contingencies=consider_contingencies,
+                                 contingency_groups_used=contingency_groups_used,
+                                 unit_commitment=unit_commitment,
+                                 ramp_constraints=ramp_constraints,
+                                 generation_expansion_planning=generation_expansion_planning,
+                                 all_generators_fixed=all_generators_fixed,
+                                 lodf_threshold=lodf_threshold,
+                                 maximize_inter_area_flow=maximize_inter_area_flow,
+                                 inter_aggregation_info=inter_aggregation_info,
+                                 energy_0=energy_0,
+                                 fluid_level_0=fluid_level_0,
+                                 optimize_nodal_capacity=optimize_nodal_capacity,
+                                 nodal_capacity_sign=nodal_capacity_sign,
+                                 capacity_nodes_idx=capacity_nodes_idx,
+                                 use_glsk_as_cost=use_glsk_as_cost,
+                                 logger=logger,
+                                 progress_text=progress_text,
+                                 progress_func=progress_func,
+                                 export_model_fname=export_model_fname,
+                                 verbose=verbose,
+                                 robust=robust)
+
+    bus_dict = {bus: i for i, bus in enumerate(grid.buses)}
+    areas_dict = {elm: i for i, elm in enumerate(grid.areas)}
+
+    if time_indices is None or len(time_indices) == 0:
+        time_indices = [None]
+
+    if contingency_groups_used is None:
+        contingency_groups_used = grid.get_contingency_groups()
+
+    nt = len(time_indices)
+    n = grid.get_bus_number()
+    nbr = grid.get_branch_number(add_vsc=False, add_hvdc=False, add_switch=True)
+    n_hvdc = grid.get_hvdc_number()
+    n_vsc = grid.get_vsc_number()
+
+    # gather the fuels and emission rates matrices
+    gen_emissions_rates_matrix = grid.get_gen_emission_rates_sparse_matrix()
+    gen_fuel_rates_matrix = grid.get_gen_fuel_rates_sparse_matrix()
+    gen_tech_shares_matrix = grid.get_gen_technology_connectivity_matrix()
+    batt_tech_shares_matrix = grid.get_batt_technology_connectivity_matrix()
+
+    # the emissions and fuels are added to the objective with the generation
+    gen_objective_weights = np.zeros(grid.get_generators_number(), dtype=float)
+    for mat in (gen_emissions_rates_matrix, gen_fuel_rates_matrix):
+        if mat.shape[0] > 0:
+            gen_objective_weights += np.asarray(mat.sum(axis=0)).ravel()
+
+    mip_vars = MatrixOpfVars(nt=nt, nbus=n,
+                             ng=grid.get_generators_number(),
+                             nb=grid.get_batteries_number(),
+                             nl=grid.get_load_like_device_number(),
+                             nbr=nbr, n_hvdc=n_hvdc, n_vsc=n_vsc,
+                             n_fluid_node=grid.get_fluid_nodes_number(),
+                             n_fluid_path=grid.get_fluid_paths_number(),
+                             n_fluid_inj=grid.get_fluid_injection_number())
+
+    model = MatrixLpModel()
+
+    # contingency structures (computed once, their factors are cached by topology)
+    mctg: Union[LinearMultiContingencies, None] = None
+    lazy_ctg = MatrixLazyContingencies(nbus=n) if consider_contingencies and lazy_contingencies else None
+
+    for local_t_idx, global_t_idx in enumerate(time_indices):
+
+        nc: NumericalCircuit = compile_numerical_circuit_at(
+            circuit=grid,
+            t_idx=global_t_idx,
+            bus_dict=bus_dict,
+            areas_dict=areas_dict,
+            logger=logger
+        )
+
+        indices = nc.get_simulation_indices()
+
+        if local_t_idx == 0:
+            mip_vars.C_load = get_connectivity(nc.load_data.bus_idx, n)
+            mip_vars.C_gen = get_connectivity(nc.generator_data.bus_idx, n)
+            mip_vars.C_batt = get_connectivity(nc.battery_data.bus_idx, n)
+
+        # the buses with the voltage set by a converter have a fixed module
+        if zonal_grouping == ZonalGrouping.NoGrouping:
+            dc_slack = get_vsc_dc_slack(vsc_data_t=nc.vsc_data, nbus=n)
+            if not np.any(dc_slack) and nc.vsc_data.nelm > 0:
+                logger.add_warning("No DC Slack! set Vm_dc in any of the converters")
+        else:
+            dc_slack = np.zeros(n, dtype=bool)
+
+        # nodal balance expressions
+        balance = MatrixLpExp(n)
+
+        # formulate the bus angles -------------------------------------------------------------------------------------
+        add_matrix_bus_formulation(t=local_t_idx,
+                                   bus_data_t=nc.bus_data,
+                                   dc_slack=dc_slack,
+                                   bus_vars=mip_vars.bus_vars,
+                                   model=model)
+
+        # formulate loads ----------------------------------------------------------------------------------------------
+        add_matrix_load_formulation(t=local_t_idx,
+                                    Sbase=nc.Sbase,
+                                    load_data_t=nc.load_data,
+                                    load_vars=mip_vars.load_vars,
+                                    balance=balance,
+                                    model=model)
+
+        # formulate generation -----------------------------------------------------------------------------------------
+        add_matrix_generation_formulation(t=local_t_idx,
+                                          Sbase=nc.Sbase,
+                                          time_array=grid.time_profile,
+                                          gen_data_t=nc.generator_data,
+                                          gen_vars=mip_vars.gen_vars,
+                                          balance=balance,
+                                          model=model,
+                                          unit_commitment=unit_commitment,
+                                          ramp_constraints=ramp_constraints,
+                                          skip_generation_limits=skip_generation_limits,
+                                          all_generators_fixed=all_generators_fixed,
+                                          use_glsk_as_cost=use_glsk_as_cost)
+
+        # formulate batteries ------------------------------------------------------------------------------------------
+        if local_t_idx == 0 and energy_0 is None:
+            # declare the initial energy of the batteries
+            energy_0 = nc.battery_data.soc_0 * nc.battery_data.enom  # in MWh here
+
+        add_matrix_battery_formulation(t=local_t_idx,
+                                       Sbase=nc.Sbase,
+                                       time_array=grid.time_profile,
+                                       batt_data_t=nc.battery_data,
+                                       batt_vars=mip_vars.batt_vars,
+                                       balance=balance,
+                                       model=model,
+                                       unit_commitment=unit_commitment,
+                                       ramp_constraints=ramp_constraints,
+                                       skip_generation_limits=skip_generation_limits,
+                                       energy_0=energy_0)
+
+        # add emissions and fuels --------------------------------------------------------------------------------------
+        gen_idx = np.arange(nc.generator_data.nelm)
+        mip_vars.gen_vars.p.add_to_objective(t=local_t_idx, idx=gen_idx, weights=gen_objective_weights, model=model)
+
+        if zonal_grouping == ZonalGrouping.NoGrouping:
+
+            # formulate hvdc -------------------------------------------------------------------------------------------
+            hvdc_flows = add_matrix_hvdc_formulation(t=local_t_idx,
+                                                     Sbase=nc.Sbase,
+                                                     hvdc_data_t=nc.hvdc_data,
+                                                     hvdc_vars=mip_vars.hvdc_vars,
+                                                     bus_vars=mip_vars.bus_vars,
+                                                     balance=balance,
+                                                     model=model)
+
+            # formulate vsc --------------------------------------------------------------------------------------------
+            vsc_flows = add_matrix_vsc_formulation(t=local_t_idx,
+                                                   Sbase=nc.Sbase,
+                                                   vsc_data_t=nc.vsc_data,
+                                                   vsc_vars=mip_vars.vsc_vars,
+                                                   balance=balance,
+                                                   model=model)
+
+            # formulate branches ---------------------------------------------------------------------------------------
+            branch_flows = add_matrix_branches_formulation(t=local_t_idx,
+                                                           Sbase=nc.Sbase,
+                                                           branch_data_t=nc.passive_branch_data,
+                                                           ctrl_branch_data_t=nc.active_branch_data,
+                                                           branch_vars=mip_vars.branch_vars,
+                                                           bus_vars=mip_vars.bus_vars,
+                                                           balance=balance,
+                                                           model=model)
+
+            # formulate nodes ------------------------------------------------------------------------------------------
+            add_matrix_node_balance(t=local_t_idx,
+                                    vd=indices.vd,
+                                    bus_data=nc.bus_data,
+                                    bus_vars=mip_vars.bus_vars,
+                                    balance=balance,
+                                    model=model,
+                                    logger=logger)
+
+            # add branch contingencies ---------------------------------------------------------------------------------
+            if consider_contingencies:
+
+                if len(contingency_groups_used) > 0:
+
+                    if mctg is None:
+                        mctg = LinearMultiContingencies(grid=grid,
+                                                        contingency_groups_used=contingency_groups_used)
+
+                    # the contingency factors are reused among the time steps with the same topology
+                    topology_key = get_linear_factors_key(nc)
+
+                    if not mctg.load_cached(topology_key=topology_key,
+                                            ptdf_threshold=lodf_threshold,
+                                            lodf_threshold=lodf_threshold):
+                        ls = LinearAnalysis(nc=nc,
+                                            distributed_slack=False,
+                                            correct_values=True,
+                                            lazy=True)
+
+                        mctg.compute(lin=ls,
+                                     ptdf_threshold=lodf_threshold,
+                                     lodf_threshold=lodf_threshold,
+                                     topology_key=topology_key)
+
+                    if lazy_ctg is not None:
+                        # the constraints are formulated after solving, if violated
+                        lazy_ctg.register(t=local_t_idx,
+                                          topology_key=topology_key,
+                                          rates=nc.passive_branch_data.rates / nc.Sbase,
+                                          branch_flows=branch_flows,
+                                          hvdc_flows=hvdc_flows,
+                                          vsc_flows=vsc_flows,
+                                          linear_multi_contingencies=mctg)
+                    else:
+                        add_matrix_branches_contingencies_formulation(t=local_t_idx,
+                                                                      Sbase=nc.Sbase,
+                                                                      branch_data_t=nc.passive_branch_data,
+                                                                      branch_flows=branch_flows,
+                                                                      hvdc_flows=hvdc_flows,
+                                                                      vsc_flows=vsc_flows,
+                                                                      branch_vars=mip_vars.branch_vars,
+                                                                      model=model,
+                                                                      linear_multi_contingencies=mctg)
+                else:
+                    logger.add_warning(msg="Contingencies enabled, but no contingency groups provided")
+
+            # add inter area branch flow maximization ------------------------------------------------------------------
+            if maximize_inter_area_flow:
+
+                # maximize the power at the from buses and minimize the power at the to buses
+                bus_weights = np.zeros(n, dtype=float)
+                np.add.at(bus_weights, inter_aggregation_info.idx_bus_from, -1.0)
+                np.add.at(bus_weights, inter_aggregation_info.idx_bus_to, 1.0)
+
+                gen_bus = nc.generator_data.bus_idx
+                g = np.where((gen_bus > -1) & nc.generator_data.active.astype(bool))[0]
+                mip_vars.gen_vars.p.add_to_objective(t=local_t_idx, idx=g, weights=bus_weights[gen_bus[g]],
+                                                     model=model)
+
+                batt_bus = nc.battery_data.bus_idx
+                b = np.where((batt_bus > -1) & nc.battery_data.active.astype(bool))[0]
+                mip_vars.batt_vars.p_pos.add_to_objective(t=local_t_idx, idx=b, weights=bus_weights[batt_bus[b]],
+                                                          model=model)
+                mip_vars.batt_vars.p_neg.add_to_objective(t=local_t_idx, idx=b, weights=-bus_weights[batt_bus[b]],
+                                                          model=model)
+
+                # we want to maximize, hence the minus sign
+                for exp, lst in ((branch_flows, inter_aggregation_info.lst_br),
+                                 (hvdc_flows, inter_aggregation_info.lst_br_hvdc)):
+                    weights = np.zeros(exp.n, dtype=float)
+                    for k, branch, sense in lst:
+                        weights[k] -= sense
+                    add_exp_to_objective(exp=exp, weights=weights, model=model)
+
+        elif zonal_grouping == ZonalGrouping.All:
+            # this is the copper plate approach
+            add_matrix_copper_plate_balance(t=local_t_idx,
+                                            bus_vars=mip_vars.bus_vars,
+                                            balance=balance,
+                                            model=model)
+
+        if progress_func is not None:
+            progress_func((local_t_idx + 1) / nt * 100.0)
+
+    # solve
+    if progress_text is not None:
+        progress_text("Solving...")
+
+    if progress_func is not None:
+        progress_func(0)
+
+    if lazy_ctg is not None and warm_start is None:
+        # the re-solves append the violated constraints to the solver model
+        warm_start = HighsWarmStart()
+
+    status = model.solve(show_logs=verbose > 0, progress_text=progress_text, warm_start=warm_start)
+
+    if lazy_ctg is not None:
+        while status == MatrixLpModel.OPTIMAL:
+            if lazy_ctg.add_violated(model=model, branch_vars=mip_vars.branch_vars) == 0:
+                break
+
+            if progress_text is not None:
+                progress_text(f"Solving with {lazy_ctg.n_constraints} contingency constraints...")
+
+            status = model.solve(show_logs=verbose > 0, progress_text=progress_text, warm_start=warm_start)
+
+        logger.add_info("Lazy contingency iterations", value=lazy_ctg.n_iterations)
+        logger.add_info("Lazy contingency constraints", value=lazy_ctg.n_constraints)
+
+    if export_model_fname is not None:
+        # saved after the lazy contingencies, so that the model has the constraints that were added
+        model.save_model(file_name=export_model_fname)
+        logger.add_info("LP model saved as", value=export_model_fname)
+
+    # gather the results
+    logger.add_info(msg="Status", value=model.status2string(status))
+
+    if status == MatrixLpModel.OPTIMAL:
+        logger.add_info("Objective function", value=model.fobj_value())
+        mip_vars.acceptable_solution = True
+    else:
+        logger.add_error("The problem does not have an optimal solution.")
+        mip_vars.acceptable_solution = False
+        lp_file_name = os.path.join(opf_file_path(), f"{grid.name} opf debug.lp")
+        model.save_model(file_name=lp_file_name)
+        logger.add_info("Debug LP model saved", value=lp_file_name)
+
+    # convert the lp vars to their values
+    vars_v = mip_vars.get_values(Sbase=grid.Sbase,
+                                 model=model,
+                                 gen_emissions_rates_matrix=gen_emissions_rates_matrix,
+                                 gen_fuel_rates_matrix=gen_fuel_rates_matrix,
+                                 gen_tech_shares_matrix=gen_tech_shares_matrix,
+                                 batt_tech_shares_matrix=batt_tech_shares_matrix)
+
+    # add the model logger to the main logger
+    logger += model.logger
+
+    return vars_v
@@ -8,6 +8,7 @@ from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 from VeraGridEngine.enumerations import SolverType, EngineType, SimulationTypes
 from VeraGridEngine.Simulations.OPF.opf_options import OptimalPowerFlowOptions
 from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import run_linear_opf_ts
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts_matrix import run_linear_opf_ts_matrix
 from VeraGridEngine.Simulations.OPF.opf_results import OptimalPowerFlowResults
 from VeraGridEngine.Simulations.OPF.ac_opf_worker import run_nonlinear_opf
 from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
@@ -129,26 +130,36 @@ class OptimalPowerFlowDriver(TimeSeriesDriverTemplate):
                 self.report_text('Formulating problem...')
 
             # DC optimal power flow
-            opf_vars = run_linear_opf_ts(grid=self.grid,
-                                         time_indices=None,
-                                         solver_type=self.options.mip_solver,
-                                         zonal_grouping=self.options.zonal_grouping,
-                                         skip_generation_limits=self.options.skip_generation_limits,
-                                         consider_contingencies=self.options.consider_contingencies,
-                                         contingency_groups_used=self.options.contingency_groups_used,
-                                         unit_commitment=self.options.unit_commitment,
-                                         ramp_constraints=False,
-                                         all_generators_fixed=False,
-                                         lodf_threshold=self.options.lodf_tolerance,
-                                         maximize_inter_area_flow=self.options.maximize_flows,
-                                         inter_aggregation_info=self.options.inter_aggregation_info,
-                                         energy_0=None,
-                                         fluid_level_0=None,
-                                         use_glsk_as_cost=self.options.use_glsk_as_cost,
-                                         logger=self.logger,
-                                         export_model_fname=self.options.export_model_fname,
-                                         verbose=self.options.verbose,
-                                         robust=self.options.robust)
+            if self.options.matrix_lp_builder:
+                run_linear_opf = run_linear_opf_ts_matrix
+                kwargs = dict(lazy_contingencies=self.options.lazy_contingencies)
+            else:
+                run_linear_opf = run_linear_opf_ts
+                kwargs = dict()
+                if self.options.lazy_contingencies:
+                    self.logger.add_warning("The lazy contingencies require the matrix LP builder")
+
+            opf_vars = run_linear_opf(grid=self.grid,
+                                      time_indices=None,
+                                      solver_type=self.options.mip_solver,
+                                      zonal_grouping=self.options.zonal_grouping,
+                                      skip_generation_limits=self.options.skip_generation_limits,
+                                      consider_contingencies=self.options.consider_contingencies,
+                                      contingency_groups_used=self.options.contingency_groups_used,
+                                      unit_commitment=self.options.unit_commitment,
+                                      ramp_constraints=False,
+                                      all_generators_fixed=False,
+                                      lodf_threshold=self.options.lodf_tolerance,
+                                      maximize_inter_area_flow=self.options.maximize_flows,
+                                      inter_aggregation_info=self.options.inter_aggregation_info,
+                                      energy_0=None,
+                                      fluid_level_0=None,
+                                      use_glsk_as_cost=self.options.use_glsk_as_cost,
+                                      logger=self.logger,
+                                      export_model_fname=self.options.export_model_fname,
+                                      verbose=self.options.verbose,
+                                      robust=self.options.robust,
+                                      **kwargs)
 
             self.results.voltage = opf_vars.bus_vars.Vm[0, :] * np.exp(1j * opf_vars.bus_vars.Va[0, :])
             self.results.bus_shadow_prices = opf_vars.bus_vars.shadow_prices[0, :]
@@ -46,7 +46,11 @@ class OptimalPowerFlowOptions(OptionsTemplate):
                  acopf_mode: AcOpfMode = AcOpfMode.ACOPFstd,
                  acopf_v0: Vec | None = None,
                  acopf_S0: Vec | None = None,
-                 robust: bool = False,):
+                 robust: bool = False,
+                 matrix_lp_builder: bool = False,
+                 rolling_horizon_overlap: int = 0,
+                 n_workers: int = 1,
+                 lazy_contingencies: bool = False):
         """
         Optimal power flow options
         :param verbose:
@@ -74,6 +78,15 @@ class OptimalPowerFlowOptions(OptionsTemplate):
         :param acopf_mode:
         :param acopf_S0: Sbus initial solution
         :param acopf_v0: Voltage initial solution
+        :param robust: Robust optimization?
+        :param matrix_lp_builder: build the linear OPF model with sparse matrices straight into HiGHS
+                                  (much faster to build on large grids and time series)
+        :param rolling_horizon_overlap: number of time steps of the next time group solved with each group
+                                        (look-ahead of the rolling horizon, their results are discarded)
+        :param n_workers: number of processes to solve the time groups when they are independent
+                          (no batteries, hydro, unit commitment or expansion planning). 1: run in this process
+        :param lazy_contingencies: formulate only the contingency constraints violated by the solution,
+                                   re-solving until there are no violations (requires matrix_lp_builder)
         """
         OptionsTemplate.__init__(self, name="Optimal power flow options")
 
@@ -119,6 +132,14 @@ class OptimalPowerFlowOptions(OptionsTemplate):
 
         self.robust = robust
 
+        self.matrix_lp_builder = matrix_lp_builder
+
+        self.rolling_horizon_overlap: int = rolling_horizon_overlap
+
+        self.n_workers: int = n_workers
+
+        self.lazy_contingencies: bool = lazy_contingencies
+
         # IPS settings
         self.ips_method: SolverType = ips_method
         self.ips_tolerance = ips_tolerance
@@ -154,6 +175,10 @@ class OptimalPowerFlowOptions(OptionsTemplate):
         self.register(key="ips_init_with_pf", tpe=bool)
         self.register(key="ips_control_q_limits", tpe=bool)
         self.register(key="robust", tpe=bool)
+        self.register(key="matrix_lp_builder", tpe=bool)
+        self.register(key="rolling_horizon_overlap", tpe=int)
+        self.register(key="n_workers", tpe=int)
+        self.register(key="lazy_contingencies", tpe=bool)
 
         self.register(key="acopf_v0", tpe=Vec)
         self.register(key="acopf_S0", tpe=Vec)
@@ -6,14 +6,19 @@ import datetime
 
 import numpy as np
 import pandas as pd
-from typing import Union
+from typing import Union, List
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 from VeraGridEngine.enumerations import SolverType, TimeGrouping, EngineType, SimulationTypes
 from VeraGridEngine.Simulations.OPF.opf_options import OptimalPowerFlowOptions
-from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import run_linear_opf_ts
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import run_linear_opf_ts, OpfVars
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts_matrix import run_linear_opf_ts_matrix
 from VeraGridEngine.Simulations.OPF.simple_dispatch_ts import run_greedy_dispatch_ts
 from VeraGridEngine.Simulations.OPF.ac_opf_worker import run_nonlinear_opf
 from VeraGridEngine.Simulations.OPF.opf_ts_results import OptimalPowerFlowTimeSeriesResults
+from VeraGridEngine.Simulations.OPF.opf_ts_worker import (OpfWindow, LinearOpfWindowTask, get_rolling_windows,
+                                                         has_inter_temporal_coupling,
+                                                         run_linear_opf_windows_parallel)
+from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
 from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
 from VeraGridEngine.Simulations.driver_template import TimeSeriesDriverTemplate
 from VeraGridEngine.Compilers.circuit_to_newton_pa import newton_pa_linear_opf, newton_pa_nonlinear_opf
@@ -105,27 +110,37 @@ class OptimalPowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         if self.options.solver == SolverType.LINEAR_OPF:
 
             # DC optimal power flow
-            opf_vars = run_linear_opf_ts(grid=self.grid,
-                                         time_indices=self.time_indices,
-                                         solver_type=self.options.mip_solver,
-                                         zonal_grouping=self.options.zonal_grouping,
-                                         skip_generation_limits=self.options.skip_generation_limits,
-                                         consider_contingencies=self.options.consider_contingencies,
-                                         contingency_groups_used=self.grid.contingency_groups,
-                                         unit_commitment=self.options.unit_commitment,
-                                         ramp_constraints=self.options.unit_commitment,
-                                         generation_expansion_planning=self.options.generation_expansion_planning,
-                                         all_generators_fixed=False,
-                                         lodf_threshold=self.options.lodf_tolerance,
-                                         maximize_inter_area_flow=self.options.maximize_flows,
-                                         inter_aggregation_info=self.options.inter_aggregation_info,
-                                         use_glsk_as_cost=self.options.use_glsk_as_cost,
-                                         logger=self.logger,
-                                         progress_text=self.report_text,
-                                         progress_func=self.report_progress,
-                                         export_model_fname=self.options.export_model_fname,
-                                         verbose=self.options.verbose,
-                                         robust=self.options.robust)
+            if self.options.matrix_lp_builder:
+                run_linear_opf = run_linear_opf_ts_matrix
+                kwargs = dict(lazy_contingencies=self.options.lazy_contingencies)
+            else:
+                run_linear_opf = run_linear_opf_ts
+                kwargs = dict()
+                if self.options.lazy_contingencies:
+                    self.logger.add_warning("The lazy contingencies require the matrix LP builder")
+
+            opf_vars = run_linear_opf(grid=self.grid,
+                                      time_indices=self.time_indices,
+                                      solver_type=self.options.mip_solver,
+                                      zonal_grouping=self.options.zonal_grouping,
+                                      skip_generation_limits=self.options.skip_generation_limits,
+                                      consider_contingencies=self.options.consider_contingencies,
+                                      contingency_groups_used=self.grid.contingency_groups,
+                                      unit_commitment=self.options.unit_commitment,
+                                      ramp_constraints=self.options.unit_commitment,
+                                      generation_expansion_planning=self.options.generation_expansion_planning,
+                                      all_generators_fixed=False,
+                                      lodf_threshold=self.options.lodf_tolerance,
+                                      maximize_inter_area_flow=self.options.maximize_flows,
+                                      inter_aggregation_info=self.options.inter_aggregation_info,
+                                      use_glsk_as_cost=self.options.use_glsk_as_cost,
+                                      logger=self.logger,
+                                      progress_text=self.report_text,
+                                      progress_func=self.report_progress,
+                                      export_model_fname=self.options.export_model_fname,
+                                      verbose=self.options.verbose,
+                                      robust=self.options.robust,
+                                      **kwargs)
 
             self.results.voltage = opf_vars.bus_vars.Vm * np.exp(1j * opf_vars.bus_vars.Va)
             self.results.bus_shadow_prices = opf_vars.bus_vars.shadow_prices
@@ -276,10 +291,12 @@ class OptimalPowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         # get the partition points of the time series
         groups = get_time_groups(t_array=self.grid.time_profile[self.time_indices], grouping=self.options.time_grouping)
 
+        if self.options.solver == SolverType.LINEAR_OPF:
+            self.linear_opf_rolling_horizon(groups=groups)
+            return
+
         n = len(groups)
         i = 1
-        energy_0: Union[Vec, None] = None  # at the beginning
-        fluid_level_0: Union[Vec, None] = None
 
         while i < n and not self.__cancel__:
             start_ = groups[i - 1]
@@ -296,86 +313,7 @@ class OptimalPowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
             self.report_text('Running OPF for the time group {0} '
                              'start {1} - end {2} in external solver...'.format(i, start_, end_))
 
-            if self.options.solver == SolverType.LINEAR_OPF:
-
-                # run an opf for the group interval only if the group is within the start:end boundaries
-                # DC optimal power flow
-                opf_vars = run_linear_opf_ts(grid=self.grid,
-                                             time_indices=time_indices,
-                                             solver_type=self.options.mip_solver,
-                                             zonal_grouping=self.options.zonal_grouping,
-                                             skip_generation_limits=self.options.skip_generation_limits,
-                                             consider_contingencies=self.options.consider_contingencies,
-                                             contingency_groups_used=self.options.contingency_groups_used,
-                                             unit_commitment=self.options.unit_commitment,
-                                             ramp_constraints=self.options.unit_commitment,
-                                             generation_expansion_planning=self.options.generation_expansion_planning,
-                                             all_generators_fixed=False,
-                                             lodf_threshold=self.options.lodf_tolerance,
-                                             maximize_inter_area_flow=self.options.maximize_flows,
-                                             inter_aggregation_info=self.options.inter_aggregation_info,
-                                             energy_0=energy_0,
-                                             fluid_level_0=fluid_level_0,
-                                             use_glsk_as_cost=self.options.use_glsk_as_cost,
-                                             logger=self.logger,
-                                             export_model_fname=self.options.export_model_fname,
-                                             verbose=self.options.verbose,
-                                             robust=self.options.robust)
-
-                self.results.voltage[time_indices, :] = opf_vars.bus_vars.Vm * np.exp(1j * opf_vars.bus_vars.Va)
-                self.results.bus_shadow_prices[time_indices, :] = opf_vars.bus_vars.shadow_prices
-
-                self.results.load_power[time_indices, :] = opf_vars.load_vars.p
-                self.results.load_shedding[time_indices, :] = opf_vars.load_vars.shedding
-                self.results.load_shedding_cost[time_indices, :] = opf_vars.load_vars.shedding_cost
-
-                self.results.battery_power[time_indices, :] = opf_vars.batt_vars.p
-                self.results.battery_energy[time_indices, :] = opf_vars.batt_vars.e
-
-                self.results.generator_power[time_indices, :] = opf_vars.gen_vars.p
-                self.results.generator_shedding[time_indices, :] = opf_vars.gen_vars.shedding
-                self.results.generator_cost[time_indices, :] = opf_vars.gen_vars.cost
-                self.results.generator_producing[time_indices, :] = opf_vars.gen_vars.producing
-                self.results.generator_starting_up[time_indices, :] = opf_vars.gen_vars.starting_up
-                self.results.generator_shutting_down[time_indices, :] = opf_vars.gen_vars.shedding
-                self.results.generator_invested[time_indices, :] = opf_vars.gen_vars.invested
-
-                self.results.Sf[time_indices, :] = opf_vars.branch_vars.flows
-                self.results.St[time_indices, :] = -opf_vars.branch_vars.flows
-                self.results.overloads[time_indices, :] = (opf_vars.branch_vars.flow_slacks_pos
-                                                           - opf_vars.branch_vars.flow_slacks_neg)
-                self.results.overloads_cost[time_indices, :] = opf_vars.branch_vars.overload_cost
-
-                self.results.loading[time_indices, :] = opf_vars.branch_vars.loading
-                self.results.phase_shift[time_indices, :] = opf_vars.branch_vars.tap_angles
-
-                self.results.hvdc_Pf[time_indices, :] = opf_vars.hvdc_vars.flows
-                self.results.hvdc_loading[time_indices, :] = opf_vars.hvdc_vars.loading
-
-                self.results.vsc_Pf[time_indices, :] = opf_vars.vsc_vars.flows
-                self.results.vsc_loading[time_indices, :] = opf_vars.vsc_vars.loading
-
-                self.results.fluid_node_current_level[time_indices, :] = opf_vars.fluid_node_vars.current_level
-                self.results.fluid_node_flow_in[time_indices, :] = opf_vars.fluid_node_vars.flow_in
-                self.results.fluid_node_flow_out[time_indices, :] = opf_vars.fluid_node_vars.flow_out
-                self.results.fluid_node_p2x_flow[time_indices, :] = opf_vars.fluid_node_vars.p2x_flow
-                self.results.fluid_node_spillage[time_indices, :] = opf_vars.fluid_node_vars.spillage
-                self.results.fluid_path_flow[time_indices, :] = opf_vars.fluid_path_vars.flow
-                self.results.fluid_injection_flow[time_indices, :] = opf_vars.fluid_inject_vars.flow
-
-                self.results.system_fuel[time_indices, :] = opf_vars.sys_vars.system_fuel
-                self.results.system_emissions[time_indices, :] = opf_vars.sys_vars.system_emissions
-                self.results.system_energy_cost[time_indices] = opf_vars.sys_vars.system_unit_energy_cost
-                self.results.system_total_energy_cost[time_indices] = opf_vars.sys_vars.system_total_energy_cost
-                self.results.power_by_technology[time_indices] = opf_vars.sys_vars.power_by_technology
-
-                # set converged for all t to the value of acceptable solution
-                self.results.converged[time_indices] = np.array([opf_vars.acceptable_solution] * opf_vars.nt)
-
-                energy_0 = self.results.battery_energy[end_ - 1, :]
-                fluid_level_0 = self.results.fluid_node_current_level[end_ - 1, :]
-
-            elif self.options.solver == SolverType.NONLINEAR_OPF:
+            if self.options.solver == SolverType.NONLINEAR_OPF:
 
                 self.report_progress(0.0)
                 for it, t in enumerate(time_indices):
@@ -448,6 +386,126 @@ class OptimalPowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
 
             i += 1
 
+    def store_linear_opf_window(self, window: OpfWindow, opf_vars: OpfVars) -> None:
+        """
+        Store the kept time steps of the solution of a window of the rolling horizon
+        :param window: OpfWindow
+        :param opf_vars: OpfVars of the window
+        """
+        time_indices = window.kept_positions
+        k = window.n_keep
+
+        self.results.voltage[time_indices, :] = (opf_vars.bus_vars.Vm[:k, :]
+                                                 * np.exp(1j * opf_vars.bus_vars.Va[:k, :]))
+        self.results.bus_shadow_prices[time_indices, :] = opf_vars.bus_vars.shadow_prices[:k, :]
+
+        self.results.load_power[time_indices, :] = opf_vars.load_vars.p[:k, :]
+        self.results.load_shedding[time_indices, :] = opf_vars.load_vars.shedding[:k, :]
+        self.results.load_shedding_cost[time_indices, :] = opf_vars.load_vars.shedding_cost[:k, :]
+
+        self.results.battery_power[time_indices, :] = opf_vars.batt_vars.p[:k, :]
+        self.results.battery_energy[time_indices, :] = opf_vars.batt_vars.e[:k, :]
+
+        self.results.generator_power[time_indices, :] = opf_vars.gen_vars.p[:k, :]
+        self.results.generator_shedding[time_indices, :] = opf_vars.gen_vars.shedding[:k, :]
+        self.results.generator_cost[time_indices, :] = opf_vars.gen_vars.cost[:k, :]
+        self.results.generator_producing[time_indices, :] = opf_vars.gen_vars.producing[:k, :]
+        self.results.generator_starting_up[time_indices, :] = opf_vars.gen_vars.starting_up[:k, :]
+        self.results.generator_shutting_down[time_indices, :] = opf_vars.gen_vars.shedding[:k, :]
+        self.results.generator_invested[time_indices, :] = opf_vars.gen_vars.invested[:k, :]
+
+        self.results.Sf[time_indices, :] = opf_vars.branch_vars.flows[:k, :]
+        self.results.St[time_indices, :] = -opf_vars.branch_vars.flows[:k, :]
+        self.results.overloads[time_indices, :] = (opf_vars.branch_vars.flow_slacks_pos[:k, :]
+                                                   - opf_vars.branch_vars.flow_slacks_neg[:k, :])
+        self.results.overloads_cost[time_indices, :] = opf_vars.branch_vars.overload_cost[:k, :]
+
+        self.results.loading[time_indices, :] = opf_vars.branch_vars.loading[:k, :]
+        self.results.phase_shift[time_indices, :] = opf_vars.branch_vars.tap_angles[:k, :]
+
+        self.results.hvdc_Pf[time_indices, :] = opf_vars.hvdc_vars.flows[:k, :]
+        self.results.hvdc_loading[time_indices, :] = opf_vars.hvdc_vars.loading[:k, :]
+
+        self.results.vsc_Pf[time_indices, :] = opf_vars.vsc_vars.flows[:k, :]
+        self.results.vsc_loading[time_indices, :] = opf_vars.vsc_vars.loading[:k, :]
+
+        self.results.fluid_node_current_level[time_indices, :] = opf_vars.fluid_node_vars.current_level[:k, :]
+        self.results.fluid_node_flow_in[time_indices, :] = opf_vars.fluid_node_vars.flow_in[:k, :]
+        self.results.fluid_node_flow_out[time_indices, :] = opf_vars.fluid_node_vars.flow_out[:k, :]
+        self.results.fluid_node_p2x_flow[time_indices, :] = opf_vars.fluid_node_vars.p2x_flow[:k, :]
+        self.results.fluid_node_spillage[time_indices, :] = opf_vars.fluid_node_vars.spillage[:k, :]
+        self.results.fluid_path_flow[time_indices, :] = opf_vars.fluid_path_vars.flow[:k, :]
+        self.results.fluid_injection_flow[time_indices, :] = opf_vars.fluid_inject_vars.flow[:k, :]
+
+        self.results.system_fuel[time_indices, :] = opf_vars.sys_vars.system_fuel[:k]
+        self.results.system_emissions[time_indices, :] = opf_vars.sys_vars.system_emissions[:k]
+        self.results.system_energy_cost[time_indices] = opf_vars.sys_vars.system_unit_energy_cost[:k]
+        self.results.system_total_energy_cost[time_indices] = opf_vars.sys_vars.system_total_energy_cost[:k]
+        self.results.power_by_technology[time_indices] = opf_vars.sys_vars.power_by_technology[:k]
+
+        # set converged for all t to the value of acceptable solution
+        self.results.converged[time_indices] = opf_vars.acceptable_solution
+
+    def linear_opf_rolling_horizon(self, groups: List[int]) -> None:
+        """
+        Run the linear OPF of the time groups as a rolling horizon.
+        Each window solves a group plus the overlap with the next one, and passes the battery
+        energy and fluid levels of its last kept time step to the next window. With the matrix builder,
+        the windows reuse the solver model (or its basis) of the previous one.
+        When the time steps are independent, the windows are solved in parallel processes.
+        :param groups: list of indices that determine the partitions (see get_time_groups)
+        """
+        windows = get_rolling_windows(groups=groups,
+                                      nt=len(self.time_indices),
+                                      overlap=self.options.rolling_horizon_overlap)
+
+        task = LinearOpfWindowTask(grid=self.grid, options=self.options, time_indices=self.time_indices)
+
+        if (self.options.n_workers > 1
+                and len(windows) > 1
+                and not has_inter_temporal_coupling(grid=self.grid, options=self.options)):
+
+            self.report_text('Running the OPF of {} time groups in {} processes...'.format(len(windows),
+                                                                                          self.options.n_workers))
+            run_linear_opf_windows_parallel(task=task,
+                                            windows=windows,
+                                            n_workers=self.options.n_workers,
+                                            store_func=self.store_linear_opf_window,
+                                            logger=self.logger,
+                                            report_progress2=self.report_progress2,
+                                            is_cancel=self.is_cancel)
+            return
+
+        energy_0: Union[Vec, None] = None  # at the beginning
+        fluid_level_0: Union[Vec, None] = None
+        warm_start = HighsWarmStart()
+
+        for w, window in enumerate(windows):
+
+            if self.__cancel__:
+                break
+
+            self.report_text('Running OPF for the time group {0} '
+                             'start {1} - end {2} in external solver...'.format(w + 1,
+                                                                                window.positions[0],
+                                                                                window.positions[-1]))
+
+            opf_vars = task.run(window=window,
+                                energy_0=energy_0,
+                                fluid_level_0=fluid_level_0,
+                                warm_start=warm_start,
+                                logger=self.logger)
+
+            self.store_linear_opf_window(window=window, opf_vars=opf_vars)
+
+            # the next window starts from the state of the last kept time step
+            last = window.kept_positions[-1]
+            energy_0 = self.results.battery_energy[last, :]
+            fluid_level_0 = self.results.fluid_node_current_level[last, :]
+
+            # update progress bar
+            self.report_progress2(w + 1, len(windows))
+
     def add_report(self, eps: float = 1e-6) -> None:
         """
         Add a report of the results (in-place)
@@ -0,0 +1,195 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from typing import Callable, Dict, List, Tuple, Union
+
+from VeraGridEngine.basic_structures import Logger, IntVec, Vec
+from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Simulations.OPF.opf_options import OptimalPowerFlowOptions
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import run_linear_opf_ts, OpfVars
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts_matrix import run_linear_opf_ts_matrix
+from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
+from VeraGridEngine.Utils.process_pool import run_in_process_pool
+
+
+class OpfWindow:
+    """
+    Window of a rolling horizon: the time positions solved together and how many of them are kept.
+    The positions after the kept ones are the overlap (look-ahead) with the next window
+    """
+
+    def __init__(self, positions: IntVec, n_keep: int):
+        """
+        Constructor
+        :param positions: time positions (in the driver time indices) solved in the window
+        :param n_keep: number of the first positions whose results are kept
+        """
+        self.positions: IntVec = positions
+        self.n_keep: int = n_keep
+
+    @property
+    def kept_positions(self) -> IntVec:
+        """
+        Positions whose results are kept
+        """
+        return self.positions[:self.n_keep]
+
+
+def get_rolling_windows(groups: List[int], nt: int, overlap: int = 0) -> List[OpfWindow]:
+    """
+    Get the windows of a rolling horizon from the time groups
+    :param groups: list of indices that determine the partitions (see get_time_groups)
+    :param nt: number of time positions
+    :param overlap: number of positions of the next group that are solved with each window (look-ahead)
+    :return: list of OpfWindow
+    """
+    windows: List[OpfWindow] = list()
+    n = len(groups)
+
+    for i in range(1, n):
+        start_ = groups[i - 1]
+
+        # the last group includes the last time index
+        end_ = groups[i] + 1 if i == n - 1 else groups[i]
+
+        end_overlap = min(end_ + max(overlap, 0), nt)
+        windows.append(OpfWindow(positions=np.arange(start_, end_overlap), n_keep=end_ - start_))
+
+    return windows
+
+
+def has_inter_temporal_coupling(grid: MultiCircuit, options: OptimalPowerFlowOptions) -> bool:
+    """
+    Check if the solution of a time step depends on the others, in which case the windows of
+    the rolling horizon must be solved in order, passing the state from one to the next
+    :param grid: MultiCircuit
+    :param options: OptimalPowerFlowOptions
+    :return: bool
+    """
+    return (options.unit_commitment  # the ramps and the commitment states couple the time steps
+            or options.generation_expansion_planning
+            or grid.get_batteries_number() > 0
+            or grid.get_fluid_nodes_number() > 0)
+
+
+class LinearOpfWindowTask:
+    """
+    Everything needed to solve the linear OPF of a window of the time series.
+    The grid and the options travel together, so that the devices referenced by the options
+    (i.e. the contingency groups) remain the grid devices in the worker processes
+    """
+
+    def __init__(self, grid: MultiCircuit, options: OptimalPowerFlowOptions, time_indices: IntVec):
+        """
+        Constructor
+        :param grid: MultiCircuit
+        :param options: OptimalPowerFlowOptions
+        :param time_indices: time indices of the driver (the windows positions refer to these)
+        """
+        self.grid = grid
+        self.options = options
+        self.time_indices = time_indices
+
+    def run(self,
+            window: OpfWindow,
+            energy_0: Union[Vec, None],
+            fluid_level_0: Union[Vec, None],
+            warm_start: Union[HighsWarmStart, None],
+            logger: Logger) -> OpfVars:
+        """
+        Solve the linear OPF of a window
+        :param window: OpfWindow
+        :param energy_0: initial energy of the batteries (None for their initial state of charge)
+        :param fluid_level_0: initial level of the fluid nodes (None for their initial level)
+        :param warm_start: HighsWarmStart of the previous window (only used by the matrix builder)
+        :param logger: Logger
+        :return: OpfVars
+        """
+        kwargs = dict()
+        if self.options.matrix_lp_builder:
+            run_linear_opf = run_linear_opf_ts_matrix
+            kwargs['warm_start'] = warm_start
+            kwargs['lazy_contingencies'] = self.options.lazy_contingencies
+        else:
+            run_linear_opf = run_linear_opf_ts
+            if self.options.lazy_contingencies:
+                logger.add_warning("The lazy contingencies require the matrix LP builder")
+
+        return run_linear_opf(grid=self.grid,
+                              time_indices=self.time_indices[window.positions],
+                              solver_type=self.options.mip_solver,
+                              zonal_grouping=self.options.zonal_grouping,
+                              skip_generation_limits=self.options.skip_generation_limits,
+                              consider_contingencies=self.options.consider_contingencies,
+                              contingency_groups_used=self.options.contingency_groups_used,
+                              unit_commitment=self.options.unit_commitment,
+                              ramp_constraints=self.options.unit_commitment,
+                              generation_expansion_planning=self.options.generation_expansion_planning,
+                              all_generators_fixed=False,
+                              lodf_threshold=self.options.lodf_tolerance,
+                              maximize_inter_area_flow=self.options.maximize_flows,
+                              inter_aggregation_info=self.options.inter_aggregation_info,
+                              energy_0=energy_0,
+                              fluid_level_0=fluid_level_0,
+                              use_glsk_as_cost=self.options.use_glsk_as_cost,
+                              logger=logger,
+                              export_model_fname=self.options.export_model_fname,
+                              verbose=self.options.verbose,
+                              robust=self.options.robust,
+                              **kwargs)
+
+
+def _run_opf_window(process_data: Dict, w: int, window: OpfWindow) -> Tuple[OpfVars, Logger]:
+    """
+    Solve the linear OPF of a window inside a process of the pool
+    :param process_data: data of the process, with the LinearOpfWindowTask as context
+    :param w: window index
+    :param window: OpfWindow
+    :return: OpfVars, Logger
+    """
+    task: LinearOpfWindowTask = process_data['context']
+
+    if 'warm_start' not in process_data:
+        # the windows of a process are solved one after the other, they can share the solver state
+        process_data['warm_start'] = HighsWarmStart()
+
+    logger = Logger()
+    opf_vars = task.run(window=window,
+                        energy_0=None,
+                        fluid_level_0=None,
+                        warm_start=process_data['warm_start'],
+                        logger=logger)
+    return opf_vars, logger
+
+
+def run_linear_opf_windows_parallel(task: LinearOpfWindowTask,
+                                    windows: List[OpfWindow],
+                                    n_workers: int,
+                                    store_func: Callable[[OpfWindow, OpfVars], None],
+                                    logger: Logger,
+                                    report_progress2: Union[Callable[[int, int], None], None] = None,
+                                    is_cancel: Union[Callable[[], bool], None] = None) -> bool:
+    """
+    Solve the windows of the rolling horizon in a pool of processes.
+    This is only valid if the windows are independent (see has_inter_temporal_coupling)
+    :param task: LinearOpfWindowTask
+    :param windows: list of OpfWindow
+    :param n_workers: number of processes
+    :param store_func: function storing the solution of a window in the results
+    :param logger: Logger
+    :param report_progress2: (optional) progress function (current, total)
+    :param is_cancel: (optional) function returning True if the simulation must stop
+    :return: True if completed, False if cancelled
+    """
+    return run_in_process_pool(func=_run_opf_window,
+                               args_list=[(w, window) for w, window in enumerate(windows)],
+                               context=task,
+                               n_workers=n_workers,
+                               store_func=lambda w, opf_vars: store_func(windows[w], opf_vars),
+                               logger=logger,
+                               report_progress2=report_progress2,
+                               is_cancel=is_cancel)
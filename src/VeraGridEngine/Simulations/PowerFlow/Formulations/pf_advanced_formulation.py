@@ -6,7 +6,7 @@ from typing import Tuple, List, Callable
 import numpy as np
 from numba import njit
 from scipy.sparse import lil_matrix, csc_matrix
-from VeraGridEngine.Topology.admittance_matrices import compute_admittances
+from VeraGridEngine.Topology.admittance_matrices import compute_admittances, compute_incremental_admittances
 from VeraGridEngine.Simulations.PowerFlow.power_flow_results import NumericPowerFlowResults
 from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
@@ -232,7 +232,9 @@ class PfAdvancedFormulation(PfFormulationTemplate):
 
         self.Ys: CxVec = self.nc.passive_branch_data.get_series_admittance()
 
-        self.adm = compute_admittances(
+        # the taps change at every iteration, the admittances are updated in place
+        self.adm = compute_incremental_admittances(
+            nbus=self.nc.nbus,
             R=self.nc.passive_branch_data.R,
             X=self.nc.passive_branch_data.X,
             G=self.nc.passive_branch_data.G,
@@ -241,12 +243,9 @@ class PfAdvancedFormulation(PfFormulationTemplate):
             vtap_f=self.nc.passive_branch_data.virtual_tap_f,
             vtap_t=self.nc.passive_branch_data.virtual_tap_t,
             tap_angle=expand(self.nc.nbr, self.tau, self.idx_dtau, 0.0),
-            Cf=self.Cf,
-            Ct=self.Ct,
             Yshunt_bus=self.nc.get_Yshunt_bus_pu(),
-            conn=self.nc.passive_branch_data.conn,
-            seq=1,
-            add_windings_phase=False
+            F=self.nc.passive_branch_data.F,
+            T=self.nc.passive_branch_data.T
         )
 
         if not len(self.pqv) >= len(k_v_m):
@@ -402,23 +401,10 @@ class PfAdvancedFormulation(PfFormulationTemplate):
         m = x[b:c]
         tau = x[c:d]
 
-        # recompute admittances
-        adm = compute_admittances(
-            R=self.nc.passive_branch_data.R,
-            X=self.nc.passive_branch_data.X,
-            G=self.nc.passive_branch_data.G,
-            B=self.nc.passive_branch_data.B,
-            tap_module=expand(self.nc.nbr, m, self.idx_dm, 1.0),
-            vtap_f=self.nc.passive_branch_data.virtual_tap_f,
-            vtap_t=self.nc.passive_branch_data.virtual_tap_t,
-            tap_angle=expand(self.nc.nbr, tau, self.idx_dtau, 0.0),
-            Cf=self.Cf,
-            Ct=self.Ct,
-            Yshunt_bus=self.nc.get_Yshunt_bus_pu(),
-            conn=self.nc.passive_branch_data.conn,
-            seq=1,
-            add_windings_phase=False,
-        )
+        # set the trial taps in place (restored at the end)
+        adm = self.adm
+        adm.set_all_taps(tap_module=expand(self.nc.nbr, m, self.idx_dm, 1.0),
+                         tap_angle=expand(self.nc.nbr, tau, self.idx_dtau, 0.0))
 
         # compute the complex voltage
         V = polar_to_rect(Vm, Va)
@@ -453,6 +439,10 @@ class PfAdvancedFormulation(PfFormulationTemplate):
             Qt - self.nc.active_branch_data.Qset[self.idx_dQt]
         ]
 
+        # restore the taps of the problem
+        adm.set_all_taps(tap_module=expand(self.nc.nbr, self.m, self.idx_dm, 1.0),
+                         tap_angle=expand(self.nc.nbr, self.tau, self.idx_dtau, 0.0))
+
         # compute the error
         return compute_fx_error(_f), x
 
@@ -463,26 +453,14 @@ class PfAdvancedFormulation(PfFormulationTemplate):
         :param update_controls:
         :return: error, converged?, x, fx
         """
+        self._controls_changed = False
+
         # set the problem state
         self.x2var(x)
 
-        # recompute admittances
-        self.adm = compute_admittances(
-            R=self.nc.passive_branch_data.R,
-            X=self.nc.passive_branch_data.X,
-            G=self.nc.passive_branch_data.G,
-            B=self.nc.passive_branch_data.B,
-            tap_module=expand(self.nc.nbr, self.m, self.idx_dm, 1.0),
-            vtap_f=self.nc.passive_branch_data.virtual_tap_f,
-            vtap_t=self.nc.passive_branch_data.virtual_tap_t,
-            tap_angle=expand(self.nc.nbr, self.tau, self.idx_dtau, 0.0),
-            Cf=self.Cf,
-            Ct=self.Ct,
-            Yshunt_bus=self.nc.get_Yshunt_bus_pu(),
-            conn=self.nc.passive_branch_data.conn,
-            seq=1,
-            add_windings_phase=False
-        )
+        # update the admittances of the branches whose taps changed
+        self.adm.set_all_taps(tap_module=expand(self.nc.nbr, self.m, self.idx_dm, 1.0),
+                              tap_angle=expand(self.nc.nbr, self.tau, self.idx_dtau, 0.0))
 
         # compute the complex voltage
         self.V = polar_to_rect(self.Vm, self.Va)
@@ -622,6 +600,8 @@ class PfAdvancedFormulation(PfFormulationTemplate):
                 vd, pq, pv, pqv, p, self.no_slack = compile_types(Pbus=self.S0.real, types=self.bus_types)
                 self.update_bus_types(pq=pq, pv=pv, pqv=pqv, p=p)
 
+            self._controls_changed = any_change or branch_ctrl_change
+
             if any_change or branch_ctrl_change:
                 # recompute the error based on the new Scalc and S0
                 self._f = self.fx()
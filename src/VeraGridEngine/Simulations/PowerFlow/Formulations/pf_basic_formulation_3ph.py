@@ -789,6 +789,8 @@ class PfBasicFormulation3Ph(PfFormulationTemplate):
         :param update_controls:
         :return: error, converged?, x
         """
+        self._controls_changed = False
+
         # set the problem state
         self.x2var(x)
 
@@ -863,6 +865,8 @@ class PfBasicFormulation3Ph(PfFormulationTemplate):
                     # Update the objective power to reflect the slack distribution
                     self.S0 += delta
 
+            self._controls_changed = any_change
+
             if any_change:
                 # recompute the error based on the new Scalc and S0
                 self._f = self.fx()
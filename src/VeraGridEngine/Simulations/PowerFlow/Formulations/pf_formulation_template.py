@@ -41,6 +41,9 @@ class PfFormulationTemplate:
 
         self._controls_tol: float = 1.0e-2  # min(1e-2, self.options.tolerance * 100.0)
 
+        # did the last update change the controls (i.e. the bus types)?
+        self._controls_changed: bool = False
+
     @property
     def converged(self) -> bool:
         """
@@ -57,6 +60,14 @@ class PfFormulationTemplate:
         """
         return self._error
 
+    @property
+    def controls_changed(self) -> bool:
+        """
+        Did the last update change the controls? then the Jacobian may have changed its structure
+        :return:
+        """
+        return self._controls_changed
+
     @property
     def f(self) -> Vec:
         """
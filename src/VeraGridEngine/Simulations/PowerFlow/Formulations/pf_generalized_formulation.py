@@ -1454,6 +1454,8 @@ class PfGeneralizedFormulation(PfFormulationTemplate):
         :param update_controls:
         :return: error, converged?, x, fx
         """
+        self._controls_changed = False
+
         # set the problem state
         self.x2var(x)
 
@@ -1603,6 +1605,8 @@ class PfGeneralizedFormulation(PfFormulationTemplate):
                 # the composition of x may have changed, so recompute
                 x = self.var2x()
 
+            self._controls_changed = any_change or branch_ctrl_change
+
             if any_change or branch_ctrl_change:
                 # recompute the error based on the new Scalc and S0
                 self._f = self.fx()
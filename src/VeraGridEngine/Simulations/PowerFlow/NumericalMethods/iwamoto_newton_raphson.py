@@ -8,6 +8,7 @@ import scipy
 import numpy as np
 from VeraGridEngine.Utils.NumericalMethods.sparse_solve import get_sparse_type, get_linear_solver
 from VeraGridEngine.Utils.Sparse.csc2 import spsolve_csc
+from VeraGridEngine.Utils.Sparse.factorization_cache import SymbolicFactorizationCache
 from VeraGridEngine.Simulations.Derivatives.ac_jacobian import AC_jacobianVc, CSC
 import VeraGridEngine.Simulations.PowerFlow.NumericalMethods.common_functions as cf
 from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
@@ -90,6 +91,9 @@ def IwamotoNR(nc: NumericalCircuit,
     """
     start = time.time()
 
+    # the column ordering of the Jacobian is only reused among the iterations of this run
+    factorization_cache = SymbolicFactorizationCache(max_size=4)
+
     # initialize
     iter_ = 0
     V = V0
@@ -129,7 +133,7 @@ def IwamotoNR(nc: NumericalCircuit,
 
             # compute update step
             try:
-                dx, ok = spsolve_csc(J, f)
+                dx, ok = spsolve_csc(J, f, cache=factorization_cache)
 
                 if not ok:
                     end = time.time()
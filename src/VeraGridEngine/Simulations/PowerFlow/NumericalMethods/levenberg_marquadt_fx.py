@@ -11,7 +11,6 @@ from VeraGridEngine.Simulations.PowerFlow.Formulations.pf_formulation_template i
 from VeraGridEngine.Utils.Sparse.csc2 import mat_to_scipy
 from VeraGridEngine.basic_structures import Logger
 
-linear_solver = get_linear_solver()
 
 
 def levenberg_marquardt_fx(problem: PfFormulationTemplate,
@@ -37,6 +36,9 @@ def levenberg_marquardt_fx(problem: PfFormulationTemplate,
     """
     start = time.time()
 
+    # the symbolic analysis of the linear systems is only reused among the iterations of this run
+    linear_solver = get_linear_solver(reuse_analysis=True)
+
     # get the initial point
     x = problem.var2x()
 
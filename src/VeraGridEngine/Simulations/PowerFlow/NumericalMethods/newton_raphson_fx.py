@@ -6,7 +6,8 @@ import time
 import numpy as np
 from VeraGridEngine.Simulations.PowerFlow.power_flow_results import NumericPowerFlowResults
 from VeraGridEngine.Simulations.PowerFlow.Formulations.pf_formulation_template import PfFormulationTemplate
-from VeraGridEngine.Utils.Sparse.csc2 import CSC, spsolve_csc
+from VeraGridEngine.Utils.Sparse.csc2 import CSC, spfactor
+from VeraGridEngine.Utils.Sparse.factorization_cache import SparseLuFactor, SymbolicFactorizationCache
 from VeraGridEngine.basic_structures import Logger
 
 
@@ -15,7 +16,9 @@ def newton_raphson_fx(problem: PfFormulationTemplate,
                       max_iter: int = 10,
                       trust: float = 1.0,
                       verbose: int = 0,
-                      logger: Logger = Logger()) -> NumericPowerFlowResults:
+                      logger: Logger = Logger(),
+                      dishonest_iterations: int = 0,
+                      dishonest_ratio: float = 0.5) -> NumericPowerFlowResults:
     """
     Newton-Raphson with Line search to solve:
 
@@ -23,12 +26,17 @@ def newton_raphson_fx(problem: PfFormulationTemplate,
         s.t.
             g(x) = 0
 
+    In the "dishonest" mode, the factorization of the Jacobian is reused for up to dishonest_iterations
+    consecutive iterations, as long as each of them reduces the error by the factor dishonest_ratio.
+
     :param problem: PfFormulationTemplate
     :param tol: Error tolerance
     :param max_iter: Maximum number of iterations
     :param trust: trust amount in the derivative length correctness
     :param verbose:  Display console information
     :param logger: Logger instance
+    :param dishonest_iterations: maximum number of consecutive iterations reusing a Jacobian factorization
+    :param dishonest_ratio: minimum error reduction ratio to keep reusing the Jacobian factorization
     :return: ConvexMethodResult
     """
     start = time.time()
@@ -66,6 +74,13 @@ def newton_raphson_fx(problem: PfFormulationTemplate,
         if verbose > 1:
             print("x0:\n", problem.get_x_df(x))
 
+        J: CSC | None = None
+        factor: SparseLuFactor | None = None
+
+        # the column ordering of the Jacobian is only reused among the iterations of this run
+        factorization_cache = SymbolicFactorizationCache(max_size=4)
+        n_reused = 0
+
         while not converged and iteration < max_iter:
 
             # update iteration counter
@@ -76,32 +91,36 @@ def newton_raphson_fx(problem: PfFormulationTemplate,
                 print(f'Iter: {iteration}')
                 print('-' * 200)
 
-            J: CSC = problem.Jacobian()
+            if factor is not None and n_reused < dishonest_iterations and factor.shape[0] == len(f):
+
+                # dishonest step: reuse the previous Jacobian factorization
+                dx = factor.solve(-f)
+                n_reused += 1
 
-            if J.shape[0] != J.shape[1]:
-                logger.add_error("Jacobian not square, check the controls!", "Newton-Raphson",
-                                 value=J.shape[0], expected_value=J.shape[1])
-                return problem.get_solution(elapsed=time.time() - start, iterations=iteration, )
+            else:
 
-            if J.shape[0] != len(f):
-                logger.add_error("Jacobian and residuals have different sizes!", "Newton-Raphson",
-                                 value=len(f), expected_value=J.shape[0])
-                return problem.get_solution(elapsed=time.time() - start, iterations=iteration)
+                J = problem.Jacobian()
 
-            try:
+                if J.shape[0] != J.shape[1]:
+                    logger.add_error("Jacobian not square, check the controls!", "Newton-Raphson",
+                                     value=J.shape[0], expected_value=J.shape[1])
+                    return problem.get_solution(elapsed=time.time() - start, iterations=iteration, )
+
+                if J.shape[0] != len(f):
+                    logger.add_error("Jacobian and residuals have different sizes!", "Newton-Raphson",
+                                     value=len(f), expected_value=J.shape[0])
+                    return problem.get_solution(elapsed=time.time() - start, iterations=iteration)
 
                 # compute update step: J x Δx = Δg
-                dx, ok = spsolve_csc(J, -f)
+                factor = spfactor(J, cache=factorization_cache)
+                n_reused = 0
 
-            except RuntimeError:
-                logger.add_error(f"Newton-Raphson's Jacobian is singular @iter {iteration}:")
-                print("(newton_raphson_fx.py) Singular Jacobian")
-                return problem.get_solution(elapsed=time.time() - start, iterations=iteration)
+                if factor is None:
+                    logger.add_error(f"Newton-Raphson's Jacobian is singular @iter {iteration}:")
+                    print("(newton_raphson_fx.py) Singular Jacobian")
+                    return problem.get_solution(elapsed=time.time() - start, iterations=iteration)
 
-            if not ok:
-                logger.add_error(f"Newton-Raphson's Jacobian is singular @iter {iteration}:")
-                print("(newton_raphson_fx.py) Singular Jacobian")
-                return problem.get_solution(elapsed=time.time() - start, iterations=iteration)
+                dx = factor.solve(-f)
 
             # line search
             mu = trust0
@@ -113,6 +132,14 @@ def newton_raphson_fx(problem: PfFormulationTemplate,
             update_controls = error < (tol * 100)
             error, converged, x, f = problem.update(x=x_sol, update_controls=update_controls)
 
+            if n_reused > 0 and error > dishonest_ratio * error0:
+                # the old Jacobian is not good enough anymore
+                factor = None
+
+            if factor is not None and (problem.controls_changed or len(f) != factor.shape[0]):
+                # the controls changed the problem (i.e. the bus types), so the factorization is not valid anymore
+                factor = None
+
             if verbose > 1:
                 print("x:\n", problem.get_x_df(x))
 
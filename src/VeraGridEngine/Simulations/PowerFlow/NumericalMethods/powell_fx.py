@@ -12,7 +12,6 @@ from VeraGridEngine.Utils.Sparse.csc2 import mat_to_scipy
 from VeraGridEngine.basic_structures import Logger, Vec
 from VeraGridEngine.Utils.NumericalMethods.common import norm
 
-linear_solver = get_linear_solver()
 
 
 def compute_beta(a: Vec, b: Vec, delta: float):
@@ -83,6 +82,9 @@ def powell_fx(problem: PfFormulationTemplate,
     """
     start = time.time()
 
+    # the symbolic analysis of the linear systems is only reused among the iterations of this run
+    linear_solver = get_linear_solver(reuse_analysis=True)
+
     # get the initial point
     x = problem.var2x()
 
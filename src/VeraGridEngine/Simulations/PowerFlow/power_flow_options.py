@@ -34,7 +34,8 @@ class PowerFlowOptions(OptionsTemplate):
                  use_stored_guess: bool = False,
                  initialize_angles: bool = False,
                  generate_report: bool = False,
-                 three_phase_unbalanced: bool = False):
+                 three_phase_unbalanced: bool = False,
+                 dishonest_newton_iterations: int = 0):
         """
         Power flow options class
         :param solver_type: Solver type
@@ -53,6 +54,9 @@ class PowerFlowOptions(OptionsTemplate):
         :param use_stored_guess: Use the existing solution from the Bus class (Vm0, Va0)
         :param initialize_angles: Use a linear power flow to initialize the voltage guess
         :param generate_report: Generate the power flow report after the solution?
+        :param three_phase_unbalanced: Run the three-phase unbalanced power flow?
+        :param dishonest_newton_iterations: Maximum number of consecutive Newton-Raphson iterations reusing
+                                            the Jacobian factorization (0: factorize the Jacobian every iteration)
         """
         OptionsTemplate.__init__(self, name='PowerFlowOptions')
 
@@ -100,6 +104,8 @@ class PowerFlowOptions(OptionsTemplate):
 
         self.three_phase_unbalanced = three_phase_unbalanced
 
+        self.dishonest_newton_iterations = dishonest_newton_iterations
+
         self.register(key="solver_type", tpe=SolverType)
         self.register(key="retry_with_other_methods", tpe=bool)
         self.register(key="tolerance", tpe=float)
@@ -121,4 +127,5 @@ class PowerFlowOptions(OptionsTemplate):
         self.register(key="use_stored_guess", tpe=bool)
         self.register(key="initialize_angles", tpe=bool)
         self.register(key="generate_report", tpe=bool)
-        self.register(key="three_phase_unbalanced", tpe=bool)
\ No newline at end of file
+        self.register(key="three_phase_unbalanced", tpe=bool)
+        self.register(key="dishonest_newton_iterations", tpe=int)
\ No newline at end of file
@@ -0,0 +1,106 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from typing import Dict, List, Tuple
+from VeraGridEngine.DataStructures.numerical_circuit import NumericalCircuit
+from VeraGridEngine.Topology.admittance_matrices import IncrementalAdmittanceMatrices
+from VeraGridEngine.basic_structures import IntVec, Vec, CxVec
+from VeraGridEngine.enumerations import BusMode
+
+
+class PowerFlowTopologyCache:
+    """
+    Structures shared by the power flows of a group of time steps with the same topology:
+    the island split and the island admittance matrices.
+    The admittances are only reused if the branch impedances are exactly the same,
+    the changes of taps and shunts are applied in place, so the cache is always safe to use within a group.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor
+        """
+        # consider_hvdc_as_island_links -> bus indices of each island
+        self.idx_islands: Dict[bool, List[IntVec]] = dict()
+
+        # island index -> (branch admittance data, IncrementalAdmittanceMatrices)
+        self.admittances: Dict[int, Tuple[List[Vec | IntVec], IncrementalAdmittanceMatrices]] = dict()
+
+    def split_into_islands(self,
+                           nc: NumericalCircuit,
+                           ignore_single_node_islands: bool,
+                           consider_hvdc_as_island_links: bool,
+                           logger) -> List[NumericalCircuit]:
+        """
+        Split the circuit into islands, finding the islands only the first time
+        :param nc: NumericalCircuit
+        :param ignore_single_node_islands: ignore islands composed of only one bus
+        :param consider_hvdc_as_island_links: Does the HVDCLine works for the topology as a normal line?
+        :param logger: Logger
+        :return: List of NumericalCircuit islands
+        """
+        islands = nc.split_into_islands(ignore_single_node_islands=ignore_single_node_islands,
+                                        consider_hvdc_as_island_links=consider_hvdc_as_island_links,
+                                        logger=logger,
+                                        idx_islands=self.idx_islands.get(consider_hvdc_as_island_links, None))
+
+        if consider_hvdc_as_island_links not in self.idx_islands:
+            self.idx_islands[consider_hvdc_as_island_links] = [island.bus_data.original_idx for island in islands]
+
+        return islands
+
+    def set_admittances(self, i: int, island: NumericalCircuit) -> None:
+        """
+        Give an island the admittances computed for a previous step if its branch impedances did not change
+        (updating in place the taps and shunts that changed)
+        :param i: island index
+        :param island: NumericalCircuit island
+        """
+        data = [island.passive_branch_data.R,
+                island.passive_branch_data.X,
+                island.passive_branch_data.G,
+                island.passive_branch_data.B,
+                island.passive_branch_data.F,
+                island.passive_branch_data.T,
+                island.passive_branch_data.virtual_tap_f,
+                island.passive_branch_data.virtual_tap_t]
+
+        entry = self.admittances.get(i, None)
+
+        if entry is not None:
+            data0, adm = entry
+            if all(len(a) == len(b) and np.array_equal(a, b) for a, b in zip(data, data0)):
+                # same branches: the tap and shunt changes are applied in place
+                adm.set_all_taps(tap_module=island.active_branch_data.tap_module,
+                                 tap_angle=island.active_branch_data.tap_angle)
+                adm.set_all_bus_shunts(Yshunt=island.get_Yshunt_bus_pu())
+                island.set_admittance_matrices(adm)
+                return
+
+        adm = island.get_incremental_admittance_matrices()
+        island.set_admittance_matrices(adm)
+        self.admittances[i] = ([a.copy() for a in data], adm)
+
+
+def get_warm_start_voltage(V_prev: CxVec, nc: NumericalCircuit) -> CxVec:
+    """
+    Compose the initial voltage of a power flow from the solution of a previous one.
+    The buses with a fixed voltage module keep their set point.
+    :param V_prev: previous voltage solution
+    :param nc: NumericalCircuit to be solved
+    :return: voltage guess
+    """
+    V0 = nc.bus_data.Vbus
+    fixed_vm = ((nc.bus_data.bus_types == BusMode.PV_tpe.value) |
+                (nc.bus_data.bus_types == BusMode.Slack_tpe.value) |
+                (nc.bus_data.bus_types == BusMode.PQV_tpe.value))
+    solved = np.abs(V_prev) > 0
+
+    Vm = np.where(fixed_vm | ~solved, np.abs(V0), np.abs(V_prev))
+    Va = np.where(solved, np.angle(V_prev), np.angle(V0))
+
+    return Vm * np.exp(1j * Va)
@@ -6,11 +6,14 @@
 import numpy as np
 from typing import Union
 from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_results import PowerFlowTimeSeriesResults
+from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_worker import (store_pf_ts_results, run_pf_ts_positions,
+                                                                       run_pf_ts_parallel)
 from VeraGridEngine.Devices.multi_circuit import MultiCircuit
 from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
 from VeraGridEngine.Simulations.driver_template import TimeSeriesDriverTemplate
 from VeraGridEngine.Simulations.Clustering.clustering_results import ClusteringResults
 import VeraGridEngine.Simulations.PowerFlow.power_flow_worker as pf_worker
+from VeraGridEngine.Compilers.circuit_to_data_ts import NumericalCircuitTs
 from VeraGridEngine.Compilers.circuit_to_bentayga import bentayga_pf
 from VeraGridEngine.Compilers.circuit_to_newton_pa import newton_pa_pf
 from VeraGridEngine.Compilers.circuit_to_pgm import pgm_pf
@@ -29,7 +32,8 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
                  time_indices: Union[IntVec, None] = None,
                  opf_time_series_results=None,
                  clustering_results: Union[ClusteringResults, None] = None,
-                 engine: EngineType = EngineType.VeraGrid):
+                 engine: EngineType = EngineType.VeraGrid,
+                 n_workers: int = 1):
         """
         PowerFlowTimeSeries constructor
         :param grid: MultiCircuit instance
@@ -38,6 +42,7 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         :param opf_time_series_results: ClusteringResults instance (optional)
         :param clustering_results: ClusteringResults instance (optional)
         :param engine: Calculation engine to use
+        :param n_workers: number of processes to run the time steps (1: run in this process)
         """
         TimeSeriesDriverTemplate.__init__(
             self,
@@ -50,6 +55,9 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         self.options = PowerFlowOptions() if options is None else options
 
         self.opf_time_series_results = opf_time_series_results
+
+        self.n_workers = n_workers
+
         n = grid.get_bus_number()
         self.results = PowerFlowTimeSeriesResults(
             n=n,
@@ -93,37 +101,89 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         # compile dictionaries once for speed
         bus_dict = {bus: i for i, bus in enumerate(self.grid.buses)}
         areas_dict = {elm: i for i, elm in enumerate(self.grid.areas)}
+
+        if self.opf_time_series_results is None:
+            # gather all the profiles at once and compile only once per topological state
+            self.report_text('Compiling the time series...')
+            nc_ts = NumericalCircuitTs(circuit=self.grid,
+                                       time_indices=time_indices,
+                                       apply_temperature=self.options.apply_temperature_correction,
+                                       branch_tolerance_mode=self.options.branch_impedance_tolerance_mode,
+                                       use_stored_guess=self.options.use_stored_guess,
+                                       bus_dict=bus_dict,
+                                       areas_dict=areas_dict,
+                                       control_taps_modules=self.options.control_taps_modules,
+                                       control_taps_phase=self.options.control_taps_phase,
+                                       control_remote_voltage=self.options.control_remote_voltage,
+                                       logger=self.logger)
+        else:
+            # the OPF results modify the injections, hence we compile every time step
+            nc_ts = None
+
         self.report_progress(0.0)
-        for it, t in enumerate(time_indices):
-
-            self.report_text('Time series at ' + str(self.grid.time_profile[t]) + '...')
-            self.report_progress2(it, len(time_indices))
-
-            # run power flow
-            pf_res = pf_worker.multi_island_pf(multi_circuit=self.grid,
-                                               t=t,
-                                               options=self.options,
-                                               opf_results=self.opf_time_series_results,
-                                               bus_dict=bus_dict,
-                                               areas_dict=areas_dict)
-
-            # gather results
-            time_series_results.voltage[it, :] = pf_res.voltage
-            time_series_results.S[it, :] = pf_res.Sbus
-            time_series_results.Sf[it, :] = pf_res.Sf
-            time_series_results.St[it, :] = pf_res.St
-            time_series_results.Vbranch[it, :] = pf_res.Vbranch
-            time_series_results.loading[it, :] = pf_res.loading
-            time_series_results.losses[it, :] = pf_res.losses
-            time_series_results.hvdc_losses[it, :] = pf_res.losses_hvdc
-            time_series_results.hvdc_Pf[it, :] = pf_res.Pf_hvdc
-            time_series_results.hvdc_Pt[it, :] = pf_res.Pt_hvdc
-            time_series_results.hvdc_loading[it, :] = pf_res.loading_hvdc
-            time_series_results.error_values[it] = pf_res.error
-            time_series_results.converged_values[it] = pf_res.converged
-
-            if self.__cancel__:
-                return time_series_results
+
+        if nc_ts is None:
+            for it, t in enumerate(time_indices):
+
+                self.report_text('Time series at ' + str(self.grid.time_profile[t]) + '...')
+                self.report_progress2(it, len(time_indices))
+
+                # run power flow
+                pf_res = pf_worker.multi_island_pf(multi_circuit=self.grid,
+                                                   t=t,
+                                                   options=self.options,
+                                                   opf_results=self.opf_time_series_results,
+                                                   bus_dict=bus_dict,
+                                                   areas_dict=areas_dict)
+
+                store_pf_ts_results(results=time_series_results, it=it, pf_res=pf_res)
+
+                if self.__cancel__:
+                    return time_series_results
+
+        else:
+            # run the time steps grouped by topology: the island split and the admittances are shared
+            # within a group, and every step is warm-started from the previous step of the group
+            positions = [it for group_positions in nc_ts.groups.values() for it in group_positions]
+
+            if self.n_workers > 1:
+
+                def report_chunks(current: int, total: int) -> None:
+                    """
+                    Report the progress of the processes (the chunks finish in any order)
+                    :param current: number of solved time steps
+                    :param total: number of time steps
+                    """
+                    self.report_text('Time series: {} of {} steps in {} processes...'.format(current, total,
+                                                                                              self.n_workers))
+                    self.report_progress2(current, total)
+
+                report_chunks(0, len(time_indices))
+                run_pf_ts_parallel(nc_ts=nc_ts,
+                                   options=self.options,
+                                   results=time_series_results,
+                                   n_workers=self.n_workers,
+                                   logger=self.logger,
+                                   report_progress2=report_chunks,
+                                   is_cancel=self.is_cancel)
+            else:
+
+                def report_step(k: int, t: int) -> None:
+                    """
+                    Report the time step about to be solved
+                    :param k: number of solved time steps
+                    :param t: time index
+                    """
+                    self.report_text('Time series at ' + str(self.grid.time_profile[t]) + '...')
+                    self.report_progress2(k, len(time_indices))
+
+                run_pf_ts_positions(nc_ts=nc_ts,
+                                    positions=positions,
+                                    options=self.options,
+                                    results=time_series_results,
+                                    logger=self.logger,
+                                    report_step=report_step,
+                                    is_cancel=self.is_cancel)
 
         return time_series_results
 
@@ -0,0 +1,211 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from typing import Callable, Dict, List, Tuple, Union
+
+from VeraGridEngine.basic_structures import Logger, IntVec
+from VeraGridEngine.Compilers.circuit_to_data_ts import NumericalCircuitTs
+from VeraGridEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
+from VeraGridEngine.Simulations.PowerFlow.power_flow_results import PowerFlowResults
+from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_results import PowerFlowTimeSeriesResults
+from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_cache import PowerFlowTopologyCache, get_warm_start_voltage
+from VeraGridEngine.Simulations.PowerFlow.power_flow_worker import multi_island_pf_nc
+from VeraGridEngine.Utils.shared_arrays import SharedArrays
+from VeraGridEngine.Utils.process_pool import run_in_process_pool
+
+# time series results arrays filled by the power flows
+PF_TS_RESULTS_ARRAYS: Tuple[str, ...] = ('voltage', 'S', 'Sf', 'St', 'Vbranch', 'loading', 'losses',
+                                         'hvdc_losses', 'hvdc_Pf', 'hvdc_Pt', 'hvdc_loading',
+                                         'error_values', 'converged_values')
+
+
+class PowerFlowTsSharedResults:
+    """
+    Time series results arrays living in shared memory (same attributes as PowerFlowTimeSeriesResults)
+    """
+
+    def __init__(self, shared: SharedArrays):
+        """
+        Constructor
+        :param shared: SharedArrays with the PF_TS_RESULTS_ARRAYS
+        """
+        self.voltage = shared['voltage']
+        self.S = shared['S']
+        self.Sf = shared['Sf']
+        self.St = shared['St']
+        self.Vbranch = shared['Vbranch']
+        self.loading = shared['loading']
+        self.losses = shared['losses']
+        self.hvdc_losses = shared['hvdc_losses']
+        self.hvdc_Pf = shared['hvdc_Pf']
+        self.hvdc_Pt = shared['hvdc_Pt']
+        self.hvdc_loading = shared['hvdc_loading']
+        self.error_values = shared['error_values']
+        self.converged_values = shared['converged_values']
+
+
+def store_pf_ts_results(results: Union[PowerFlowTimeSeriesResults, PowerFlowTsSharedResults],
+                        it: int,
+                        pf_res: PowerFlowResults) -> None:
+    """
+    Store the results of a power flow in the time series results
+    :param results: PowerFlowTimeSeriesResults (or its shared memory counterpart)
+    :param it: time position in the results
+    :param pf_res: PowerFlowResults
+    """
+    results.voltage[it, :] = pf_res.voltage
+    results.S[it, :] = pf_res.Sbus
+    results.Sf[it, :] = pf_res.Sf
+    results.St[it, :] = pf_res.St
+    results.Vbranch[it, :] = pf_res.Vbranch
+    results.loading[it, :] = pf_res.loading
+    results.losses[it, :] = pf_res.losses
+    results.hvdc_losses[it, :] = pf_res.losses_hvdc
+    results.hvdc_Pf[it, :] = pf_res.Pf_hvdc
+    results.hvdc_Pt[it, :] = pf_res.Pt_hvdc
+    results.hvdc_loading[it, :] = pf_res.loading_hvdc
+    results.error_values[it] = pf_res.error
+    results.converged_values[it] = pf_res.converged
+
+
+def run_pf_ts_positions(nc_ts: NumericalCircuitTs,
+                        positions: List[int] | IntVec,
+                        options: PowerFlowOptions,
+                        results: Union[PowerFlowTimeSeriesResults, PowerFlowTsSharedResults],
+                        logger: Logger,
+                        report_step: Callable[[int, int], None] | None = None,
+                        is_cancel: Callable[[], bool] | None = None) -> None:
+    """
+    Run the power flows of some time positions, sharing the topology structures and warm-starting
+    each step from the previous one as long as the topology group does not change.
+    :param nc_ts: NumericalCircuitTs
+    :param positions: positions in nc_ts.time_indices to run (ideally sorted by group)
+    :param options: PowerFlowOptions
+    :param results: results to fill at the given positions
+    :param logger: Logger
+    :param report_step: (optional) function called with (number of solved steps, time index) before each step
+    :param is_cancel: (optional) function returning True if the simulation must stop
+    """
+    topology_cache = None
+    V_prev = None
+    rep_prev = -1
+
+    for k, it in enumerate(positions):
+        t = nc_ts.time_indices[it]
+        rep = nc_ts.mapping[it]
+
+        if report_step is not None:
+            report_step(k, t)
+
+        if rep != rep_prev:
+            # new topology group: start from scratch
+            topology_cache = PowerFlowTopologyCache()
+            V_prev = None
+            rep_prev = rep
+
+        nc = nc_ts.nc_at(t)
+
+        pf_res = multi_island_pf_nc(
+            nc=nc,
+            options=options,
+            logger=logger,
+            V_guess=None if V_prev is None else get_warm_start_voltage(V_prev=V_prev, nc=nc),
+            topology_cache=topology_cache
+        )
+
+        store_pf_ts_results(results=results, it=it, pf_res=pf_res)
+
+        # only converged solutions are good starting points
+        V_prev = pf_res.voltage if pf_res.converged else None
+
+        if is_cancel is not None and is_cancel():
+            return
+
+
+def get_pf_ts_chunks(nc_ts: NumericalCircuitTs, n_workers: int, chunks_per_worker: int = 4) -> List[List[int]]:
+    """
+    Split the time positions into contiguous chunks that never mix topology groups
+    :param nc_ts: NumericalCircuitTs
+    :param n_workers: number of workers
+    :param chunks_per_worker: approximate number of chunks per worker (for load balancing)
+    :return: list of lists of positions
+    """
+    chunk_size = max(1, int(np.ceil(nc_ts.nt / (n_workers * chunks_per_worker))))
+    chunks = list()
+    for rep, group_positions in nc_ts.groups.items():
+        for i in range(0, len(group_positions), chunk_size):
+            chunks.append(list(group_positions[i:i + chunk_size]))
+    return chunks
+
+
+def _run_pf_ts_chunk(process_data: Dict, positions: List[int]) -> Tuple[int, Logger]:
+    """
+    Run a chunk of time positions inside a process of the pool
+    :param process_data: data of the process, with (NumericalCircuitTs, PowerFlowOptions, SharedArraysSpec) as context
+    :param positions: positions in nc_ts.time_indices
+    :return: number of solved positions, Logger
+    """
+    nc_ts, options, spec = process_data['context']
+
+    if 'results' not in process_data:
+        process_data['shared'] = SharedArrays.attach(spec)
+        process_data['results'] = PowerFlowTsSharedResults(process_data['shared'])
+
+    logger = Logger()
+    run_pf_ts_positions(nc_ts=nc_ts,
+                        positions=positions,
+                        options=options,
+                        results=process_data['results'],
+                        logger=logger)
+    return len(positions), logger
+
+
+def run_pf_ts_parallel(nc_ts: NumericalCircuitTs,
+                       options: PowerFlowOptions,
+                       results: PowerFlowTimeSeriesResults,
+                       n_workers: int,
+                       logger: Logger,
+                       report_progress2: Callable[[int, int], None] | None = None,
+                       is_cancel: Callable[[], bool] | None = None) -> None:
+    """
+    Run the power flow time series in a pool of processes.
+    The workers write their rows straight into shared memory, so the results do not depend on
+    the order in which the chunks are finished.
+    :param nc_ts: NumericalCircuitTs
+    :param options: PowerFlowOptions
+    :param results: PowerFlowTimeSeriesResults to fill (rows in the order of nc_ts.time_indices)
+    :param n_workers: number of processes
+    :param logger: Logger
+    :param report_progress2: (optional) progress function (current, total)
+    :param is_cancel: (optional) function returning True if the simulation must stop
+    """
+    # compile the groups here, so that the processes don't need the MultiCircuit
+    nc_ts.compile_base_circuits()
+
+    shared = SharedArrays.create({name: (getattr(results, name).shape, getattr(results, name).dtype)
+                                  for name in PF_TS_RESULTS_ARRAYS})
+    for name in PF_TS_RESULTS_ARRAYS:
+        shared[name][...] = getattr(results, name)
+
+    chunks = get_pf_ts_chunks(nc_ts=nc_ts, n_workers=n_workers)
+
+    try:
+        run_in_process_pool(func=_run_pf_ts_chunk,
+                            args_list=[(chunk,) for chunk in chunks],
+                            context=(nc_ts, options, shared.spec),
+                            n_workers=n_workers,
+                            logger=logger,
+                            weights=[len(chunk) for chunk in chunks],
+                            report_progress2=report_progress2,
+                            is_cancel=is_cancel)
+
+        # copy the results out of the shared memory
+        for name in PF_TS_RESULTS_ARRAYS:
+            getattr(results, name)[...] = shared[name]
+
+    finally:
+        shared.close()
@@ -28,6 +28,7 @@ from VeraGridEngine.basic_structures import CxVec, Vec
 
 if TYPE_CHECKING:  # Only imports the below statements during type checking
     from VeraGridEngine.Compilers.circuit_to_data import VALID_OPF_RESULTS
+    from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_cache import PowerFlowTopologyCache
 
 
 def __split_reactive_power_into_devices(nc: NumericalCircuit, Qbus: Vec, results: PowerFlowResults) -> None:
@@ -206,7 +207,8 @@ def __solve_island_complete_support(nc: NumericalCircuit,
                                              max_iter=options.max_iter,
                                              trust=options.trust_radius,
                                              verbose=options.verbose,
-                                             logger=logger)
+                                             logger=logger,
+                                             dishonest_iterations=options.dishonest_newton_iterations)
 
             elif solver_type == SolverType.PowellDogLeg:
 
@@ -621,7 +623,8 @@ def __solve_island_limited_support(island: NumericalCircuit,
                                              max_iter=options.max_iter,
                                              trust=options.trust_radius,
                                              verbose=options.verbose,
-                                             logger=logger)
+                                             logger=logger,
+                                             dishonest_iterations=options.dishonest_newton_iterations)
 
             # Powell's Dog Leg (full)
             elif solver_type == SolverType.PowellDogLeg:
@@ -720,7 +723,8 @@ def __multi_island_pf_nc_complete_support(nc: NumericalCircuit,
                                           options: PowerFlowOptions,
                                           logger: Logger | None = None,
                                           V_guess: Union[CxVec, None] = None,
-                                          Sbus_input: Union[CxVec, None] = None) -> PowerFlowResults:
+                                          Sbus_input: Union[CxVec, None] = None,
+                                          topology_cache: PowerFlowTopologyCache | None = None) -> PowerFlowResults:
     """
     Multiple islands power flow (this is the most generic power flow function)
 
@@ -736,6 +740,7 @@ def __multi_island_pf_nc_complete_support(nc: NumericalCircuit,
     :param logger: logger
     :param V_guess: voltage guess
     :param Sbus_input: Use this power injections if provided
+    :param topology_cache: (optional) cache of the structures shared by the steps of a topology group
     :return: PowerFlowResults instance
     """
     if logger is None:
@@ -761,9 +766,15 @@ def __multi_island_pf_nc_complete_support(nc: NumericalCircuit,
     )
 
     # compute islands
-    islands = nc.split_into_islands(ignore_single_node_islands=options.ignore_single_node_islands,
-                                    consider_hvdc_as_island_links=True,
-                                    logger=logger)
+    if topology_cache is None:
+        islands = nc.split_into_islands(ignore_single_node_islands=options.ignore_single_node_islands,
+                                        consider_hvdc_as_island_links=True,
+                                        logger=logger)
+    else:
+        islands = topology_cache.split_into_islands(nc=nc,
+                                                    ignore_single_node_islands=options.ignore_single_node_islands,
+                                                    consider_hvdc_as_island_links=True,
+                                                    logger=logger)
 
     for i, island in enumerate(islands):
 
@@ -802,7 +813,8 @@ def __multi_island_pf_nc_limited_support(nc: NumericalCircuit,
                                          options: PowerFlowOptions,
                                          logger: Logger | None = None,
                                          V_guess: Union[CxVec, None] = None,
-                                         Sbus_input: Union[CxVec, None] = None) -> PowerFlowResults:
+                                         Sbus_input: Union[CxVec, None] = None,
+                                         topology_cache: PowerFlowTopologyCache | None = None) -> PowerFlowResults:
     """
     Multiple islands power flow (this is the most generic power flow function)
 
@@ -818,6 +830,7 @@ def __multi_island_pf_nc_limited_support(nc: NumericalCircuit,
     :param logger: logger
     :param V_guess: voltage guess
     :param Sbus_input: Use this power injections if provided
+    :param topology_cache: (optional) cache of the structures shared by the steps of a topology group
     :return: PowerFlowResults instance
     """
     if logger is None:
@@ -850,12 +863,22 @@ def __multi_island_pf_nc_limited_support(nc: NumericalCircuit,
     )
 
     # compute islands
-    islands = nc.split_into_islands(ignore_single_node_islands=options.ignore_single_node_islands,
-                                    consider_hvdc_as_island_links=False,
-                                    logger=logger)
+    if topology_cache is None:
+        islands = nc.split_into_islands(ignore_single_node_islands=options.ignore_single_node_islands,
+                                        consider_hvdc_as_island_links=False,
+                                        logger=logger)
+    else:
+        islands = topology_cache.split_into_islands(nc=nc,
+                                                    ignore_single_node_islands=options.ignore_single_node_islands,
+                                                    consider_hvdc_as_island_links=False,
+                                                    logger=logger)
 
     for i, island in enumerate(islands):
 
+        if topology_cache is not None:
+            # reuse the admittances of the previous step if possible
+            topology_cache.set_admittances(i=i, island=island)
+
         Sbus_base = island.get_power_injections_pu()
         indices = island.get_simulation_indices(Sbus=Sbus_base)
 
@@ -900,7 +923,8 @@ def multi_island_pf_nc(nc: NumericalCircuit,
                        options: PowerFlowOptions,
                        logger: Logger | None = None,
                        V_guess: Union[CxVec, None] = None,
-                       Sbus_input: Union[CxVec, None] = None) -> PowerFlowResults:
+                       Sbus_input: Union[CxVec, None] = None,
+                       topology_cache: PowerFlowTopologyCache | None = None) -> PowerFlowResults:
     """
     Multiple islands power flow (this is the most generic power flow function)
     :param nc: SnapshotData instance
@@ -908,6 +932,7 @@ def multi_island_pf_nc(nc: NumericalCircuit,
     :param logger: logger
     :param V_guess: voltage guess
     :param Sbus_input: Use this power injections if provided (in p.u.)
+    :param topology_cache: (optional) cache of the structures shared by the steps of a topology group
     :return: PowerFlowResults instance
     """
     if logger is None:
@@ -924,6 +949,7 @@ def multi_island_pf_nc(nc: NumericalCircuit,
             logger=logger,
             V_guess=V_guess,
             Sbus_input=Sbus_input,
+            topology_cache=topology_cache,
         )
         V_guess = results_0.voltage
 
@@ -935,6 +961,7 @@ def multi_island_pf_nc(nc: NumericalCircuit,
             logger=logger,
             V_guess=V_guess,
             Sbus_input=Sbus_input,
+            topology_cache=topology_cache,
         )
 
         if not results.converged:
@@ -944,6 +971,7 @@ def multi_island_pf_nc(nc: NumericalCircuit,
                 logger=logger,
                 V_guess=V_guess,
                 Sbus_input=Sbus_input,
+                topology_cache=topology_cache,
             )
 
         # expand voltages if there was a bus topology reduction
@@ -963,6 +991,7 @@ def multi_island_pf_nc(nc: NumericalCircuit,
             logger=logger,
             V_guess=V_guess,
             Sbus_input=Sbus_input,
+            topology_cache=topology_cache,
         )
 
         # expand voltages if there was a bus topology reduction
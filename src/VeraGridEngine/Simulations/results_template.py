@@ -185,13 +185,17 @@ class ResultsTemplate:
                     data[arr_name] = arr
 
             elif arr_prop.tpe == DateVec:
-                data[arr_name] = arr.values.astype(float).tolist()  # pass the unix nano-seconds
+                # pass the unix nano-seconds (whatever the resolution of the array)
+                data[arr_name] = arr.values.astype('datetime64[ns]').astype(np.int64).astype(float).tolist()
 
             else:
                 if isinstance(arr, list):
                     data[arr_name] = arr
                 elif isinstance(arr, dict):
                     data[arr_name] = arr
+                elif hasattr(arr, 'get_dict'):
+                    # structured results (i.e. reports) that know how to pass themselves via json
+                    data[arr_name] = arr.get_dict()
                 else:
                     data[arr_name] = arr
 
@@ -223,6 +227,9 @@ class ResultsTemplate:
                 arr = pd.to_datetime(np.array(arr_data), unit='ns')  # pass the unix nano-seconds
                 setattr(self, arr_name, arr)
 
+            elif hasattr(getattr(self, arr_name, None), 'parse_data') and arr_data is not None:
+                getattr(self, arr_name).parse_data(arr_data)
+
             else:
                 data[arr_name] = arr_data
 
@@ -811,6 +811,314 @@ def compute_admittances_fast(nbus,
                                   Yshunt_bus=Yshunt_bus)
 
 
+@nb.njit(cache=True)
+def _get_diagonal_positions(n: int, indices: IntVec, indptr: IntVec) -> IntVec:
+    """
+    Get the positions of the diagonal entries in the data of a square CSC matrix
+    :param n: number of columns
+    :param indices: CSC row indices
+    :param indptr: CSC column pointers
+    :return: position of each diagonal entry (-1 if not in the pattern)
+    """
+    pos = np.full(n, -1, np.int64)
+    for col in range(n):
+        for p in range(indptr[col], indptr[col + 1]):
+            if indices[p] == col:
+                pos[col] = p
+                break
+    return pos
+
+
+class IncrementalAdmittanceMatrices(AdmittanceMatricesFast):
+    """
+    Admittance matrices with a fixed sparsity pattern that are updated in place.
+    Every branch keeps its entries in the pattern even when disconnected (with zero admittance),
+    so that branch outages, tap changes and shunt switching only modify the CSC data arrays
+    at positions computed once.
+    """
+
+    def __init__(self,
+                 nbus: int,
+                 F: IntVec,
+                 T: IntVec,
+                 ys: CxVec,
+                 ysh2: CxVec,
+                 vtap_f: Vec,
+                 vtap_t: Vec,
+                 tap_module: Vec,
+                 tap_angle: Vec,
+                 Yshunt_bus: CxVec,
+                 active: Union[Vec, IntVec, None] = None):
+        """
+        Constructor
+        :param nbus: number of buses
+        :param F: Branches array of "from" bus
+        :param T: Branches array of "to" bus
+        :param ys: series admittance {ys = 1.0 / (R + 1.0j * (X + 1e-20))}
+        :param ysh2: shunt admittance {ysh_2 = (G + 1j * B) / 2.0}
+        :param vtap_f: array of from virtual taps
+        :param vtap_t: array of to virtual taps
+        :param tap_module: array of tap modules
+        :param tap_angle: array of tap angles
+        :param Yshunt_bus: array of shunt admittances per bus
+        :param active: array of branch states (None for all active)
+        """
+        nbr = len(F)
+        self.tap_module: Vec = np.array(tap_module, dtype=float)
+        self.tap_angle: Vec = np.array(tap_angle, dtype=float)
+        self.active: Vec = np.ones(nbr, dtype=float) if active is None else np.array(active, dtype=float)
+
+        AdmittanceMatricesFast.__init__(self,
+                                        Ybus=sp.csc_matrix((nbus, nbus), dtype=complex),
+                                        Yf=sp.csc_matrix((nbr, nbus), dtype=complex),
+                                        Yt=sp.csc_matrix((nbr, nbus), dtype=complex),
+                                        F=F, T=T,
+                                        ys=ys, ysh2=ysh2,
+                                        vtap_f=vtap_f, vtap_t=vtap_t,
+                                        yff=np.zeros(nbr, dtype=complex),
+                                        yft=np.zeros(nbr, dtype=complex),
+                                        ytf=np.zeros(nbr, dtype=complex),
+                                        ytt=np.zeros(nbr, dtype=complex),
+                                        Yshunt_bus=np.array(Yshunt_bus, dtype=complex))
+
+        self.refresh()
+
+        self.initialize_update()
+        self.pos_b_diag: IntVec = _get_diagonal_positions(nbus, self.Ybus.indices, self.Ybus.indptr)
+
+    @property
+    def nbus(self) -> int:
+        """
+        Number of buses
+        """
+        return self.Ybus.shape[0]
+
+    @property
+    def nbr(self) -> int:
+        """
+        Number of branches
+        """
+        return len(self.F)
+
+    @property
+    def Cf(self) -> sp.csc_matrix:
+        """
+        Connectivity matrix of the branches with their "from" bus
+        """
+        return sp.csc_matrix((np.ones(self.nbr, dtype=int), (np.arange(self.nbr), self.F)),
+                             shape=(self.nbr, self.nbus))
+
+    @property
+    def Ct(self) -> sp.csc_matrix:
+        """
+        Connectivity matrix of the branches with their "to" bus
+        """
+        return sp.csc_matrix((np.ones(self.nbr, dtype=int), (np.arange(self.nbr), self.T)),
+                             shape=(self.nbr, self.nbus))
+
+    def _get_primitives(self, idx: IntVec) -> Tuple[CxVec, CxVec, CxVec, CxVec]:
+        """
+        Compute the primitives of some branches from their current state
+        :param idx: branch indices
+        :return: yff, yft, ytf, ytt
+        """
+        ys = self.ys[idx] * self.active[idx]
+        ysh2 = self.ysh2[idx] * self.active[idx]
+        m = self.tap_module[idx]
+        tau = self.tap_angle[idx]
+        mf = self.vtap_f[idx]
+        mt = self.vtap_t[idx]
+        yff = (ys + ysh2) / (m * m * mf * mf)
+        yft = -ys / (m * np.exp(-1.0j * tau) * mf * mt)
+        ytf = -ys / (m * np.exp(1.0j * tau) * mt * mf)
+        ytt = (ys + ysh2) / (mt * mt)
+        return yff, yft, ytf, ytt
+
+    def refresh(self) -> None:
+        """
+        Build the matrices from scratch with the current state
+        (this discards the rounding accumulated by the incremental updates of Ybus)
+        """
+        idx = np.arange(self.nbr)
+        self.yff, self.yft, self.ytf, self.ytt = self._get_primitives(idx)
+
+        data_F, data_T, idx_FT, ptr_FT = _build_Yf_Yt(self.nbus, self.nbr, self.F, self.T,
+                                                      self.yff, self.yft, self.ytf, self.ytt)
+        data_B, idx_B, ptr_B = _build_Ybus(self.nbus, self.nbr, self.F, self.T,
+                                           self.yff, self.yft, self.ytf, self.ytt, self.Yshunt_bus)
+
+        if len(self.pos_yff) and len(data_B) == len(self.Ybus.data):
+            # same pattern: write in place so that the references to the matrices stay valid
+            self.Yf.data[:] = data_F
+            self.Yt.data[:] = data_T
+            self.Ybus.data[:] = data_B
+        else:
+            self.Yf = sp.csc_matrix((data_F, idx_FT, ptr_FT), shape=(self.nbr, self.nbus))
+            self.Yt = sp.csc_matrix((data_T, idx_FT, ptr_FT), shape=(self.nbr, self.nbus))
+            self.Ybus = sp.csc_matrix((data_B, idx_B, ptr_B), shape=(self.nbus, self.nbus))
+
+    def _update_branches(self, idx: IntVec) -> None:
+        """
+        Update in place the entries of some branches after changing their state
+        :param idx: branch indices
+        """
+        if len(idx) == 0:
+            return
+
+        new_yff, new_yft, new_ytf, new_ytt = self._get_primitives(idx)
+
+        self.yff[idx] = new_yff
+        self.yft[idx] = new_yft
+        self.ytf[idx] = new_ytf
+        self.ytt[idx] = new_ytt
+
+        update_branch_admittances(
+            idx=idx,
+            new_yff=new_yff,
+            new_yft=new_yft,
+            new_ytf=new_ytf,
+            new_ytt=new_ytt,
+            Yf_data=self.Yf.data,
+            Yt_data=self.Yt.data,
+            Ybus_data=self.Ybus.data,
+            pos_yff=self.pos_yff,
+            pos_yft=self.pos_yft,
+            pos_ytf=self.pos_ytf,
+            pos_ytt=self.pos_ytt,
+            pos_b_ii=self.pos_b_ii,
+            pos_b_ij=self.pos_b_ij,
+            pos_b_ji=self.pos_b_ji,
+            pos_b_jj=self.pos_b_jj
+        )
+
+    def set_branch_status(self, idx: IntVec, active: Union[Vec, IntVec, int]) -> None:
+        """
+        Connect or disconnect branches in place
+        :param idx: branch indices
+        :param active: new states (1: connected, 0: disconnected)
+        """
+        idx = np.asarray(idx, dtype=int)
+        self.active[idx] = active
+        self._update_branches(idx)
+
+    def set_taps(self, idx: IntVec, tap_module: Vec, tap_angle: Vec) -> None:
+        """
+        Change the taps of some branches in place
+        :param idx: branch indices
+        :param tap_module: new tap modules of the branches given by idx
+        :param tap_angle: new tap angles of the branches given by idx
+        """
+        idx = np.asarray(idx, dtype=int)
+        self.tap_module[idx] = tap_module
+        self.tap_angle[idx] = tap_angle
+        self._update_branches(idx)
+
+    def set_all_taps(self, tap_module: Vec, tap_angle: Vec) -> IntVec:
+        """
+        Set the taps of all the branches, updating in place only the branches whose taps changed
+        :param tap_module: tap modules (nbr)
+        :param tap_angle: tap angles (nbr)
+        :return: indices of the branches updated
+        """
+        idx = np.where((tap_module != self.tap_module) | (tap_angle != self.tap_angle))[0]
+        self.set_taps(idx=idx, tap_module=tap_module[idx], tap_angle=tap_angle[idx])
+        return idx
+
+    def modify_taps_fast(self, idx, tap_module: Vec, tap_angle: Vec) -> None:
+        """
+        Modify in-place Ybus, Yf and Yt
+        :param idx: indices of the branches to modify. Both the tap angle and module are updated for every index.
+        :param tap_module: Tap modules of the positions given by idx
+        :param tap_angle: Tap angles of the positions given by idx
+        """
+        self.set_taps(idx=idx, tap_module=tap_module, tap_angle=tap_angle)
+
+    def set_bus_shunts(self, idx: IntVec, Yshunt: CxVec) -> None:
+        """
+        Change the shunt admittance of some buses in place
+        :param idx: bus indices
+        :param Yshunt: new shunt admittances of the buses given by idx
+        """
+        idx = np.asarray(idx, dtype=int)
+        pos = self.pos_b_diag[idx]
+        self.Ybus.data[pos] += Yshunt - self.Yshunt_bus[idx]
+        self.Yshunt_bus[idx] = Yshunt
+
+    def set_all_bus_shunts(self, Yshunt: CxVec) -> IntVec:
+        """
+        Set the shunt admittance of all the buses, updating in place only the buses whose shunt changed
+        :param Yshunt: shunt admittances (nbus)
+        :return: indices of the buses updated
+        """
+        idx = np.where(Yshunt != self.Yshunt_bus)[0]
+        self.set_bus_shunts(idx=idx, Yshunt=Yshunt[idx])
+        return idx
+
+    def copy(self) -> "IncrementalAdmittanceMatrices":
+        """
+        Get a deep copy
+        """
+        res = IncrementalAdmittanceMatrices(nbus=self.nbus,
+                                            F=self.F.copy(),
+                                            T=self.T.copy(),
+                                            ys=self.ys.copy(),
+                                            ysh2=self.ysh2.copy(),
+                                            vtap_f=self.vtap_f.copy(),
+                                            vtap_t=self.vtap_t.copy(),
+                                            tap_module=self.tap_module,
+                                            tap_angle=self.tap_angle,
+                                            Yshunt_bus=self.Yshunt_bus,
+                                            active=self.active)
+        res.Ybus.data[:] = self.Ybus.data
+        return res
+
+
+def compute_incremental_admittances(nbus: int,
+                                    R: Vec,
+                                    X: Vec,
+                                    G: Vec,
+                                    B: Vec,
+                                    tap_module: Vec,
+                                    vtap_f: Vec,
+                                    vtap_t: Vec,
+                                    tap_angle: Vec,
+                                    Yshunt_bus: CxVec,
+                                    F: IntVec,
+                                    T: IntVec,
+                                    active: Union[Vec, IntVec, None] = None) -> IncrementalAdmittanceMatrices:
+    """
+    Build the admittance matrices that can be updated in place
+    :param nbus: number of nodes
+    :param R: array of branch resistance (p.u.)
+    :param X: array of branch reactance (p.u.)
+    :param G: array of branch conductance (p.u.)
+    :param B: array of branch susceptance (p.u.)
+    :param tap_module: array of tap modules (for all Branches, regardless of their type)
+    :param vtap_f: array of virtual taps at the "from" side
+    :param vtap_t: array of virtual taps at the "to" side
+    :param tap_angle: array of tap angles (for all Branches, regardless of their type)
+    :param Yshunt_bus: array of shunts equivalent power per bus, from the shunt devices (p.u.)
+    :param F: Array of branch-from bus indices
+    :param T: Array of branch-to bus indices
+    :param active: array of branch states (None for all active)
+    :return: IncrementalAdmittanceMatrices
+    """
+    ys = 1.0 / (R + 1.0j * (X + 1e-20))  # series admittance
+    ysh_2 = (G + 1j * B) / 2.0  # shunt admittance
+
+    return IncrementalAdmittanceMatrices(nbus=nbus,
+                                         F=F,
+                                         T=T,
+                                         ys=ys,
+                                         ysh2=ysh_2,
+                                         vtap_f=vtap_f,
+                                         vtap_t=vtap_t,
+                                         tap_module=tap_module,
+                                         tap_angle=tap_angle,
+                                         Yshunt_bus=Yshunt_bus,
+                                         active=active)
+
+
 class SeriesAdmittanceMatrices:
     """
     Admittance matrices for HELM and the AC linear methods
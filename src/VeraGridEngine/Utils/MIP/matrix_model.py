@@ -0,0 +1,685 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+
+"""
+Matrix based LP/MIP model for HiGHS.
+The variables are declared in blocks (index ranges) and the constraints are added
+in blocks of sparse (A, lb, ub) triplets, so that big models are built with numpy operations
+instead of one python object per variable and constraint.
+"""
+from __future__ import annotations
+
+from typing import Union, Callable, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+from VeraGridEngine.basic_structures import Vec, IntVec, Logger
+
+try:
+    import highspy
+
+    HIGHS_AVAILABLE = True
+except ImportError:
+    highspy = None
+    HIGHS_AVAILABLE = False
+
+
+class GrowingArray:
+    """
+    One dimensional numpy array with amortized appending
+    """
+
+    def __init__(self, dtype=float, capacity: int = 1024):
+        """
+        Constructor
+        :param dtype: data type
+        :param capacity: initial capacity
+        """
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self.n = 0
+
+    def append(self, values: Union[np.ndarray, float, int], n: Union[int, None] = None) -> IntVec:
+        """
+        Append values
+        :param values: array of values or scalar to be repeated n times
+        :param n: number of values (only needed if values is a scalar)
+        :return: positions of the appended values
+        """
+        values = np.asarray(values, dtype=self._data.dtype)
+        if values.ndim == 0:
+            values = np.full(n, values, dtype=self._data.dtype)
+
+        n_new = self.n + len(values)
+
+        if n_new > len(self._data):
+            data = np.empty(max(n_new, 2 * len(self._data)), dtype=self._data.dtype)
+            data[:self.n] = self._data[:self.n]
+            self._data = data
+
+        self._data[self.n:n_new] = values
+        idx = np.arange(self.n, n_new)
+        self.n = n_new
+        return idx
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        View of the stored values
+        """
+        return self._data[:self.n]
+
+
+class MatrixLpExp:
+    """
+    Block of n affine expressions A·x + b, where A is stored as sparse triplets
+    over the columns of a MatrixLpModel
+    """
+
+    def __init__(self, n: int):
+        """
+        Constructor
+        :param n: number of expressions
+        """
+        self.n = n
+        self.rows = GrowingArray(dtype=int)
+        self.cols = GrowingArray(dtype=int)
+        self.vals = GrowingArray(dtype=float)
+        self.const = np.zeros(n, dtype=float)
+
+    def add_terms(self, rows: IntVec, cols: IntVec, vals: Union[Vec, float]) -> None:
+        """
+        Add terms vals · x[cols] to the expressions rows
+        :param rows: expression indices
+        :param cols: model column indices
+        :param vals: coefficients
+        """
+        self.rows.append(rows)
+        self.cols.append(cols)
+        self.vals.append(vals, n=len(rows))
+
+    def add_const(self, rows: IntVec, vals: Union[Vec, float]) -> None:
+        """
+        Add constants to the expressions rows (repeated rows are summed)
+        :param rows: expression indices
+        :param vals: constants
+        """
+        np.add.at(self.const, rows, vals)
+
+    def add_exp(self, other: "MatrixLpExp", rows: IntVec, factor: Union[Vec, float] = 1.0) -> None:
+        """
+        Add other expressions to some of these: self[rows[i]] += factor · other[i]
+        :param other: MatrixLpExp of size len(rows)
+        :param rows: expression indices of this object matching each expression of the other
+        :param factor: factors to apply to the other expressions
+        """
+        factor = np.broadcast_to(np.asarray(factor, dtype=float), other.n)
+        other_rows = other.rows.values
+        self.add_terms(rows=rows[other_rows],
+                       cols=other.cols.values,
+                       vals=factor[other_rows] * other.vals.values)
+        self.add_const(rows=rows, vals=factor * other.const)
+
+    def has_terms(self) -> np.ndarray:
+        """
+        Get the expressions that depend on any column
+        :return: boolean array (n)
+        """
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.rows.values] = True
+        return mask
+
+    def get_matrix(self, n_cols: int) -> sp.csr_matrix:
+        """
+        Get the matrix A of the expressions
+        :param n_cols: number of columns of the model
+        :return: CSR matrix (n, n_cols)
+        """
+        return sp.csr_matrix((self.vals.values, (self.rows.values, self.cols.values)), shape=(self.n, n_cols))
+
+    def evaluate(self, x: Vec) -> Vec:
+        """
+        Evaluate the expressions
+        :param x: values of the model columns
+        :return: A·x + b
+        """
+        val = self.const.copy()
+        np.add.at(val, self.rows.values, self.vals.values * x[self.cols.values])
+        return val
+
+
+class MatrixVarArray:
+    """
+    Array (nt, n) of values that are either constants or scaled model columns: const + coef · x[col]
+    It replaces the arrays of LP objects of the scalar formulations
+    """
+
+    def __init__(self, nt: int, n: int, const: float = 0.0):
+        """
+        Constructor
+        :param nt: number of time steps
+        :param n: number of elements
+        :param const: initial constant value
+        """
+        self.col = np.full((nt, n), -1, dtype=int)
+        self.coef = np.zeros((nt, n), dtype=float)
+        self.const = np.full((nt, n), const, dtype=float)
+
+    def set(self, t: int, idx: IntVec,
+            cols: Union[IntVec, None] = None,
+            coef: Union[Vec, float] = 1.0,
+            const: Union[Vec, float] = 0.0) -> None:
+        """
+        Set the values of some elements
+        :param t: time index
+        :param idx: element indices
+        :param cols: model columns (None for constant values)
+        :param coef: columns coefficients
+        :param const: constant values
+        """
+        if cols is None:
+            self.col[t, idx] = -1
+            self.coef[t, idx] = 0.0
+        else:
+            self.col[t, idx] = cols
+            self.coef[t, idx] = coef
+        self.const[t, idx] = const
+
+    def add_to_exp(self, t: int, idx: IntVec, exp: MatrixLpExp, rows: IntVec,
+                   factor: Union[Vec, float] = 1.0) -> None:
+        """
+        Add the values of some elements to some expressions: exp[rows[i]] += factor · self[t, idx[i]]
+        :param t: time index
+        :param idx: element indices
+        :param exp: MatrixLpExp
+        :param rows: expression indices matching idx
+        :param factor: factors
+        """
+        factor = np.broadcast_to(np.asarray(factor, dtype=float), len(idx))
+        col = self.col[t, idx]
+        has_col = col > -1
+        exp.add_terms(rows=rows[has_col], cols=col[has_col], vals=factor[has_col] * self.coef[t, idx[has_col]])
+        exp.add_const(rows=rows, vals=factor * self.const[t, idx])
+
+    def add_to_objective(self, t: int, idx: IntVec, weights: Union[Vec, float], model: "MatrixLpModel") -> None:
+        """
+        Add the weighted values of some elements to the objective function of a model
+        :param t: time index
+        :param idx: element indices
+        :param weights: objective weights
+        :param model: MatrixLpModel
+        """
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), len(idx))
+        col = self.col[t, idx]
+        has_col = col > -1
+        model.add_cost(col[has_col], weights[has_col] * self.coef[t, idx[has_col]])
+        model.add_offset(float(np.sum(weights * self.const[t, idx])))
+
+    def get_values(self, x: Vec) -> np.ndarray:
+        """
+        Get the values
+        :param x: values of the model columns
+        :return: Array of values (nt, n)
+        """
+        val = self.const.copy()
+        mask = self.col > -1
+        val[mask] += self.coef[mask] * x[self.col[mask]]
+        return val
+
+
+class HighsWarmStart:
+    """
+    HiGHS state kept between the solves of consecutive models (i.e. the windows of a rolling horizon).
+    When a model has the same constraints matrix as the previous one, the HiGHS model is reused
+    updating only the costs and bounds. When a model only appends rows and columns to the previous one
+    (i.e. lazily generated constraints), they are added to the HiGHS model. Otherwise the previous basis
+    is used as starting point
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.highs = None
+        self.A: Union[sp.csc_matrix, None] = None
+        self.col_int: Union[np.ndarray, None] = None
+        self.basis = None
+
+        # (rows, columns) of the model of the stored basis
+        self.shape: Union[Tuple[int, int], None] = None
+
+        # number of solves that reused the HiGHS model and number of solves started from the previous basis
+        self.n_reused: int = 0
+        self.n_warm_started: int = 0
+
+        # number of solves that appended rows and columns to the HiGHS model
+        self.n_extended: int = 0
+
+    def has_same_structure(self, A: sp.csc_matrix, col_int: np.ndarray) -> bool:
+        """
+        Check if a model has the same structure (constraints matrix and integrality) as the stored one
+        :param A: constraints matrix (CSC)
+        :param col_int: integrality of the columns
+        :return: bool
+        """
+        return (self.highs is not None
+                and self.A.shape == A.shape
+                and np.array_equal(self.A.indptr, A.indptr)
+                and np.array_equal(self.A.indices, A.indices)
+                and np.array_equal(self.A.data, A.data)
+                and np.array_equal(self.col_int, col_int))
+
+    def is_extended_by(self, A: sp.csc_matrix, col_int: np.ndarray) -> bool:
+        """
+        Check if a model is the stored one with some rows and columns appended
+        (i.e. constraints generated after a solve), the new columns must only appear in the new rows
+        :param A: constraints matrix (CSC)
+        :param col_int: integrality of the columns
+        :return: bool
+        """
+        if self.highs is None:
+            return False
+
+        n_rows0, n_cols0 = self.A.shape
+        n_rows, n_cols = A.shape
+
+        if n_rows < n_rows0 or n_cols < n_cols0 or (n_rows, n_cols) == (n_rows0, n_cols0):
+            return False
+
+        A0 = A[:n_rows0, :n_cols0]
+        return (np.array_equal(self.A.indptr, A0.indptr)
+                and np.array_equal(self.A.indices, A0.indices)
+                and np.array_equal(self.A.data, A0.data)
+                and A[:n_rows0, n_cols0:].nnz == 0
+                and np.array_equal(self.col_int, col_int[:n_cols0]))
+
+    def has_same_dimensions(self, shape: Tuple[int, int]) -> bool:
+        """
+        Check if a model has the same number of rows and columns as the one of the stored basis
+        :param shape: (rows, columns) of the model
+        :return: bool
+        """
+        return self.basis is not None and self.shape == tuple(shape)
+
+    def clear(self) -> None:
+        """
+        Forget the stored solver state
+        """
+        self.highs = None
+        self.A = None
+        self.col_int = None
+        self.basis = None
+        self.shape = None
+
+
+class MatrixLpModel:
+    """
+    LP/MIP model where the variables and constraints are added in vectorized blocks and
+    the resulting CSC matrix is handed straight to HiGHS
+    """
+    OPTIMAL = highspy.HighsModelStatus.kOptimal if HIGHS_AVAILABLE else None
+    INFEASIBLE = highspy.HighsModelStatus.kInfeasible if HIGHS_AVAILABLE else None
+    UNBOUNDED = highspy.HighsModelStatus.kUnbounded if HIGHS_AVAILABLE else None
+    INFINITY = 1e20
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        if not HIGHS_AVAILABLE:
+            raise Exception("No highspy available, try installing with: pip install highspy")
+
+        # columns
+        self._col_lb = GrowingArray(dtype=float)
+        self._col_ub = GrowingArray(dtype=float)
+        self._col_cost = GrowingArray(dtype=float)
+        self._col_int = GrowingArray(dtype=np.uint8)
+
+        # rows
+        self._row_lb = GrowingArray(dtype=float)
+        self._row_ub = GrowingArray(dtype=float)
+
+        # coefficients triplets
+        self._a_rows = GrowingArray(dtype=int)
+        self._a_cols = GrowingArray(dtype=int)
+        self._a_vals = GrowingArray(dtype=float)
+
+        self.offset = 0.0
+
+        # solution
+        self._col_value = np.empty(0)
+        self._row_value = np.empty(0)
+        self._row_dual = np.empty(0)
+        self._objective_value = 0.0
+        self._status = None
+
+        self.logger = Logger()
+
+    @property
+    def n_cols(self) -> int:
+        """
+        Number of variables
+        """
+        return self._col_lb.n
+
+    @property
+    def n_rows(self) -> int:
+        """
+        Number of constraints
+        """
+        return self._row_lb.n
+
+    def is_mip(self) -> bool:
+        """
+        Is this model a MIP?
+        :return: bool
+        """
+        return bool(np.any(self._col_int.values))
+
+    def add_vars(self, n: int,
+                 lb: Union[Vec, float] = 0.0,
+                 ub: Union[Vec, float] = 1e20,
+                 cost: Union[Vec, float] = 0.0,
+                 is_int: Union[np.ndarray, bool] = False) -> IntVec:
+        """
+        Declare a block of variables
+        :param n: number of variables
+        :param lb: lower bounds
+        :param ub: upper bounds
+        :param cost: objective function coefficients
+        :param is_int: are the variables integer? (one value for all or one per variable)
+        :return: column indices of the variables
+        """
+        idx = self._col_lb.append(lb, n=n)
+        self._col_ub.append(ub, n=n)
+        self._col_cost.append(cost, n=n)
+        self._col_int.append(np.asarray(is_int, dtype=np.uint8), n=n)
+        return idx
+
+    def set_var_bounds(self, idx: IntVec, lb: Union[Vec, float], ub: Union[Vec, float]) -> None:
+        """
+        Modify the bounds of some variables
+        :param idx: column indices
+        :param lb: lower bounds
+        :param ub: upper bounds
+        """
+        self._col_lb.values[idx] = lb
+        self._col_ub.values[idx] = ub
+
+    def add_cost(self, idx: IntVec, vals: Union[Vec, float]) -> None:
+        """
+        Add objective function coefficients to some variables (repeated indices are summed)
+        :param idx: column indices
+        :param vals: coefficients
+        """
+        np.add.at(self._col_cost.values, idx, vals)
+
+    def add_offset(self, val: float) -> None:
+        """
+        Add a constant to the objective function
+        :param val: value
+        """
+        self.offset += val
+
+    def add_csts(self, n: int,
+                 rows: IntVec,
+                 cols: IntVec,
+                 vals: Union[Vec, float],
+                 lb: Union[Vec, float],
+                 ub: Union[Vec, float]) -> IntVec:
+        """
+        Add a block of constraints lb <= A·x <= ub given by the triplets of A
+        (use lb == ub for the equalities and ±1e20 for the free sides)
+        :param n: number of constraints
+        :param rows: row of each coefficient, local to the block (0..n-1)
+        :param cols: column of each coefficient
+        :param vals: coefficients
+        :param lb: lower bounds
+        :param ub: upper bounds
+        :return: row indices of the constraints
+        """
+        offset = self.n_rows
+        idx = self._row_lb.append(lb, n=n)
+        self._row_ub.append(ub, n=n)
+        self._a_rows.append(np.asarray(rows, dtype=int) + offset)
+        self._a_cols.append(cols)
+        self._a_vals.append(vals, n=len(rows))
+        return idx
+
+    def add_matrix_csts(self, A: sp.spmatrix, lb: Union[Vec, float], ub: Union[Vec, float]) -> IntVec:
+        """
+        Add a block of constraints lb <= A·x <= ub
+        :param A: sparse matrix (n, number of columns up to now)
+        :param lb: lower bounds
+        :param ub: upper bounds
+        :return: row indices of the constraints
+        """
+        A = A.tocoo()
+        return self.add_csts(n=A.shape[0], rows=A.row, cols=A.col, vals=A.data, lb=lb, ub=ub)
+
+    def add_exp_csts(self, exp: MatrixLpExp, lb: Union[Vec, float], ub: Union[Vec, float]) -> IntVec:
+        """
+        Add a block of constraints lb <= exp <= ub, the constants of the expressions are moved to the bounds
+        :param exp: MatrixLpExp
+        :param lb: lower bounds
+        :param ub: upper bounds
+        :return: row indices of the constraints
+        """
+        return self.add_csts(n=exp.n,
+                             rows=exp.rows.values,
+                             cols=exp.cols.values,
+                             vals=exp.vals.values,
+                             lb=lb - exp.const,
+                             ub=ub - exp.const)
+
+    def get_matrix(self) -> sp.csc_matrix:
+        """
+        Get the constraints matrix
+        :return: CSC matrix (n_rows, n_cols), repeated coefficients are summed
+        """
+        return sp.csc_matrix((self._a_vals.values, (self._a_rows.values, self._a_cols.values)),
+                             shape=(self.n_rows, self.n_cols))
+
+    def get_highs_lp(self, A: Union[sp.csc_matrix, None] = None):
+        """
+        Get the HiGHS LP object of this model
+        :param A: constraints matrix (computed if not given)
+        :return: highspy.HighsLp
+        """
+        if A is None:
+            A = self.get_matrix()
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = self.n_cols
+        lp.num_row_ = self.n_rows
+        lp.sense_ = highspy.ObjSense.kMinimize
+        lp.offset_ = self.offset
+
+        lp.col_cost_ = self._col_cost.values
+        lp.col_lower_ = self._col_lb.values
+        lp.col_upper_ = self._col_ub.values
+        lp.row_lower_ = self._row_lb.values
+        lp.row_upper_ = self._row_ub.values
+
+        if self.is_mip():
+            lp.integrality_ = [highspy.HighsVarType.kInteger if i else highspy.HighsVarType.kContinuous
+                               for i in self._col_int.values]
+
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+
+        return lp
+
+    def _update_highs(self, h) -> None:
+        """
+        Set the costs, bounds and objective offset of this model in a HiGHS object with the same dimensions
+        :param h: highspy.Highs
+        """
+        col_idx = np.arange(self.n_cols, dtype=np.int32)
+        row_idx = np.arange(self.n_rows, dtype=np.int32)
+        h.changeColsCost(self.n_cols, col_idx, self._col_cost.values)
+        h.changeColsBounds(self.n_cols, col_idx, self._col_lb.values, self._col_ub.values)
+        h.changeRowsBounds(self.n_rows, row_idx, self._row_lb.values, self._row_ub.values)
+        h.changeObjectiveOffset(self.offset)
+
+    def solve(self, show_logs: bool = False,
+              progress_text: Union[Callable[[str], None], None] = None,
+              warm_start: Union[HighsWarmStart, None] = None):
+        """
+        Solve the model with HiGHS
+        :param show_logs: show the solver logs?
+        :param progress_text: progress function pointer
+        :param warm_start: HighsWarmStart of the previous solve (optional, it is updated with this solve)
+        :return: HiGHS model status (compare with MatrixLpModel.OPTIMAL)
+        """
+        if progress_text is not None:
+            progress_text("Solving model with HiGHS...")
+
+        A = self.get_matrix()
+        col_int = self._col_int.values.copy()
+
+        if warm_start is not None and warm_start.has_same_structure(A=A, col_int=col_int):
+            # same matrix: only the costs and bounds change, HiGHS starts from its current basis
+            h = warm_start.highs
+            h.setOptionValue("output_flag", show_logs)
+            self._update_highs(h)
+            warm_start.n_reused += 1
+
+        elif warm_start is not None and warm_start.is_extended_by(A=A, col_int=col_int):
+            # appended rows and columns: HiGHS starts from its current basis extended with the new ones
+            h = warm_start.highs
+            h.setOptionValue("output_flag", show_logs)
+            n_rows0, n_cols0 = warm_start.A.shape
+
+            n_new_cols = self.n_cols - n_cols0
+            if n_new_cols > 0:
+                h.addCols(n_new_cols,
+                          self._col_cost.values[n_cols0:],
+                          self._col_lb.values[n_cols0:],
+                          self._col_ub.values[n_cols0:],
+                          0,
+                          np.zeros(n_new_cols, dtype=np.int32),
+                          np.zeros(0, dtype=np.int32),
+                          np.zeros(0, dtype=float))
+
+                new_int = np.where(col_int[n_cols0:])[0] + n_cols0
+                if len(new_int):
+                    h.changeColsIntegrality(len(new_int), new_int.astype(np.int32),
+                                            np.full(len(new_int), highspy.HighsVarType.kInteger.value,
+                                                    dtype=np.uint8))
+
+            n_new_rows = self.n_rows - n_rows0
+            if n_new_rows > 0:
+                A_new = A[n_rows0:, :].tocsr()
+                h.addRows(n_new_rows,
+                          self._row_lb.values[n_rows0:],
+                          self._row_ub.values[n_rows0:],
+                          A_new.nnz,
+                          A_new.indptr[:-1].astype(np.int32),
+                          A_new.indices.astype(np.int32),
+                          A_new.data)
+
+            self._update_highs(h)
+            warm_start.n_extended += 1
+
+        else:
+            h = highspy.Highs()
+            h.setOptionValue("output_flag", show_logs)
+            h.passModel(self.get_highs_lp(A=A))
+
+            if warm_start is not None and warm_start.has_same_dimensions(shape=A.shape):
+                # different coefficients, but the previous basis is still a good starting point
+                h.setBasis(warm_start.basis)
+                warm_start.n_warm_started += 1
+
+        h.run()
+
+        self._status = h.getModelStatus()
+        solution = h.getSolution()
+        self._col_value = np.array(solution.col_value, dtype=float)
+        self._row_value = np.array(solution.row_value, dtype=float)
+
+        if solution.dual_valid:
+            self._row_dual = np.array(solution.row_dual, dtype=float)
+        else:
+            # i.e. MIP
+            self._row_dual = np.zeros(self.n_rows, dtype=float)
+
+        self._objective_value = h.getInfo().objective_function_value
+
+        if len(self._col_value) != self.n_cols:
+            self._col_value = np.zeros(self.n_cols, dtype=float)
+            self._row_value = np.zeros(self.n_rows, dtype=float)
+            self._row_dual = np.zeros(self.n_rows, dtype=float)
+
+        if warm_start is not None:
+            warm_start.highs = h
+            warm_start.A = A
+            warm_start.col_int = col_int
+            basis = h.getBasis()
+            warm_start.basis = basis if basis.valid else None
+            warm_start.shape = A.shape
+
+        return self._status
+
+    def status2string(self, status) -> str:
+        """
+        Convert the HiGHS status to a string
+        :param status: HiGHS model status
+        :return: string
+        """
+        return highspy.Highs().modelStatusToString(status)
+
+    def fobj_value(self) -> float:
+        """
+        Get the objective function value
+        :return: float
+        """
+        return self._objective_value
+
+    def get_values(self, idx: IntVec) -> Vec:
+        """
+        Get the values of some variables
+        :param idx: column indices
+        :return: values
+        """
+        return self._col_value[idx]
+
+    @property
+    def col_values(self) -> Vec:
+        """
+        Values of all the variables
+        """
+        return self._col_value
+
+    def get_row_values(self, idx: IntVec) -> Vec:
+        """
+        Get the values of A·x of some constraints
+        :param idx: row indices
+        :return: values
+        """
+        return self._row_value[idx]
+
+    def get_dual_values(self, idx: IntVec) -> Vec:
+        """
+        Get the dual values of some constraints (zero for MIP)
+        :param idx: row indices
+        :return: values
+        """
+        return self._row_dual[idx]
+
+    def save_model(self, file_name: str = "model.lp") -> None:
+        """
+        Save problem in LP or MPS format
+        :param file_name: name of the file (.lp or .mps supported)
+        """
+        if not (file_name.lower().endswith('.lp') or file_name.lower().endswith('.mps')):
+            raise Exception('Unsupported file format')
+
+        h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        h.passModel(self.get_highs_lp())
+        h.writeModel(file_name)
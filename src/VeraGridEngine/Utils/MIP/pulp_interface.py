@@ -23,6 +23,7 @@ from pulp import LpVariable as LpVar, LpConstraint as LpCst, LpAffineExpression
 from pulp import HiGHS, CPLEX_CMD
 from VeraGridEngine.enumerations import MIPSolvers
 from VeraGridEngine.basic_structures import Logger
+from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart, HIGHS_AVAILABLE
 
 
 def get_lp_var_value(x: Union[float, LpVar]) -> float:
@@ -41,6 +42,45 @@ def get_lp_var_value(x: Union[float, LpVar]) -> float:
         return x
 
 
+class HighsWarmStartSolver(HiGHS):
+    """
+    PuLP HiGHS solver that starts from the basis of the previous solve when the model has the same dimensions
+    (i.e. the consecutive time steps of a time series).
+
+    The PuLP models are handed to HiGHS by PuLP itself: assembling them again as a MatrixLpModel to reuse the
+    HiGHS model would mean walking every variable and constraint twice, while the formulations written with
+    PuLP expressions (i.e. the NTC) cannot be assembled as matrices without rewriting them.
+    """
+
+    def __init__(self, warm_start: HighsWarmStart, mip: bool = True, msg: bool = False):
+        """
+        Constructor
+        :param warm_start: HighsWarmStart of the previous solve (it is updated with this solve)
+        :param mip: if False, assume LP even if integer variables
+        :param msg: show the solver logs?
+        """
+        HiGHS.__init__(self, mip=mip, msg=msg)
+        self.warm_start = warm_start
+
+    def callSolver(self, lp):
+        """
+        Run HiGHS on the model built by PuLP
+        :param lp: pulp.LpProblem
+        """
+        h = lp.solverModel
+        shape = (h.getNumRow(), h.getNumCol())
+
+        if self.warm_start.has_same_dimensions(shape=shape):
+            h.setBasis(self.warm_start.basis)
+            self.warm_start.n_warm_started += 1
+
+        h.run()
+
+        basis = h.getBasis()
+        self.warm_start.basis = basis if basis.valid else None
+        self.warm_start.shape = shape
+
+
 def get_available_mip_solvers() -> List[str]:
     """
     Get a list of candidate solvers
@@ -190,12 +230,14 @@ class LpModel:
             raise Exception('PuLP Unsupported MIP solver ' + self.solver_type.value)
 
     def solve(self, robust: bool = False, show_logs: bool = False,
-              progress_text: Callable[[str], None] | None = None) -> int:
+              progress_text: Callable[[str], None] | None = None,
+              warm_start: HighsWarmStart | None = None) -> int:
         """
         Solve the model
         :param robust: In this interface, this is useless
         :param show_logs: In this interface, this is useless
         :param progress_text: progress function pointer
+        :param warm_start: HighsWarmStart of the previous solve, only used with HiGHS (optional)
         :return:
         """
         if progress_text is not None:
@@ -203,7 +245,12 @@ class LpModel:
 
         # solve the model
         try:
-            status = self.model.solve(solver=self.get_solver(show_logs=show_logs))
+            if warm_start is not None and self.solver_type == MIPSolvers.HIGHS and HIGHS_AVAILABLE:
+                status = self.model.solve(solver=HighsWarmStartSolver(warm_start=warm_start,
+                                                                      mip=self.model.isMIP(),
+                                                                      msg=show_logs))
+            else:
+                status = self.model.solve(solver=self.get_solver(show_logs=show_logs))
         except pulp.PulpSolverError as e:
             self.logger.add_error(msg=str(e), )
             # Retry with Highs
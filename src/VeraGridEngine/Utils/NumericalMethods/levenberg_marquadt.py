@@ -13,7 +13,6 @@ from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.Utils.NumericalMethods.common import (ConvexMethodResult, ConvexFunctionResult,
                                                           check_function_and_args)
 
-linear_solver = get_linear_solver()
 
 
 def levenberg_marquardt(func: Callable[[Vec, bool, Any], ConvexFunctionResult],
@@ -46,6 +45,9 @@ def levenberg_marquardt(func: Callable[[Vec, bool, Any], ConvexFunctionResult],
     """
     start = time.time()
 
+    # the symbolic analysis of the linear systems is only reused among the iterations of this run
+    linear_solver = get_linear_solver(reuse_analysis=True)
+
     if not check_function_and_args(func, func_args, 2):
         raise Exception(f'Invalid function arguments, required {", ".join(func.__code__.co_varnames)}')
 
@@ -12,7 +12,6 @@ from VeraGridEngine.Utils.NumericalMethods.sparse_solve import get_linear_solver
 from VeraGridEngine.basic_structures import Logger
 
 
-linear_solver = get_linear_solver()
 
 
 def newton_raphson(func: Callable[[Vec, bool, Any], ConvexFunctionResult],
@@ -45,6 +44,9 @@ def newton_raphson(func: Callable[[Vec, bool, Any], ConvexFunctionResult],
     """
     start = time.time()
 
+    # the symbolic analysis of the linear systems is only reused among the iterations of this run
+    linear_solver = get_linear_solver(reuse_analysis=True)
+
     if not check_function_and_args(func, func_args, 2):
         raise Exception(f'Invalid function arguments, required {", ".join(func.__code__.co_varnames)}')
 
@@ -11,7 +11,6 @@ from VeraGridEngine.basic_structures import Logger
 from VeraGridEngine.Utils.NumericalMethods.common import (ConvexMethodResult, ConvexFunctionResult, norm, max_abs,
                                                           check_function_and_args)
 
-linear_solver = get_linear_solver()
 
 
 def compute_beta(a: Vec, b: Vec, delta):
@@ -89,6 +88,9 @@ def powell_dog_leg(func: Callable[[Vec, bool, Any], ConvexFunctionResult],
     """
     start = time.time()
 
+    # the symbolic analysis of the linear systems is only reused among the iterations of this run
+    linear_solver = get_linear_solver(reuse_analysis=True)
+
     if not check_function_and_args(func, func_args, 2):
         raise Exception(f'Invalid function arguments, required {", ".join(func.__code__.co_varnames)}')
 
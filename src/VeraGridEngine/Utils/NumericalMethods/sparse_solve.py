@@ -10,6 +10,7 @@ from collections.abc import Callable
 from scipy.sparse import csr_matrix, csc_matrix
 from VeraGridEngine.basic_structures import Vec, Mat
 from VeraGridEngine.enumerations import SparseSolver
+from VeraGridEngine.Utils.Sparse.factorization_cache import SymbolicFactorizationCache, sparse_lu_factorize
 
 
 # list of available linear algebra frameworks
@@ -39,6 +40,13 @@ except ImportError:
     # print(SparseSolver.BLAS_LAPACK.value + ' failed')
 
 
+try:
+    # scipy only uses UMFPACK through scikit-umfpack, otherwise its spsolve runs SuperLU
+    import scikits.umfpack as umfpack
+except ImportError:
+    umfpack = None
+
+
 try:
     from pypardiso import spsolve as pardiso_spsolve
 
@@ -120,16 +128,106 @@ def gmres_linsolve(A: csc_matrix, b: Union[Vec, Mat]) -> Union[Vec, Mat]:
     return x
 
 
-def get_linear_solver(solver_type: SparseSolver = preferred_type) -> Callable[[csc_matrix, Union[Vec, Mat]], Union[Vec, Mat]]:
+class ReusedAnalysisLinearSolver:
+    """
+    Linear solver A x = b that reuses the symbolic analysis (fill-reducing ordering) of the previous
+    matrices with the same sparsity pattern, i.e. the Jacobians of the Newton-Raphson iterations.
+    Each instance keeps its own analysis, so that the results do not depend on what was solved before.
+
+    - SuperLU: the column orderings are kept in a SymbolicFactorizationCache
+    - UMFPACK: the symbolic analysis of the UmfpackContext is kept (SuperLU if scikit-umfpack is missing)
+    - KLU: the symbolic analysis of cvxoptklu is kept
+    """
+
+    def __init__(self, solver_type: SparseSolver):
+        """
+        Constructor
+        :param solver_type: SparseSolver (SuperLU, UMFPACK or KLU)
+        """
+        self.solver_type = solver_type
+
+        if solver_type == SparseSolver.UMFPACK and umfpack is None:
+            self.solver_type = SparseSolver.SuperLU
+
+        self._ordering_cache = SymbolicFactorizationCache(max_size=4)
+
+        # sparsity pattern of the last symbolic analysis (UMFPACK and KLU)
+        self._indptr: Union[np.ndarray, None] = None
+        self._indices: Union[np.ndarray, None] = None
+
+        self._umfpack_context = umfpack.UmfpackContext("di") if self.solver_type == SparseSolver.UMFPACK else None
+        self._klu_symbolic = None
+
+    def is_same_pattern(self, A: csc_matrix) -> bool:
+        """
+        Does the matrix have the pattern of the last symbolic analysis? (the pattern is stored otherwise)
+        :param A: System matrix
+        :return: bool
+        """
+        if (self._indptr is not None and np.array_equal(self._indptr, A.indptr)
+                and np.array_equal(self._indices, A.indices)):
+            return True
+
+        self._indptr = A.indptr.copy()
+        self._indices = A.indices.copy()
+        return False
+
+    def __call__(self, A: csc_matrix, b: Union[Vec, Mat]) -> Union[Vec, Mat]:
+        """
+        Solve A x = b
+        :param A: System matrix
+        :param b: right hand side
+        :return: solution
+        """
+        if A.format != 'csc':
+            A = A.tocsc()
+
+        if not A.has_sorted_indices:
+            A = A.sorted_indices()
+
+        if self.solver_type == SparseSolver.UMFPACK:
+            A = csc_matrix((A.data, A.indices.astype(np.int32), A.indptr.astype(np.int32)), shape=A.shape)
+            if not self.is_same_pattern(A):
+                self._umfpack_context.symbolic(A)
+            self._umfpack_context.numeric(A)
+            return self._umfpack_context.solve(umfpack.UMFPACK_A, A, b, autoTranspose=True)
+
+        elif self.solver_type == SparseSolver.KLU:
+            A2 = A.tocoo()
+            A_cvxopt = cvxopt.spmatrix(A2.data, A2.row, A2.col, A2.shape, 'd')
+            if not self.is_same_pattern(A):
+                self._klu_symbolic = klu.symbolic(A_cvxopt)
+            numeric = klu.numeric(A_cvxopt, self._klu_symbolic)
+            x = cvxopt.matrix(b)
+            klu.solve(A_cvxopt, self._klu_symbolic, numeric, x)
+            return np.array(x)[:, 0]
+
+        else:
+            return sparse_lu_factorize(n_cols=A.shape[1],
+                                       nnz=A.nnz,
+                                       data=A.data,
+                                       indices=A.indices.astype(np.int32, copy=False),
+                                       indptr=A.indptr.astype(np.int32, copy=False),
+                                       cache=self._ordering_cache).solve(b)
+
+
+def get_linear_solver(solver_type: SparseSolver = preferred_type,
+                      reuse_analysis: bool = False) -> Callable[[csc_matrix, Union[Vec, Mat]], Union[Vec, Mat]]:
     """
     Privide the chosen linear solver_type function pointer to
     solver_type linear systems of the type A x = b, with x = f(A,b)
     :param solver_type: SparseSolver option
+    :param reuse_analysis: get a new solver that reuses the symbolic analysis of the matrices with the same
+                           sparsity pattern (SuperLU, UMFPACK and KLU), see ReusedAnalysisLinearSolver.
+                           It should be created for each run of an iterative method
     :return: function pointer f(A, b)
     """
     if solver_type in available_sparse_solvers:
 
-        if solver_type == SparseSolver.UMFPACK:
+        if reuse_analysis and solver_type in [SparseSolver.SuperLU, SparseSolver.UMFPACK, SparseSolver.KLU]:
+            return ReusedAnalysisLinearSolver(solver_type=solver_type)
+
+        elif solver_type == SparseSolver.UMFPACK:
             return scipy_spsolve
 
         elif solver_type == SparseSolver.UMFPACKTriangular:
@@ -155,4 +253,3 @@ def get_linear_solver(solver_type: SparseSolver = preferred_type) -> Callable[[c
 
     else:
         return scipy_spsolve
-
@@ -92,6 +92,18 @@ class WeldorfOnlineStdDevMat:
                mean=self.mean,
                M2=self.M2)
 
+    def set_row(self, t: int, other: "WeldorfOnlineStdDevMat", i: int = 0) -> None:
+        """
+        Set a row with the statistics accumulated in the row of another instance
+        :param t: Row index
+        :param other: WeldorfOnlineStdDevMat
+        :param i: Row index of the other instance
+        """
+        self.steps += other.steps
+        self.count[t, :] = other.count[i, :]
+        self.mean[t, :] = other.mean[i, :]
+        self.M2[t, :] = other.M2[i, :]
+
     def finalize(self) -> None:
         """
         Finalize: compute the variance and std dev
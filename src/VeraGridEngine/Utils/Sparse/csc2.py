@@ -12,8 +12,9 @@ from numba import types
 from numba.experimental import jitclass
 import numpy as np
 from scipy.sparse import csc_matrix
-from scipy.sparse.linalg._dsolve._superlu import gstrf, SuperLU
 from VeraGridEngine.basic_structures import IntVec, IntMat, Vec, CxVec
+from VeraGridEngine.Utils.Sparse.factorization_cache import (SparseLuFactor, SymbolicFactorizationCache,
+                                                             sparse_lu_factorize)
 
 
 @jitclass([
@@ -599,40 +600,30 @@ def scipy_to_cxmat(mat: csc_matrix) -> CxCSC:
     return x
 
 
-def spfactor(A: CSC) -> None | SuperLU:
+def spfactor(A: CSC, cache: SymbolicFactorizationCache | None = None) -> None | SparseLuFactor:
     """
-    Sparse factorization with SuperLU
+    Sparse factorization with SuperLU.
     :param A: CSC matrix
-    :return: SuperLU factorization object
+    :param cache: SymbolicFactorizationCache to reuse the column ordering of matrices with the same
+                  sparsity pattern (i.e. the Jacobians of the Newton-Raphson iterations), optional
+    :return: SparseLuFactor factorization object, None if the matrix is singular
     """
-    permc_spec = None
-    diag_pivot_thresh = None
-    relax = None
-    panel_size = None
-    _options = dict(DiagPivotThresh=diag_pivot_thresh,
-                    ColPerm=permc_spec,
-                    PanelSize=panel_size,
-                    Relax=relax)
-
-    if _options["ColPerm"] == "NATURAL":
-        _options["SymmetricMode"] = True
-
     try:
-        ret = gstrf(A.n_cols, A.nnz, A.data, A.indices, A.indptr,
-                    ilu=False, options=_options, csc_construct_func=None)
-        return ret
+        return sparse_lu_factorize(n_cols=A.n_cols, nnz=A.nnz, data=A.data, indices=A.indices, indptr=A.indptr,
+                                   cache=cache)
     except RuntimeError:
         return None
 
 
-def spsolve_csc(A: CSC, x: Vec) -> Vec:
+def spsolve_csc(A: CSC, x: Vec, cache: SymbolicFactorizationCache | None = None) -> Vec:
     """
     Sparse solution
     :param A: CSC matrix
     :param x: vector
+    :param cache: SymbolicFactorizationCache to reuse the column ordering of the pattern (optional)
     :return: solution
     """
-    factor = spfactor(A)
+    factor = spfactor(A, cache=cache)
     if factor is None:
         return np.full(len(x), np.nan), False
     else:
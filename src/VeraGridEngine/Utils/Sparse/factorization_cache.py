@@ -0,0 +1,211 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Tuple, Union
+import numba as nb
+import numpy as np
+from scipy.sparse.linalg._dsolve._superlu import gstrf, SuperLU
+from VeraGridEngine.basic_structures import IntVec, Vec, Mat
+
+
+@nb.njit(cache=True)
+def csc_permute_columns(n_cols: int, data: Vec, indices: IntVec, indptr: IntVec,
+                        q: IntVec) -> Tuple[Vec, IntVec, IntVec]:
+    """
+    Compute the CSC structure of A[:, q]
+    :param n_cols: number of columns
+    :param data: CSC data
+    :param indices: CSC row indices
+    :param indptr: CSC column pointers
+    :param q: column permutation (new column j is the old column q[j])
+    :return: data, indices, indptr of the permuted matrix
+    """
+    data2 = np.empty_like(data)
+    indices2 = np.empty_like(indices)
+    indptr2 = np.empty_like(indptr)
+
+    cnt = 0
+    indptr2[0] = 0
+    for j in range(n_cols):
+        for k in range(indptr[q[j]], indptr[q[j] + 1]):
+            data2[cnt] = data[k]
+            indices2[cnt] = indices[k]
+            cnt += 1
+        indptr2[j + 1] = cnt
+
+    return data2, indices2, indptr2
+
+
+class SparseLuFactor:
+    """
+    SuperLU factorization of a column-permuted matrix A[:, q], that solves A x = b
+    """
+
+    def __init__(self, lu: SuperLU, perm: IntVec | None):
+        """
+        Constructor
+        :param lu: SuperLU factorization
+        :param perm: inverse of the column permutation applied before the factorization (None if none)
+        """
+        self.lu = lu
+        self.perm = perm
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """
+        Shape of the factorized matrix
+        :return: rows, cols
+        """
+        return self.lu.shape
+
+    def solve(self, b: Union[Vec, Mat]) -> Union[Vec, Mat]:
+        """
+        Solve A x = b
+        :param b: right hand side
+        :return: x
+        """
+        y = self.lu.solve(b)
+        if self.perm is None:
+            return y
+        else:
+            return y[self.perm]
+
+
+class SymbolicFactorizationCache:
+    """
+    LRU cache of fill-reducing column orderings keyed by sparsity pattern.
+
+    SuperLU does not expose its symbolic analysis, so what is reused is the column ordering:
+    the first matrix with a pattern is factorized computing the ordering, and the next ones
+    are factorized with their columns already permuted (NATURAL ordering) skipping that step.
+
+    The cache belongs to the solver that creates it (i.e. one Newton-Raphson run), so that the orderings
+    and therefore the results do not depend on what was solved before. It is thread-safe: the orderings
+    are read and stored under a lock, while the numerical factorizations run outside of it.
+    """
+
+    def __init__(self, max_size: int = 64, permc_spec: str = "COLAMD"):
+        """
+        Constructor
+        :param max_size: maximum number of patterns stored
+        :param permc_spec: SuperLU column ordering computed for the new patterns
+        """
+        self.max_size = max_size
+        self.permc_spec = permc_spec
+
+        # key -> (indptr, indices, column permutation q, inverse permutation)
+        self._data: OrderedDict[Tuple[int, int, int], Tuple[IntVec, IntVec, IntVec, IntVec]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        """
+        Forget all the orderings
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_ordering(self, n_cols: int, indices: IntVec, indptr: IntVec) -> Tuple[IntVec, IntVec] | None:
+        """
+        Get the column ordering of a sparsity pattern
+        :param n_cols: number of columns
+        :param indices: CSC row indices
+        :param indptr: CSC column pointers
+        :return: (column permutation, inverse permutation) or None if the pattern is unknown
+        """
+        key = (n_cols, len(indices), hash(indptr.tobytes()) ^ hash(indices.tobytes()))
+
+        with self._lock:
+            entry = self._data.get(key, None)
+
+            if entry is not None:
+                indptr0, indices0, q, perm = entry
+                if np.array_equal(indptr0, indptr) and np.array_equal(indices0, indices):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return q, perm
+
+            self.misses += 1
+            return None
+
+    def set_ordering(self, n_cols: int, indices: IntVec, indptr: IntVec, perm_c: IntVec) -> None:
+        """
+        Store the column ordering of a sparsity pattern
+        :param n_cols: number of columns
+        :param indices: CSC row indices
+        :param indptr: CSC column pointers
+        :param perm_c: SuperLU perm_c of the factorization of the pattern
+        """
+        key = (n_cols, len(indices), hash(indptr.tobytes()) ^ hash(indices.tobytes()))
+
+        # SuperLU factorizes A Pc with (A Pc)[:, perm_c[j]] = A[:, j], so A Pc = A[:, q] with q = argsort(perm_c)
+        q = np.argsort(perm_c).astype(indptr.dtype)
+        entry = (indptr.copy(), indices.copy(), q, np.asarray(perm_c, dtype=int))
+
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def factorize(self, n_cols: int, nnz: int, data: Vec, indices: IntVec, indptr: IntVec) -> SparseLuFactor:
+        """
+        Factorize a square CSC matrix, reusing the column ordering of its pattern if known
+        :param n_cols: number of columns
+        :param nnz: number of non-zeros
+        :param data: CSC data
+        :param indices: CSC row indices
+        :param indptr: CSC column pointers
+        :return: SparseLuFactor
+        :raises RuntimeError: if the matrix is singular
+        """
+        ordering = self.get_ordering(n_cols=n_cols, indices=indices, indptr=indptr)
+
+        if ordering is None:
+            lu = gstrf(n_cols, nnz, data, indices, indptr,
+                       ilu=False, options=dict(ColPerm=self.permc_spec), csc_construct_func=None)
+            self.set_ordering(n_cols=n_cols, indices=indices, indptr=indptr, perm_c=lu.perm_c)
+            return SparseLuFactor(lu=lu, perm=None)
+
+        else:
+            q, perm = ordering
+            data2, indices2, indptr2 = csc_permute_columns(n_cols, data, indices, indptr, q)
+            lu = gstrf(n_cols, nnz, data2, indices2, indptr2,
+                       ilu=False, options=dict(ColPerm="NATURAL"), csc_construct_func=None)
+            return SparseLuFactor(lu=lu, perm=perm)
+
+
+
+def sparse_lu_factorize(n_cols: int, nnz: int, data: Vec, indices: IntVec, indptr: IntVec,
+                        cache: SymbolicFactorizationCache | None = None) -> SparseLuFactor:
+    """
+    Factorize a square CSC matrix with SuperLU
+    :param n_cols: number of columns
+    :param nnz: number of non-zeros
+    :param data: CSC data
+    :param indices: CSC row indices
+    :param indptr: CSC column pointers
+    :param cache: SymbolicFactorizationCache to reuse the column ordering of the pattern (optional)
+    :return: SparseLuFactor
+    :raises RuntimeError: if the matrix is singular
+    """
+    if cache is None:
+        lu = gstrf(n_cols, nnz, data, indices, indptr,
+                   ilu=False, options=dict(ColPerm="COLAMD"), csc_construct_func=None)
+        return SparseLuFactor(lu=lu, perm=None)
+    else:
+        return cache.factorize(n_cols=n_cols, nnz=nnz, data=data, indices=indices, indptr=indptr)
@@ -0,0 +1,234 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
+
+from VeraGridEngine.basic_structures import Logger
+
+# data of the process, kept between its chunks: the context under 'context' and anything derived from it
+_process_data: Dict[str, Any] = dict()
+
+
+def _set_process_context(version: int, payload: bytes) -> None:
+    """
+    Replace the context of a process of the pool (this is the pool initializer too)
+    :param version: context version
+    :param payload: pickled context
+    """
+    _process_data.clear()
+    _process_data['version'] = version
+    _process_data['context'] = pickle.loads(payload)
+
+
+def _load_process_context(version: int, file_name: str) -> None:
+    """
+    Replace the context of a process of the pool with the one pickled in a file
+    :param version: context version
+    :param file_name: name of the file holding the pickled context
+    """
+    with open(file_name, 'rb') as f:
+        _set_process_context(version, f.read())
+
+
+def _run_process_chunk(func: Callable[..., Tuple[Any, Logger]],
+                       version: int,
+                       file_name: Union[str, None],
+                       args: Tuple[Any, ...]) -> Tuple[Any, Logger]:
+    """
+    Run a chunk inside a process of the pool
+    :param func: function called as func(process data, *args), returning (value, Logger)
+    :param version: version of the context of the chunk
+    :param file_name: file holding the pickled context, if it may not be the one of the process yet
+    :param args: chunk arguments
+    :return: value, Logger
+    """
+    if _process_data.get('version', None) != version:
+        # the process has a stale context: it is read once, the next chunks of this version reuse it
+        _load_process_context(version, file_name)
+
+    return func(_process_data, *args)
+
+
+class ProcessPool:
+    """
+    Pool of processes running the chunks of a simulation.
+    The context of the simulation (i.e. the compiled circuit) is sent to each process once and kept there,
+    so that the chunks only carry their own arguments. The pool can be reused with other contexts
+    (i.e. for the time steps of a time series): a new context is pickled once into a temporary file,
+    the chunks only carry its version and file name, and each process reads the file when it receives
+    the first chunk of a version newer than its own.
+    """
+
+    def __init__(self, n_workers: int, context: Any = None):
+        """
+        Constructor, the processes are started on the first run
+        :param n_workers: number of processes
+        :param context: context of the chunks (see set_context)
+        """
+        self.n_workers = max(1, n_workers)
+
+        self._executor: Union[ProcessPoolExecutor, None] = None
+        self._version = 0
+        self._payload: bytes = pickle.dumps(context)
+
+        # version of the context that the processes got when they started
+        self._initial_version = 0
+
+        # file with the pickled context, once the processes are started
+        self._file_name: Union[str, None] = None
+
+    def set_context(self, context: Any) -> None:
+        """
+        Set the context that the chunk functions get in process_data['context']
+        :param context: any picklable object
+        """
+        self._version += 1
+        self._payload = pickle.dumps(context)
+
+        if self._executor is not None:
+            # the processes are running already: they will read the new context from a file
+            self._write_context_file()
+
+    def _write_context_file(self) -> None:
+        """
+        Write the pickled context to a new temporary file, removing the previous one
+        """
+        self._remove_context_file()
+        fd, self._file_name = tempfile.mkstemp(prefix='veragrid_context_', suffix='.pkl')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self._payload)
+
+    def _remove_context_file(self) -> None:
+        """
+        Remove the temporary file of the context, if any
+        """
+        if self._file_name is not None:
+            try:
+                os.remove(self._file_name)
+            except OSError:
+                pass
+            self._file_name = None
+
+    def run(self,
+            func: Callable[..., Tuple[Any, Logger]],
+            args_list: Sequence[Tuple[Any, ...]],
+            store_func: Union[Callable[[int, Any], None], None] = None,
+            logger: Union[Logger, None] = None,
+            ordered: bool = False,
+            weights: Union[Sequence[int], None] = None,
+            report_progress2: Union[Callable[[int, int], None], None] = None,
+            is_cancel: Union[Callable[[], bool], None] = None) -> bool:
+        """
+        Run chunks in the pool
+        :param func: module level function called as func(process data, *args) in the processes,
+                     returning (value, Logger). The process data holds the context and is kept between chunks.
+        :param args_list: arguments of each chunk
+        :param store_func: function called with (chunk index, value) for each finished chunk
+        :param logger: Logger where the chunks messages are added, in the chunks order
+        :param ordered: call store_func in the chunks order? (otherwise, in the finishing order)
+        :param weights: weight of each chunk in the progress (i.e. number of time steps), 1 by default
+        :param report_progress2: (optional) progress function (current, total)
+        :param is_cancel: (optional) function returning True if the simulation must stop
+        :return: True if completed, False if cancelled
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers,
+                                                 mp_context=mp.get_context(),
+                                                 initializer=_set_process_context,
+                                                 initargs=(self._version, self._payload))
+            self._initial_version = self._version
+
+        # all the processes started with the initial context, the others are read from the file once per process
+        file_name = None if self._version == self._initial_version else self._file_name
+
+        futures: Dict[Future, int] = {self._executor.submit(_run_process_chunk, func, self._version, file_name, args): i
+                                      for i, args in enumerate(args_list)}
+        pending = set(futures.keys())
+
+        if weights is None:
+            weights = [1] * len(args_list)
+        total = int(sum(weights))
+
+        loggers: Dict[int, Logger] = dict()
+        finished: Dict[int, Any] = dict()
+        next_i = 0
+        n_done = 0
+        completed = True
+
+        try:
+            while len(pending):
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    i = futures[future]
+                    value, loggers[i] = future.result()
+                    n_done += weights[i]
+
+                    if store_func is not None:
+                        if ordered:
+                            finished[i] = value
+                        else:
+                            store_func(i, value)
+
+                while next_i in finished:
+                    store_func(next_i, finished.pop(next_i))
+                    next_i += 1
+
+                if report_progress2 is not None and len(done):
+                    report_progress2(n_done, total)
+
+                if is_cancel is not None and is_cancel():
+                    completed = False
+                    break
+        finally:
+            # the chunks not started yet are dropped (the running ones finish in the background)
+            for future in pending:
+                future.cancel()
+
+        if logger is not None:
+            for i in sorted(loggers.keys()):
+                logger += loggers[i]
+
+        return completed
+
+    def shutdown(self) -> None:
+        """
+        Stop the processes, waiting for the running chunks
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        self._remove_context_file()
+
+    def __enter__(self) -> "ProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+
+
+def run_in_process_pool(func: Callable[..., Tuple[Any, Logger]],
+                        args_list: Sequence[Tuple[Any, ...]],
+                        context: Any,
+                        n_workers: int,
+                        **kwargs) -> bool:
+    """
+    Run chunks in a pool of processes created for them (see ProcessPool.run)
+    :param func: module level function called as func(process data, *args), returning (value, Logger)
+    :param args_list: arguments of each chunk
+    :param context: context of the chunks, sent once per process
+    :param n_workers: number of processes
+    :param kwargs: ProcessPool.run arguments
+    :return: True if completed, False if cancelled
+    """
+    with ProcessPool(n_workers=min(n_workers, len(args_list)), context=context) as pool:
+        return pool.run(func=func, args_list=args_list, **kwargs)
@@ -0,0 +1,84 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+# name -> (shared memory block name, shape, dtype string)
+SharedArraysSpec = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class SharedArrays:
+    """
+    Set of named numpy arrays backed by multiprocessing shared memory,
+    so that several processes can write their rows into the same results
+    """
+
+    def __init__(self, spec: SharedArraysSpec, create: bool = False) -> None:
+        """
+        Constructor, use SharedArrays.create or SharedArrays.attach
+        :param spec: arrays specification
+        :param create: create the memory blocks? otherwise, they are attached
+        """
+        self.spec: SharedArraysSpec = spec
+        self.owner = create
+        self.blocks: Dict[str, shared_memory.SharedMemory] = dict()
+        self.arrays: Dict[str, np.ndarray] = dict()
+
+        for name, (block_name, shape, dtype) in spec.items():
+            if create:
+                nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+                block = shared_memory.SharedMemory(create=True, size=nbytes)
+                self.spec[name] = (block.name, shape, dtype)
+            else:
+                block = shared_memory.SharedMemory(name=block_name)
+
+            self.blocks[name] = block
+            self.arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+            if create:
+                self.arrays[name][...] = 0
+
+    @staticmethod
+    def create(arrays: Dict[str, Tuple[Tuple[int, ...], np.dtype | type | str]]) -> "SharedArrays":
+        """
+        Create new shared arrays initialized to zero
+        :param arrays: dictionary of name -> (shape, dtype)
+        :return: SharedArrays (owner of the memory blocks)
+        """
+        spec: SharedArraysSpec = {name: ("", tuple(shape), np.dtype(dtype).str)
+                                  for name, (shape, dtype) in arrays.items()}
+        return SharedArrays(spec=spec, create=True)
+
+    @staticmethod
+    def attach(spec: SharedArraysSpec) -> "SharedArrays":
+        """
+        Attach to shared arrays created by another process
+        :param spec: specification of the owner (SharedArrays.spec)
+        :return: SharedArrays
+        """
+        return SharedArrays(spec=spec, create=False)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """
+        Get a shared array
+        :param name: array name
+        :return: numpy array view of the shared memory
+        """
+        return self.arrays[name]
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory, and free it if this is the owner.
+        The arrays are not usable afterwards, copy them before closing.
+        """
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks.clear()
@@ -18,10 +18,11 @@ from VeraGridEngine.Devices import *
 from VeraGridEngine.DataStructures import *
 from VeraGridEngine.Topology import *
 from VeraGridEngine.Compilers import *
-from VeraGridEngine.IO.file_handler import FileOpen, FileSave, FileSavingOptions
+from VeraGridEngine.IO.file_handler import FileOpen, FileSave, FileSavingOptions, FileOpenOptions
 from VeraGridEngine.IO.veragrid.remote import (gather_model_as_jsons_for_communication, RemoteInstruction,
                                                SimulationTypes, send_json_data, get_certificate_path, get_certificate)
 from VeraGridEngine.Compilers.circuit_to_data import compile_numerical_circuit_at, NumericalCircuit
+from VeraGridEngine.Compilers.circuit_to_data_ts import NumericalCircuitTs, compile_numerical_circuit_ts
 
 
 def open_file(filename: Union[str, List[str]]) -> MultiCircuit:
@@ -885,6 +885,10 @@ class ListSet(list):
         """Check if the value is in the ListSet using the internal set for O(1) queries."""
         return value in self._set
 
+    def __reduce__(self):
+        """Pickle as the list of items, the default list pickling appends them before the set exists."""
+        return self.__class__, (list(self),)
+
     def __add__(self, other):
         """Return a new ListSet containing elements from self and other, ensuring uniqueness."""
         return ListSet(self + [item for item in other if item not in self._set])
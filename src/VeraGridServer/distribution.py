@@ -0,0 +1,541 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import os
+import time
+import tempfile
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, Any, Callable, Union, TYPE_CHECKING
+
+import numpy as np
+import requests
+
+from VeraGridEngine.IO.veragrid.remote import (RemoteInstruction, RemoteJob, download_job_results,
+                                               read_job_results, upload_model)
+from VeraGridEngine.IO.veragrid.pack_unpack import parse_veragrid_data
+from VeraGridEngine.IO.file_handler import FileOpen
+from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.Simulations.driver_handler import create_driver
+from VeraGridEngine.Simulations.OPF.opf_ts_driver import OptimalPowerFlowTimeSeriesDriver
+from VeraGridEngine.Simulations.OPF.opf_ts_worker import has_inter_temporal_coupling
+from VeraGridEngine.Simulations.results_template import ResultsTemplate
+from VeraGridEngine.basic_structures import IntVec, get_time_groups
+from VeraGridEngine.enumerations import SimulationTypes, JobStatus, TimeGrouping
+
+if TYPE_CHECKING:  # Only imports the below statements during type checking
+    from VeraGridServer.job_queue import JobQueue
+
+# simulations that can be split by time index ranges
+DISTRIBUTABLE_SIMULATIONS = (SimulationTypes.PowerFlowTimeSeries_run,
+                             SimulationTypes.ContingencyAnalysisTS_run,
+                             SimulationTypes.OPFTimeSeries_run)
+
+# results variables that are not per time step and accumulate over the shards
+SUMMED_VARIABLES: Dict[SimulationTypes, List[str]] = {
+    SimulationTypes.ContingencyAnalysisTS_run: ['srap_used_power'],
+}
+
+
+def load_job_grid(json_data: Dict[str, Any]) -> MultiCircuit:
+    """
+    Get the grid of a job
+    :param json_data: job data, either with the grid info generated with 'gather_model_as_jsons_for_communication'
+                      or with the 'model_file' of a binary model payload stored in the server
+    :return: MultiCircuit
+    """
+    model_file = json_data.get('model_file', None)
+
+    if model_file is not None:
+        grid = FileOpen(file_name=model_file).open()
+        if grid is None:
+            raise RuntimeError(f"Could not open the model {json_data.get('model_hash', model_file)}")
+        return grid
+    else:
+        return parse_veragrid_data(data=json_data)
+
+
+class ChildServer(ABC):
+    """
+    Server that can run jobs for the master
+    """
+
+    def __init__(self, name: str):
+        """
+        Constructor
+        :param name: name to identify the server in the messages
+        """
+        self.name = name
+
+    @abstractmethod
+    def submit(self, json_data: Dict[str, Any]) -> str:
+        """
+        Submit a job
+        :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+        :return: job id tag
+        """
+        pass
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Union[RemoteJob, None]:
+        """
+        Get the status of a job
+        :param job_id: job id tag
+        :return: RemoteJob or None if not found
+        """
+        pass
+
+    @abstractmethod
+    def get_results(self, job_id: str, results: ResultsTemplate) -> None:
+        """
+        Get the results of a finished job
+        :param job_id: job id tag
+        :param results: results object of the job (time indices) to fill in-place
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """
+        Cancel (if running) and delete a job
+        :param job_id: job id tag
+        """
+        pass
+
+
+class RemoteChildServer(ChildServer):
+    """
+    Child server reached through its REST API
+    """
+
+    def __init__(self, base_url: str, certificate: Union[str, bool] = False, timeout: float = 30.0,
+                 max_retries: int = 3, retry_wait: float = 1.0):
+        """
+        Constructor
+        :param base_url: url of the server (i.e. https://192.168.1.10:8000)
+        :param certificate: SSL certificate path (False to not to verify it)
+        :param timeout: requests timeout in seconds
+        :param max_retries: number of times that a status request that failed to reach the server is repeated
+        :param retry_wait: time in seconds before the first repetition (it doubles with each one)
+        """
+        ChildServer.__init__(self, name=base_url)
+        self.base_url = base_url
+        self.certificate = certificate
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_wait = retry_wait
+
+    def submit(self, json_data: Dict[str, Any]) -> str:
+        """
+        Submit a job
+        :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+        :return: job id tag
+        """
+        model_file = json_data.get('model_file', None)
+
+        if model_file is not None:
+            # binary model payload: the child only receives the model if it does not have it cached
+            if not upload_model(base_url=self.base_url, file_path=model_file,
+                                model_hash=json_data['model_hash'], certificate=self.certificate):
+                raise RuntimeError(f"{self.name}: could not upload the model")
+
+            response = requests.post(url=f"{self.base_url}/models/{json_data['model_hash']}/jobs",
+                                     json={'name': json_data.get('name', ""),
+                                           'instruction': json_data['instruction']},
+                                     verify=self.certificate, timeout=self.timeout)
+        else:
+            response = requests.post(url=f"{self.base_url}/upload_job/", json=json_data,
+                                     verify=self.certificate, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if not data.get("success", False):
+            raise RuntimeError(f"{self.name}: {data.get('msg', 'the job was not accepted')}")
+
+        return data["job_id"]
+
+    def get_job(self, job_id: str) -> Union[RemoteJob, None]:
+        """
+        Get the status of a job
+        :param job_id: job id tag
+        :return: RemoteJob or None if not found
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = requests.get(url=f"{self.base_url}/jobs/{job_id}",
+                                        verify=self.certificate, timeout=self.timeout)
+
+                if response.status_code == 404:
+                    return None
+
+                response.raise_for_status()
+                return RemoteJob(data=response.json())
+
+            except requests.exceptions.RequestException:
+                # connection errors, timeouts and server errors may be transient: the job is not lost yet
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.retry_wait * 2 ** attempt)
+
+        return None
+
+    def get_results(self, job_id: str, results: ResultsTemplate) -> None:
+        """
+        Download the results of a finished job
+        :param job_id: job id tag
+        :param results: results object of the job (time indices) to fill in-place
+        """
+        file_path = os.path.join(tempfile.gettempdir(), f"{job_id}.zip")
+
+        if not download_job_results(base_url=self.base_url, job_id=job_id,
+                                    certificate=self.certificate, file_path=file_path):
+            raise RuntimeError(f"{self.name}: could not download the results of {job_id}")
+
+        try:
+            read_job_results(file_path=file_path, results=results)
+        finally:
+            os.remove(file_path)
+
+    def delete(self, job_id: str) -> None:
+        """
+        Cancel (if running) and delete a job
+        :param job_id: job id tag
+        """
+        requests.delete(url=f"{self.base_url}/jobs/{job_id}", verify=self.certificate, timeout=self.timeout)
+
+
+class LocalChildServer(ChildServer):
+    """
+    Stand-in child server that runs the jobs in a local JobQueue
+    """
+
+    def __init__(self, job_queue: "JobQueue", name: str = "local"):
+        """
+        Constructor
+        :param job_queue: JobQueue
+        :param name: name to identify the server in the messages
+        """
+        ChildServer.__init__(self, name=name)
+        self.job_queue = job_queue
+
+    def submit(self, json_data: Dict[str, Any]) -> str:
+        """
+        Submit a job
+        :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+        :return: job id tag
+        """
+        return self.job_queue.submit(json_data=json_data).id_tag
+
+    def get_job(self, job_id: str) -> Union[RemoteJob, None]:
+        """
+        Get the status of a job
+        :param job_id: job id tag
+        :return: RemoteJob or None if not found
+        """
+        return self.job_queue.get_job(job_id)
+
+    def get_results(self, job_id: str, results: ResultsTemplate) -> None:
+        """
+        Read the results of a finished job
+        :param job_id: job id tag
+        :param results: results object of the job (time indices) to fill in-place
+        """
+        read_job_results(file_path=self.job_queue.file_path_func(job_id), results=results)
+
+    def delete(self, job_id: str) -> None:
+        """
+        Cancel (if running) and delete a job
+        :param job_id: job id tag
+        """
+        self.job_queue.delete(job_id)
+
+
+def get_time_shards(time_indices: IntVec,
+                    n_shards: int,
+                    time_array: Union[Any, None] = None,
+                    time_grouping: TimeGrouping = TimeGrouping.NoGrouping) -> List[IntVec]:
+    """
+    Split the time indices into contiguous shards of similar size
+    :param time_indices: time indices to simulate
+    :param n_shards: number of shards wanted
+    :param time_array: DatetimeIndex of the time indices (needed for the grouping)
+    :param time_grouping: if given, the shards only break at the start of a time group,
+                          so that the groups (i.e. the days of an OPF by groups) are not split
+    :return: list of arrays of time indices
+    """
+    nt = len(time_indices)
+    n_shards = max(1, min(n_shards, nt))
+
+    if time_grouping != TimeGrouping.NoGrouping and time_array is not None and nt > 0:
+        # the last group delimiter is the last index, not the start of a group
+        starts = np.array(get_time_groups(t_array=time_array, grouping=time_grouping)[:-1], dtype=int)
+        if len(starts) == 0 or starts[0] != 0:
+            starts = np.r_[0, starts]
+    else:
+        starts = np.arange(nt)
+
+    # pick the allowed breaking points closest to an even split
+    targets = np.linspace(0, nt, n_shards + 1)[1:-1]
+    breaks = np.unique(starts[np.searchsorted(starts, targets).clip(0, len(starts) - 1)])
+    breaks = breaks[(breaks > 0) & (breaks < nt)]
+
+    return [time_indices[a:b] for a, b in zip(np.r_[0, breaks], np.r_[breaks, nt])]
+
+
+def merge_time_shard(results: ResultsTemplate,
+                     shard_results: ResultsTemplate,
+                     positions: IntVec,
+                     summed: List[str]) -> None:
+    """
+    Copy the results of a time shard into the results of the complete time series (in-place)
+    :param results: results of all the time indices
+    :param shard_results: results of the shard time indices
+    :param positions: positions of the shard time indices in the complete time series
+    :param summed: names of the variables that are not per time step and are summed
+    """
+    nt = results.time_array.shape[0]
+
+    for arr_name in results.data_variables.keys():
+
+        arr = getattr(results, arr_name)
+        shard_arr = getattr(shard_results, arr_name)
+
+        if arr_name == 'time_array' or shard_arr is None:
+            continue
+
+        elif isinstance(arr, np.ndarray) and isinstance(shard_arr, np.ndarray):
+
+            if arr.ndim > 0 and arr.shape[0] == nt and shard_arr.shape == (len(positions),) + arr.shape[1:]:
+                # per time step results
+                arr[positions, ...] = shard_arr
+
+            elif arr_name in summed and arr.shape == shard_arr.shape:
+                arr += shard_arr
+
+            elif arr.shape == shard_arr.shape:
+                # the values that do not depend on the time (names, indices, ...) are the same in every shard
+                setattr(results, arr_name, shard_arr)
+
+        elif hasattr(arr, 'merge'):
+            # reports
+            arr.merge(shard_arr)
+
+
+class DistributedJob:
+    """
+    Job that the master splits into time shards run by the child servers.
+    Each shard is sent to the least busy server; a shard that fails or times out is sent again
+    until the number of retries is exhausted, and the server that failed is not used for a while
+    (the waiting time doubles with each consecutive failure).
+    """
+
+    def __init__(self,
+                 json_data: Dict[str, Any],
+                 servers: List[ChildServer],
+                 n_shards: int = 0,
+                 time_grouping: TimeGrouping = TimeGrouping.NoGrouping,
+                 timeout: float = 3600.0,
+                 max_retries: int = 2,
+                 max_jobs_per_server: int = 1,
+                 poll_time: float = 1.0,
+                 progress_func: Union[Callable[[float], None], None] = None,
+                 text_func: Union[Callable[[str], None], None] = None,
+                 cancel_func: Union[Callable[[], bool], None] = None):
+        """
+        Constructor
+        :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+        :param servers: child servers to run the shards
+        :param n_shards: number of shards (if zero, one per server)
+        :param time_grouping: time grouping that the shards must not split
+        :param timeout: maximum time in seconds that a shard may run in a server before being sent again
+        :param max_retries: number of times that a shard may be sent again
+        :param max_jobs_per_server: maximum number of shards running at the same time in a server
+        :param poll_time: time in seconds between the status requests
+        :param progress_func: function to report the progress (0~100)
+        :param text_func: function to report messages
+        :param cancel_func: function that returns True when the job has to stop
+        """
+        if len(servers) == 0:
+            raise ValueError("No child servers to distribute the job")
+
+        self.json_data = json_data
+        self.servers = servers
+        self.n_shards = n_shards if n_shards > 0 else len(servers)
+        self.time_grouping = time_grouping
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_jobs_per_server = max_jobs_per_server
+        self.poll_time = poll_time
+        self.progress_func = progress_func
+        self.text_func = text_func
+        self.cancel_func = cancel_func
+
+        self.instruction = RemoteInstruction(data=json_data['instruction'])
+
+        if self.instruction.operation not in DISTRIBUTABLE_SIMULATIONS:
+            raise ValueError(f"{self.instruction.operation.value} cannot be distributed")
+
+    def report_text(self, msg: str) -> None:
+        """
+        Report a message
+        :param msg: message
+        """
+        if self.text_func is not None:
+            self.text_func(msg)
+
+    def get_shard_json_data(self, time_indices: IntVec) -> Dict[str, Any]:
+        """
+        Get the job data of a shard
+        :param time_indices: time indices of the shard
+        :return: json data
+        """
+        instruction = RemoteInstruction(data=self.json_data['instruction'])
+        instruction.time_indices = time_indices
+
+        data = dict(self.json_data)  # the model data is shared, only the instruction changes
+        data['instruction'] = instruction.get_data()
+        return data
+
+    def run(self, grid: Union[MultiCircuit, None] = None) -> ResultsTemplate:
+        """
+        Run the shards in the child servers and merge their results
+        :param grid: the MultiCircuit of the json data (parsed if not given)
+        :return: results of the complete time series
+        """
+        if grid is None:
+            grid = load_job_grid(json_data=self.json_data)
+
+        time_indices = (self.instruction.time_indices if self.instruction.time_indices is not None
+                        else grid.get_all_time_indices())
+
+        # the driver that the child servers create for the shards
+        driver = create_driver(grid=grid, driver_tpe=self.instruction.operation, time_indices=time_indices)
+        n_shards = self.n_shards
+        time_grouping = self.time_grouping
+
+        if isinstance(driver, OptimalPowerFlowTimeSeriesDriver):
+            if time_grouping == TimeGrouping.NoGrouping:
+                time_grouping = driver.options.time_grouping
+
+            if has_inter_temporal_coupling(grid=grid, options=driver.options):
+                # the storage and commitment states of a shard depend on the previous one
+                self.report_text("The time steps are coupled, the job is not split")
+                n_shards = 1
+
+        shards = get_time_shards(time_indices=time_indices,
+                                 n_shards=n_shards,
+                                 time_array=grid.time_profile[time_indices] if grid.time_profile is not None else None,
+                                 time_grouping=time_grouping)
+
+        # positions of each shard in the complete time series
+        offsets = np.r_[0, np.cumsum([len(shard) for shard in shards])]
+
+        results = driver.results
+        summed = SUMMED_VARIABLES.get(self.instruction.operation, list())
+
+        pending = deque(range(len(shards)))
+        running: Dict[int, Any] = dict()  # shard -> (server index, job id, start time)
+        attempts = np.zeros(len(shards), dtype=int)
+        server_failures = np.zeros(len(self.servers), dtype=int)
+        server_wait_until = np.zeros(len(self.servers), dtype=float)
+        n_done = 0
+
+        def retry(i_shard: int, i_srv_: int, msg: str, count: bool = True):
+            """
+            Queue a shard again
+            :param i_shard: shard index
+            :param i_srv_: index of the server that failed
+            :param msg: reason
+            :param count: count this as a shard attempt? (otherwise it only counts against the server)
+            """
+            server_failures[i_srv_] += 1
+            server_wait_until[i_srv_] = time.time() + self.poll_time * 2 ** min(server_failures[i_srv_], 10)
+
+            if count:
+                attempts[i_shard] += 1
+
+            if attempts[i_shard] > self.max_retries or np.all(server_failures > self.max_retries):
+                for i_srv_, job_id_, _ in running.values():
+                    self.servers[i_srv_].delete(job_id_)
+                raise RuntimeError(f"Shard {i_shard} failed {attempts[i_shard]} times, last: {msg}")
+
+            self.report_text(f"Retrying shard {i_shard}: {msg}")
+            pending.append(i_shard)
+
+        while n_done < len(shards):
+
+            if self.cancel_func is not None and self.cancel_func():
+                for i_srv, job_id, _ in running.values():
+                    self.servers[i_srv].delete(job_id)
+                raise RuntimeError("Distributed job cancelled")
+
+            # send the pending shards to the least busy servers (the failed ones wait for the next round)
+            for _ in range(len(pending)):
+                load = np.zeros(len(self.servers), dtype=int)
+                for i_srv, _, _ in running.values():
+                    load[i_srv] += 1
+
+                available = (load < self.max_jobs_per_server) & (server_wait_until <= time.time())
+                if not available.any():
+                    break
+
+                i_srv = int(np.argmin(np.where(available, load, np.iinfo(int).max)))
+                i_shard = pending.popleft()
+
+                try:
+                    job_id = self.servers[i_srv].submit(self.get_shard_json_data(shards[i_shard]))
+                    running[i_shard] = (i_srv, job_id, time.time())
+                    self.report_text(f"Shard {i_shard} ({len(shards[i_shard])} steps) "
+                                     f"sent to {self.servers[i_srv].name}")
+                except Exception as e:
+                    # the server could not be reached: the shard did not fail
+                    retry(i_shard, i_srv, f"{self.servers[i_srv].name}: {e}", count=False)
+
+            # check the running shards
+            for i_shard, (i_srv, job_id, t0) in list(running.items()):
+                server = self.servers[i_srv]
+
+                try:
+                    job = server.get_job(job_id)
+                except Exception as e:
+                    job = None
+                    self.report_text(f"{server.name}: {e}")
+
+                if job is not None and job.status == JobStatus.Done:
+                    del running[i_shard]
+                    try:
+                        shard_results = create_driver(grid=grid,
+                                                      driver_tpe=self.instruction.operation,
+                                                      time_indices=shards[i_shard]).results
+                        server.get_results(job_id=job_id, results=shard_results)
+                    except Exception as e:
+                        retry(i_shard, i_srv, f"{server.name}: {e}")
+                        continue
+
+                    merge_time_shard(results=results,
+                                     shard_results=shard_results,
+                                     positions=np.arange(offsets[i_shard], offsets[i_shard + 1]),
+                                     summed=summed)
+                    server.delete(job_id)
+                    server_failures[i_srv] = 0
+
+                    n_done += 1
+                    if self.progress_func is not None:
+                        self.progress_func(n_done / len(shards) * 100.0)
+
+                elif job is None or job.is_finished():
+                    del running[i_shard]
+                    retry(i_shard, i_srv, f"{server.name}: " + (job.msg if job is not None else "job lost"))
+
+                elif time.time() - t0 > self.timeout:
+                    del running[i_shard]
+                    server.delete(job_id)
+                    retry(i_shard, i_srv, f"{server.name}: timeout")
+
+            if n_done < len(shards):
+                time.sleep(self.poll_time)
+
+        return results
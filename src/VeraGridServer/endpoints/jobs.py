@@ -3,19 +3,25 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
 import os
+import re
 import json
-from typing import Dict
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
+from typing import List, Union, Dict, Any
+from fastapi import APIRouter, HTTPException, Response, Request
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import StreamingResponse
 
-from VeraGridEngine.IO.veragrid.remote import RemoteInstruction, RemoteJob, run_job
-from VeraGridEngine.IO.veragrid.pack_unpack import parse_veragrid_data
-from VeraGridEngine.Devices.multi_circuit import MultiCircuit
+from VeraGridEngine.IO.veragrid.remote import RemoteInstruction
+from VeraGridEngine.IO.veragrid.zip_interface import get_zip_model_hash
 from VeraGridEngine.enumerations import SimulationTypes, JobStatus
+from VeraGridServer.job_queue import JobQueue
+from VeraGridServer.distribution import DISTRIBUTABLE_SIMULATIONS
+from VeraGridServer.endpoints.register_sub_servers import registered_services
+from VeraGridServer.settings import settings
 
 router = APIRouter()
 
-JOBS_LIST: Dict[str, RemoteJob] = dict()
+# the queue is created on the first use, with the settings given at launch
+JOB_QUEUE: Union[JobQueue, None] = None
 
 
 def get_fs_folder() -> str:
@@ -35,43 +41,43 @@ def generate_job_file_path(job_id: str):
     return os.path.join(get_fs_folder(), f"{job_id}.zip")
 
 
-async def process_json_data(json_data: Dict[str, Dict[str, Dict[str, str]]]):
+def get_model_file_path(model_hash: str) -> str:
     """
-    Action called on the upload
-    :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+    Get the path of the cached model payload of a hash
+    :param model_hash: model content hash
+    :return: file path
     """
-    grid = parse_veragrid_data(data=json_data)
-    print(f'Circuit loaded alright nbus{grid.get_bus_number()}, '
-          f'nbr{grid.get_branch_number(add_vsc=False, add_hvdc=False, add_switch=True)}')
+    if re.fullmatch(r"[0-9a-f]{32}", model_hash) is None:
+        raise HTTPException(status_code=400, detail="Invalid model hash")
 
-    if 'instruction' in json_data:
-        instruction = RemoteInstruction(data=json_data['instruction'])
+    return os.path.join(get_fs_folder(), "models", f"{model_hash}.veragrid")
 
-        job = RemoteJob(grid=grid, instruction=instruction)
 
-        # register the job
-        JOBS_LIST[job.id_tag] = job
+def get_job_queue() -> JobQueue:
+    """
+    Get the jobs queue of the server
+    :return: JobQueue
+    """
+    global JOB_QUEUE
+    if JOB_QUEUE is None:
+        JOB_QUEUE = JobQueue(file_path_func=generate_job_file_path, max_workers=settings.max_workers)
+    return JOB_QUEUE
 
-        # print("Job data\n", job.get_data())
-        if job.instruction.operation != SimulationTypes.NoSim:
-            driver = run_job(grid=grid, job=job)
 
-            if driver is not None:
-                print("Driver:", driver.name)
-                if driver.results is not None:
-                    return driver.results.get_dict()
-                else:
-                    return dict()
-            else:
-                return dict()
+def get_child_servers_urls() -> List[str]:
+    """
+    Get the urls of the child servers registered in this (master) server
+    :return: list of urls
+    """
+    return [f"https://{service['ip']}:{service['port']}" for service in registered_services.values()]
 
-        else:
-            print("No simulation")
-            return dict()
 
-    else:
-        print('No Instruction found\n\n', json_data)
-        return dict()
+def shutdown_job_queue() -> None:
+    """
+    Stop the jobs queue workers (if started)
+    """
+    if JOB_QUEUE is not None:
+        JOB_QUEUE.shutdown()
 
 
 async def stream_load_json(json_data):
@@ -90,56 +96,123 @@ async def stream_load_json(json_data):
     return StreamingResponse(generate())
 
 
+def submit_job_data(json_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Queue a job
+    :param json_data: the job data (see load_job_grid)
+    :return: response
+    """
+    if 'instruction' in json_data:
+        instruction = RemoteInstruction(data=json_data['instruction'])
+
+        if instruction.operation != SimulationTypes.NoSim:
+
+            if settings.am_i_master and instruction.operation in DISTRIBUTABLE_SIMULATIONS:
+                # split the job among the child servers (if any)
+                child_servers = get_child_servers_urls()
+            else:
+                child_servers = None
+
+            job = get_job_queue().submit(json_data=json_data, child_servers=child_servers)
+            return {"success": True, "job_id": job.id_tag, "results": None, "msg": "Job submitted"}
+
+        else:
+            return {"success": False, "job_id": None, "results": None, "msg": "No simulation"}
+
+    else:
+        return {"success": False, "job_id": None, "results": None, "msg": "No Instruction found"}
+
+
 @router.post("/upload_job/")
-async def upload_job(json_data: dict, background_tasks: BackgroundTasks):
+async def upload_job(json_data: dict):
     """
-    Endpoint to upload a job into here
-    :param json_data:
-    :param background_tasks:
+    Endpoint to upload a job into here.
+    The job is queued and run by the workers, use the job id to follow it and download its results
+    :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
     :return:
     """
-    background_tasks.add_task(stream_load_json, json_data)
+    return submit_job_data(json_data=json_data)
+
 
-    grid: MultiCircuit = parse_veragrid_data(data=json_data)
+@router.get("/models/{model_hash}")
+async def model_status(model_hash: str):
+    """
+    Check if a model payload is cached in this server
+    :param model_hash: model content hash
+    :return: found?
+    """
+    if not os.path.exists(get_model_file_path(model_hash)):
+        raise HTTPException(status_code=404, detail="Model not found")
 
-    print(f'Circuit loaded alright nbus{grid.get_bus_number()}, '
-          f'nbr{grid.get_branch_number(add_vsc=False, add_hvdc=False, add_switch=True)}')
+    return {"model_hash": model_hash}
 
-    if 'instruction' in json_data:
-        instruction = RemoteInstruction(data=json_data['instruction'])
 
-        job = RemoteJob(grid=grid, instruction=instruction)
+@router.put("/models/{model_hash}")
+async def upload_model(model_hash: str, request: Request):
+    """
+    Upload a binary model payload (a .veragrid file) streaming it to disk.
+    The file is only accepted if its content matches the hash, and a cached file is never replaced
+    :param model_hash: model content hash
+    :param request: request with the file as body
+    :return: A message indicating the result
+    """
+    file_path = get_model_file_path(model_hash)
 
-        # register the job
-        JOBS_LIST[job.id_tag] = job
-        job.status = JobStatus.Running
+    if os.path.exists(file_path):
+        # already cached and verified
+        return {"model_hash": model_hash}
 
-        # print("Job data\n", job.get_data())
-        if job.instruction.operation != SimulationTypes.NoSim:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-            try:
-                driver = run_job(grid=grid, job=job)
-            except Exception as e:
-                print("Job running error:\n", e)
-                return {"success": False, "results": None, "msg": f"Job running error"}
+    tmp_path = f"{file_path}.{os.getpid()}.{id(request)}.part"
+    try:
+        file = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(file.write, chunk)
+        finally:
+            await run_in_threadpool(file.close)
 
-            job.status = JobStatus.Done
-            JOBS_LIST.pop(job.id_tag)
+        if await run_in_threadpool(get_zip_model_hash, tmp_path) != model_hash:
+            raise HTTPException(status_code=400, detail="The model content does not match the hash")
 
-            if driver is not None:
-                print("Driver:", driver.name)
-                if driver.results is not None:
-                    return {"success": True, "results": driver.results.get_dict(), "msg": "all good"}
-                else:
-                    return {"success": False, "results": None, "msg": "No results in the driver"}
-            else:
-                return {"success": False, "results": None, "msg": "The driver is None"}
+        try:
+            # unlike a rename, the link fails if another upload of the same model got there first
+            os.link(tmp_path, file_path)
+        except FileExistsError:
+            pass
 
-        else:
-            return {"success": False, "results": None, "msg": "No simulation"}
+    except HTTPException:
+        raise
 
-    else:
-        return {"success": False, "results": None, "msg": "No Instruction found"}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid model file: {e}")
+
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {"model_hash": model_hash}
+
+
+@router.post("/models/{model_hash}/jobs")
+async def upload_model_job(model_hash: str, json_data: dict):
+    """
+    Endpoint to run a job on a cached model payload
+    :param model_hash: model content hash
+    :param json_data: {'name': model name, 'instruction': RemoteInstruction data}
+    :return:
+    """
+    file_path = get_model_file_path(model_hash)
+
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    data = dict(json_data)
+    data['model_file'] = os.path.abspath(file_path)
+    data['model_hash'] = model_hash
+
+    return submit_job_data(json_data=data)
 
 
 @router.get("/jobs_list")
@@ -148,7 +221,35 @@ async def jobs_list():
     Endpoint to return the list of jobs
     :return: string
     """
-    return [job.get_data() for id_tag, job in JOBS_LIST.items()]
+    return [job.get_data() for job in get_job_queue().get_jobs()]
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    Get the status of a specific job by ID
+    :param job_id: The ID of the job
+    :return: job data
+    """
+    job = get_job_queue().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job.get_data()
+
+
+@router.get("/jobs/{job_id}/progress")
+async def job_progress(job_id: str):
+    """
+    Get the progress of a specific job by ID
+    :param job_id: The ID of the job
+    :return: status, progress value (0~100) and progress text
+    """
+    job = get_job_queue().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {"status": job.status.value, "progress_value": job.progress_value, "progress": job.progress}
 
 
 @router.delete("/jobs/{job_id}")
@@ -158,8 +259,7 @@ async def delete_job(job_id: str):
     :param job_id: The ID of the job to delete_with_dialogue
     :return: A message indicating the result
     """
-    if job_id in JOBS_LIST:
-        del JOBS_LIST[job_id]
+    if get_job_queue().delete(job_id):
         return {"message": f"Job {job_id} deleted successfully"}
     else:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -172,13 +272,11 @@ async def cancel_job(job_id: str):
     :param job_id: The ID of the job to cancel
     :return: A message indicating the result
     """
-    job = JOBS_LIST.get(job_id)
-    if not job:
+    if get_job_queue().cancel(job_id):
+        return {"message": f"Job {job_id} canceled successfully"}
+    else:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job.cancel()
-    return {"message": f"Job {job_id} canceled successfully"}
-
 
 @router.get("/download_results/{job_id}")
 async def download_large_file(job_id: str):
@@ -186,7 +284,7 @@ async def download_large_file(job_id: str):
     Function to download a large file, ie the results of a simulation
     """
 
-    job = JOBS_LIST.get(job_id, None)
+    job = get_job_queue().get_job(job_id)
 
     if job is None:
         return Response(status_code=404, content="Job not found")
@@ -209,10 +307,7 @@ async def download_large_file(job_id: str):
         :return:
         """
         with open(file_path, "rb") as file:
-            sent = 0
             while chunk := file.read(chunk_size):  # Read in chunks of 1MB
-                sent += chunk_size
-                job.progress = f"{sent} MB"
                 yield chunk
 
     print("Sending", job_id)
@@ -0,0 +1,381 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+from __future__ import annotations
+
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List, Any, Callable, Union
+
+from VeraGridEngine.IO.veragrid.remote import RemoteInstruction, RemoteJob, save_job_results
+from VeraGridEngine.Simulations.driver_handler import create_driver
+from VeraGridEngine.Simulations.driver_template import DummySignal
+from VeraGridEngine.Simulations.types import DRIVER_OBJECTS
+from VeraGridEngine.enumerations import JobStatus
+from VeraGridServer.distribution import DistributedJob, RemoteChildServer, load_job_grid
+
+
+class JobStateReporter:
+    """
+    Publishes the state of a job running in a worker process into the shared state dictionary,
+    and cancels the job driver when the cancel event is set
+    """
+
+    def __init__(self, job_id: str, state: Dict[str, Dict[str, Any]], cancel_event: Any,
+                 min_interval: float = 0.2):
+        """
+        Constructor
+        :param job_id: job id tag
+        :param state: shared (multiprocessing manager) dictionary {job id: job state}
+        :param cancel_event: shared (multiprocessing manager) event to cancel the job
+        :param min_interval: minimum time in seconds between progress publications
+        """
+        self.job_id = job_id
+        self.state = state
+        self.cancel_event = cancel_event
+        self.min_interval = min_interval
+
+        self.driver: Union[DRIVER_OBJECTS, None] = None
+
+        self.data: Dict[str, Any] = {"status": JobStatus.Waiting.value,
+                                     "progress": "",
+                                     "progress_value": 0.0,
+                                     "msg": ""}
+        self._last_publish = 0.0
+
+    def set(self, force: bool = True, **kwargs) -> None:
+        """
+        Update the job state
+        :param force: publish now, otherwise the publication is throttled
+        :param kwargs: state values
+        """
+        self.data.update(kwargs)
+
+        now = time.time()
+        if force or now - self._last_publish >= self.min_interval:
+            # the whole entry is assigned, the manager does not see nested modifications
+            self.state[self.job_id] = dict(self.data)
+            self._last_publish = now
+            self.check_cancel()
+
+    def check_cancel(self) -> None:
+        """
+        Cancel the driver if the cancellation was requested
+        """
+        if self.driver is not None and not self.driver.is_cancel() and self.cancel_event.is_set():
+            self.driver.cancel()
+
+
+class JobSignal(DummySignal):
+    """
+    Driver signal that sends the reported values to the job state
+    """
+
+    def __init__(self, reporter: JobStateReporter, key: str, tpe: type = str) -> None:
+        """
+        Constructor
+        :param reporter: JobStateReporter
+        :param key: state entry to update ("progress_value" or "progress")
+        :param tpe: type of the emitted values
+        """
+        DummySignal.__init__(self, tpe=tpe)
+        self.reporter = reporter
+        self.key = key
+
+    def emit(self, val: Union[str, float] = '') -> None:
+        """
+        Report a value
+        :param val: value
+        """
+        self.reporter.set(force=False, **{self.key: val})
+
+
+def run_job_process(job_id: str,
+                    json_data: Dict[str, Any],
+                    file_path: str,
+                    state: Dict[str, Dict[str, Any]],
+                    cancel_event: Any) -> None:
+    """
+    Run a job in a worker process: parse the grid, run the simulation and write the results file
+    :param job_id: job id tag
+    :param json_data: the job data (see load_job_grid)
+    :param file_path: path of the results file to write
+    :param state: shared dictionary {job id: job state}
+    :param cancel_event: shared event to cancel the job
+    """
+    reporter = JobStateReporter(job_id=job_id, state=state, cancel_event=cancel_event)
+
+    if cancel_event.is_set():
+        reporter.set(status=JobStatus.Cancelled.value)
+        return
+
+    reporter.set(status=JobStatus.Running.value, progress="Parsing the grid")
+
+    try:
+        grid = load_job_grid(json_data=json_data)
+        instruction = RemoteInstruction(data=json_data['instruction'])
+
+        driver = create_driver(grid=grid, driver_tpe=instruction.operation, time_indices=instruction.time_indices)
+
+        if driver is None:
+            reporter.set(status=JobStatus.Failed.value, msg="The driver is None")
+            return
+
+        driver.progress_signal = JobSignal(reporter=reporter, key="progress_value", tpe=float)
+        driver.progress_text = JobSignal(reporter=reporter, key="progress", tpe=str)
+        reporter.driver = driver
+
+        driver.run()
+
+        if driver.is_cancel():
+            reporter.set(status=JobStatus.Cancelled.value)
+
+        elif driver.results is None:
+            reporter.set(status=JobStatus.Failed.value, msg="No results in the driver")
+
+        else:
+            reporter.set(progress="Writing the results")
+            save_job_results(results=driver.results, file_path=file_path)
+            reporter.set(status=JobStatus.Done.value, progress="Done", progress_value=100.0)
+
+    except Exception as e:
+        reporter.set(status=JobStatus.Failed.value, msg=f"Job running error: {e}")
+
+
+def run_distributed_job_process(job_id: str,
+                                json_data: Dict[str, Any],
+                                file_path: str,
+                                state: Dict[str, Dict[str, Any]],
+                                cancel_event: Any,
+                                child_servers: List[str]) -> None:
+    """
+    Run a job in a worker process, splitting it into shards run by the child servers
+    :param job_id: job id tag
+    :param json_data: the job data (see load_job_grid)
+    :param file_path: path of the results file to write
+    :param state: shared dictionary {job id: job state}
+    :param cancel_event: shared event to cancel the job
+    :param child_servers: urls of the child servers
+    """
+    reporter = JobStateReporter(job_id=job_id, state=state, cancel_event=cancel_event)
+    reporter.set(status=JobStatus.Running.value, progress="Distributing the job")
+
+    try:
+        job = DistributedJob(json_data=json_data,
+                             servers=[RemoteChildServer(base_url=url) for url in child_servers],
+                             progress_func=lambda val: reporter.set(force=False, progress_value=val),
+                             text_func=lambda val: reporter.set(force=False, progress=val),
+                             cancel_func=cancel_event.is_set)
+        results = job.run()
+
+        reporter.set(progress="Writing the results")
+        save_job_results(results=results, file_path=file_path)
+        reporter.set(status=JobStatus.Done.value, progress="Done", progress_value=100.0)
+
+    except Exception as e:
+        if cancel_event.is_set():
+            reporter.set(status=JobStatus.Cancelled.value)
+        else:
+            reporter.set(status=JobStatus.Failed.value, msg=f"Distributed job error: {e}")
+
+
+class JobQueue:
+    """
+    Queue of the server jobs.
+    The jobs are run by a bounded pool of worker processes, so that the server keeps answering
+    while the simulations run. The state and progress of the jobs is shared through a multiprocessing manager,
+    and the results are written to a file per job to be downloaded later.
+    """
+
+    def __init__(self, file_path_func: Callable[[str], str], max_workers: int = 1):
+        """
+        Constructor
+        :param file_path_func: function that returns the results file path of a job id
+        :param max_workers: maximum number of jobs running at the same time
+        """
+        self.file_path_func = file_path_func
+        self.max_workers = max(1, max_workers)
+
+        self.jobs: Dict[str, RemoteJob] = dict()
+
+        self._futures: Dict[str, Future] = dict()
+        self._cancel_events: Dict[str, Any] = dict()
+
+        # the processes are started on the first submission
+        self._manager = None
+        self._state: Union[Dict[str, Dict[str, Any]], None] = None
+        self._pool: Union[ProcessPoolExecutor, None] = None
+
+    def _start(self) -> None:
+        """
+        Start the manager and the workers pool
+        """
+        if self._pool is None:
+            # spawn: the server process runs threads and an event loop that must not be forked
+            ctx = mp.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._state = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def submit(self, json_data: Dict[str, Any], child_servers: Union[List[str], None] = None) -> RemoteJob:
+        """
+        Submit a job without waiting for it
+        :param json_data: the grid info generated with 'gather_model_as_jsons_for_communication'
+        :param child_servers: urls of the child servers to distribute the job to (None to run it here)
+        :return: RemoteJob
+        """
+        self._start()
+
+        instruction = RemoteInstruction(data=json_data['instruction'])
+        job = RemoteJob(grid=None, instruction=instruction)
+        job.grid_name = json_data.get('name', "")
+
+        cancel_event = self._manager.Event()
+
+        self.jobs[job.id_tag] = job
+        self._cancel_events[job.id_tag] = cancel_event
+        if child_servers:
+            self._futures[job.id_tag] = self._pool.submit(run_distributed_job_process,
+                                                          job.id_tag,
+                                                          json_data,
+                                                          self.file_path_func(job.id_tag),
+                                                          self._state,
+                                                          cancel_event,
+                                                          child_servers)
+        else:
+            self._futures[job.id_tag] = self._pool.submit(run_job_process,
+                                                          job.id_tag,
+                                                          json_data,
+                                                          self.file_path_func(job.id_tag),
+                                                          self._state,
+                                                          cancel_event)
+        return job
+
+    def update(self) -> None:
+        """
+        Update the jobs with the state published by the workers
+        """
+        if self._state is None:
+            return
+
+        # check the workers before reading their state, the final state is published before the worker returns
+        done = {job_id for job_id, future in self._futures.items() if future.done()}
+        state = self._state.copy()
+
+        for job_id, job in self.jobs.items():
+
+            if job.is_finished():
+                continue
+
+            data = state.get(job_id, None)
+            if data is not None:
+                job.status = JobStatus(data["status"])
+                job.progress = data["progress"]
+                job.progress_value = data["progress_value"]
+                job.msg = data["msg"]
+
+            if job_id in done and not job.is_finished():
+                future = self._futures[job_id]
+                # the worker died or the job never started
+                if future.cancelled():
+                    job.status = JobStatus.Cancelled
+                else:
+                    job.status = JobStatus.Failed
+                    exception = future.exception()
+                    job.msg = str(exception) if exception is not None else "The job ended without a state"
+
+            if job.is_finished():
+                self._state.pop(job_id, None)
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+
+    def get_job(self, job_id: str) -> Union[RemoteJob, None]:
+        """
+        Get an updated job
+        :param job_id: job id tag
+        :return: RemoteJob or None if not found
+        """
+        self.update()
+        return self.jobs.get(job_id, None)
+
+    def get_jobs(self) -> List[RemoteJob]:
+        """
+        Get the updated list of jobs
+        :return: list of RemoteJob
+        """
+        self.update()
+        return list(self.jobs.values())
+
+    def wait(self, job_id: str, timeout: Union[float, None] = None) -> Union[RemoteJob, None]:
+        """
+        Wait for a job to finish
+        :param job_id: job id tag
+        :param timeout: maximum time to wait in seconds (None waits forever)
+        :return: updated RemoteJob or None if not found
+        """
+        future = self._futures.get(job_id, None)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        return self.get_job(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job: if it has not started it is removed from the queue,
+        otherwise its driver is cancelled by the worker
+        :param job_id: job id tag
+        :return: was the job found?
+        """
+        job = self.get_job(job_id)
+
+        if job is None:
+            return False
+
+        if not job.is_finished():
+            future = self._futures.get(job_id, None)
+            if future is not None and future.cancel():
+                job.cancel()
+            else:
+                self._cancel_events[job_id].set()
+
+        return True
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Cancel a job and forget about it, removing its results file
+        :param job_id: job id tag
+        :return: was the job found?
+        """
+        if not self.cancel(job_id):
+            return False
+
+        self.jobs.pop(job_id)
+        self._futures.pop(job_id, None)
+        self._cancel_events.pop(job_id, None)
+
+        file_path = self.file_path_func(job_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+        return True
+
+    def shutdown(self) -> None:
+        """
+        Cancel the pending jobs and stop the workers
+        """
+        if self._pool is not None:
+            for event in self._cancel_events.values():
+                event.set()
+            # the jobs not started yet are dropped (shutdown(cancel_futures=True) requires python 3.9)
+            for future in self._futures.values():
+                future.cancel()
+            self._pool.shutdown(wait=True)
+            self._manager.shutdown()
+            self._pool = None
+            self._manager = None
+            self._state = None
@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
 import os
+from contextlib import asynccontextmanager
 from hashlib import sha256
 from fastapi import FastAPI, Header, HTTPException, Response, Query
 from fastapi.responses import FileResponse
@@ -19,7 +20,18 @@ from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat
 from datetime import datetime, timedelta
 import ipaddress
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Server life span: stop the jobs workers on exit
+    :param application: FastAPI app
+    """
+    yield
+    jobs.shutdown_job_queue()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(register_in_master.router)
 app.include_router(register_sub_servers.router)
 app.include_router(calculations.router)
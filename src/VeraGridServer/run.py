@@ -21,7 +21,7 @@ def start_server(key_file_name: str = "key.pem", cert_file_name: str = "cert.pem
                  port: int = 8000, domain="localhost",
                  master_host: str = "", master_port: int = 0,
                  username: str = "", password: str = "", is_master: bool = True,
-                 secure: bool = True):
+                 secure: bool = True, max_workers: int = 1):
     """
     Start server function
     :param key_file_name: name of the key file that the server generates
@@ -34,6 +34,7 @@ def start_server(key_file_name: str = "key.pem", cert_file_name: str = "cert.pem
     :param password: Password to authenticate with
     :param is_master: Whether the server is master or not
     :param secure: Whether the server is secure or not (if it looks for the certificates or not)
+    :param max_workers: Maximum number of jobs running at the same time
     """
 
     # find out my IP
@@ -62,6 +63,7 @@ def start_server(key_file_name: str = "key.pem", cert_file_name: str = "cert.pem
     settings.this_port = port
     settings.this_username = username
     settings.this_password = password
+    settings.max_workers = max_workers
 
     if secure:
         uvicorn.run(app,
@@ -102,6 +104,7 @@ if __name__ == "__main__":
     parser.add_argument("--master_port", type=int, default=80, help="Port of the master instance")
     parser.add_argument("--user", type=str, default="", help="username")
     parser.add_argument("--pwd", type=str, default="", help="Password")
+    parser.add_argument("--max_workers", type=int, default=1, help="Maximum number of jobs running at the same time")
 
     # Parse arguments
     args = parser.parse_args()
@@ -119,4 +122,5 @@ if __name__ == "__main__":
                  secure=args.secure,
                  is_master=args.master,
                  username=args.user,
-                 password=args.pwd)
+                 password=args.pwd,
+                 max_workers=args.max_workers)
@@ -12,5 +12,8 @@ class ExtraSettings:
         self.this_username = ""
         self.this_password = ""
 
+        # maximum number of jobs running at the same time
+        self.max_workers: int = 1
+
 
 settings = ExtraSettings()
\ No newline at end of file
@@ -8,6 +8,7 @@ import time
 from scipy.sparse import diags
 from VeraGridEngine.api import *
 from VeraGridEngine.Topology.admittance_matrices import compute_admittances, compute_admittances_fast
+from VeraGridEngine.Simulations.PowerFlow.power_flow_ts_cache import PowerFlowTopologyCache
 
 
 def __check__(fname):
@@ -247,6 +248,82 @@ def test_fast_admittance_update():
             print("ok")
 
 
+def test_incremental_admittance_update():
+    """
+    Check the in-place updates of branch states, taps and shunts against a computation from scratch
+    """
+    for file in ["case14.m", "case118.m", "case89pegase.m"]:
+        grid = FileOpen(os.path.join("data", "grids", "Matpower", file)).open()
+        nc = compile_numerical_circuit_at(grid, apply_temperature=False)
+
+        adm = nc.get_incremental_admittance_matrices()
+        Ybus = adm.Ybus
+        nnz = Ybus.nnz
+
+        # outage of two branches, tap changes and shunt switching
+        active = nc.passive_branch_data.active.astype(float)
+        m = nc.active_branch_data.tap_module.copy()
+        tau = nc.active_branch_data.tap_angle.copy()
+        Yshunt_bus = nc.get_Yshunt_bus_pu().copy()
+
+        out_idx = np.array([1, 5])
+        active[out_idx] = 0
+        m[3] = 1.05
+        tau[4] = 0.1
+        Yshunt_bus[2] += 0.5j
+
+        adm.set_branch_status(idx=out_idx, active=0)
+        adm.set_all_taps(tap_module=m, tap_angle=tau)
+        adm.set_all_bus_shunts(Yshunt=Yshunt_bus)
+
+        ref = compute_admittances(R=nc.passive_branch_data.R,
+                                  X=nc.passive_branch_data.X,
+                                  G=nc.passive_branch_data.G,
+                                  B=nc.passive_branch_data.B,
+                                  tap_module=m,
+                                  vtap_f=nc.passive_branch_data.virtual_tap_f,
+                                  vtap_t=nc.passive_branch_data.virtual_tap_t,
+                                  tap_angle=tau,
+                                  Cf=diags(active) @ nc.passive_branch_data.Cf,
+                                  Ct=diags(active) @ nc.passive_branch_data.Ct,
+                                  Yshunt_bus=Yshunt_bus,
+                                  conn=nc.passive_branch_data.conn,
+                                  seq=1)
+
+        # the matrices are the same objects, with the same pattern
+        assert adm.Ybus is Ybus
+        assert adm.Ybus.nnz == nnz
+        assert np.allclose(adm.Ybus.toarray(), ref.Ybus.toarray(), atol=1e-10)
+        assert np.allclose(adm.Yf.toarray(), ref.Yf.toarray(), atol=1e-10)
+        assert np.allclose(adm.Yt.toarray(), ref.Yt.toarray(), atol=1e-10)
+
+        # reconnecting the branches restores the original matrix
+        adm.set_branch_status(idx=out_idx, active=1)
+        adm.set_all_taps(tap_module=nc.active_branch_data.tap_module, tap_angle=nc.active_branch_data.tap_angle)
+        adm.set_all_bus_shunts(Yshunt=nc.get_Yshunt_bus_pu())
+        assert np.allclose(adm.Ybus.toarray(), nc.get_admittance_matrices().Ybus.toarray(), atol=1e-10)
+
+
+def test_topology_cache_incremental_admittances():
+    """
+    The time series topology cache applies the tap changes in place
+    """
+    grid = FileOpen(os.path.join("data", "grids", "Matpower", "case14.m")).open()
+    nc = compile_numerical_circuit_at(grid, apply_temperature=False)
+
+    cache = PowerFlowTopologyCache()
+    island = nc.split_into_islands()[0]
+    cache.set_admittances(i=0, island=island)
+    adm0 = island.get_admittance_matrices()
+
+    island2 = nc.split_into_islands()[0]
+    island2.active_branch_data.tap_module[island2.active_branch_data.tap_module != 1.0] *= 1.02
+    cache.set_admittances(i=0, island=island2)
+    adm2 = island2.get_admittance_matrices()
+
+    assert adm2 is adm0
+    island2.set_admittance_matrices(None)
+    assert np.allclose(adm2.Ybus.toarray(), island2.get_admittance_matrices().Ybus.toarray(), atol=1e-10)
 
 
 if __name__ == '__main__':
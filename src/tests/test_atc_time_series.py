@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+
+import VeraGridEngine as vg
+from VeraGridEngine.Simulations.ATC.available_transfer_capacity_driver import compute_dP, compute_alpha, \
+    compute_atc_list
+
+
+def get_atc_options(grid: vg.MultiCircuit,
+                    mode: vg.AvailableTransferMode,
+                    tile_size: int) -> vg.AvailableTransferCapacityOptions:
+    """
+    Get the ATC options to transfer power from the first half of the buses to the second half
+    :param grid: MultiCircuit
+    :param mode: AvailableTransferMode
+    :param tile_size: tile size
+    :return: AvailableTransferCapacityOptions
+    """
+    nbus = grid.get_bus_number()
+    bus_area = np.zeros(nbus, dtype=int)
+    bus_area[nbus // 2:] = 1
+    bus_dict = grid.get_bus_index_dict()
+
+    idx_br = list()
+    sense_br = list()
+    for k, branch in enumerate(grid.get_branches(add_hvdc=False, add_vsc=False, add_switch=True)):
+        f = bus_area[bus_dict[branch.bus_from]]
+        t = bus_area[bus_dict[branch.bus_to]]
+        if f != t:
+            idx_br.append(k)
+            sense_br.append(1 if f == 0 else -1)
+
+    return vg.AvailableTransferCapacityOptions(bus_idx_from=np.where(bus_area == 0)[0],
+                                               bus_idx_to=np.where(bus_area == 1)[0],
+                                               idx_br=np.array(idx_br, dtype=int),
+                                               sense_br=np.array(sense_br, dtype=int),
+                                               mode=mode,
+                                               tile_size=tile_size)
+
+
+def test_atc_time_series_batched():
+    """
+    Check that the ATC time series computed by topology groups matches the ATC computed time step by time step
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+
+    grid = vg.open_file(fname)
+
+    # disconnect some lines for a few hours to have several topologies
+    branches = grid.get_branches()
+    for t_idx in range(5, 10):
+        branches[3].active_prof[t_idx] = 0
+    for t_idx in range(8, 14):
+        branches[20].active_prof[t_idx] = 0
+
+    time_indices = np.arange(24)
+    mode_2_int = {vg.AvailableTransferMode.Generation: 0,
+                  vg.AvailableTransferMode.InstalledPower: 1}
+
+    for mode in [vg.AvailableTransferMode.Generation, vg.AvailableTransferMode.InstalledPower]:
+
+        # small tiles to evaluate the topology groups in several tiles
+        options = get_atc_options(grid=grid, mode=mode, tile_size=2000)
+        drv = vg.AvailableTransferCapacityTimeSeriesDriver(grid=grid, options=options, time_indices=time_indices)
+        drv.run()
+        report = drv.results.raw_report
+
+        # compute the ATC time step by time step
+        nc = vg.compile_numerical_circuit_at(grid)
+        br_idx = nc.passive_branch_data.get_monitor_enabled_indices()
+        con_br_idx = nc.passive_branch_data.get_contingency_enabled_indices()
+        expected = dict()
+        for t in time_indices:
+            nc = vg.compile_numerical_circuit_at(grid, t_idx=t)
+            lin = vg.LinearAnalysis(nc=nc, distributed_slack=True, correct_values=False)
+            P = nc.get_power_injections().real
+            flows = lin.get_flows(Sbus=P, P_hvdc=nc.hvdc_data.Pset)
+            dP = compute_dP(P0=P,
+                            P_installed=nc.bus_data.installed_power,
+                            Pgen=nc.generator_data.get_injections_per_bus().real,
+                            Pload=nc.load_data.get_injections_per_bus().real,
+                            bus_a1_idx=options.bus_idx_from,
+                            bus_a2_idx=options.bus_idx_to,
+                            mode=mode_2_int[mode])
+            alpha = compute_alpha(ptdf=lin.PTDF, dP=dP)
+            base_exchange = (options.inter_area_branch_sense * flows[options.inter_area_branch_idx]).sum()
+
+            for row in compute_atc_list(br_idx=br_idx,
+                                        contingency_br_idx=con_br_idx,
+                                        lodf=lin.LODF,
+                                        alpha=alpha,
+                                        flows=flows,
+                                        rates=drv.results.rates[t, :],
+                                        contingency_rates=drv.results.contingency_rates[t, :],
+                                        base_exchange=base_exchange,
+                                        time_idx=t,
+                                        threshold=options.threshold):
+                expected[row[:3]] = np.array(row, dtype=float)
+
+        assert report.shape[0] == len(expected)
+
+        # the report is sorted by time and NTC
+        assert np.all(np.diff(report[:, 0]) >= 0)
+        for t in time_indices:
+            assert np.all(np.diff(report[report[:, 0] == t, 9]) >= 0)
+
+        for row in report:
+            key = (int(row[0]), int(row[1]), int(row[2]))
+            assert np.allclose(row, expected[key])
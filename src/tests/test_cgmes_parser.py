@@ -0,0 +1,46 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+import os
+from VeraGridEngine.data_logger import DataLogger
+from VeraGridEngine.IO.cim.cgmes.cgmes_data_parser import (CgmesDataParser, read_cgmes_files, parse_xml_text,
+                                                           get_cgmes_sources, parse_cgmes_source)
+
+
+def test_streaming_parser_matches_tree_parser() -> None:
+    """
+    The streaming parser must produce the same dictionaries as parsing the whole xml tree
+    """
+    folder = os.path.join("data", "grids", "CGMES_2_4_15")
+    files = [os.path.join(folder, "micro_grid_assmb_base.zip"),
+             os.path.join(folder, "IEEE 14 bus.zip")]
+
+    logger = DataLogger()
+    data = read_cgmes_files(cim_files=files, logger=logger)
+    sources = get_cgmes_sources(cim_files=files, logger=logger)
+
+    assert [name for name, _, _, _ in sources] == list(data.keys())
+
+    for name, file_path, member, _ in sources:
+        assert parse_cgmes_source(file_path, member) == parse_xml_text(data[name])
+
+
+def test_parallel_parsing() -> None:
+    """
+    Parsing the files in parallel processes must give the same data as parsing them serially
+    """
+    files = [os.path.join("data", "grids", "CGMES_2_4_15", "micro_grid_NL_T1.zip")]
+
+    serial_parser = CgmesDataParser(max_workers=1, logger=DataLogger())
+    serial_parser.load_files(files=files)
+
+    parallel_parser = CgmesDataParser(max_workers=2, parallel_min_size=0, logger=DataLogger())
+    parallel_parser.load_files(files=files)
+
+    assert len(serial_parser.data) > 0
+    assert len(serial_parser.boundary_set) > 0
+    assert parallel_parser.cgmes_version == serial_parser.cgmes_version
+    assert list(parallel_parser.parsed_data.keys()) == list(serial_parser.parsed_data.keys())
+    assert parallel_parser.data == serial_parser.data
+    assert parallel_parser.boundary_set == serial_parser.boundary_set
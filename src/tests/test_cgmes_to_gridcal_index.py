@@ -0,0 +1,62 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+import os
+from VeraGridEngine.data_logger import DataLogger
+from VeraGridEngine.IO.cim.cgmes.cgmes_data_parser import CgmesDataParser
+from VeraGridEngine.IO.cim.cgmes.cgmes_circuit import CgmesCircuit
+from VeraGridEngine.IO.cim.cgmes.cgmes_to_veragrid import cgmes_to_veragrid, CgmesIndex
+
+
+def load_cgmes_circuit(files) -> CgmesCircuit:
+    """
+    Parse some CGMES files
+    :param files: list of files
+    :return: CgmesCircuit
+    """
+    logger = DataLogger()
+    data_parser = CgmesDataParser(logger=logger)
+    data_parser.load_files(files=files)
+    cgmes_circuit = CgmesCircuit(cgmes_version=data_parser.cgmes_version, logger=logger)
+    cgmes_circuit.parse_files(data_parser=data_parser)
+    return cgmes_circuit
+
+
+def test_cgmes_index() -> None:
+    """
+    The reverse references of the index must match the forward references of the CGMES objects
+    """
+    fname = os.path.join("data", "grids", "CGMES_2_4_15", "IEEE_14_v35_3_nudox_1_hvdc_desf_rates_fs_ss.zip")
+    cgmes_circuit = load_cgmes_circuit([fname])
+    index = CgmesIndex(cgmes_model=cgmes_circuit, logger=DataLogger())
+
+    for terminal in cgmes_circuit.cgmes_assets.Terminal_list:
+        assert terminal in index.device_to_terminal_dict[terminal.ConductingEquipment.uuid]
+
+    for cn in cgmes_circuit.cgmes_assets.ConnectivityNode_list:
+        tn = index.cn_to_tn_dict.get(cn.uuid, None)
+        if tn is not None:
+            assert tn == cn.TopologicalNode
+
+    for device_uuid, dc_terminals in index.dc_device_to_terminal_dict.items():
+        assert device_uuid in index.dc_terminal_to_devices_dict[dc_terminals[0].rdfid]
+
+
+def test_cgmes_conversion_timings() -> None:
+    """
+    The conversion reports the time of its stages and maps the DC lines and converters to HVDC lines
+    """
+    fname = os.path.join("data", "grids", "CGMES_2_4_15", "IEEE_14_v35_3_nudox_1_hvdc_desf_rates_fs_ss.zip")
+    cgmes_circuit = load_cgmes_circuit([fname])
+
+    timings = dict()
+    grid = cgmes_to_veragrid(cgmes_model=cgmes_circuit,
+                             map_dc_to_hvdc_line=True,
+                             logger=DataLogger(),
+                             timings=timings)
+
+    assert len(grid.hvdc_lines) == 2
+    for stage in ["indices", "buses", "lines", "transformers", "hvdc"]:
+        assert stage in timings
+        assert timings[stage] >= 0.0
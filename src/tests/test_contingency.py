@@ -64,6 +64,324 @@ def test_linear_contingency():
     print("")
 
 
+def test_contingency_sparse_store() -> None:
+    """
+    The memory-bounded results (aggregates + sparse store) must match the dense results
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    # lower the ratings to have overloads
+    for br in main_circuit.get_branches(add_hvdc=False, add_vsc=False, add_switch=True):
+        br.rate *= 0.5
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+
+    dense_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                               contingency_method=ContingencyMethod.PowerFlow)
+    dense_driver = ContingencyAnalysisDriver(grid=main_circuit, options=dense_options)
+    dense_driver.run()
+
+    sparse_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                contingency_method=ContingencyMethod.PowerFlow,
+                                                store_dense_results=False,
+                                                results_loading_threshold=1.0)
+    sparse_driver = ContingencyAnalysisDriver(grid=main_circuit, options=sparse_options)
+    sparse_driver.run()
+
+    dense = dense_driver.results
+    sparse = sparse_driver.results
+
+    assert sparse.Sf.shape[0] == 0
+    assert sparse.store.size() > 0
+
+    assert np.allclose(sparse.max_flows, np.abs(dense.Sf).max(axis=0))
+    assert np.allclose(sparse.max_loading, np.abs(dense.loading).max(axis=0))
+
+    # the store only has the monitored values over the threshold
+    loading = np.abs(dense.loading)
+    mon_idx = np.where([br.monitor_loading for br in main_circuit.get_branches(add_hvdc=False,
+                                                                                  add_vsc=False,
+                                                                                  add_switch=True)])[0]
+    expected = np.zeros_like(loading)
+    expected[:, mon_idx] = np.where(loading[:, mon_idx] >= 1.0, dense.loading.real[:, mon_idx], 0.0)
+    assert np.allclose(sparse.get_store_dense(value='loading'), expected)
+
+    # the tables can be built from the store
+    table = sparse.mdl(ResultTypes.BranchLoading)
+    assert table.data_c.shape == (sparse.ncon, sparse.nbranch)
+
+    # top-k
+    store = ContingencyResultsStore(loading_threshold=0.0, top_k=2)
+    for ic in range(dense.ncon):
+        store.add(t_idx=None, contingency_idx=ic, mon_idx=mon_idx, flows=dense.Sf[ic, :],
+                  loadings=dense.loading[ic, :])
+    data = store.get_arrays()
+    assert store.size() == 2 * dense.ncon
+    for ic in range(dense.ncon):
+        assert mon_idx[np.argmax(loading[ic, mon_idx])] in data['branch_idx'][data['contingency_idx'] == ic]
+
+
+def test_contingency_ts_streaming_store(tmp_path) -> None:
+    """
+    The time series contingency analysis must give the same statistics with the streamed sparse store
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    for br in main_circuit.get_branches(add_hvdc=False, add_vsc=False, add_switch=True):
+        br.rate *= 0.5
+        br.rate_prof.set(br.rate_prof.toarray() * 0.5)
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+    time_indices = np.arange(0, 4)
+
+    dense_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                               contingency_method=ContingencyMethod.PowerFlow)
+    dense_driver = ContingencyAnalysisTimeSeriesDriver(grid=main_circuit,
+                                                       options=dense_options,
+                                                       time_indices=time_indices)
+    dense_driver.run()
+
+    file_name = str(tmp_path / "contingencies.parquet")
+    sparse_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                contingency_method=ContingencyMethod.PowerFlow,
+                                                store_dense_results=False,
+                                                results_file_name=file_name)
+    sparse_driver = ContingencyAnalysisTimeSeriesDriver(grid=main_circuit,
+                                                        options=sparse_options,
+                                                        time_indices=time_indices)
+    sparse_driver.run()
+
+    assert np.allclose(dense_driver.results.max_flows, sparse_driver.results.max_flows)
+    assert np.allclose(dense_driver.results.max_loading, sparse_driver.results.max_loading)
+    assert np.allclose(dense_driver.results.sum_overload, sparse_driver.results.sum_overload)
+    assert np.allclose(dense_driver.results.std_dev_overload, sparse_driver.results.std_dev_overload)
+    assert dense_driver.results.report.size() == sparse_driver.results.report.size()
+
+    # the values were streamed to disk, one chunk per time step
+    assert os.path.exists(file_name)
+    df = pd.read_parquet(file_name)
+    assert len(df) == sparse_driver.results.store.size()
+    assert len(df) > 0
+    assert set(df['time_idx'].unique()).issubset(set(time_indices))
+
+
+def test_contingency_store_close(tmp_path) -> None:
+    """
+    The streamed store can only be read once closed, and the dense matrices need a time index
+    if several time steps were stored
+    """
+    file_name = str(tmp_path / "store.parquet")
+    store = ContingencyResultsStore(loading_threshold=0.0, file_name=file_name, buffer_size=2)
+    mon_idx = np.arange(3)
+
+    for t_idx in range(2):
+        for ic in range(2):
+            store.add(t_idx=t_idx, contingency_idx=ic, mon_idx=mon_idx,
+                      flows=np.full(3, 10.0 * (t_idx + 1)), loadings=np.full(3, 0.5 * (t_idx + 1)))
+
+    try:
+        store.get_arrays()
+        assert False, "the store must be closed before reading it"
+    except RuntimeError:
+        pass
+
+    store.close()
+    assert len(store.get_arrays()['loading']) == 12
+
+    try:
+        store.get_dense(ncon=2, nbr=3)
+        assert False, "the time index is required for several time steps"
+    except ValueError:
+        pass
+
+    assert np.allclose(store.get_dense(ncon=2, nbr=3, t_idx=1), 1.0)
+
+    # reading does not close anything: the values added afterwards are kept
+    store.add(t_idx=2, contingency_idx=0, mon_idx=mon_idx, flows=np.ones(3), loadings=np.ones(3))
+    assert len(store.get_arrays()['loading']) == 15
+
+
+def test_contingency_parallel() -> None:
+    """
+    The contingency groups run in a process pool must give the same results as the serial run
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    for br in main_circuit.get_branches(add_hvdc=False, add_vsc=False, add_switch=True):
+        br.rate *= 0.5
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+
+    serial_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                contingency_method=ContingencyMethod.PowerFlow)
+    serial_driver = ContingencyAnalysisDriver(grid=main_circuit, options=serial_options)
+    serial_driver.run()
+
+    parallel_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                  contingency_method=ContingencyMethod.PowerFlow,
+                                                  n_workers=2)
+    parallel_driver = ContingencyAnalysisDriver(grid=main_circuit, options=parallel_options)
+    parallel_driver.run()
+
+    assert np.allclose(serial_driver.results.Sf, parallel_driver.results.Sf)
+    assert np.allclose(serial_driver.results.voltage, parallel_driver.results.voltage)
+    assert np.allclose(serial_driver.results.max_loading, parallel_driver.results.max_loading)
+    assert np.allclose(serial_driver.results.overload_stats.M2, parallel_driver.results.overload_stats.M2)
+
+    # the merged report must be the same as the serial one
+    assert serial_driver.results.report.size() == parallel_driver.results.report.size()
+    serial_report = serial_driver.results.report.get_data()
+    parallel_report = parallel_driver.results.report.get_data()
+    assert serial_report.shape == parallel_report.shape
+    for j in range(serial_report.shape[1]):
+        try:
+            # the numeric columns may differ in the last digits
+            assert np.allclose(serial_report[:, j].astype(float), parallel_report[:, j].astype(float))
+        except ValueError:
+            assert np.array_equal(serial_report[:, j], parallel_report[:, j])
+
+
+def test_contingency_ts_ptdf_cache() -> None:
+    """
+    The linear contingency time series compiles each time step twice (linear analysis and contingencies):
+    the second compilation and its linear factors must come from the compilation cache
+    """
+    from VeraGridEngine.DataStructures.compilation_cache import COMPILATION_CACHE
+
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+    time_indices = np.arange(3)
+
+    options = ContingencyAnalysisOptions(contingency_method=ContingencyMethod.PTDF)
+    driver = ContingencyAnalysisTimeSeriesDriver(grid=main_circuit, options=options, time_indices=time_indices)
+
+    hits = COMPILATION_CACHE.hits
+    driver.run()
+    assert COMPILATION_CACHE.hits >= hits + 2 * len(time_indices)
+
+    # the same as the snapshot contingency analysis of each time step without the cache
+    for it, t in enumerate(time_indices):
+        snapshot_driver = ContingencyAnalysisDriver(grid=main_circuit, options=options)
+        res_t = snapshot_driver.run_at(t_idx=int(t))
+        assert np.allclose(driver.results.max_loading[it, :], res_t.max_loading)
+
+
+def test_contingency_ts_parallel() -> None:
+    """
+    The time series run in parallel must give the same results as the serial run, both when the time steps
+    are split among the processes and when each time step runs its contingency groups in the processes
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    for br in main_circuit.get_branches(add_hvdc=False, add_vsc=False, add_switch=True):
+        br.rate *= 0.5
+        br.rate_prof.set(br.rate_prof.toarray() * 0.5)
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+
+    # (time indices, number of processes): the time steps in parallel, then the groups of each time step
+    for time_indices, n_workers in [(np.arange(4), 2), (np.arange(2), 3)]:
+        serial_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                    contingency_method=ContingencyMethod.PowerFlow)
+        serial_driver = ContingencyAnalysisTimeSeriesDriver(grid=main_circuit,
+                                                            options=serial_options,
+                                                            time_indices=time_indices)
+        serial_driver.run()
+
+        parallel_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                      contingency_method=ContingencyMethod.PowerFlow,
+                                                      n_workers=n_workers)
+        parallel_driver = ContingencyAnalysisTimeSeriesDriver(grid=main_circuit,
+                                                              options=parallel_options,
+                                                              time_indices=time_indices)
+        parallel_driver.run()
+
+        assert np.allclose(serial_driver.results.max_flows, parallel_driver.results.max_flows)
+        assert np.allclose(serial_driver.results.max_loading, parallel_driver.results.max_loading)
+        assert np.allclose(serial_driver.results.sum_overload, parallel_driver.results.sum_overload)
+        assert np.allclose(serial_driver.results.mean_overload, parallel_driver.results.mean_overload)
+        assert serial_driver.results.report.size() == parallel_driver.results.report.size()
+
+
+def test_contingency_linear_screening() -> None:
+    """
+    The AC contingency analysis with linear screening must find the same overloads as the full one,
+    verifying less contingencies with AC power flows
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+
+    full_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                              contingency_method=ContingencyMethod.PowerFlow)
+    full_driver = ContingencyAnalysisDriver(grid=main_circuit, options=full_options)
+    full_driver.run()
+
+    screened_options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                                  contingency_method=ContingencyMethod.PowerFlow,
+                                                  use_linear_screening=True,
+                                                  screening_margin=0.1,
+                                                  screening_top_n=2)
+    screened_driver = ContingencyAnalysisDriver(grid=main_circuit, options=screened_options)
+    screened_driver.run()
+
+    full = full_driver.results
+    screened = screened_driver.results
+
+    # the screening must have discarded some contingencies: those keep the linear flows, flagged as estimates
+    assert not np.any(full.linear_estimate)
+    assert 0 < screened.linear_estimate.sum() < screened.ncon
+    assert np.all(screened.Sf[screened.linear_estimate, :].imag == 0)
+
+    # the contingencies with overloads must have been verified with the AC power flow
+    overloaded = np.where(np.abs(full.loading).max(axis=1) > 1.0)[0]
+    assert len(overloaded) > 0
+    for ic in overloaded:
+        assert np.allclose(full.Sf[ic, :], screened.Sf[ic, :])
+
+    # the same overloads are reported
+    assert full.report.size() == screened.report.size()
+    overloaded_br = full.max_loading > 1.0
+    assert np.allclose(full.max_loading[overloaded_br], screened.max_loading[overloaded_br])
+
+
+def test_contingency_base_case_report() -> None:
+    """
+    The base case overloads must be reported once, whether the first contingency is verified or screened out
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    for br in main_circuit.get_branches(add_hvdc=False, add_vsc=False, add_switch=True):
+        br.rate *= 0.5
+
+    pf_options = PowerFlowOptions(SolverType.NR, verbose=False, control_q=False)
+
+    pf_driver = PowerFlowDriver(grid=main_circuit, options=pf_options)
+    pf_driver.run()
+    n_base_overloads = int(np.sum(np.abs(pf_driver.results.loading) > 1.0))
+    assert n_base_overloads > 0
+
+    for use_linear_screening in [False, True]:
+        options = ContingencyAnalysisOptions(pf_options=pf_options,
+                                             contingency_method=ContingencyMethod.PowerFlow,
+                                             use_linear_screening=use_linear_screening,
+                                             screening_top_n=1)
+        driver = ContingencyAnalysisDriver(grid=main_circuit, options=options)
+        driver.run()
+
+        contingency_names = np.array([e.contingency_name for e in driver.results.report.entries])
+        assert np.sum(contingency_names == 'Base') == n_base_overloads
+
+        # the base case entries go first
+        assert np.all(contingency_names[:n_base_overloads] == 'Base')
+
+
 # def test_ieee14_contingencies() -> None:
 #     """
 #     Check that the contingencies match conceptually
@@ -3,8 +3,13 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 # SPDX-License-Identifier: MPL-2.0
 import os
+import json
+import zipfile
+from pathlib import Path
 import numpy as np
 import VeraGridEngine.api as gce
+from VeraGridEngine.IO.veragrid.zip_interface import (get_frames_from_zip, get_session_tree, get_zip_members_map,
+                                                      compact_veragrid_zip)
 
 
 def test_load_save_load() -> None:
@@ -139,4 +144,244 @@ def test_load_save_load_xlsx() -> None:
         gce.save_file(grid=grid1, filename=fname2)
 
         # open the main grid again
-        grid2 = gce.open_file(fname2)
\ No newline at end of file
+        grid2 = gce.open_file(fname2)
+
+def test_load_save_load_profile_blocks() -> None:
+    """
+    This test checks that the numeric profiles are saved as binary blocks
+    and that they are read back exactly (dense, sparse and boolean profiles)
+    :return:
+    """
+    grid1 = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+
+    # a sparse profile with values
+    grid1.lines[2].active_prof[7] = False
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    o_file = os.path.join("output", "test_load_save_load_profile_blocks.veragrid")
+
+    gce.save_file(grid=grid1, filename=o_file)
+
+    with zipfile.ZipFile(o_file) as f_zip:
+        names = f_zip.namelist()
+        load_data = json.loads(f_zip.read("model_data/load.model"))
+        line_data = json.loads(f_zip.read("model_data/line.model"))
+
+    assert "profiles/layout.version" in names
+    assert "profiles/load/P.npy" in names
+    assert all('block' in entry['P_prof'] for entry in load_data)
+    assert all('dense_data' not in entry['P_prof'] for entry in load_data)
+
+    # the sparse profiles do not take columns of the blocks, they keep their index/value map
+    assert "profiles/line/active.npy" not in names
+    assert "profiles/load/Q.npy" not in names
+    assert all('block' not in entry['active_prof'] for entry in line_data)
+    assert line_data[2]['active_prof']['sparse_data']['map'] == {'7': False}
+    assert line_data[0]['active_prof']['sparse_data']['map'] == {}
+
+    grid2 = gce.open_file(o_file)
+
+    equal, logger = grid1.compare_circuits(grid2, detailed_profile_comparison=True)
+
+    if not equal:
+        logger.print()
+
+    assert equal
+
+    for load1, load2 in zip(grid1.loads, grid2.loads):
+        assert np.allclose(load1.P_prof.toarray(), load2.P_prof.toarray())
+        assert load1.P_prof.is_sparse == load2.P_prof.is_sparse
+
+    os.remove(o_file)
+
+
+def test_lazy_profiles() -> None:
+    """
+    This test checks that the profiles opened lazily are only read when accessed,
+    that they give the same values and results, and that the file can be overwritten
+    :return:
+    """
+    grid1 = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    o_file = os.path.join("output", "test_lazy_profiles.veragrid")
+
+    for compress in [True, False]:
+
+        gce.FileSave(circuit=grid1, file_name=o_file,
+                     options=gce.FileSavingOptions(compress_profiles=compress)).save()
+
+        grid2 = gce.FileOpen(file_name=o_file, options=gce.FileOpenOptions(lazy_profiles=True)).open()
+
+        assert all(load.P_prof.is_lazy for load in grid2.loads)
+
+        # values and windows are read without materializing the profile
+        load1 = grid1.loads[0]
+        load2 = grid2.loads[0]
+        assert np.isclose(load2.P_prof[5], load1.P_prof[5])
+        assert np.allclose(load2.P_prof.get_window(2, 7), load1.P_prof.toarray()[2:7])
+        assert load2.P_prof.is_lazy
+
+        # uncompressed profiles are memory-mapped
+        assert load2.P_prof._lazy[0].is_mapped == (not compress)
+
+        ts1 = gce.PowerFlowTimeSeriesDriver(grid=grid1, options=gce.PowerFlowOptions())
+        ts1.run()
+        ts2 = gce.PowerFlowTimeSeriesDriver(grid=grid2, options=gce.PowerFlowOptions())
+        ts2.run()
+        assert np.allclose(ts1.results.voltage, ts2.results.voltage)
+
+        # overwrite the file the lazy profiles come from
+        gce.save_file(grid=grid2, filename=o_file)
+
+        equal, logger = grid1.compare_circuits(grid2, detailed_profile_comparison=True)
+
+        if not equal:
+            logger.print()
+
+        assert equal
+
+        grid3 = gce.open_file(o_file)
+        equal, logger = grid1.compare_circuits(grid3, detailed_profile_comparison=True)
+        assert equal
+
+    os.remove(o_file)
+
+
+def test_parallel_zip_loading() -> None:
+    """
+    This test checks that decoding the .veragrid members in parallel gives the same data as the serial decoding,
+    that the sessions results are not loaded, and that the members timings are reported
+    :return:
+    """
+    fname = os.path.join('data', 'grids', '2bus_hvdc_ntc.gridcal')
+
+    messages = list()
+    data1, json_files1 = get_frames_from_zip(fname, max_workers=1)
+    data2, json_files2 = get_frames_from_zip(fname, text_func=messages.append)
+    data3, json_files3 = get_frames_from_zip(fname, max_workers=2, use_processes=True)
+
+    for data in [data1, data2, data3]:
+        assert not any(key.startswith('sessions/') for key in data.keys())
+
+    for data in [data2, data3]:
+        assert data.keys() == data1.keys()
+        assert data['model_data'] == data1['model_data']
+        assert data['diagrams'] == data1['diagrams']
+
+    assert json_files2 == json_files1
+    assert json_files3 == json_files1
+    assert len(messages) > 0 and all(msg.endswith(' s') for msg in messages)
+
+    # the sessions are still available on demand
+    sessions = get_session_tree(fname)
+    assert len(sessions) > 0
+
+
+def test_incremental_save(tmp_path: Path) -> None:
+    """
+    This test checks that the incremental saving only appends the members that changed,
+    that the journal is resolved when opening, and that compacting the file keeps the same model
+    :return:
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+
+    o_file = os.path.join(tmp_path, 'IEEE39_1W_incremental.veragrid')
+    options = gce.FileSavingOptions(incremental=True)
+
+    grid1 = gce.open_file(fname)
+    gce.FileSave(grid1, o_file, options=options).save()
+
+    # change one generator value and one load profile
+    grid1.generators[0].P = 123.0
+    grid1.loads[3].P_prof[5] = 77.0
+    gce.FileSave(grid1, o_file, options=options).save()
+
+    with zipfile.ZipFile(o_file) as f_zip:
+        written = [name for name in f_zip.namelist() if name.startswith('journal/1/')]
+        members = get_zip_members_map(f_zip)
+
+    assert 'journal/1/model_data/generator.model' in written
+    assert 'journal/1/profiles/load/P.npy' in written
+    assert 'journal/1/model_data/line.model' not in written
+    assert 'journal/1/profiles/generator/P.npy' not in written
+
+    assert members['model_data/generator.model'] == 'journal/1/model_data/generator.model'
+    assert members['model_data/line.model'] == 'model_data/line.model'
+
+    grid2 = gce.open_file(o_file)
+    assert grid2.generators[0].P == 123.0
+    assert grid2.loads[3].P_prof[5] == 77.0
+    equal, logger = grid1.compare_circuits(grid2, detailed_profile_comparison=True)
+    assert all(entry.device_property == 'rms_model' for entry in logger.entries)
+
+    # compacting leaves a plain file with the same model
+    compact_veragrid_zip(o_file)
+    with zipfile.ZipFile(o_file) as f_zip:
+        assert not any(name.startswith('journal/1') for name in f_zip.namelist())
+
+    grid3 = gce.open_file(o_file)
+    equal, logger = grid2.compare_circuits(grid3, detailed_profile_comparison=True)
+    assert all(entry.device_property == 'rms_model' for entry in logger.entries)
+
+
+def test_incremental_save_modified_types(tmp_path: Path) -> None:
+    """
+    This test checks that the incremental saving of a loaded file only serializes the modified device types,
+    and that the lazy profiles of the other types are not read
+    :return:
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+
+    o_file = os.path.join(tmp_path, 'IEEE39_1W_modified_types.veragrid')
+    options = gce.FileSavingOptions(incremental=True, compress_profiles=False)
+    gce.FileSave(gce.open_file(fname), o_file, options=options).save()
+
+    grid1 = gce.FileOpen(file_name=o_file, options=gce.FileOpenOptions(lazy_profiles=True)).open()
+    assert all(gen.P_prof.is_lazy for gen in grid1.generators)
+
+    def model_members(names):
+        # the diagrams are serialized on every save (they get new idtags when loaded)
+        return sorted(name for name in names if not name.startswith('diagrams/'))
+
+    # no device changed: only the circuit data is written from the model data
+    gce.FileSave(grid1, o_file, options=options).save()
+    with zipfile.ZipFile(o_file) as f_zip:
+        manifest = json.loads(f_zip.read('journal/1.manifest'))
+    assert model_members(manifest['written']) == ['model_data/circuit.model']
+    assert model_members(manifest['removed']) == []
+
+    grid1.loads[3].P_prof[5] = 77.0
+    gce.FileSave(grid1, o_file, options=options).save()
+
+    with zipfile.ZipFile(o_file) as f_zip:
+        manifest = json.loads(f_zip.read('journal/2.manifest'))
+
+    assert model_members(manifest['written']) == ['model_data/circuit.model',
+                                                  'model_data/load.model',
+                                                  'profiles/load/P.npy']
+    assert model_members(manifest['removed']) == []
+    assert 'model_data/generator.model' in manifest['fingerprints']
+    assert 'profiles/generator/P.npy' in manifest['fingerprints']
+
+    # the profiles of the other types were not read
+    assert all(gen.P_prof.is_lazy for gen in grid1.generators)
+
+    # adding a device marks its type as modified
+    grid1.add_load(bus=grid1.buses[0], api_obj=gce.Load(name='new load', P=1.0))
+    gce.FileSave(grid1, o_file, options=options).save()
+
+    with zipfile.ZipFile(o_file) as f_zip:
+        manifest = json.loads(f_zip.read('journal/3.manifest'))
+    assert 'model_data/load.model' in manifest['written']
+    assert 'model_data/generator.model' not in manifest['written']
+
+    grid2 = gce.open_file(o_file)
+    assert grid2.loads[3].P_prof[5] == 77.0
+    assert len(grid2.loads) == len(grid1.loads)
+    equal, logger = grid1.compare_circuits(grid2, detailed_profile_comparison=True)
+    assert all(entry.device_property == 'rms_model' for entry in logger.entries)
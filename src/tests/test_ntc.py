@@ -1450,6 +1450,79 @@ def test_activs_2000_acdc_ts():
     assert res.converged.all()
 
 
+def test_ntc_ts_warm_start_and_workers():
+    """
+    The time series NTC must give the same results solving each time step from scratch,
+    warm starting the solver from the previous time step and splitting the time steps among processes
+    :return:
+    """
+    fname = os.path.join('data', 'grids', 'IEEE14 - ntc areas_voltages_hvdc_shifter_l10free.gridcal')
+
+    grid = gce.open_file(fname)
+
+    info = grid.get_inter_aggregation_info(objects_from=[grid.areas[0]],
+                                           objects_to=[grid.areas[1]])
+
+    results = list()
+    for warm_start, n_workers in [(False, 1), (True, 1), (True, 2)]:
+        ntc_options = gce.OptimalNetTransferCapacityOptions(
+            sending_bus_idx=info.idx_bus_from,
+            receiving_bus_idx=info.idx_bus_to,
+            transfer_method=gce.AvailableTransferMode.InstalledPower,
+            loading_threshold_to_report=98.0,
+            skip_generation_limits=True,
+            transmission_reliability_margin=0.1,
+            branch_exchange_sensitivity=0.01,
+            use_branch_exchange_sensitivity=True,
+            branch_rating_contribution=1.0,
+            monitor_only_ntc_load_rule_branches=True,
+            consider_contingencies=False,
+            opf_options=gce.OptimalPowerFlowOptions(),
+            lin_options=gce.LinearAnalysisOptions(),
+            warm_start=warm_start,
+            n_workers=n_workers
+        )
+
+        drv = gce.OptimalNetTransferCapacityTimeSeriesDriver(grid, ntc_options, time_indices=np.arange(24))
+        drv.run()
+        results.append(drv.results)
+
+    ref = results[0]
+    assert ref.converged.all()
+    for res in results[1:]:
+        assert res.converged.all()
+        assert np.allclose(res.inter_area_flows, ref.inter_area_flows, atol=1e-6)
+        assert abs(res.nodal_balance.sum()) < 1e-6
+
+
+
+def test_ntc_warm_start_basis():
+    """
+    The NTC of consecutive time steps must start HiGHS from the basis of the previous one,
+    reaching the same optimum as the cold start
+    """
+    from VeraGridEngine.Simulations.NTC.ntc_opf import run_linear_ntc_opf
+    from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
+
+    fname = os.path.join('data', 'grids', 'IEEE14 - ntc areas_voltages_hvdc_shifter_l10free.gridcal')
+    grid = gce.open_file(fname)
+
+    info = grid.get_inter_aggregation_info(objects_from=[grid.areas[0]],
+                                           objects_to=[grid.areas[1]])
+
+    warm_start = HighsWarmStart()
+    for t in range(3):
+        cold_vars = run_linear_ntc_opf(grid=grid, t=t, bus_a1_idx=info.idx_bus_from, bus_a2_idx=info.idx_bus_to,
+                                       skip_generation_limits=True, logger=gce.Logger())
+        warm_vars = run_linear_ntc_opf(grid=grid, t=t, bus_a1_idx=info.idx_bus_from, bus_a2_idx=info.idx_bus_to,
+                                       skip_generation_limits=True, logger=gce.Logger(), warm_start=warm_start)
+
+        assert cold_vars.acceptable_solution.all()
+        assert warm_vars.acceptable_solution.all()
+        assert np.allclose(cold_vars.inter_area_flows, warm_vars.inter_area_flows, atol=1e-6)
+
+    assert warm_start.n_warm_started == 2
+
 if __name__ == '__main__':
     # test_issue_372_1()
     # test_issue_372_2()
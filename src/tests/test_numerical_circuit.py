@@ -109,3 +109,125 @@ def test_bus_indexing_remap():
 
         assert np.allclose(F, island.passive_branch_data.F)
         assert np.allclose(T, island.passive_branch_data.T)
+
+
+def test_numerical_circuit_ts():
+    """
+    Check that the whole-horizon compilation produces the same numerical circuits
+    as compiling each time step independently, also when the topology changes in time.
+    :return: Nothing if ok, fails if not
+    """
+    for fname in [os.path.join('data', 'grids', 'IEEE39_1W.gridcal'),
+                  os.path.join('data', 'grids', 'IEEE39_1W_batt.gridcal'),
+                  os.path.join('data', 'grids', 'IEEE39_trafo.gridcal')]:
+        grid = FileOpen(fname).open()
+        time_indices = np.arange(48)
+
+        # disconnect a line during some hours to force several topological groups
+        active = grid.lines[3].active_prof.toarray()
+        active[10:20] = False
+        grid.lines[3].active_prof.set(active)
+
+        nc_ts = compile_numerical_circuit_ts(grid, time_indices=time_indices)
+        assert nc_ts.n_groups == 2
+
+        for t in time_indices:
+            nc = compile_numerical_circuit_at(grid, t_idx=t)
+            ok, logger = nc.compare(nc_ts.nc_at(t))
+            assert ok
+
+
+def test_compilation_cache():
+    """
+    Check that the compilations of an unmodified circuit are reused,
+    and that any modification of the devices, profiles or structure is seen
+    """
+    from VeraGridEngine.DataStructures.compilation_cache import (COMPILATION_CACHE, CompilationCache,
+                                                                 get_content_key)
+    from VeraGridEngine.Compilers.circuit_to_data import build_numerical_circuit_at
+
+    grid = FileOpen(os.path.join('data', 'grids', 'IEEE39_1W.gridcal')).open()
+
+    nc1 = compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    hits = COMPILATION_CACHE.hits
+    nc2 = compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    assert COMPILATION_CACHE.hits == hits + 1
+    assert get_content_key(nc1) == get_content_key(nc2)
+    nc_built = build_numerical_circuit_at(grid, t_idx=None)
+    assert not nc_built.use_cache
+    nc_built.use_cache = True
+    assert get_content_key(nc2) == get_content_key(nc_built)
+
+    # the numerical circuits given are copies
+    nc2.load_data.S[:] = 0.0
+    nc3 = compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    assert np.allclose(nc3.load_data.S, nc1.load_data.S)
+
+    # the modifications of another circuit do not invalidate the compilations of this one
+    other = FileOpen(os.path.join('data', 'grids', 'IEEE39_1W.gridcal')).open()
+    other.loads[0].P += 10.0
+    hits = COMPILATION_CACHE.hits
+    compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    assert COMPILATION_CACHE.hits == hits + 1
+
+    # modify a property
+    grid.loads[0].P += 10.0
+    nc4 = compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    assert np.isclose(nc4.load_data.S[0].real, nc1.load_data.S[0].real + 10.0)
+
+    # modify a profile
+    grid.loads[0].P_prof[3] = 123.0
+    nc5 = compile_numerical_circuit_at(grid, t_idx=3, use_cache=True)
+    assert np.isclose(nc5.load_data.S[0].real, 123.0)
+
+    # modify the structure
+    grid.delete_load(grid.loads[1])
+    nc6 = compile_numerical_circuit_at(grid, t_idx=None, use_cache=True)
+    assert nc6.nload == nc1.nload - 1
+
+    # without the cache, the derived structures are not cached either
+    assert not compile_numerical_circuit_at(grid, t_idx=None).use_cache
+
+    # the linear factors are reused and equal
+    la1 = LinearAnalysis(nc=compile_numerical_circuit_at(grid, t_idx=None, use_cache=True))
+    hits = COMPILATION_CACHE.hits
+    la2 = LinearAnalysis(nc=compile_numerical_circuit_at(grid, t_idx=None, use_cache=True))
+    assert COMPILATION_CACHE.hits == hits + 2  # the compilation and the factors
+    assert np.array_equal(la1.PTDF, la2.PTDF)
+    assert np.array_equal(la1.LODF, la2.LODF)
+    assert la1.PTDF is not la2.PTDF
+
+    # least recently used eviction under the memory cap
+    cache = CompilationCache(max_memory=3 * 800)
+    for i in range(4):
+        cache.set(i, np.zeros(100))  # 800 bytes each
+    assert cache.get(0) is None
+    assert cache.get(1) is not None
+    cache.set(4, np.zeros(100))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.memory == 3 * 800
+
+
+def test_compilation_cache_in_place_edits():
+    """
+    Check that the in-place modifications of the profiles are seen by the compilation:
+    always without the cache, and after touch_model() with the cache
+    """
+    from VeraGridEngine.Devices.model_revision import touch_model
+
+    grid = FileOpen(os.path.join('data', 'grids', 'IEEE39_1W.gridcal')).open()
+    load = grid.loads[0]
+
+    nc1 = compile_numerical_circuit_at(grid, t_idx=0)
+    load.P_prof.toarray()[0] = 9999.0
+    nc2 = compile_numerical_circuit_at(grid, t_idx=0)
+    assert not np.isclose(nc1.load_data.S[0].real, 9999.0)
+    assert np.isclose(nc2.load_data.S[0].real, 9999.0)
+
+    nc3 = compile_numerical_circuit_at(grid, t_idx=0, use_cache=True)
+    assert np.isclose(nc3.load_data.S[0].real, 9999.0)
+    load.P_prof.toarray()[0] = 8888.0
+    touch_model()
+    nc4 = compile_numerical_circuit_at(grid, t_idx=0, use_cache=True)
+    assert np.isclose(nc4.load_data.S[0].real, 8888.0)
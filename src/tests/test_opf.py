@@ -537,3 +537,44 @@ if __name__ == '__main__':
     # test_opf()
     test_opf_generation_shedding()
     test_opf_battery_shedding()
+
+
+def test_opf_ts_rolling_horizon():
+    """
+    The rolling horizon reaches the same optimum solving the daily windows one after the other,
+    with look-ahead, reusing the solver model and in parallel processes
+    (the dispatch of generators with the same cost may differ)
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+    time_indices = main_circuit.get_all_time_indices()[:72]
+
+    # without batteries the days are independent, and they can be solved in parallel
+    for battery in list(main_circuit.batteries):
+        main_circuit.delete_battery(battery)
+
+    costs = list()
+    for matrix_lp_builder, overlap, n_workers in [(False, 0, 1),
+                                                  (True, 0, 1),
+                                                  (True, 3, 1),
+                                                  (True, 0, 2)]:
+        opf_options = OptimalPowerFlowOptions(solver=SolverType.LINEAR_OPF,
+                                              time_grouping=TimeGrouping.Daily,
+                                              mip_solver=MIPSolvers.HIGHS,
+                                              matrix_lp_builder=matrix_lp_builder,
+                                              rolling_horizon_overlap=overlap,
+                                              n_workers=n_workers)
+
+        opf_ts = OptimalPowerFlowTimeSeriesDriver(grid=main_circuit,
+                                                  options=opf_options,
+                                                  time_indices=time_indices)
+        opf_ts.run()
+
+        assert opf_ts.logger.error_count() == 0
+        assert np.all(opf_ts.results.converged)
+        costs.append(opf_ts.results.generator_cost.sum(axis=1)
+                     + opf_ts.results.load_shedding_cost.sum(axis=1)
+                     + opf_ts.results.overloads_cost.sum(axis=1))
+
+    for cost in costs[1:]:
+        assert np.allclose(cost, costs[0], rtol=1e-6)
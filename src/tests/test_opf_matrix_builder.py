@@ -0,0 +1,142 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+
+import os
+import numpy as np
+from VeraGridEngine.api import *
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts import run_linear_opf_ts
+from VeraGridEngine.Simulations.OPF.Formulations.linear_opf_ts_matrix import run_linear_opf_ts_matrix
+
+
+def get_total_cost(opf_vars) -> Vec:
+    """
+    Total cost of each time step
+    :param opf_vars: OpfVars
+    :return: array (nt)
+    """
+    return (opf_vars.gen_vars.cost.sum(axis=1)
+            + opf_vars.load_vars.shedding_cost.sum(axis=1)
+            + opf_vars.branch_vars.overload_cost.sum(axis=1))
+
+
+def test_matrix_builder_matches_scalar_builder():
+    """
+    The matrix builder must reach the same optimum as the scalar builder
+    (the dispatch of generators with the same cost may differ)
+    """
+    cases = [('IEEE39_1W.gridcal', dict()),
+             ('IEEE39_1W_batt.gridcal', dict(unit_commitment=True, ramp_constraints=True)),
+             ('IEEE39_hvdc.gridcal', dict()),
+             ('IEEE39_trafo.gridcal', dict()),
+             ('IEEE39_1W.gridcal', dict(zonal_grouping=ZonalGrouping.All)),
+             ('IEEE39_1W.gridcal', dict(consider_contingencies=True))]
+
+    for fname, kwargs in cases:
+        grid = FileOpen(os.path.join('data', 'grids', fname)).open()
+        time_indices = np.arange(min(grid.get_time_number(), 6))
+
+        scalar_vars = run_linear_opf_ts(grid=grid, time_indices=time_indices, logger=Logger(), **kwargs)
+        matrix_vars = run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger(), **kwargs)
+
+        assert scalar_vars.acceptable_solution
+        assert matrix_vars.acceptable_solution
+        assert np.allclose(get_total_cost(scalar_vars), get_total_cost(matrix_vars), rtol=1e-6)
+        assert np.allclose(scalar_vars.gen_vars.p.sum(axis=1) + scalar_vars.batt_vars.p.sum(axis=1),
+                           matrix_vars.gen_vars.p.sum(axis=1) + matrix_vars.batt_vars.p.sum(axis=1), atol=1e-4)
+        assert np.allclose(scalar_vars.load_vars.shedding, matrix_vars.load_vars.shedding, atol=1e-4)
+        assert np.allclose(scalar_vars.bus_vars.Pbalance, matrix_vars.bus_vars.Pbalance, atol=1e-4)
+
+        # the flows are within the rates (or the overload is paid for)
+        flows = matrix_vars.branch_vars.flows
+        slacks = matrix_vars.branch_vars.flow_slacks_pos + matrix_vars.branch_vars.flow_slacks_neg
+        assert np.all(np.abs(flows) <= matrix_vars.branch_vars.rates + slacks + 1e-4)
+
+
+def test_matrix_builder_driver():
+    """
+    The time series driver runs with the matrix builder
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    grid = FileOpen(fname).open()
+
+    opf_options = OptimalPowerFlowOptions(solver=SolverType.LINEAR_OPF,
+                                          mip_solver=MIPSolvers.HIGHS,
+                                          matrix_lp_builder=True)
+
+    opf_ts = OptimalPowerFlowTimeSeriesDriver(grid=grid,
+                                              options=opf_options,
+                                              time_indices=grid.get_all_time_indices())
+    opf_ts.run()
+
+    assert opf_ts.logger.error_count() == 0
+    assert np.all(opf_ts.results.converged)
+    generation = opf_ts.results.generator_power.sum(axis=1) + opf_ts.results.battery_power.sum(axis=1)
+    assert np.allclose(generation, opf_ts.results.load_power.sum(axis=1), atol=1e-4)
+
+
+def test_matrix_builder_warm_start():
+    """
+    Consecutive windows of the same size reuse the solver model and reach the same optimum as a cold solve
+    """
+    from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
+
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    grid = FileOpen(fname).open()
+
+    warm_start = HighsWarmStart()
+    for start in (0, 24, 48):
+        time_indices = np.arange(start, start + 24)
+        warm_vars = run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger(),
+                                             warm_start=warm_start)
+        cold_vars = run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger())
+
+        assert warm_vars.acceptable_solution
+        assert np.allclose(get_total_cost(warm_vars), get_total_cost(cold_vars), rtol=1e-6)
+
+    assert warm_start.n_reused + warm_start.n_warm_started == 2
+
+
+def test_matrix_builder_lazy_contingencies(tmp_path):
+    """
+    Generating the violated contingency constraints lazily reaches the same optimum
+    as formulating all of them, with a fraction of the constraints
+    """
+    import highspy
+    from VeraGridEngine.Utils.MIP.matrix_model import HighsWarmStart
+
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    grid = FileOpen(fname).open()
+    time_indices = np.arange(12)
+
+    full_vars = run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger(),
+                                         consider_contingencies=True)
+
+    base_fname = str(tmp_path / "base.lp")
+    run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger(),
+                             export_model_fname=base_fname)
+
+    warm_start = HighsWarmStart()
+    lazy_fname = str(tmp_path / "lazy.lp")
+    lazy_vars = run_linear_opf_ts_matrix(grid=grid, time_indices=time_indices, logger=Logger(),
+                                         consider_contingencies=True, lazy_contingencies=True,
+                                         warm_start=warm_start, export_model_fname=lazy_fname)
+
+    assert full_vars.acceptable_solution
+    assert lazy_vars.acceptable_solution
+    assert np.allclose(get_total_cost(full_vars), get_total_cost(lazy_vars), rtol=1e-6)
+
+    # the re-solves appended the violated constraints to the solver model
+    assert warm_start.n_extended > 0
+    assert 0 < len(lazy_vars.branch_vars.contingency_flow_data) < len(full_vars.branch_vars.contingency_flow_data)
+
+    # the exported model has the constraints added by the lazy iterations
+    n_rows = list()
+    for fname in [base_fname, lazy_fname]:
+        h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        h.readModel(fname)
+        n_rows.append(h.getNumRow())
+    assert n_rows[1] > n_rows[0]
+
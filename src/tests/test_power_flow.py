@@ -628,6 +628,26 @@ def test_hvdc_all_methods() -> None:
         assert np.isclose(abs(res.voltage[1]), 1.02222, atol=1e-4)
 
 
+def test_dishonest_newton() -> None:
+    """
+    The Newton-Raphson reusing the Jacobian factorization must converge to the same solution
+    """
+    fname = os.path.join('data', 'grids', 'RAW', 'IEEE 118 Bus v2.raw')
+    main_circuit = FileOpen(fname).open()
+
+    options = PowerFlowOptions(SolverType.NR, control_q=False, retry_with_other_methods=False)
+    pf1 = PowerFlowDriver(main_circuit, options)
+    pf1.run()
+
+    options = PowerFlowOptions(SolverType.NR, control_q=False, retry_with_other_methods=False,
+                               dishonest_newton_iterations=3)
+    pf2 = PowerFlowDriver(main_circuit, options)
+    pf2.run()
+
+    assert pf2.results.converged
+    assert np.allclose(pf1.results.voltage, pf2.results.voltage, atol=1e-5)
+
+
 # def test_reactive_power_splitting():
 #     options = PowerFlowOptions(SolverType.NR,
 #                                verbose=False,
@@ -835,3 +835,115 @@ def test_ptdf_contingencies_powerflow():
 
             ok = np.allclose(cont_analysis_driver1.results.Sf, power_flow.results.Sf)
             assert ok
+
+
+def test_lazy_linear_factors() -> None:
+    """
+    Check that the on-demand PTDF and LODF match the dense ones,
+    and that the contingency factors computed from them are the same
+    """
+    for fname, distributed_slack, correct_values in [
+        (os.path.join('data', 'grids', 'RAW', 'IEEE 118 Bus v2.raw'), True, False),
+        (os.path.join('data', 'grids', 'RAW', 'IEEE 30 bus.raw'), False, True),
+        (os.path.join('data', 'grids', 'IEEE39_1W.gridcal'), False, True),
+    ]:
+        grid = gce.FileOpen(fname).open()
+
+        if len(grid.contingency_groups) == 0:
+            # single and double branch contingencies
+            branches = grid.get_branches()
+            for i in range(0, 20, 3):
+                group = gce.ContingencyGroup(name=f'ctg {i}')
+                grid.add_contingency_group(group)
+                for b in branches[i:i + 1 + i % 2]:
+                    grid.add_contingency(gce.Contingency(device=b, name=b.name, prop=gce.ContingencyOperationTypes.Active,
+                                                         value=0, group=group))
+
+        nc = gce.compile_numerical_circuit_at(grid)
+        dense = LinearAnalysis(nc=nc, distributed_slack=distributed_slack, correct_values=correct_values)
+        lazy = LinearAnalysis(nc=nc, distributed_slack=distributed_slack, correct_values=correct_values,
+                              lazy=True, cache_size=16)
+
+        br_idx = np.array([0, 3, 7, nc.nbr - 1])
+        bus_idx = np.array([1, 2, nc.nbus - 1])
+
+        assert lazy.PTDF.shape == dense.PTDF.shape
+        assert np.allclose(lazy.PTDF[:, bus_idx], dense.PTDF[:, bus_idx], atol=1e-10)
+        assert np.allclose(lazy.PTDF[br_idx, :], dense.PTDF[br_idx, :], atol=1e-10)
+        assert np.allclose(lazy.PTDF[np.ix_(br_idx, bus_idx)], dense.PTDF[np.ix_(br_idx, bus_idx)], atol=1e-10)
+        assert np.isclose(lazy.PTDF[3, 2], dense.PTDF[3, 2], atol=1e-10)
+        assert np.allclose(lazy.LODF[:, br_idx], dense.LODF[:, br_idx], atol=1e-10)
+
+        # the LODF rows are computed without the columns
+        n_cols = len(lazy.LODF._col_cache)
+        assert np.allclose(lazy.LODF[br_idx, :], dense.LODF[br_idx, :], atol=1e-10)
+        assert len(lazy.LODF._col_cache) == n_cols
+
+        assert np.allclose(lazy.LODF[np.ix_(br_idx, br_idx)], dense.LODF[np.ix_(br_idx, br_idx)], atol=1e-10)
+        assert np.allclose(lazy.LODF.toarray(), dense.LODF, atol=1e-10)
+
+        Sbus = nc.get_power_injections_pu()
+        assert np.allclose(lazy.get_flows(Sbus), dense.get_flows(Sbus), atol=1e-10)
+
+        # the cached columns are reused
+        misses = lazy.PTDF.cache_misses
+        lazy.PTDF[:, bus_idx]
+        assert lazy.PTDF.cache_misses == misses
+
+        mctg_dense = gce.LinearMultiContingencies(grid=grid, contingency_groups_used=grid.get_contingency_groups())
+        mctg_dense.compute(lin=dense)
+
+        mctg_lazy = gce.LinearMultiContingencies(grid=grid, contingency_groups_used=grid.get_contingency_groups())
+        mctg_lazy.compute(lin=lazy)
+
+        for mc_dense, mc_lazy in zip(mctg_dense.multi_contingencies, mctg_lazy.multi_contingencies):
+            assert np.allclose(mc_dense.mlodf_factors.toarray(), mc_lazy.mlodf_factors.toarray(), atol=1e-10)
+            assert np.allclose(mc_dense.compensated_ptdf_factors.toarray(),
+                               mc_lazy.compensated_ptdf_factors.toarray(), atol=1e-10)
+
+
+def test_mlodf_batched() -> None:
+    """
+    Check the batched MLODF computation against the direct formula, and the reuse of the cached factors
+    """
+    grid = gce.FileOpen(os.path.join('data', 'grids', 'RAW', 'IEEE 118 Bus v2.raw')).open()
+    branches = grid.get_branches()
+
+    # single, double and triple branch contingencies
+    for i in range(0, 60, 4):
+        group = gce.ContingencyGroup(name=f'ctg {i}')
+        grid.add_contingency_group(group)
+        for b in branches[i:i + 1 + i % 3]:
+            grid.add_contingency(gce.Contingency(device=b, name=b.name, prop=gce.ContingencyOperationTypes.Active,
+                                                 value=0, group=group))
+
+    nc = gce.compile_numerical_circuit_at(grid)
+    lin = LinearAnalysis(nc=nc, distributed_slack=False, correct_values=True)
+
+    mctg = gce.LinearMultiContingencies(grid=grid, contingency_groups_used=grid.get_contingency_groups())
+
+    # a tiny batch size forces one group per batch
+    for batch_size in [1, 10000000]:
+        mctg.compute(lin=lin, lodf_threshold=0.0, batch_size=batch_size)
+
+        for mc in mctg.multi_contingencies:
+            idx = mc.branch_indices
+            M = -lin.LODF[np.ix_(idx, idx)]
+            np.fill_diagonal(M, 1.0)
+            if np.linalg.cond(M) > 1e8:
+                # the contingency splits the grid, the factors are meaningless
+                continue
+            expected = lin.LODF[:, idx] @ np.linalg.inv(M)
+            assert np.allclose(mc.mlodf_factors.toarray(), expected, atol=1e-8)
+
+    key = gce.get_linear_factors_key(nc)
+    mctg.compute(lin=lin, topology_key=key)
+    computed = mctg.multi_contingencies
+
+    mctg.multi_contingencies = list()
+    assert mctg.load_cached(topology_key=key)
+    assert mctg.multi_contingencies[0] is computed[0]
+
+    # another topology is not found
+    nc.passive_branch_data.active[0] = 0
+    assert not mctg.load_cached(topology_key=gce.get_linear_factors_key(nc))
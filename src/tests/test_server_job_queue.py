@@ -0,0 +1,274 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+import os
+import zipfile
+import numpy as np
+import VeraGridEngine.api as gce
+from VeraGridEngine.IO.veragrid.remote import (RemoteInstruction, gather_model_as_jsons_for_communication,
+                                               read_job_results, save_job_results, save_model_payload)
+from VeraGridEngine.IO.veragrid.zip_interface import get_zip_model_hash
+from VeraGridEngine.Simulations.driver_handler import create_driver
+from VeraGridEngine.enumerations import SimulationTypes, JobStatus, TimeGrouping
+from VeraGridServer.job_queue import JobQueue
+from VeraGridServer.distribution import DistributedJob, ChildServer, LocalChildServer, get_time_shards
+
+
+def test_job_queue() -> None:
+    """
+    Check that the jobs submitted to the queue run in the workers, report their state,
+    and write results equal to the ones of running the simulation here
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    grid = gce.open_file(fname)
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    def file_path_func(job_id: str) -> str:
+        return os.path.join("output", f"{job_id}.zip")
+
+    instruction = RemoteInstruction(operation=SimulationTypes.PowerFlow_run)
+    json_data = gather_model_as_jsons_for_communication(circuit=grid, instruction=instruction)
+
+    queue = JobQueue(file_path_func=file_path_func, max_workers=1)
+
+    try:
+        job1 = queue.submit(json_data=json_data)
+        job2 = queue.submit(json_data=json_data)
+
+        # the submission does not wait for the jobs
+        assert len(queue.get_jobs()) == 2
+
+        # the second job has not started: cancelling it removes it from the queue
+        assert queue.cancel(job2.id_tag)
+
+        job1 = queue.wait(job1.id_tag, timeout=300)
+        assert job1.status == JobStatus.Done
+        assert job1.progress_value == 100.0
+
+        job2 = queue.wait(job2.id_tag, timeout=300)
+        assert job2.status == JobStatus.Cancelled
+
+        results = create_driver(grid=grid, driver_tpe=SimulationTypes.PowerFlow_run, time_indices=None).results
+        read_job_results(file_path=file_path_func(job1.id_tag), results=results)
+        pf = gce.power_flow(grid)
+        assert np.allclose(np.abs(results.voltage), np.abs(pf.voltage))
+
+        # deleting a job removes its results
+        assert queue.delete(job1.id_tag)
+        assert not os.path.exists(file_path_func(job1.id_tag))
+        assert queue.get_job(job1.id_tag) is None
+        assert not queue.delete(job1.id_tag)
+
+    finally:
+        queue.shutdown()
+
+
+def test_binary_model_and_results() -> None:
+    """
+    Check that the binary model payload has a stable hash, can be run by the queue,
+    and that the binary results round-trip
+    """
+    grid = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    model_file1 = os.path.join("output", "payload1.veragrid")
+    model_file2 = os.path.join("output", "payload2.veragrid")
+    model_hash1 = save_model_payload(circuit=grid, file_path=model_file1)
+    model_hash2 = save_model_payload(circuit=grid, file_path=model_file2)
+    assert model_hash1 == model_hash2
+
+    # the hash follows the model changes
+    grid.loads[0].P += 1.0
+    model_file3 = os.path.join("output", "payload3.veragrid")
+    assert save_model_payload(circuit=grid, file_path=model_file3) != model_hash1
+    grid.loads[0].P -= 1.0
+
+    # the hash is computed from the members content, not from the fingerprints the file claims
+    model_file4 = os.path.join("output", "payload4.veragrid")
+    with zipfile.ZipFile(model_file1) as f_in, zipfile.ZipFile(model_file4, 'w') as f_out:
+        for name in f_in.namelist():
+            content = f_in.read(name)
+            if name == 'model_data/load.model':
+                content = content.replace(b'Load1@bus 0', b'Load1@bus X')
+            f_out.writestr(name, content)
+    assert get_zip_model_hash(model_file4) != model_hash1
+
+    # run a time series from the payload
+    time_indices = np.arange(0, 24)
+    instruction = RemoteInstruction(operation=SimulationTypes.PowerFlowTimeSeries_run, time_indices=time_indices)
+    json_data = {'name': grid.name,
+                 'instruction': instruction.get_data(),
+                 'model_file': os.path.abspath(model_file1),
+                 'model_hash': model_hash1}
+
+    def file_path_func(job_id: str) -> str:
+        return os.path.join("output", f"{job_id}.zip")
+
+    queue = JobQueue(file_path_func=file_path_func, max_workers=1)
+
+    try:
+        job = queue.submit(json_data=json_data)
+        job = queue.wait(job.id_tag, timeout=600)
+        assert job.status == JobStatus.Done, job.msg
+
+        results = create_driver(grid=grid,
+                                driver_tpe=SimulationTypes.PowerFlowTimeSeries_run,
+                                time_indices=time_indices).results
+        read_job_results(file_path=file_path_func(job.id_tag), results=results)
+        queue.delete(job.id_tag)
+    finally:
+        queue.shutdown()
+
+    ts = gce.PowerFlowTimeSeriesDriver(grid=grid, time_indices=time_indices)
+    ts.run()
+    assert np.allclose(results.voltage, ts.results.voltage)
+    assert np.allclose(results.Sf, ts.results.Sf)
+    assert (results.time_array == ts.results.time_array).all()
+    assert (results.bus_names == ts.results.bus_names).all()
+
+    # the results round-trip exactly
+    results_file = os.path.join("output", "binary_results.zip")
+    save_job_results(results=ts.results, file_path=results_file)
+    results2 = create_driver(grid=grid,
+                             driver_tpe=SimulationTypes.PowerFlowTimeSeries_run,
+                             time_indices=time_indices).results
+    read_job_results(file_path=results_file, results=results2)
+    assert np.array_equal(results2.voltage, ts.results.voltage)
+    assert np.array_equal(results2.Sf, ts.results.Sf)
+
+    for f in [model_file1, model_file2, model_file3, model_file4, results_file]:
+        os.remove(f)
+
+
+class FailingChildServer(ChildServer):
+    """
+    Child server that never accepts a job
+    """
+
+    def submit(self, json_data):
+        raise ConnectionError("server down")
+
+    def get_job(self, job_id):
+        raise ConnectionError("server down")
+
+    def get_results(self, job_id, results):
+        raise ConnectionError("server down")
+
+    def delete(self, job_id):
+        pass
+
+
+def test_time_shards() -> None:
+    """
+    Check that the time shards cover the time indices and respect the time groups
+    """
+    grid = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+    time_indices = grid.get_all_time_indices()
+
+    shards = get_time_shards(time_indices=time_indices, n_shards=4)
+    assert len(shards) == 4
+    assert np.array_equal(np.concatenate(shards), time_indices)
+
+    shards = get_time_shards(time_indices=time_indices, n_shards=5,
+                             time_array=grid.time_profile[time_indices],
+                             time_grouping=TimeGrouping.Daily)
+    assert np.array_equal(np.concatenate(shards), time_indices)
+    for shard in shards[1:]:
+        # every shard starts at the beginning of a day
+        assert grid.time_profile[shard[0]].day != grid.time_profile[shard[0] - 1].day
+
+
+def test_distributed_time_series() -> None:
+    """
+    Check that a time series split among child servers gives the same results as running it here,
+    and that the shards sent to a failing server are sent again to another one
+    """
+    grid = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+    time_indices = np.arange(48)
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    def file_path_func(job_id: str) -> str:
+        return os.path.join("output", f"{job_id}.zip")
+
+    instruction = RemoteInstruction(operation=SimulationTypes.PowerFlowTimeSeries_run, time_indices=time_indices)
+    json_data = gather_model_as_jsons_for_communication(circuit=grid, instruction=instruction)
+
+    queue1 = JobQueue(file_path_func=file_path_func, max_workers=1)
+    queue2 = JobQueue(file_path_func=file_path_func, max_workers=1)
+
+    messages = list()
+    try:
+        job = DistributedJob(json_data=json_data,
+                             servers=[LocalChildServer(queue1, name="child1"),
+                                      FailingChildServer(name="down"),
+                                      LocalChildServer(queue2, name="child2")],
+                             n_shards=3,
+                             max_retries=3,
+                             poll_time=0.2,
+                             text_func=messages.append)
+        results = job.run()
+    finally:
+        queue1.shutdown()
+        queue2.shutdown()
+
+    assert any(msg.startswith("Retrying") for msg in messages)
+
+    driver = gce.PowerFlowTimeSeriesDriver(grid=grid, options=gce.PowerFlowOptions(), time_indices=time_indices)
+    driver.run()
+
+    assert np.allclose(results.voltage, driver.results.voltage)
+    assert np.allclose(results.Sf, driver.results.Sf)
+    assert np.array_equal(results.time_array, driver.results.time_array)
+
+
+def test_distributed_opf_with_storage() -> None:
+    """
+    Check that the OPF time series of a grid with storage gives the same results distributed as running it here:
+    the time steps are coupled by the battery energy, so the job must not be split in independent shards
+    """
+    grid = gce.open_file(os.path.join('data', 'grids', 'IEEE39_1W.gridcal'))
+    grid.add_battery(bus=grid.buses[5], api_obj=gce.Battery(name="battery", Pmin=-50.0, Pmax=50.0,
+                                                            Snom=60.0, Enom=200.0, Cost=0.1))
+    time_indices = np.arange(24)
+
+    if not os.path.exists("output"):
+        os.makedirs("output")
+
+    def file_path_func(job_id: str) -> str:
+        return os.path.join("output", f"{job_id}.zip")
+
+    instruction = RemoteInstruction(operation=SimulationTypes.OPFTimeSeries_run, time_indices=time_indices)
+    json_data = gather_model_as_jsons_for_communication(circuit=grid, instruction=instruction)
+
+    queue1 = JobQueue(file_path_func=file_path_func, max_workers=1)
+    queue2 = JobQueue(file_path_func=file_path_func, max_workers=1)
+
+    messages = list()
+    try:
+        job = DistributedJob(json_data=json_data,
+                             servers=[LocalChildServer(queue1, name="child1"),
+                                      LocalChildServer(queue2, name="child2")],
+                             n_shards=3,
+                             poll_time=0.2,
+                             text_func=messages.append)
+        results = job.run()
+    finally:
+        queue1.shutdown()
+        queue2.shutdown()
+
+    assert "The time steps are coupled, the job is not split" in messages
+
+    driver = gce.OptimalPowerFlowTimeSeriesDriver(grid=grid, options=gce.OptimalPowerFlowOptions(),
+                                                  time_indices=time_indices)
+    driver.run()
+
+    assert np.allclose(results.battery_energy, driver.results.battery_energy)
+    assert np.allclose(results.battery_power, driver.results.battery_power)
+    assert np.allclose(results.generator_power, driver.results.generator_power)
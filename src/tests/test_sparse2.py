@@ -11,6 +11,10 @@ from scipy.sparse import rand
 from scipy.sparse.linalg import spsolve as spsolve_scipy
 from VeraGridEngine.Utils.Sparse.csc2 import (sp_slice, sp_slice_rows, csc_stack_2d_ff, scipy_to_mat, spsolve_csc,
                                               extend, CSC, csc_multiply_ff, csc_add_ff)
+from VeraGridEngine.Utils.Sparse.factorization_cache import SymbolicFactorizationCache
+from VeraGridEngine.Utils.NumericalMethods.sparse_solve import (get_linear_solver, available_sparse_solvers,
+                                                                ReusedAnalysisLinearSolver)
+from VeraGridEngine.enumerations import SparseSolver
 
 
 def get_scipy_random_matrix(m: int | None = None, n: int | None = None) -> csc_matrix:
@@ -132,6 +136,87 @@ def test_spsolve() -> None:
             ok_a = False
 
 
+def test_symbolic_factorization_cache() -> None:
+    """
+    Test that the factorizations reusing the column ordering of a sparsity pattern solve the systems correctly
+    """
+    cache = SymbolicFactorizationCache()
+    m = 300
+    pattern = rand(m, m, density=0.02, format="csc", random_state=1) + csc_matrix(np.eye(m) * 10)
+    pattern.sort_indices()
+
+    for i in range(5):
+        # same pattern, different values
+        matrix = pattern.copy()
+        matrix.data = np.random.rand(matrix.nnz) + (matrix.indices == np.repeat(np.arange(m), np.diff(matrix.indptr))) * 10
+        rhs = np.random.rand(m)
+
+        factor = cache.factorize(n_cols=m, nnz=matrix.nnz, data=matrix.data,
+                                 indices=matrix.indices.astype(np.int32), indptr=matrix.indptr.astype(np.int32))
+
+        assert np.allclose(matrix @ factor.solve(rhs), rhs)
+
+    assert cache.misses == 1
+    assert cache.hits == 4
+    assert len(cache) == 1
+
+
+def test_symbolic_factorization_cache_threads() -> None:
+    """
+    Test that the cache can be shared by several threads factorizing matrices of different patterns
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = SymbolicFactorizationCache(max_size=3)
+    m = 200
+    patterns = list()
+    for seed in range(5):
+        pattern = rand(m, m, density=0.02, format="csc", random_state=seed) + csc_matrix(np.eye(m) * 10)
+        pattern.sort_indices()
+        patterns.append(pattern)
+
+    def solve(i: int) -> bool:
+        matrix = patterns[i % len(patterns)]
+        rhs = np.random.rand(m)
+        factor = cache.factorize(n_cols=m, nnz=matrix.nnz, data=matrix.data,
+                                 indices=matrix.indices.astype(np.int32), indptr=matrix.indptr.astype(np.int32))
+        return np.allclose(matrix @ factor.solve(rhs), rhs)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(solve, range(100)))
+
+    assert cache.hits + cache.misses == 100
+    assert len(cache) <= 3
+
+
+def test_reused_analysis_linear_solver() -> None:
+    """
+    Test that the solvers reusing the symbolic analysis solve the systems correctly,
+    and that each solver keeps its own analysis
+    """
+    m = 300
+    pattern = rand(m, m, density=0.02, format="csc", random_state=2) + csc_matrix(np.eye(m) * 10)
+    pattern.sort_indices()
+    other_pattern = rand(m, m, density=0.03, format="csc", random_state=3) + csc_matrix(np.eye(m) * 10)
+    other_pattern.sort_indices()
+
+    for solver_type in [SparseSolver.SuperLU, SparseSolver.UMFPACK, SparseSolver.KLU]:
+        if solver_type not in available_sparse_solvers:
+            continue
+
+        solver1 = get_linear_solver(solver_type, reuse_analysis=True)
+        solver2 = get_linear_solver(solver_type, reuse_analysis=True)
+        assert isinstance(solver1, ReusedAnalysisLinearSolver)
+
+        for matrix in [pattern, pattern * 2.0, other_pattern, pattern]:
+            rhs = np.random.rand(m)
+            assert np.allclose(matrix @ solver1(matrix, rhs), rhs)
+
+        # the second solver did not get the analysis of the first one
+        if solver1.solver_type == SparseSolver.SuperLU:
+            assert len(solver2._ordering_cache) == 0
+
+
 def test_extend():
     """
     Test the extend function
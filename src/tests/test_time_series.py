@@ -30,5 +30,53 @@ def test_time_series():
     assert np.allclose(np.real(ts.results.Sf), data.values[:96])
 
 
+def test_time_series_topology_groups():
+    """
+    The time series run by topology groups with warm start must match the
+    independent snapshot power flows at every time step
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    # disconnect a line during some hours to have several topology groups
+    active = main_circuit.lines[3].active_prof.toarray()
+    active[10:20] = False
+    main_circuit.lines[3].active_prof.set(active)
+
+    pf_options = PowerFlowOptions(solver_type=SolverType.NR, verbose=0, control_q=True)
+    time_indices = np.arange(0, 48)
+
+    ts = PowerFlowTimeSeriesDriver(grid=main_circuit, options=pf_options, time_indices=time_indices)
+    ts.run()
+
+    for it, t in enumerate(time_indices):
+        res = multi_island_pf(multi_circuit=main_circuit, options=pf_options, t=t)
+        assert np.allclose(ts.results.voltage[it, :], res.voltage, atol=1e-6)
+        assert np.allclose(ts.results.Sf[it, :], res.Sf, atol=1e-4)
+        assert ts.results.converged_values[it]
+
+
+def test_time_series_parallel():
+    """
+    The time series run in a process pool must give the same results as the serial run
+    """
+    fname = os.path.join('data', 'grids', 'IEEE39_1W.gridcal')
+    main_circuit = FileOpen(fname).open()
+
+    pf_options = PowerFlowOptions(solver_type=SolverType.NR, verbose=0, control_q=True)
+    time_indices = np.arange(0, 48)
+
+    ts1 = PowerFlowTimeSeriesDriver(grid=main_circuit, options=pf_options, time_indices=time_indices)
+    ts1.run()
+
+    ts2 = PowerFlowTimeSeriesDriver(grid=main_circuit, options=pf_options, time_indices=time_indices, n_workers=2)
+    ts2.run()
+
+    assert np.allclose(ts1.results.voltage, ts2.results.voltage)
+    assert np.allclose(ts1.results.Sf, ts2.results.Sf)
+    assert np.allclose(ts1.results.loading, ts2.results.loading)
+    assert np.all(ts2.results.converged_values)
+
+
 if __name__ == '__main__':
     test_time_series()